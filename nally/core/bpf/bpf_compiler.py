@@ -0,0 +1,636 @@
+import itertools
+import re
+import socket
+from typing import List, NamedTuple, Optional, Tuple
+
+from nally.core.bpf.bpf_program import BpfProgram as Bpf
+
+
+class _Test(NamedTuple):
+    """
+    Executes 'loads' and jumps depending on the comparison of
+    the accumulator with 'k'. Empty 'loads' reuse the accumulator
+    of the previous test
+    """
+    loads: tuple
+    jump: int
+    k: int
+
+
+class _And(NamedTuple):
+    operands: tuple
+
+
+class _Or(NamedTuple):
+    operands: tuple
+
+
+class _Not(NamedTuple):
+    operand: NamedTuple
+
+
+def _ld(size: int, offset: int) -> tuple:
+    return Bpf.LD | size | Bpf.ABS, 0, 0, offset
+
+
+def _ld_transport(size: int, offset: int) -> tuple:
+    """
+    Loads the field of the header which follows the IPv4 header
+    """
+    return (
+        (Bpf.LDX | Bpf.B | Bpf.MSH, 0, 0, BpfCompiler.IP_OFFSET),
+        (Bpf.LD | size | Bpf.IND, 0, 0, BpfCompiler.IP_OFFSET + offset)
+    )
+
+
+def _or(*operands):
+    return operands[0] if len(operands) == 1 else _Or(operands)
+
+
+class BpfCompiler:
+    """
+    Compiles filter expressions in the subset of the tcpdump syntax
+    ('man pcap-filter') to classic BPF programs, see BpfProgram.
+    Supported primitives:
+        * [ether|ip|arp] [src|dst] host ADDRESS
+        * ether [src|dst] host MAC
+        * [ip|arp] [src|dst] net NETWORK[/LENGTH], net NETWORK mask MASK
+        * [tcp|udp] [src|dst] port PORT, portrange PORT-PORT
+        * ether, ip, arp, tcp, udp, icmp
+        * ether proto PROTOCOL, [ip] proto PROTOCOL
+        * PROTOCOL[OFFSET[:SIZE]] [& MASK] RELOP VALUE, e.g.
+          'tcp[tcpflags] & (tcp-syn|tcp-ack) == tcp-syn'
+        * len RELOP VALUE, greater LENGTH, less LENGTH
+    which are combined with 'and' ('&&'), 'or' ('||'), 'not' ('!') and
+    parentheses. The same as in tcpdump, 'and' and 'or' have the same
+    precedence and associate left to right. Only IPv4 is supported,
+    addresses and ports should be numeric (or service names).
+
+    Usage:
+        program = BpfCompiler.compile("tcp dst port 80 and not net 10/8")
+    """
+
+    DEFAULT_SNAPLEN = 262144
+    """Number of bytes of the accepted packets returned by the program"""
+
+    IP_OFFSET = 14
+    """Offset of the network layer header in the Ethernet frame"""
+
+    ETHER_TYPES = {"ip": 0x0800, "arp": 0x0806}
+    IP_PROTOCOLS = {"icmp": 1, "tcp": 6, "udp": 17}
+    PROTOCOLS = ("ether", "ip", "arp", "tcp", "udp", "icmp")
+    DIRECTIONS = ("src", "dst")
+    TYPES = ("host", "net", "port", "portrange", "proto")
+
+    ADDRESS_OFFSETS = {
+        # protocol: (offset of the source, offset of the destination)
+        "ether": (6, 0),
+        "ip": (IP_OFFSET + 12, IP_OFFSET + 16),
+        "arp": (IP_OFFSET + 14, IP_OFFSET + 24)
+    }
+
+    NAMED_OFFSETS = {"tcpflags": 13, "icmptype": 0, "icmpcode": 1}
+    NAMED_VALUES = {
+        "tcp-fin": 0x01, "tcp-syn": 0x02, "tcp-rst": 0x04, "tcp-push": 0x08,
+        "tcp-ack": 0x10, "tcp-urg": 0x20, "tcp-ece": 0x40, "tcp-cwr": 0x80,
+        "icmp-echoreply": 0, "icmp-unreach": 3, "icmp-sourcequench": 4,
+        "icmp-redirect": 5, "icmp-echo": 8, "icmp-routeradvert": 9,
+        "icmp-routersolicit": 10, "icmp-timxceed": 11,
+        "icmp-paramprob": 12, "icmp-tstamp": 13, "icmp-tstampreply": 14,
+        "icmp-ireq": 15, "icmp-ireqreply": 16, "icmp-maskreq": 17,
+        "icmp-maskreply": 18
+    }
+
+    RELATIONS = {
+        # operator: (jump, negate)
+        "==": (Bpf.JEQ, False),
+        "=": (Bpf.JEQ, False),
+        "!=": (Bpf.JEQ, True),
+        ">": (Bpf.JGT, False),
+        ">=": (Bpf.JGE, False),
+        "<": (Bpf.JGE, True),
+        "<=": (Bpf.JGT, True)
+    }
+
+    TOKEN = re.compile(
+        r"\s*(?:"
+        r"(?P<mac>[0-9a-fA-F]{1,2}(?::[0-9a-fA-F]{1,2}){5})(?![\w:])"
+        r"|(?P<operator>&&|\|\||!=|==|<=|>=|[()\[\]:&|!<>=])"
+        r"|(?P<word>[\w.\-/\\]+)"
+        r")"
+    )
+
+    @staticmethod
+    def compile(expression: str, snaplen: int = DEFAULT_SNAPLEN) \
+            -> Bpf:
+        """
+        Compiles the filter expression
+
+        :param expression: filter in tcpdump syntax, empty expression
+            accepts all packets
+        :param snaplen: number of bytes of the accepted packets
+        :return: compiled program
+        """
+        if snaplen <= 0:
+            raise ValueError(f"Snaplen should be positive, got {snaplen}")
+        tokens = BpfCompiler.__tokenize(expression)
+        if not tokens:
+            return Bpf([(Bpf.RET | Bpf.K, 0, 0, snaplen)])
+        parser = _Parser(tokens)
+        node = parser.parse()
+        return Bpf(BpfCompiler.__generate(node, snaplen))
+
+    @staticmethod
+    def __tokenize(expression: str) -> List[str]:
+        tokens = []
+        position = 0
+        expression = expression.strip()
+        while position < len(expression):
+            match = BpfCompiler.TOKEN.match(expression, position)
+            if match is None or match.end() == position:
+                raise ValueError(f"Invalid filter '{expression}': "
+                                 f"unexpected character at {position}")
+            tokens.append(match.group(match.lastgroup))
+            position = match.end()
+        return tokens
+
+    @staticmethod
+    def __generate(node, snaplen: int) -> List[Tuple[int, int, int, int]]:
+        """
+        Generates instructions of the expression tree, each test jumps
+        to the label of its 'true' or 'false' outcome, labels are
+        resolved to the relative offsets when all code is generated
+        """
+        labels = itertools.count()
+        code = []
+
+        def emit(node, if_true: int, if_false: int):
+            if isinstance(node, _Test):
+                code.extend(node.loads)
+                code.append((Bpf.JMP | node.jump | Bpf.K,
+                             if_true, if_false, node.k))
+            elif isinstance(node, _Not):
+                emit(node.operand, if_false, if_true)
+            else:
+                conjunction = isinstance(node, _And)
+                for operand in node.operands[:-1]:
+                    next_operand = next(labels)
+                    if conjunction:
+                        emit(operand, next_operand, if_false)
+                    else:
+                        emit(operand, if_true, next_operand)
+                    code.append(next_operand)
+                emit(node.operands[-1], if_true, if_false)
+
+        accept = next(labels)
+        reject = next(labels)
+        emit(node, accept, reject)
+        code += [accept, (Bpf.RET | Bpf.K, 0, 0, snaplen),
+                 reject, (Bpf.RET | Bpf.K, 0, 0, 0)]
+
+        positions = {}
+        instructions = []
+        for item in code:
+            if isinstance(item, int):
+                positions[item] = len(instructions)
+            else:
+                instructions.append(item)
+        resolved = []
+        for position, (op, jt, jf, k) in enumerate(instructions):
+            if op & 0x07 == Bpf.JMP:
+                jt = positions[jt] - position - 1
+                jf = positions[jf] - position - 1
+                if jt > 0xff or jf > 0xff:
+                    raise ValueError("Filter is too complex, jump offset "
+                                     "exceeds 255 instructions")
+            resolved.append((op, jt, jf, k))
+        return resolved
+
+    @staticmethod
+    def _ether_type(ether_type: int) -> _Test:
+        return _Test((_ld(Bpf.H, 12),), Bpf.JEQ, ether_type)
+
+    @staticmethod
+    def _ip_protocol(protocol: int):
+        return _And((
+            BpfCompiler._ether_type(BpfCompiler.ETHER_TYPES["ip"]),
+            _Test((_ld(Bpf.B, BpfCompiler.IP_OFFSET + 9),), Bpf.JEQ, protocol)
+        ))
+
+    @staticmethod
+    def _transport(protocol: str):
+        """
+        Checks that the packet has the header of the transport protocol,
+        i.e. it's the first (or the only) fragment of the IPv4 packet
+        """
+        return _And((
+            BpfCompiler._ip_protocol(BpfCompiler.IP_PROTOCOLS[protocol]),
+            _Not(_Test(
+                (_ld(Bpf.H, BpfCompiler.IP_OFFSET + 6),),
+                Bpf.JSET,
+                0x1fff
+            ))
+        ))
+
+    @staticmethod
+    def _protocol(protocol: str):
+        if protocol in BpfCompiler.ETHER_TYPES:
+            return BpfCompiler._ether_type(BpfCompiler.ETHER_TYPES[protocol])
+        if protocol in BpfCompiler.IP_PROTOCOLS:
+            return BpfCompiler._ip_protocol(BpfCompiler.IP_PROTOCOLS[protocol])
+        raise ValueError(f"'{protocol}' should be followed by a primitive")
+
+    @staticmethod
+    def _address(
+            protocol: Optional[str],
+            direction: Optional[str],
+            value: int,
+            mask: int
+    ):
+        """
+        Compares IPv4 source and/or destination address of IP and ARP
+        packets with the network
+        """
+        if protocol not in (None, "ip", "arp"):
+            raise ValueError(f"'{protocol}' can't be applied to host/net")
+        loads_mask = (
+            ((Bpf.ALU | Bpf.AND | Bpf.K, 0, 0, mask),)
+            if mask != 0xffffffff
+            else ()
+        )
+        alternatives = []
+        for name in (protocol,) if protocol else ("ip", "arp"):
+            offsets = BpfCompiler.__directed(
+                direction,
+                BpfCompiler.ADDRESS_OFFSETS[name]
+            )
+            alternatives.append(_And((
+                BpfCompiler._ether_type(BpfCompiler.ETHER_TYPES[name]),
+                _or(*[
+                    _Test((_ld(Bpf.W, offset),) + loads_mask, Bpf.JEQ, value)
+                    for offset in offsets
+                ])
+            )))
+        return _or(*alternatives)
+
+    @staticmethod
+    def _ether_address(direction: Optional[str], address: bytes):
+        high = int.from_bytes(address[:2], "big")
+        low = int.from_bytes(address[2:], "big")
+        return _or(*[
+            _And((
+                _Test((_ld(Bpf.W, offset + 2),), Bpf.JEQ, low),
+                _Test((_ld(Bpf.H, offset),), Bpf.JEQ, high)
+            ))
+            for offset in BpfCompiler.__directed(
+                direction,
+                BpfCompiler.ADDRESS_OFFSETS["ether"]
+            )
+        ])
+
+    @staticmethod
+    def _port(
+            protocol: Optional[str],
+            direction: Optional[str],
+            first: int,
+            last: int
+    ):
+        if protocol not in (None, "tcp", "udp"):
+            raise ValueError(f"'{protocol}' can't be applied to port")
+        if first == last:
+            tests = [
+                _Test(_ld_transport(Bpf.H, offset), Bpf.JEQ, first)
+                for offset in BpfCompiler.__directed(direction, (0, 2))
+            ]
+        else:
+            tests = [
+                _And((
+                    _Test(_ld_transport(Bpf.H, offset), Bpf.JGE, first),
+                    _Not(_Test((), Bpf.JGT, last))
+                ))
+                for offset in BpfCompiler.__directed(direction, (0, 2))
+            ]
+        return _or(*[
+            _And((BpfCompiler._transport(name), _or(*tests)))
+            for name in ((protocol,) if protocol else ("tcp", "udp"))
+        ])
+
+    @staticmethod
+    def _relation(
+            protocol: Optional[str],
+            offset: int,
+            size: int,
+            operations: List[Tuple[str, int]],
+            relation: str,
+            value: int
+    ):
+        """
+        Compares the field of the protocol header, or the packet length
+        if protocol is None, with the value
+        """
+        load_size = {1: Bpf.B, 2: Bpf.H, 4: Bpf.W}.get(size)
+        if load_size is None:
+            raise ValueError(f"Field size should be 1, 2 or 4, got {size}")
+        if protocol is None:
+            loads = ((Bpf.LD | Bpf.W | Bpf.LEN, 0, 0, 0),)
+            condition = None
+        elif protocol == "ether":
+            loads = (_ld(load_size, offset),)
+            condition = None
+        elif protocol in BpfCompiler.ETHER_TYPES:
+            loads = (_ld(load_size, BpfCompiler.IP_OFFSET + offset),)
+            condition = BpfCompiler._protocol(protocol)
+        else:
+            loads = _ld_transport(load_size, offset)
+            condition = BpfCompiler._transport(protocol)
+        jump, negate = BpfCompiler.RELATIONS[relation]
+        if len(operations) == 1 and operations[0][0] == "&" and value == 0 \
+                and jump == Bpf.JEQ:
+            # 'field & mask != 0' is checked by the single instruction
+            test = _Test(loads, Bpf.JSET, operations[0][1])
+            negate = not negate
+        else:
+            alu = {"&": Bpf.AND, "|": Bpf.OR}
+            test = _Test(
+                loads + tuple(
+                    (Bpf.ALU | alu[operator] | Bpf.K, 0, 0, operand)
+                    for operator, operand in operations
+                ),
+                jump,
+                value
+            )
+        if negate:
+            test = _Not(test)
+        return test if condition is None else _And((condition, test))
+
+    @staticmethod
+    def __directed(direction: Optional[str], offsets: Tuple[int, int]) \
+            -> Tuple[int, ...]:
+        """
+        Returns offsets of the source and/or destination field
+        """
+        if direction is None:
+            return offsets
+        return (offsets[BpfCompiler.DIRECTIONS.index(direction)],)
+
+
+class _Parser:
+    """
+    Recursive descent parser of the filter expression, builds the tree
+    of tests, see BpfCompiler
+    """
+
+    def __init__(self, tokens: List[str]):
+        self.__tokens = tokens
+        self.__position = 0
+
+    def parse(self):
+        node = self.__expression()
+        if self.__peek() is not None:
+            self.__error(f"unexpected '{self.__peek()}'")
+        return node
+
+    def __expression(self):
+        node = self.__negation()
+        while self.__peek() in ("and", "&&", "or", "||"):
+            combine = _And if self.__next() in ("and", "&&") else _Or
+            operand = self.__negation()
+            if isinstance(node, combine):
+                node = combine(node.operands + (operand,))
+            else:
+                node = combine((node, operand))
+        return node
+
+    def __negation(self):
+        if self.__peek() in ("not", "!"):
+            self.__next()
+            return _Not(self.__negation())
+        if self.__peek() == "(":
+            self.__next()
+            node = self.__expression()
+            self.__expect(")")
+            return node
+        return self.__primitive()
+
+    def __primitive(self):
+        token = self.__peek()
+        if token == "len" or token in BpfCompiler.PROTOCOLS \
+                and self.__peek(1) == "[":
+            return self.__relation()
+        if token in ("greater", "less"):
+            self.__next()
+            return BpfCompiler._relation(
+                None, 0, 4, [],
+                ">=" if token == "greater" else "<=",
+                self.__number(self.__next())
+            )
+        protocol = self.__take(BpfCompiler.PROTOCOLS)
+        direction = self.__take(BpfCompiler.DIRECTIONS)
+        kind = self.__take(BpfCompiler.TYPES)
+        if kind is None and direction is None:
+            if protocol is not None:
+                return BpfCompiler._protocol(protocol)
+            if token is None or not token[0].isdigit():
+                self.__error(f"unknown primitive '{token}'")
+        value = self.__next()
+        if kind in (None, "host"):
+            if protocol == "ether":
+                return BpfCompiler._ether_address(
+                    direction,
+                    self.__mac_address(value)
+                )
+            return BpfCompiler._address(
+                protocol,
+                direction,
+                self.__ip_address(value),
+                0xffffffff
+            )
+        if protocol == "ether" and kind != "proto":
+            self.__error(f"'ether' can't be applied to {kind}")
+        if kind == "net":
+            return BpfCompiler._address(
+                protocol,
+                direction,
+                *self.__network(value)
+            )
+        if kind in ("port", "portrange"):
+            first, _, last = value.partition("-") \
+                if kind == "portrange" else (value, None, value)
+            return BpfCompiler._port(
+                protocol,
+                direction,
+                self.__port(first, protocol),
+                self.__port(last, protocol)
+            )
+        # proto
+        if direction is not None:
+            self.__error("direction can't be applied to proto")
+        value = value.lstrip("\\")
+        if protocol == "ether":
+            ether_type = BpfCompiler.ETHER_TYPES.get(value)
+            return BpfCompiler._ether_type(
+                ether_type
+                if ether_type is not None
+                else self.__number(value, 0xffff)
+            )
+        if protocol not in (None, "ip"):
+            self.__error(f"'{protocol}' can't be applied to proto")
+        ip_protocol = BpfCompiler.IP_PROTOCOLS.get(value)
+        return BpfCompiler._ip_protocol(
+            ip_protocol
+            if ip_protocol is not None
+            else self.__number(value, 0xff)
+        )
+
+    def __relation(self):
+        protocol = self.__next()
+        offset = 0
+        size = 4
+        if protocol == "len":
+            protocol = None
+        else:
+            self.__expect("[")
+            index = self.__next()
+            offset = BpfCompiler.NAMED_OFFSETS.get(index)
+            if offset is None:
+                offset = self.__number(index)
+            size = 1
+            if self.__peek() == ":":
+                self.__next()
+                size = self.__number(self.__next())
+            self.__expect("]")
+        operations = []
+        while self.__peek() in ("&", "|"):
+            operations.append((self.__next(), self.__value_atom()))
+        relation = self.__next()
+        if relation not in BpfCompiler.RELATIONS:
+            self.__error(f"relational operator expected, got '{relation}'")
+        return BpfCompiler._relation(
+            protocol,
+            offset,
+            size,
+            operations,
+            relation,
+            self.__value()
+        )
+
+    def __value(self) -> int:
+        value = self.__value_conjunction()
+        while self.__peek() == "|":
+            self.__next()
+            value |= self.__value_conjunction()
+        return value
+
+    def __value_conjunction(self) -> int:
+        value = self.__value_atom()
+        while self.__peek() == "&":
+            self.__next()
+            value &= self.__value_atom()
+        return value
+
+    def __value_atom(self) -> int:
+        token = self.__next()
+        if token == "(":
+            value = self.__value()
+            self.__expect(")")
+            return value
+        value = BpfCompiler.NAMED_VALUES.get(token)
+        return value if value is not None else self.__number(token)
+
+    def __number(self, token: str, max_value: int = 0xffffffff) -> int:
+        try:
+            if token.lower().startswith("0x"):
+                value = int(token, 16)
+            elif token.startswith("0") and len(token) > 1:
+                value = int(token, 8)
+            else:
+                value = int(token, 10)
+        except (AttributeError, ValueError):
+            self.__error(f"number expected, got '{token}'")
+        if not 0 <= value <= max_value:
+            self.__error(f"{value} is out of range")
+        return value
+
+    def __port(self, token: str, protocol: Optional[str]) -> int:
+        if token and token.isdigit():
+            return self.__number(token, 0xffff)
+        try:
+            return socket.getservbyname(token, protocol or "tcp")
+        except (OSError, TypeError):
+            self.__error(f"unknown port '{token}'")
+
+    def __ip_address(self, token: str) -> int:
+        try:
+            return int.from_bytes(
+                socket.inet_pton(socket.AF_INET, token),
+                "big"
+            )
+        except (OSError, TypeError):
+            self.__error(f"invalid IPv4 address '{token}'")
+
+    def __mac_address(self, token: str) -> bytes:
+        try:
+            address = bytes(int(octet, 16) for octet in token.split(":"))
+        except (AttributeError, ValueError):
+            address = b""
+        if len(address) != 6:
+            self.__error(f"invalid MAC address '{token}'")
+        return address
+
+    def __network(self, token: str) -> Tuple[int, int]:
+        """
+        Returns address and mask of the network, which is specified as
+        'address/length', 'address mask mask' or the address with omitted
+        trailing zero octets, e.g. '10.1' for 10.1.0.0/16
+        """
+        address, _, length = (token or "").partition("/")
+        octets = address.split(".")
+        if not 1 <= len(octets) <= 4 or not all(
+                o.isdigit() and int(o) <= 0xff for o in octets
+        ):
+            self.__error(f"invalid network '{token}'")
+        value = int.from_bytes(
+            bytes(int(o) for o in octets + ["0"] * (4 - len(octets))),
+            "big"
+        )
+        if length:
+            mask = (0xffffffff << (32 - self.__number(length, 32))) \
+                & 0xffffffff
+        elif self.__peek() == "mask":
+            self.__next()
+            mask = self.__ip_address(self.__next())
+        else:
+            mask = (0xffffffff << (32 - 8 * len(octets))) & 0xffffffff
+        if value & ~mask & 0xffffffff:
+            self.__error(f"non-network bits set in '{token}'")
+        return value, mask
+
+    def __peek(self, ahead: int = 0) -> Optional[str]:
+        position = self.__position + ahead
+        return self.__tokens[position] \
+            if position < len(self.__tokens) \
+            else None
+
+    def __next(self) -> Optional[str]:
+        token = self.__peek()
+        if token is None:
+            self.__error("unexpected end of expression")
+        self.__position += 1
+        return token
+
+    def __take(self, expected: tuple) -> Optional[str]:
+        """
+        Consumes the next token if it's one of the expected
+        """
+        if self.__peek() in expected:
+            return self.__next()
+        return None
+
+    def __expect(self, expected: str):
+        token = self.__next()
+        if token != expected:
+            self.__error(f"'{expected}' expected, got '{token}'")
+
+    def __error(self, message: str):
+        raise ValueError(f"Invalid filter '{' '.join(self.__tokens)}': "
+                         f"{message}")
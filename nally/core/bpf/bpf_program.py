@@ -0,0 +1,308 @@
+import struct
+from typing import Iterable, List, Optional, Tuple
+
+# kinds of the decoded instructions, see 'BpfProgram.filter'
+_CONDITIONAL_JUMP = 0
+_LOAD_ABSOLUTE = 1
+_LOAD_INDIRECT = 2
+_RETURN = 3
+_LOAD_HEADER_LENGTH = 4
+_ALU = 5
+_JUMP = 6
+_LOAD = 7
+_LOAD_INDEX = 8
+_STORE = 9
+_MISC = 10
+
+
+class BpfProgram:
+    """
+    Classic BPF program, i.e. list of (code, jt, jf, k) instructions which
+    can be attached to the socket using SO_ATTACH_FILTER or executed in
+    user space by 'filter', e.g. to filter frames read from capture file.
+    Program is validated the same way as the kernel does, so the program
+    accepted by the constructor is accepted by the kernel as well
+    """
+
+    # linux/bpf_common.h: instruction classes
+    LD = 0x00
+    LDX = 0x01
+    ST = 0x02
+    STX = 0x03
+    ALU = 0x04
+    JMP = 0x05
+    RET = 0x06
+    MISC = 0x07
+
+    # load size
+    W = 0x00
+    H = 0x08
+    B = 0x10
+
+    # load mode
+    IMM = 0x00
+    ABS = 0x20
+    IND = 0x40
+    MEM = 0x60
+    LEN = 0x80
+    MSH = 0xa0
+
+    # ALU operations
+    ADD = 0x00
+    SUB = 0x10
+    MUL = 0x20
+    DIV = 0x30
+    OR = 0x40
+    AND = 0x50
+    LSH = 0x60
+    RSH = 0x70
+    NEG = 0x80
+    MOD = 0x90
+    XOR = 0xa0
+
+    # jump operations
+    JA = 0x00
+    JEQ = 0x10
+    JGT = 0x20
+    JGE = 0x30
+    JSET = 0x40
+
+    # operand source
+    K = 0x00
+    X = 0x08
+    A = 0x10
+    """Return value source, i.e. 'ret a'"""
+
+    # miscellaneous operations
+    TAX = 0x00
+    TXA = 0x80
+
+    MAX_INSTRUCTIONS = 4096
+    """Max length of the program accepted by the kernel (BPF_MAXINSNS)"""
+    MEMORY_WORDS = 16
+    """Number of the scratch memory slots (BPF_MEMWORDS)"""
+
+    LOAD_FORMATS = {
+        W: struct.Struct("!I"),
+        H: struct.Struct("!H"),
+        B: struct.Struct("!B")
+    }
+
+    VALID_CODES = frozenset((
+        LD | W | ABS, LD | H | ABS, LD | B | ABS,
+        LD | W | IND, LD | H | IND, LD | B | IND,
+        LD | W | IMM, LD | W | MEM, LD | W | LEN,
+        LDX | W | IMM, LDX | W | MEM, LDX | W | LEN, LDX | B | MSH,
+        ST, STX,
+        ALU | ADD | K, ALU | SUB | K, ALU | MUL | K, ALU | DIV | K,
+        ALU | OR | K, ALU | AND | K, ALU | LSH | K, ALU | RSH | K,
+        ALU | MOD | K, ALU | XOR | K,
+        ALU | ADD | X, ALU | SUB | X, ALU | MUL | X, ALU | DIV | X,
+        ALU | OR | X, ALU | AND | X, ALU | LSH | X, ALU | RSH | X,
+        ALU | MOD | X, ALU | XOR | X, ALU | NEG,
+        JMP | JA,
+        JMP | JEQ | K, JMP | JGT | K, JMP | JGE | K, JMP | JSET | K,
+        JMP | JEQ | X, JMP | JGT | X, JMP | JGE | X, JMP | JSET | X,
+        RET | K, RET | A,
+        MISC | TAX, MISC | TXA
+    ))
+
+    def __init__(self, instructions: Iterable[Tuple[int, int, int, int]]):
+        """
+        :param instructions: list of (code, jt, jf, k) tuples
+        """
+        self.__instructions = [
+            (code, jt, jf, k & 0xffffffff)
+            for code, jt, jf, k in instructions
+        ]
+        self.__validate()
+        self.__decoded = self.__decode()
+
+    @property
+    def instructions(self) -> List[Tuple[int, int, int, int]]:
+        return list(self.__instructions)
+
+    def __len__(self) -> int:
+        return len(self.__instructions)
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, BpfProgram) \
+            and self.__instructions == other.__instructions
+
+    def __str__(self) -> str:
+        return "\n".join(
+            f"({code:#06x}, {jt}, {jf}, {k:#010x})"
+            for code, jt, jf, k in self.__instructions
+        )
+
+    def filter(self, packet: bytes) -> int:
+        """
+        Executes the program against the packet
+
+        :param packet: raw frame, bytes-like object
+        :return: number of bytes of the packet accepted by the program,
+            0 if packet is rejected
+        """
+        # opcodes are decoded once, so the loop only dispatches
+        # on the small integers, ordered by frequency in filters
+        program = self.__decoded
+        length = len(packet)
+        a = x = 0
+        memory = None
+        pc = 0
+        while True:
+            kind, argument, jt, jf, k = program[pc]
+            pc += 1
+            if kind == _CONDITIONAL_JUMP:
+                operand = x if argument & 0x08 else k
+                op = argument & 0xf0
+                if op == 0x10:
+                    taken = a == operand
+                elif op == 0x40:
+                    taken = a & operand
+                elif op == 0x20:
+                    taken = a > operand
+                else:
+                    taken = a >= operand
+                pc += jt if taken else jf
+            elif kind == _LOAD_ABSOLUTE:
+                if k + argument.size > length:
+                    return 0
+                a = argument.unpack_from(packet, k)[0]
+            elif kind == _LOAD_INDIRECT:
+                offset = x + k
+                if offset + argument.size > length:
+                    return 0
+                a = argument.unpack_from(packet, offset)[0]
+            elif kind == _RETURN:
+                return min(a if argument else k, length)
+            elif kind == _LOAD_HEADER_LENGTH:
+                if k >= length:
+                    return 0
+                x = (packet[k] & 0x0f) << 2
+            elif kind == _ALU:
+                a = self.__alu(argument, a, x if argument & 0x08 else k)
+                if a is None:
+                    return 0
+            elif kind == _JUMP:
+                pc += k
+            elif kind == _LOAD:
+                if argument == 0x80:
+                    a = length
+                elif argument == 0x60:
+                    a = memory[k] if memory is not None else 0
+                else:
+                    a = k
+            elif kind == _LOAD_INDEX:
+                if argument == 0x80:
+                    x = length
+                elif argument == 0x60:
+                    x = memory[k] if memory is not None else 0
+                else:
+                    x = k
+            elif kind == _STORE:
+                if memory is None:
+                    memory = [0] * self.MEMORY_WORDS
+                memory[k] = x if argument else a
+            elif argument:
+                a = x
+            else:
+                x = a
+
+    @staticmethod
+    def __alu(op: int, a: int, operand: int) -> Optional[int]:
+        """
+        Returns result of ALU operation, None on division by zero
+        """
+        op &= 0xf0
+        if op == BpfProgram.AND:
+            return a & operand
+        if op == BpfProgram.ADD:
+            return (a + operand) & 0xffffffff
+        if op == BpfProgram.SUB:
+            return (a - operand) & 0xffffffff
+        if op == BpfProgram.MUL:
+            return (a * operand) & 0xffffffff
+        if op == BpfProgram.DIV or op == BpfProgram.MOD:
+            if operand == 0:
+                return None
+            return a // operand if op == BpfProgram.DIV else a % operand
+        if op == BpfProgram.OR:
+            return a | operand
+        if op == BpfProgram.XOR:
+            return a ^ operand
+        if op == BpfProgram.LSH:
+            return (a << operand) & 0xffffffff if operand < 32 else 0
+        if op == BpfProgram.RSH:
+            return a >> operand if operand < 32 else 0
+        return -a & 0xffffffff
+
+    def __decode(self) -> list:
+        """
+        Returns program as list of (kind, argument, jt, jf, k) tuples,
+        where kind is the handler of the instruction in 'filter'
+        """
+        decoded = []
+        for code, jt, jf, k in self.__instructions:
+            cls = code & 0x07
+            mode = code & 0xe0
+            if cls == self.JMP:
+                if code & 0xf0 == self.JA:
+                    decoded.append((_JUMP, None, 0, 0, k))
+                else:
+                    decoded.append((_CONDITIONAL_JUMP, code, jt, jf, k))
+            elif cls == self.LD and mode in (self.ABS, self.IND):
+                decoded.append((
+                    _LOAD_ABSOLUTE if mode == self.ABS else _LOAD_INDIRECT,
+                    self.LOAD_FORMATS[code & 0x18],
+                    0,
+                    0,
+                    k
+                ))
+            elif cls == self.LD:
+                decoded.append((_LOAD, mode, 0, 0, k))
+            elif cls == self.LDX and mode == self.MSH:
+                decoded.append((_LOAD_HEADER_LENGTH, None, 0, 0, k))
+            elif cls == self.LDX:
+                decoded.append((_LOAD_INDEX, mode, 0, 0, k))
+            elif cls == self.RET:
+                decoded.append((_RETURN, code & self.A, 0, 0, k))
+            elif cls == self.ALU:
+                decoded.append((_ALU, code, 0, 0, k))
+            elif cls in (self.ST, self.STX):
+                decoded.append((_STORE, cls == self.STX, 0, 0, k))
+            else:
+                decoded.append((_MISC, code & 0xf8 == self.TXA, 0, 0, k))
+        return decoded
+
+    def __validate(self):
+        """
+        Checks the program the same way as the kernel does
+        ('bpf_check_classic')
+        """
+        program = self.__instructions
+        if not 0 < len(program) <= self.MAX_INSTRUCTIONS:
+            raise ValueError(f"Program should have from 1 to "
+                             f"{self.MAX_INSTRUCTIONS} instructions, "
+                             f"got {len(program)}")
+        for pc, (code, jt, jf, k) in enumerate(program):
+            if code not in self.VALID_CODES:
+                raise ValueError(f"Invalid instruction {code:#06x} "
+                                 f"at {pc}")
+            if not (0 <= jt <= 0xff and 0 <= jf <= 0xff):
+                raise ValueError(f"Invalid jump offsets at {pc}")
+            cls = code & 0x07
+            mode = code & 0xe0
+            if cls in (self.ST, self.STX) \
+                    or cls in (self.LD, self.LDX) and mode == self.MEM:
+                if k >= self.MEMORY_WORDS:
+                    raise ValueError(f"Invalid memory slot {k} at {pc}")
+            elif cls == self.ALU and code & self.X == self.K \
+                    and code & 0xf0 in (self.DIV, self.MOD) and k == 0:
+                raise ValueError(f"Division by zero at {pc}")
+            elif cls == self.JMP:
+                offsets = (k,) if code & 0xf0 == self.JA else (jt, jf)
+                if any(pc + 1 + offset >= len(program) for offset in offsets):
+                    raise ValueError(f"Jump out of the program at {pc}")
+        if program[-1][0] & 0x07 != self.RET:
+            raise ValueError("Program should end with return instruction")
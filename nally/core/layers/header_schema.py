@@ -0,0 +1,215 @@
+import keyword
+import struct
+from typing import Any, Callable, Dict, List, NamedTuple, Tuple
+
+
+class HeaderField(NamedTuple):
+    """
+    Describes a single field of the protocol header
+    """
+    name: str
+    """Name of the field, used as argument name of the encoding functions"""
+    bits: int
+    """Width of the field in bits"""
+    default: Any = 0
+    """Value which is encoded if the field value isn't passed"""
+    validator: Callable = None
+    """
+    Callable which takes the raw field value and returns the validated one
+    (e.g. the enum member) or raises ValueError, applied by the generated
+    'decode'
+    """
+    raw: bool = False
+    """
+    If True, then the field is a byte string (e.g. address) instead of
+    unsigned integer, width of such field should be divisible by 8
+    """
+
+
+class HeaderSchema:
+    """
+    Declarative description of the fixed size protocol header. Fields are
+    laid out in the declaration order, each one starts right after the
+    previous one.
+
+    Specialized codec functions are generated once, when the schema is
+    created: the whole header is handled by a single precompiled
+    struct.Struct, and bit fields sharing the same word are extracted and
+    combined with inlined shifts and masks. Generated functions are
+    available as attributes:
+        * decode(buffer, offset=0) -> tuple of field values in the
+          declaration order, values of the fields which have validators
+          are passed through them
+        * pack_into(buffer, offset, **fields) writes the header to the
+          buffer, fields which aren't passed take their default values
+
+    Example:
+        UDP_HEADER_SCHEMA = HeaderSchema("udp", [
+            HeaderField("source_port", 16),
+            HeaderField("dest_port", 16),
+            HeaderField("length", 16),
+            HeaderField("checksum", 16),
+        ])
+        source_port, dest_port, length, checksum = \\
+            UDP_HEADER_SCHEMA.decode(frame, 34)
+    """
+
+    WORD_FORMATS = {8: "B", 16: "H", 32: "I", 64: "Q"}
+    """
+    Struct formats of the words which contain integer fields, bit fields
+    should be grouped to one of these widths
+    """
+
+    RESERVED_NAMES = ("buffer", "offset")
+    """Names of the arguments of generated functions"""
+
+    def __init__(self, name: str, fields: List[HeaderField]):
+        """
+        Initializes header schema and generates codec functions
+
+        :param name: name of the header, used in error messages and
+            names of the generated functions
+        :param fields: list of HeaderField instances in the wire order
+        :raises: ValueError: if fields can't be laid out to the words
+            supported by 'struct' module
+        """
+        self.__name = name
+        self.__fields = tuple(fields)
+        self.__names = set()
+        words = self.__layout()
+        self.__struct = struct.Struct(
+            "!" + "".join(word_format for word_format, _ in words)
+        )
+        self.decode = self.__generate_decode(words)
+        self.pack_into = self.__generate_pack_into(words)
+
+    @property
+    def name(self) -> str:
+        return self.__name
+
+    @property
+    def fields(self) -> Tuple[HeaderField, ...]:
+        return self.__fields
+
+    @property
+    def size(self) -> int:
+        """
+        Returns length of the header in bytes
+        """
+        return self.__struct.size
+
+    def __layout(self) -> List[Tuple[str, List[Tuple[HeaderField, int]]]]:
+        """
+        Groups fields to the struct words, each word is represented as its
+        format and list of (field, shift) pairs
+        """
+        words = []
+        pending = []
+        pending_bits = 0
+        for field in self.__fields:
+            self.__validate_field(field)
+            self.__names.add(field.name)
+            if field.raw:
+                if pending:
+                    raise ValueError(f"{self.__name}.{field.name} should be "
+                                     f"aligned to byte boundary")
+                words.append((f"{field.bits // 8}s", [(field, 0)]))
+                continue
+            pending.append(field)
+            pending_bits += field.bits
+            if pending_bits in self.WORD_FORMATS:
+                shift = pending_bits
+                word_fields = []
+                for word_field in pending:
+                    shift -= word_field.bits
+                    word_fields.append((word_field, shift))
+                words.append((self.WORD_FORMATS[pending_bits], word_fields))
+                pending = []
+                pending_bits = 0
+            elif pending_bits > max(self.WORD_FORMATS):
+                raise ValueError(f"{self.__name}.{field.name} crosses "
+                                 f"{max(self.WORD_FORMATS)} bits word")
+        if pending:
+            raise ValueError(f"{self.__name} fields {pending[0].name}..."
+                             f"{pending[-1].name} take {pending_bits} bits, "
+                             f"which isn't a supported word width")
+        return words
+
+    def __validate_field(self, field: HeaderField):
+        if not field.name.isidentifier() or keyword.iskeyword(field.name) \
+                or field.name.startswith("_") \
+                or field.name in self.RESERVED_NAMES:
+            raise ValueError(f"Invalid {self.__name} field name: "
+                             f"{field.name!r}")
+        if field.name in self.__names:
+            raise ValueError(f"Duplicate {self.__name} field: {field.name}")
+        if field.bits <= 0 or field.raw and field.bits % 8:
+            raise ValueError(f"Invalid width of {self.__name}.{field.name}: "
+                             f"{field.bits} bits")
+
+    def __namespace(self) -> Dict[str, Any]:
+        namespace = {
+            "_unpack_from": self.__struct.unpack_from,
+            "_pack_into": self.__struct.pack_into,
+        }
+        for field in self.__fields:
+            namespace[f"_default_{field.name}"] = field.default
+            if field.validator is not None:
+                namespace[f"_validate_{field.name}"] = field.validator
+        return namespace
+
+    def __signature(self) -> str:
+        return ", ".join(
+            f"{field.name}=_default_{field.name}" for field in self.__fields
+        )
+
+    def __generate(self, function_name: str, source: str) -> Callable:
+        namespace = self.__namespace()
+        exec(compile(source, f"<{self.__name} header codec>", "exec"),
+             namespace)
+        function = namespace[function_name]
+        function.__qualname__ = f"{self.__name}_{function_name}"
+        return function
+
+    def __generate_decode(self, words) -> Callable:
+        values = []
+        for index, (word_format, word_fields) in enumerate(words):
+            word_bits = 8 * struct.calcsize("!" + word_format)
+            for field, shift in word_fields:
+                value = f"_w{index}"
+                if shift:
+                    value = f"{value} >> {shift}"
+                if shift + field.bits < word_bits:
+                    value = f"({value}) & {hex((1 << field.bits) - 1)}"
+                if field.validator is not None:
+                    value = f"_validate_{field.name}({value})"
+                values.append(value)
+        source = (
+            f"def decode(buffer, offset=0):\n"
+            f"    {', '.join(f'_w{i}' for i in range(len(words)))}, = "
+            f"_unpack_from(buffer, offset)\n"
+            f"    return ({', '.join(values)},)\n"
+        )
+        return self.__generate("decode", source)
+
+    @staticmethod
+    def __pack_words(words) -> str:
+        packed = []
+        for word_format, word_fields in words:
+            if len(word_fields) == 1:
+                packed.append(word_fields[0][0].name)
+                continue
+            packed.append(" | ".join(
+                f"(({field.name} & {hex((1 << field.bits) - 1)}) << {shift})"
+                if shift
+                else f"({field.name} & {hex((1 << field.bits) - 1)})"
+                for field, shift in word_fields
+            ))
+        return ", ".join(packed)
+
+    def __generate_pack_into(self, words) -> Callable:
+        source = (
+            f"def pack_into(buffer, offset, {self.__signature()}):\n"
+            f"    _pack_into(buffer, offset, {self.__pack_words(words)})\n"
+        )
+        return self.__generate("pack_into", source)
@@ -1,6 +1,8 @@
 from enum import IntEnum
 from typing import NamedTuple
 
+from nally.core.utils.enum_table import EnumTable
+
 
 class IcmpType(IntEnum):
     """
@@ -21,6 +23,9 @@ class IcmpType(IntEnum):
     EXT_ECHO_REPLY = 43
 
 
+ICMP_TYPES = EnumTable(IcmpType)
+"""Converts Type field values to IcmpType members"""
+
 ICMP_CODE = {
     IcmpType.ECHO_REPLY: {
         0: "echo_reply"
@@ -1,9 +1,10 @@
 import struct
 
 from nally.core.layers.inet.icmp.icmp_codes import IcmpType, ICMP_CODE,\
-    ICMP_VARIABLE_HEADER_FIELDS, IcmpFormat
+    ICMP_TYPES, ICMP_VARIABLE_HEADER_FIELDS, IcmpFormat
+from nally.core.layers.header_schema import HeaderField, HeaderSchema
 from nally.core.layers.packet import Packet
-from nally.core.utils.utils import Utils
+from nally.core.utils.checksum_utils import ChecksumUtils
 
 
 class IcmpPacket(Packet):
@@ -11,12 +12,18 @@ class IcmpPacket(Packet):
     Represents ICMP packet
     """
 
-    ICMP_HEADER_FORMAT = "!BBH"
+    ICMP_HEADER_SCHEMA = HeaderSchema("icmp", [
+        HeaderField("icmp_type", 8, validator=ICMP_TYPES.__getitem__),
+        HeaderField("icmp_code", 8),
+        HeaderField("checksum", 16),
+    ])
     """
-    Defines format of ICMP header fields:
-       * ICMP type : 1 byte
-       * ICMP code : 1 byte
-       * Checksum : 2 bytes
+    Defines format of ICMP header fields preceding the Rest of Header field
+    """
+
+    ICMP_HEADER_LENGTH_BYTES = 8
+    """
+    Length of ICMP header including 4 bytes of Rest of Header field
     """
 
     def __init__(
@@ -33,7 +40,10 @@ class IcmpPacket(Packet):
         self.__icmp_code = icmp_code
         self.__rest_of_header = self._parse_rest_of_header(**kwargs)
 
-    def to_bytes(self) -> bytes:
+    def header_length(self) -> int:
+        return self.ICMP_HEADER_LENGTH_BYTES
+
+    def _pack_header_into(self, buffer, offset: int, payload_length: int):
         header_info: IcmpFormat = self._get_header_format(
             self.icmp_type,
             self.icmp_code
@@ -49,44 +59,36 @@ class IcmpPacket(Packet):
         else:
             rest_of_header = b'\0\0\0\0'
 
-        header_fields = [
-            self.icmp_type,
-            self.icmp_code,
-            0 # checksum, will be calculated later
-        ]
-
-        # allocate 4 bytes buffer to put header without variable fields in
-        header_buffer = bytearray(4)
-        # pack header without checksum and variable fields to the buffer
-        struct.pack_into(
-            self.ICMP_HEADER_FORMAT,
-            header_buffer,
-            0,
-            *header_fields
+        # pack header without checksum and variable fields to the buffer,
+        # checksum will be calculated later
+        self.ICMP_HEADER_SCHEMA.pack_into(
+            buffer,
+            offset,
+            icmp_type=self.icmp_type,
+            icmp_code=self.icmp_code
         )
         # finally add variable header fields to the buffer
-        header_buffer += rest_of_header
+        buffer[offset + 4:offset + 8] = rest_of_header
 
-        payload = self.raw_payload
-        checksum_bytes = Utils.calc_checksum(header_buffer + payload)
+        packet_end = offset + self.ICMP_HEADER_LENGTH_BYTES + payload_length
+        checksum_bytes = ChecksumUtils.calc_checksum(
+            memoryview(buffer)[offset:packet_end]
+        )
         # checksum takes 2-nd and 3-rd bytes of the header (counting from 0)
         # see https://tools.ietf.org/html/rfc792 for more details
-        header_buffer[2] = checksum_bytes[0]
-        header_buffer[3] = checksum_bytes[1]
-
-        return bytes(header_buffer) + payload
+        buffer[offset + 2:offset + 4] = checksum_bytes
 
     @staticmethod
     def from_bytes(packet_bytes: bytes):
         header_bytes = packet_bytes[:8]
         # unpack first 4 bytes firstly since we need to know ICMP type
         # and code to find out format of last 4 ones
-        header_fields = struct.unpack(
-            IcmpPacket.ICMP_HEADER_FORMAT,
-            header_bytes[:4]
-        )
-        icmp_type = header_fields[0]
-        icmp_code = header_fields[1]
+        icmp_type, icmp_code, _ = \
+            IcmpPacket.ICMP_HEADER_SCHEMA.decode(header_bytes)
+        # valid codes depend on the type, so they are checked here
+        if icmp_code not in ICMP_CODE[icmp_type]:
+            raise ValueError(f'Invalid or unsupported ICMP code:'
+                             f'{icmp_type=}, {icmp_code=}')
         header_info = IcmpPacket._get_header_format(icmp_type, icmp_code)
 
         variable_header_fields = ()
@@ -99,18 +101,18 @@ class IcmpPacket(Packet):
         required_fields = header_info.required_header_fields
         assert len(variable_header_fields) == len(required_fields)
 
-        rest_of_header = {
-            field: variable_header_fields[index]
-            for index, field in enumerate(required_fields)
-        }
+        icmp_packet = IcmpPacket.__new__(IcmpPacket)
+        Packet.__init__(icmp_packet)
+        # fields are already validated, so the constructor is skipped
+        icmp_packet.__icmp_type = icmp_type
+        icmp_packet.__icmp_code = icmp_code
+        icmp_packet.__rest_of_header = dict(
+            zip(required_fields, variable_header_fields)
+        )
 
         payload = packet_bytes[8:]  # TODO specify data length
 
-        return IcmpPacket(
-            icmp_type=icmp_type,
-            icmp_code=icmp_code,
-            **rest_of_header
-        ) / payload
+        return icmp_packet._link_payload(payload)
 
     def _parse_rest_of_header(self, **kwargs) -> dict:
         """
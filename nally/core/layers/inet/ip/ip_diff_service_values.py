@@ -1,5 +1,7 @@
 from enum import IntEnum
 
+from nally.core.utils.enum_table import EnumTable
+
 
 class IpDiffServiceValues(IntEnum):
     """
@@ -57,3 +59,7 @@ class IpDiffServiceValues(IntEnum):
     CS5 = 40
     CS6 = 48
     CS7 = 56
+
+
+IP_DIFF_SERVICE_VALUES = EnumTable(IpDiffServiceValues)
+"""Converts DSCP field values to IpDiffServiceValues members"""
@@ -1,5 +1,7 @@
 from enum import IntEnum
 
+from nally.core.utils.enum_table import EnumTable
+
 
 class IpEcnValues(IntEnum):
     """
@@ -35,3 +37,7 @@ class IpEcnValues(IntEnum):
     """ECN Capable Transport"""
     CE = 3
     """Congestion Encountered"""
+
+
+IP_ECN_VALUES = EnumTable(IpEcnValues)
+"""Converts ECN field values to IpEcnValues members"""
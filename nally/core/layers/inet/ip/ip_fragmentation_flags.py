@@ -1,5 +1,4 @@
 from nally.core.utils.bit_flags import BitFlags
-from nally.core.utils.utils import Utils
 
 
 class IpFragmentationFlags(BitFlags):
@@ -12,6 +11,12 @@ class IpFragmentationFlags(BitFlags):
     MF = 1
     """Bit mask used to check or set MF flag"""
 
+    BIT_LENGTH = 2
+    """
+    Bit length of the stored flags, the most significant (reserved) bit of
+    3-bits field is always zero
+    """
+
     def __init__(self, mf=False, df=False):
         """
         Initialises IP fragmentation flags
@@ -28,14 +33,16 @@ class IpFragmentationFlags(BitFlags):
     @staticmethod
     def from_int(bits: int):
         """
-        Creates IpFragmentationFlags instance from integer
+        Returns IpFragmentationFlags instance for integer. Instances are
+        shared between all callers and can't be modified
 
-        :param int bits: integer which represents bit flags
-        :return: IpFragmentationFlags instance
+        :param int bits: integer which represents bit flags, reserved bit
+            and bits above the field are ignored
+        :return: shared IpFragmentationFlags instance
         """
-        df_flag = Utils.is_bit_set(bits, IpFragmentationFlags.DF)
-        mf_flag = Utils.is_bit_set(bits, IpFragmentationFlags.MF)
-        return IpFragmentationFlags(mf=mf_flag, df=df_flag)
+        return _SHARED_FRAGMENTATION_FLAGS[
+            bits & (IpFragmentationFlags.DF | IpFragmentationFlags.MF)
+        ]
 
     def __eq__(self, other: object) -> bool:
         if isinstance(other, IpFragmentationFlags):
@@ -50,3 +57,9 @@ class IpFragmentationFlags(BitFlags):
         if len(res) == 0:
             res = "none"
         return res.strip()
+
+
+_SHARED_FRAGMENTATION_FLAGS = BitFlags.shared_instances(
+    IpFragmentationFlags,
+    IpFragmentationFlags.BIT_LENGTH
+)
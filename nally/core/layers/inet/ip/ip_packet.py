@@ -1,18 +1,20 @@
 import logging
 import socket
-import struct
 import nally.core.layers.transport.tcp.tcp_packet as tcp_packet
 import nally.core.layers.transport.udp.udp_packet as udp_packet
 from nally.config import config
 
 from nally.core.layers.inet.ip.ip_diff_service_values \
-    import IpDiffServiceValues
-from nally.core.layers.inet.ip.ip_ecn_values import IpEcnValues
+    import IpDiffServiceValues, IP_DIFF_SERVICE_VALUES
+from nally.core.layers.inet.ip.ip_ecn_values \
+    import IpEcnValues, IP_ECN_VALUES
 from nally.core.layers.inet.ip.ip_fragmentation_flags \
     import IpFragmentationFlags
+from nally.core.layers.header_schema import HeaderField, HeaderSchema
 from nally.core.layers.inet.ip.ip_utils import IpUtils
+from nally.core.layers.layer import Layer
 from nally.core.layers.packet import Packet
-from nally.core.utils.utils import Utils
+from nally.core.utils.checksum_utils import ChecksumUtils
 
 
 class IpPacket(Packet):
@@ -22,23 +24,29 @@ class IpPacket(Packet):
     Note: implementation doesn't support 'Options' field
     """
 
-    IP_V4_HEADER_FORMAT = "!BBHHHBBH4s4s"
+    IP_V4_DEFAULT_TTL = 64
+
+    IP_V4_HEADER_SCHEMA = HeaderSchema("ipv4", [
+        HeaderField("version", 4, 4),
+        HeaderField("ihl", 4, IpUtils.IP_V4_MAX_HEADER_LENGTH),
+        HeaderField("dscp", 6,
+                    validator=IP_DIFF_SERVICE_VALUES.__getitem__),
+        HeaderField("ecn", 2, validator=IP_ECN_VALUES.__getitem__),
+        HeaderField("total_length", 16),
+        HeaderField("identification", 16),
+        HeaderField("flags", 3, validator=IpFragmentationFlags.from_int),
+        HeaderField("fragment_offset", 13),
+        HeaderField("ttl", 8, IP_V4_DEFAULT_TTL),
+        HeaderField("protocol", 8),
+        HeaderField("checksum", 16),
+        HeaderField("source_addr", 32, bytes(4), raw=True),
+        HeaderField("dest_addr", 32, bytes(4), raw=True),
+    ])
     """
-    Defines format of IPv4 header fields:
-        * Version + IHL : 1 byte
-        * DSCP + ECN : 1 byte
-        * Total Length : 2 bytes
-        * Identification : 2 bytes
-        * Flags + Fragment Offset : 2 bytes
-        * TTL : 1 byte
-        * Protocol : 1 byte
-        * Header checksum : 2 bytes
-        * Source IP : 4 bytes
-        * Destination IP : 4 bytes
+    Defines format of IPv4 header without 'Options' field,
+    see https://tools.ietf.org/html/rfc791#section-3.1
     """
 
-    IP_V4_DEFAULT_TTL = 64
-
     TRANSPORT_LAYER_CONVERTERS = {
         socket.IPPROTO_TCP: tcp_packet.TcpPacket.from_bytes,
         socket.IPPROTO_UDP: udp_packet.UdpPacket.from_bytes,
@@ -97,90 +105,66 @@ class IpPacket(Packet):
         self.__ttl = ttl
         self.__protocol = protocol
 
-    def to_bytes(self) -> bytes:
-        # fragmentation flags takes first 3 bits,
-        # next 13 bits is fragment offset
-        flags_fragment_offset = self.__flags.flags << 13 | \
-                                self.__fragment_offset
-
-        # DSCP value takes first 6 bits, the next 2 ones is ECN
-        dscp_ecn = self.__dscp << 2 | self.__ecn
+    def header_length(self) -> int:
+        return IpUtils.IP_V4_MAX_HEADER_LENGTH_BYTES
 
-        header_fields = [
-            IpUtils.IP_V4_VER_IHL,
-            dscp_ecn,
-            self.total_length,
-            self.__identification,
-            flags_fragment_offset,
-            self.__ttl,
-            self.__protocol,
-            0,  # placeholder for checksum
-            self.__source_addr,
-            self.__dest_addr
-        ]
-
-        # allocate 20 bytes buffer to put header in
-        header_bytes = bytearray(IpUtils.IP_V4_MAX_HEADER_LENGTH_BYTES)
+    def _pack_header_into(self, buffer, offset: int, payload_length: int):
         # pack header without checksum to the buffer
-        struct.pack_into(
-            self.IP_V4_HEADER_FORMAT,
-            header_bytes,
-            0,
-            *header_fields
+        self.IP_V4_HEADER_SCHEMA.pack_into(
+            buffer,
+            offset,
+            dscp=self.dscp,
+            ecn=self.ecn,
+            total_length=IpUtils.validate_packet_length(
+                IpUtils.IP_V4_MAX_HEADER_LENGTH_BYTES + payload_length
+            ),
+            identification=self.id,
+            flags=self.flags.flags,
+            fragment_offset=self.frag_offset,
+            ttl=self.ttl,
+            protocol=self.protocol,
+            source_addr=self.source_addr_raw,
+            dest_addr=self.dest_addr_raw
         )
 
         # calculate checksum
-        checksum_bytes = Utils.calc_checksum(header_bytes)
+        checksum_bytes = ChecksumUtils.calc_checksum(
+            memoryview(buffer)[
+                offset:offset + IpUtils.IP_V4_MAX_HEADER_LENGTH_BYTES
+            ]
+        )
         # checksum takes 10-th and 11-th bytes of the header (counting from 0)
         # see https://tools.ietf.org/html/rfc791#section-3.1 for more details
-        header_bytes[10] = checksum_bytes[0]
-        header_bytes[11] = checksum_bytes[1]
-
-        return bytes(header_bytes) + self.raw_payload
+        buffer[offset + 10:offset + 12] = checksum_bytes
 
     @staticmethod
-    def from_bytes(packet_bytes: bytes):
-        header_bytes = packet_bytes[:IpUtils.IP_V4_MAX_HEADER_LENGTH_BYTES]
-        payload_bytes = packet_bytes[IpUtils.IP_V4_MAX_HEADER_LENGTH_BYTES:]
-        header_fields = struct.unpack(
-            IpPacket.IP_V4_HEADER_FORMAT,
-            header_bytes
-        )
-
-        # we don't extract ver_ihl, total_length, checksum fields
-        # (0, 2, 7 indices) since they will be calculated after IpPacket
-        # instantiating
-        dscp_ecn = header_fields[1]
-        identification = header_fields[3]
-        flags_fragment_offset = header_fields[4]
-        ttl = header_fields[5]
-        protocol = header_fields[6]
-        source_addr = socket.inet_ntoa(header_fields[8])
-        dest_addr = socket.inet_ntoa(header_fields[9])
-
-        # take first 6 bits dropping last 2 bits
-        dscp = IpDiffServiceValues(dscp_ecn >> 2)
-        ecn = IpEcnValues(dscp_ecn & 3)  # take last 2 bits
-
-        # take first 3 bits dropping last 13 bits
-        flags = IpFragmentationFlags.from_int(flags_fragment_offset >> 13)
-        # take last 13 bits
-        fragment_offset = flags_fragment_offset & 0x1fff
+    def from_bytes(packet_bytes: bytes, max_layer: Layer = None):
+        """
+        Converts raw bytes to the IpPacket instance, also tries to parse
+        the transport layer
 
-        ip_packet = IpPacket(
-            source_addr_str=source_addr,
-            dest_addr_str=dest_addr,
-            dscp=dscp,
-            ecn=ecn,
-            identification=identification,
-            flags=flags,
-            fragment_offset=fragment_offset,
-            ttl=ttl,
-            protocol=protocol
-        )
+        :param packet_bytes: raw IPv4 packet
+        :param max_layer: the highest layer which should be decoded, payload
+            of this layer is kept as RawPacket. If not specified, then all
+            known layers are decoded
+        """
+        payload_bytes = packet_bytes[IpUtils.IP_V4_MAX_HEADER_LENGTH_BYTES:]
+        # we don't extract version, IHL, total length and checksum fields,
+        # since they will be calculated during serialization
+        ip_packet = IpPacket.__new__(IpPacket)
+        Packet.__init__(ip_packet)
+        # fields are validated by the schema, so the constructor is skipped
+        _, _, ip_packet.__dscp, ip_packet.__ecn, _, \
+            ip_packet.__identification, ip_packet.__flags, \
+            ip_packet.__fragment_offset, ip_packet.__ttl, protocol, _, \
+            ip_packet.__source_addr, ip_packet.__dest_addr = \
+            IpPacket.IP_V4_HEADER_SCHEMA.decode(packet_bytes)
+        ip_packet.__protocol = protocol
 
         if len(payload_bytes) == 0:
             return ip_packet
+        if max_layer is not None and max_layer <= Layer.INTERNET:
+            return ip_packet._link_payload(payload_bytes)
         # try to find appropriate converter based on protocol field
         transport_layer_converter = IpPacket\
             .TRANSPORT_LAYER_CONVERTERS\
@@ -191,9 +175,9 @@ class IpPacket(Packet):
                 f"Protocol: {protocol}. "
                 f"Payload: {payload_bytes.hex()}"
             )
-            return ip_packet / payload_bytes
+            return ip_packet._link_payload(payload_bytes)
         transport_layer = transport_layer_converter(payload_bytes)
-        return ip_packet / transport_layer
+        return ip_packet._link_payload(transport_layer)
 
     @property
     def source_addr(self) -> str:
@@ -221,8 +205,7 @@ class IpPacket(Packet):
 
     @property
     def total_length(self) -> int:
-        return IpUtils.validate_packet_length(
-            IpUtils.IP_V4_MAX_HEADER_LENGTH_BYTES + len(self.raw_payload))
+        return IpUtils.validate_packet_length(self.wire_length())
 
     @property
     def id(self) -> int:
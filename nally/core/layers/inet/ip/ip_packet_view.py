@@ -0,0 +1,111 @@
+import socket
+from functools import cached_property
+
+from nally.core.layers.inet.ip.ip_diff_service_values \
+    import IpDiffServiceValues, IP_DIFF_SERVICE_VALUES
+from nally.core.layers.inet.ip.ip_ecn_values \
+    import IpEcnValues, IP_ECN_VALUES
+from nally.core.layers.inet.ip.ip_fragmentation_flags \
+    import IpFragmentationFlags
+from nally.core.layers.inet.ip.ip_packet import IpPacket
+from nally.core.layers.layer import Layer
+from nally.core.layers.packet_view import PacketView
+from nally.core.layers.raw_packet import RawPacket
+from nally.core.layers.transport.tcp.tcp_packet_view import TcpPacketView
+from nally.core.layers.transport.udp.udp_packet_view import UdpPacketView
+
+
+class IpPacketView(PacketView, IpPacket):
+    """
+    Lazily decoded IPv4 packet, see PacketView for details
+    """
+
+    TRANSPORT_LAYER_VIEWS = {
+        socket.IPPROTO_TCP: TcpPacketView,
+        socket.IPPROTO_UDP: UdpPacketView,
+    }
+    """
+    Defines views of the Transport layer packets based on the value
+    of Protocol field in IP packet
+    """
+
+    @staticmethod
+    def from_bytes(packet_bytes: bytes, max_layer: Layer = None):
+        return IpPacketView(packet_bytes, max_layer=max_layer)
+
+    def _decode_upper_layer(self):
+        payload_offset = self._offset + self.header_length_bytes
+        # frame may contain padding, so rely on the Total Length field
+        payload_end = min(self._offset + self.total_length, self._end)
+        if payload_offset >= payload_end:
+            return None
+        transport_layer_view = self.TRANSPORT_LAYER_VIEWS.get(self.protocol)
+        if transport_layer_view is None or self._max_layer is not None \
+                and self._max_layer <= Layer.INTERNET:
+            return RawPacket(self._view[payload_offset:payload_end])
+        return transport_layer_view(self._view, payload_offset, payload_end)
+
+    @property
+    def header_length_bytes(self) -> int:
+        """
+        Returns IHL field value converted to bytes
+        """
+        return (self._unpack(self.UINT8, 0) & 0xf) * 4
+
+    @cached_property
+    def dscp(self) -> IpDiffServiceValues:
+        # take first 6 bits dropping last 2 bits
+        return IP_DIFF_SERVICE_VALUES[self._unpack(self.UINT8, 1) >> 2]
+
+    @cached_property
+    def ecn(self) -> IpEcnValues:
+        # take last 2 bits
+        return IP_ECN_VALUES[self._unpack(self.UINT8, 1) & 3]
+
+    @property
+    def total_length(self) -> int:
+        return self._unpack(self.UINT16, 2)
+
+    @property
+    def id(self) -> int:
+        return self._unpack(self.UINT16, 4)
+
+    @cached_property
+    def flags(self) -> IpFragmentationFlags:
+        # take first 3 bits dropping last 13 bits
+        return IpFragmentationFlags.from_int(
+            self._unpack(self.UINT16, 6) >> 13
+        )
+
+    @property
+    def frag_offset(self) -> int:
+        # take last 13 bits
+        return self._unpack(self.UINT16, 6) & 0x1fff
+
+    @property
+    def ttl(self) -> int:
+        return self._unpack(self.UINT8, 8)
+
+    @property
+    def protocol(self) -> int:
+        return self._unpack(self.UINT8, 9)
+
+    @property
+    def checksum(self) -> int:
+        return self._unpack(self.UINT16, 10)
+
+    @cached_property
+    def source_addr_raw(self) -> bytes:
+        return self._slice(12, 16)
+
+    @cached_property
+    def dest_addr_raw(self) -> bytes:
+        return self._slice(16, 20)
+
+    @property
+    def source_addr(self) -> str:
+        return socket.inet_ntoa(self.source_addr_raw)
+
+    @property
+    def dest_addr(self) -> str:
+        return socket.inet_ntoa(self.dest_addr_raw)
@@ -0,0 +1,13 @@
+from enum import IntEnum
+
+
+class Layer(IntEnum):
+    """
+    Stores layers of the protocol stack (numbered according to the OSI
+    model). Used to limit the depth of decoding: layers above 'max_layer'
+    aren't decoded and are kept as RawPacket
+    """
+
+    LINK = 2
+    INTERNET = 3
+    TRANSPORT = 4
@@ -1,8 +1,10 @@
-import struct
-
-from nally.core.layers.link.arp.arp_utils import ArpUtils, ArpOperation
-from nally.core.layers.link.proto_type import EtherType
-from nally.core.layers.link.arp.arp_utils import ArpHardwareType
+from nally.core.layers.header_schema import HeaderField, HeaderSchema
+from nally.core.layers.layer import Layer
+from nally.core.layers.link.arp.arp_utils import ArpUtils, ArpOperation, \
+    ARP_OPERATIONS
+from nally.core.layers.link.proto_type import EtherType, ETHER_TYPES
+from nally.core.layers.link.arp.arp_utils import ArpHardwareType, \
+    ARP_HARDWARE_TYPES
 from nally.core.layers.packet import Packet
 
 
@@ -11,15 +13,18 @@ class ArpPacket(Packet):
     Represents ARP (Address Resolution Protocol) packet
     """
 
-    ARP_PACKET_FORMAT = "!HHBBH"
+    ARP_PACKET_SCHEMA = HeaderSchema("arp", [
+        HeaderField("hardware_type", 16, ArpHardwareType.ETHERNET,
+                    validator=ARP_HARDWARE_TYPES.__getitem__),
+        HeaderField("protocol_type", 16, EtherType.IPV4,
+                    validator=ETHER_TYPES.__getitem__),
+        HeaderField("hw_len", 8),
+        HeaderField("proto_len", 8),
+        HeaderField("operation", 16, validator=ARP_OPERATIONS.__getitem__),
+    ])
     """
     Defines format of ARP packet without hardware and protocol addresses
-    (their sizes calculated dynamically based on HLEN, PLEN fields values):
-        * HTYPE field : 2 bytes
-        * PTYPE field : 2 bytes
-        * HLEN field : 1 byte
-        * PLEN field : 1 byte
-        * Operation field : 1 byte
+    (their sizes calculated dynamically based on HLEN, PLEN fields values)
     """
 
     def __init__(
@@ -72,51 +77,62 @@ class ArpPacket(Packet):
             protocol_type
         )
 
-    def to_bytes(self):
-        packet_without_addr = struct.pack(
-            self.ARP_PACKET_FORMAT,
-            self.__hardware_type,
-            self.__protocol_type,
-            self.__hw_len,
-            self.__proto_len,
-            self.__operation
+    def header_length(self) -> int:
+        return self.ARP_PACKET_SCHEMA.size \
+            + 2 * (self.__hw_len + self.__proto_len)
+
+    def _pack_header_into(self, buffer, offset: int, payload_length: int):
+        self.ARP_PACKET_SCHEMA.pack_into(
+            buffer,
+            offset,
+            hardware_type=self.__hardware_type,
+            protocol_type=self.__protocol_type,
+            hw_len=self.__hw_len,
+            proto_len=self.__proto_len,
+            operation=self.__operation
         )
-        sender_addr = self.__sender_hw_address + self.__sender_proto_address
-        dest_addr = self.__target_hw_address + self.__target_proto_address
-        return packet_without_addr + sender_addr + dest_addr
+        addresses = self.__sender_hw_address + self.__sender_proto_address \
+            + self.__target_hw_address + self.__target_proto_address
+        cursor = offset + self.ARP_PACKET_SCHEMA.size
+        buffer[cursor:cursor + len(addresses)] = addresses
 
     @staticmethod
-    def from_bytes(bytes_packet: bytes):
-        packet_without_addr_len = struct.calcsize(ArpPacket.ARP_PACKET_FORMAT)
-        packet_bytes_without_addr = bytes_packet[:packet_without_addr_len]
-        packet_without_addr = struct.unpack_from(
-            ArpPacket.ARP_PACKET_FORMAT,
-            packet_bytes_without_addr
-        )
-        hw_type = ArpHardwareType(packet_without_addr[0])
-        proto_type = EtherType(packet_without_addr[1])
-        hw_len = packet_without_addr[2]
-        proto_len = packet_without_addr[3]
-        op_code = ArpOperation(packet_without_addr[4])
-
-        cursor = packet_without_addr_len
-        sender_hw_addr = bytes_packet[cursor: cursor + hw_len]
+    def from_bytes(bytes_packet: bytes, max_layer: Layer = None):
+        """
+        Converts raw bytes to the ArpPacket instance. ARP has no upper
+        layers, 'max_layer' is accepted for compatibility with
+        EthernetPacket.INTERNET_LAYER_CONVERTERS
+        """
+        arp_packet = ArpPacket.__new__(ArpPacket)
+        Packet.__init__(arp_packet)
+        # fields are validated by the schema, so the constructor is skipped
+        arp_packet.__hardware_type, arp_packet.__protocol_type, \
+            hw_len, proto_len, arp_packet.__operation = \
+            ArpPacket.ARP_PACKET_SCHEMA.decode(bytes_packet)
+        # addresses are valid if their lengths match HTYPE and PTYPE
+        if hw_len != ArpUtils.resolve_hw_len(arp_packet.__hardware_type) \
+                or proto_len != ArpUtils.resolve_proto_len(
+                    arp_packet.__protocol_type):
+            raise ValueError(f"Invalid ARP addresses lengths: "
+                             f"{hw_len=}, {proto_len=}")
+        cursor = ArpPacket.ARP_PACKET_SCHEMA.size
+        if len(bytes_packet) < cursor + 2 * (hw_len + proto_len):
+            raise ValueError("ARP packet is truncated")
+        arp_packet.__hw_len = hw_len
+        arp_packet.__proto_len = proto_len
+
+        arp_packet.__sender_hw_address = \
+            bytes(bytes_packet[cursor: cursor + hw_len])
         cursor += hw_len
-        sender_proto_addr = bytes_packet[cursor: cursor + proto_len]
+        arp_packet.__sender_proto_address = \
+            bytes(bytes_packet[cursor: cursor + proto_len])
         cursor += proto_len
-        target_hw_addr = bytes_packet[cursor: cursor + hw_len]
+        arp_packet.__target_hw_address = \
+            bytes(bytes_packet[cursor: cursor + hw_len])
         cursor += hw_len
-        target_proto_addr = bytes_packet[cursor: cursor + proto_len]
-
-        return ArpPacket(
-            hardware_type=hw_type,
-            protocol_type=proto_type,
-            operation=op_code,
-            sender_hw_address=sender_hw_addr,
-            sender_proto_address=sender_proto_addr,
-            target_hw_address=target_hw_addr,
-            target_proto_address=target_proto_addr
-        )
+        arp_packet.__target_proto_address = \
+            bytes(bytes_packet[cursor: cursor + proto_len])
+        return arp_packet
 
     def is_response(self, packet: Packet) -> bool:
         if ArpPacket not in packet:
@@ -3,6 +3,7 @@ from enum import IntEnum
 from nally.core.layers.inet.ip.ip_utils import IpUtils
 from nally.core.layers.link.ethernet.ethernet_utils import EthernetUtils
 from nally.core.layers.link.proto_type import EtherType
+from nally.core.utils.enum_table import EnumTable
 
 
 class ArpHardwareType(IntEnum):
@@ -22,6 +23,13 @@ class ArpOperation(IntEnum):
     OP_REPLY = 0x0002
 
 
+ARP_HARDWARE_TYPES = EnumTable(ArpHardwareType)
+"""Converts HTYPE field values to ArpHardwareType members"""
+
+ARP_OPERATIONS = EnumTable(ArpOperation)
+"""Converts Operation field values to ArpOperation members"""
+
+
 class ArpUtils:
     """
     Defines useful utility methods related to ARP protocol
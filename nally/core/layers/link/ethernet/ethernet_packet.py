@@ -1,8 +1,9 @@
 import logging
-import struct
 
 from nally.config import config
+from nally.core.layers.header_schema import HeaderField, HeaderSchema
 from nally.core.layers.inet.ip.ip_packet import IpPacket
+from nally.core.layers.layer import Layer
 from nally.core.layers.link.arp.arp_packet import ArpPacket
 from nally.core.layers.link.proto_type import EtherType
 from nally.core.layers.link.ethernet.ethernet_utils import EthernetUtils
@@ -14,21 +15,27 @@ class EthernetPacket(Packet):
     Represents Ethernet II (DIX Ethernet) frame
     """
 
-    ETHERNET_HEADER_LENGTH_BYTES = 14
-
-    ETHERNET_PACKET_FORMAT = "!6s6sH"
+    ETHERNET_PACKET_SCHEMA = HeaderSchema("ethernet", [
+        HeaderField("dest_mac", 48, raw=True),
+        HeaderField("source_mac", 48, raw=True),
+        HeaderField("ether_type", 16, EtherType.IPV4,
+                    validator=EthernetUtils.validate_ether_type),
+    ])
     """
     Ethernet packet format, includes 12 bytes for source and
     destination MAC addresses and also 2 bytes for EtherType/length field
     """
 
+    ETHERNET_HEADER_LENGTH_BYTES = ETHERNET_PACKET_SCHEMA.size
+
     INTERNET_LAYER_CONVERTERS = {
         EtherType.IPV4: IpPacket.from_bytes,
         EtherType.ARP: ArpPacket.from_bytes
     }
     """
     Defines converters to the Internet layer packets based on the value of
-    EtherType field in Ethernet frame
+    EtherType field in Ethernet frame. Converters take the payload and
+    'max_layer', see 'from_bytes'
     """
 
     LOG = logging.getLogger("EthernetPacket")
@@ -56,31 +63,45 @@ class EthernetPacket(Packet):
         self.__source_mac = EthernetUtils.validate_mac(source_mac)
         self.__ether_type = EthernetUtils.validate_ether_type(ether_type)
 
-    def to_bytes(self):
-        header = struct.pack(
-            self.ETHERNET_PACKET_FORMAT,
-            self.__dest_mac,
-            self.__source_mac,
-            self.__ether_type,
+    def header_length(self) -> int:
+        return self.ETHERNET_HEADER_LENGTH_BYTES
+
+    def _pack_header_into(self, buffer, offset: int, payload_length: int):
+        EthernetUtils.validate_payload_length(payload_length)
+        self.ETHERNET_PACKET_SCHEMA.pack_into(
+            buffer,
+            offset,
+            dest_mac=self.dest_mac,
+            source_mac=self.source_mac,
+            ether_type=self.ether_type
         )
-        return header + EthernetUtils.validate_payload(self.raw_payload)
 
     @staticmethod
-    def from_bytes(bytes_packet: bytes):
-        header_bytes = bytes_packet[:EthernetPacket.ETHERNET_HEADER_LENGTH_BYTES] # noqa E501
-        payload_bytes = EthernetUtils.validate_payload(
+    def from_bytes(bytes_packet: bytes, max_layer: Layer = None):
+        """
+        Converts raw frame to the EthernetPacket instance, also tries to
+        parse upper protocols layers
+
+        :param bytes_packet: raw frame
+        :param max_layer: the highest layer which should be decoded, payload
+            of this layer is kept as RawPacket. If not specified, then all
+            known layers are decoded
+        """
+        # payload length isn't validated, since captured frames can exceed
+        # the MTU (e.g. jumbo frames or frames coalesced by GRO)
+        payload_bytes = \
             bytes_packet[EthernetPacket.ETHERNET_HEADER_LENGTH_BYTES:]
-        )
-        packet_fields = struct.unpack(
-            EthernetPacket.ETHERNET_PACKET_FORMAT,
-            header_bytes
-        )
-        dest_mac = packet_fields[0]
-        source_mac = packet_fields[1]
-        ether_type = packet_fields[2]
-        ethernet_packet = EthernetPacket(dest_mac, source_mac, ether_type)
+        ethernet_packet = EthernetPacket.__new__(EthernetPacket)
+        Packet.__init__(ethernet_packet)
+        # fields are validated by the schema, so the constructor is skipped
+        ethernet_packet.__dest_mac, ethernet_packet.__source_mac, \
+            ether_type = \
+            EthernetPacket.ETHERNET_PACKET_SCHEMA.decode(bytes_packet)
+        ethernet_packet.__ether_type = ether_type
         if len(payload_bytes) == 0:
             return ethernet_packet
+        if max_layer is not None and max_layer <= Layer.LINK:
+            return ethernet_packet._link_payload(payload_bytes)
         # try to find appropriate converter based on EtherType field
         internet_layer_converter = EthernetPacket \
             .INTERNET_LAYER_CONVERTERS \
@@ -92,8 +113,18 @@ class EthernetPacket(Packet):
                 f"Payload: {payload_bytes.hex()}"
             )
             return ethernet_packet
-        internet_layer = internet_layer_converter(payload_bytes)
-        return ethernet_packet / internet_layer
+        internet_layer = internet_layer_converter(payload_bytes, max_layer)
+        return ethernet_packet._link_payload(internet_layer)
+
+    @staticmethod
+    def decode_batch(frames):
+        """
+        Decodes batch of raw frames to the columnar representation without
+        creating Packet instance per frame, see PacketBatch for details
+        """
+        # imported here since PacketBatch depends on EthernetPacket
+        from nally.core.layers.packet_batch import PacketBatch
+        return PacketBatch.decode(frames)
 
     def is_response(self, packet: Packet) -> bool:
         if EthernetPacket not in packet:
@@ -0,0 +1,72 @@
+from functools import cached_property
+
+from nally.core.layers.inet.ip.ip_packet_view import IpPacketView
+from nally.core.layers.layer import Layer
+from nally.core.layers.link.ethernet.ethernet_packet import EthernetPacket
+from nally.core.layers.link.ethernet.ethernet_utils import EthernetUtils
+from nally.core.layers.link.proto_type import EtherType
+from nally.core.layers.packet_view import PacketView
+from nally.core.layers.raw_packet import RawPacket
+
+
+class EthernetPacketView(PacketView, EthernetPacket):
+    """
+    Lazily decoded Ethernet II frame, see PacketView for details.
+    Internet layer protocols which have no view implementation are decoded
+    eagerly using EthernetPacket.INTERNET_LAYER_CONVERTERS
+    """
+
+    INTERNET_LAYER_VIEWS = {
+        EtherType.IPV4: IpPacketView,
+    }
+    """
+    Defines views of the Internet layer packets based on the value of
+    EtherType field in Ethernet frame
+    """
+
+    @staticmethod
+    def from_bytes(bytes_packet: bytes, max_layer: Layer = None):
+        return EthernetPacketView(bytes_packet, max_layer=max_layer)
+
+    def _decode_upper_layer(self):
+        payload_offset = self._offset + self.ETHERNET_HEADER_LENGTH_BYTES
+        if payload_offset >= self._end:
+            return None
+        if self._max_layer is not None and self._max_layer <= Layer.LINK:
+            return RawPacket(self._view[payload_offset:self._end])
+        ether_type = self.ether_type
+        internet_layer_view = self.INTERNET_LAYER_VIEWS.get(ether_type)
+        if internet_layer_view is not None:
+            return internet_layer_view(
+                self._view,
+                payload_offset,
+                self._end,
+                self._max_layer
+            )
+        internet_layer_converter = self.INTERNET_LAYER_CONVERTERS.get(
+            ether_type
+        )
+        payload_bytes = bytes(self._view[payload_offset:self._end])
+        if internet_layer_converter is None:
+            self.LOG.warning(
+                f"Can't find converter to internet layer packet. "
+                f"EtherType: {ether_type}. "
+                f"Payload: {payload_bytes.hex()}"
+            )
+            return None
+        return internet_layer_converter(payload_bytes, self._max_layer)
+
+    @cached_property
+    def dest_mac(self):
+        return self._slice(0, EthernetUtils.MAC_LENGTH_BYTES)
+
+    @cached_property
+    def source_mac(self):
+        return self._slice(
+            EthernetUtils.MAC_LENGTH_BYTES,
+            EthernetUtils.MAC_LENGTH_BYTES * 2
+        )
+
+    @cached_property
+    def ether_type(self):
+        return EthernetUtils.validate_ether_type(self._unpack(self.UINT16, 12))
@@ -1,4 +1,4 @@
-from nally.core.layers.link.proto_type import EtherType
+from nally.core.layers.link.proto_type import EtherType, ETHER_TYPES
 
 
 class EthernetUtils:
@@ -51,10 +51,19 @@ class EthernetUtils:
         :param payload_bytes:
         :return:
         """
-        if len(payload_bytes) > EthernetUtils.MAX_PAYLOAD_LENGTH_BYTES:
+        EthernetUtils.validate_payload_length(len(payload_bytes))
+        return payload_bytes
+
+    @staticmethod
+    def validate_payload_length(payload_length: int) -> int:
+        """
+        Validates payload length in bytes against to maximum Ethernet
+        frame size
+        """
+        if payload_length > EthernetUtils.MAX_PAYLOAD_LENGTH_BYTES:
             raise ValueError(f"Ethernet frame payload can't be greater than "
                              f"{EthernetUtils.MAX_PAYLOAD_LENGTH_BYTES} bytes")
-        return payload_bytes
+        return payload_length
 
     @staticmethod
     def validate_ether_type(ether_type):
@@ -67,7 +76,7 @@ class EthernetUtils:
             if ether_type <= 1500:
                 return ether_type
             elif ether_type >= 1536:
-                return EtherType(ether_type)
+                return ETHER_TYPES[ether_type]
             else:
                 raise ValueError(f"Invalid EtherType field value {ether_type}")
         else:
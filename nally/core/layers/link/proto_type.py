@@ -1,5 +1,7 @@
 from enum import IntEnum
 
+from nally.core.utils.enum_table import EnumTable
+
 
 class EtherType(IntEnum):
     """
@@ -14,3 +16,7 @@ class EtherType(IntEnum):
     IPV6 = 0x86dd
     ARP = 0x0806
     LLDP = 0x88cc
+
+
+ETHER_TYPES = EnumTable(EtherType)
+"""Converts EtherType and PTYPE field values to EtherType members"""
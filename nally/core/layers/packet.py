@@ -12,12 +12,69 @@ class Packet(ABC):
         self._under_layer = None
         self._upper_layer = None
 
-    @abstractmethod
-    def to_bytes(self):
+    def to_bytes(self) -> bytes:
         """
         Converts 'Packet' instance to the 'bytes' representation ready to be
         sent over the network
         """
+        buffer = bytearray(self.wire_length())
+        self.serialize_into(buffer)
+        return bytes(buffer)
+
+    def serialize_into(self, buffer, offset: int = 0) -> int:
+        """
+        Serializes the packet with all upper layers into the preallocated
+        buffer in a single pass. Upper layers are written first, so each
+        layer can compute lengths and checksums over its payload in place
+
+        :param buffer: writable buffer ('bytearray' or 'memoryview'),
+            should have at least 'offset + wire_length()' bytes
+        :param offset: offset in the buffer at which packet will be written
+        :return: number of written bytes
+        """
+        header_length = self.header_length()
+        payload_length = (
+            self.upper_layer.serialize_into(buffer, offset + header_length)
+            if self.upper_layer is not None
+            else 0
+        )
+        self._pack_header_into(buffer, offset, payload_length)
+        return header_length + payload_length
+
+    def wire_length(self) -> int:
+        """
+        Returns length in bytes of the packet including all upper layers,
+        doesn't perform serialization
+        """
+        return self.header_length() + self.payload_length()
+
+    def payload_length(self) -> int:
+        """
+        Returns length in bytes of all upper layers if present
+        """
+        return (
+            self.upper_layer.wire_length()
+            if self.upper_layer is not None
+            else 0
+        )
+
+    @abstractmethod
+    def header_length(self) -> int:
+        """
+        Returns length in bytes of the packet header
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def _pack_header_into(self, buffer, offset: int, payload_length: int):
+        """
+        Writes packet header to the buffer at the specified offset. Payload
+        is already written to the buffer right after the header
+
+        :param buffer: writable buffer
+        :param offset: offset of the header in the buffer
+        :param payload_length: length of the written payload in bytes
+        """
         raise NotImplementedError
 
     @staticmethod
@@ -92,20 +149,62 @@ class Packet(ABC):
     def __contains__(self, key):
         return self[key] is not None
 
+    def stack(self, other):
+        """
+        Performs in-place layer stacking. Puts right packet to the payload of
+        the left one without copying any of them, so both packets become the
+        parts of the same stack. Returns 'self', so calls can be chained:
+        'ip.stack(tcp).stack(payload)'
+
+        :param other: either a Packet instance which doesn't belong to
+            another stack or raw bytes
+        """
+        other = self._to_packet(other)
+        if other.under_layer is not None:
+            raise ValueError("Packet is already stacked on top "
+                             "of another layer")
+        self.add_payload(other)
+        return self
+
     def __truediv__(self, other):
         """
         Performs layer stacking. Puts right packet to the payload of the left
         one. If the right packet already has the upper layer packet, then
-        checks all upper layers until packet without payload will be found
+        checks all upper layers until packet without payload will be found.
+        Both operands are copied, use 'stack' to avoid copying
 
         :param other: either a Packet instance or raw bytes
         """
-        if isinstance(other, (bytes, bytearray)):
-            from nally.core.layers.raw_packet import RawPacket
-            other = RawPacket(other)
-        if not isinstance(other, Packet):
-            raise ValueError("Underlying packet should be Packet instance")
+        other = self._to_packet(other)
         self_copy = self.clone()
         other_copy = other.clone()
         self_copy.add_payload(other_copy)
         return self_copy
+
+    def _link_payload(self, payload):
+        """
+        Puts decoded payload to the packet, used by 'from_bytes'
+        implementations instead of 'stack', since freshly decoded layers
+        don't belong to another stack. Returns 'self'
+
+        :param payload: either a Packet instance or raw bytes
+        """
+        if not isinstance(payload, Packet):
+            from nally.core.layers.raw_packet import RawPacket
+            payload = RawPacket(payload)
+        payload._under_layer = self
+        self._upper_layer = payload
+        return self
+
+    @staticmethod
+    def _to_packet(other):
+        """
+        Wraps raw bytes into RawPacket, validates that argument
+        is Packet instance otherwise
+        """
+        if isinstance(other, (bytes, bytearray, memoryview)):
+            from nally.core.layers.raw_packet import RawPacket
+            other = RawPacket(other)
+        if not isinstance(other, Packet):
+            raise ValueError("Underlying packet should be Packet instance")
+        return other
@@ -0,0 +1,298 @@
+import socket
+import struct
+from array import array
+from typing import Iterable, List
+
+from nally.core.layers.link.ethernet.ethernet_packet import EthernetPacket
+from nally.core.layers.link.proto_type import EtherType
+from nally.core.layers.transport.tcp.tcp_utils import TcpUtils
+from nally.core.layers.transport.udp.udp_packet import UdpPacket
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+class PacketBatch:
+    """
+    Columnar representation of the batch of captured Ethernet frames. Instead
+    of building Packet object per frame, header fields of the common
+    Ethernet/IPv4/TCP/UDP layouts are extracted to columns, so filtering and
+    aggregation can be performed on the whole columns.
+
+    If NumPy is available, then columns are extracted with vectorized
+    operations and stored in the structured array (see 'table'), otherwise
+    columns are 'array.array' instances. Fields of the missing layers
+    (e.g. ports of ICMP packet) are set to zero
+    """
+
+    COLUMNS = (
+        # (column name, 'array' type code, NumPy type)
+        ("length", "L", "u4"),
+        ("dest_mac", "Q", "u8"),
+        ("source_mac", "Q", "u8"),
+        ("ether_type", "H", "u2"),
+        ("source_addr", "L", "u4"),
+        ("dest_addr", "L", "u4"),
+        ("protocol", "B", "u1"),
+        ("ttl", "B", "u1"),
+        ("source_port", "H", "u2"),
+        ("dest_port", "H", "u2"),
+        ("tcp_flags", "H", "u2"),
+        ("sequence_number", "L", "u4"),
+        ("ack_number", "L", "u4"),
+        ("payload_offset", "L", "u4"),
+    )
+    """
+    Defines columns of the batch. MAC and IP addresses are stored as
+    integers, 'payload_offset' is the offset of the upper-most decoded
+    layer payload in the frame
+    """
+
+    IP_V4_MAX_HEADER_WITH_OPTIONS_LENGTH_BYTES = 60
+    """Max IPv4 header length in bytes including options"""
+
+    MAX_HEADERS_LENGTH_BYTES = EthernetPacket.ETHERNET_HEADER_LENGTH_BYTES \
+        + IP_V4_MAX_HEADER_WITH_OPTIONS_LENGTH_BYTES \
+        + TcpUtils.TCP_HEADER_LENGTH_BYTES
+    """
+    Max number of bytes of the frame needed to extract all columns:
+    Ethernet header, IPv4 header with options and TCP header without options
+    """
+
+    ETHERNET_HEADER_FORMAT = struct.Struct("!HIHIH")
+    """
+    Ethernet header, MAC addresses are split to 2 + 4 bytes integers
+    """
+    IP_HEADER_FORMAT = struct.Struct("!B7xBB2xII")
+    """
+    IPv4 header, includes Version + IHL, TTL, Protocol, Source
+    and Destination addresses fields
+    """
+    TCP_HEADER_FORMAT = struct.Struct("!HHIIH")
+    """
+    TCP header, includes ports, sequence and acknowledgment numbers,
+    data offset and flags fields
+    """
+    UDP_HEADER_FORMAT = struct.Struct("!HH")
+    """UDP header ports"""
+
+    def __init__(self, columns: dict, table=None):
+        """
+        :param columns: columns by names
+        :param table: NumPy structured array which holds the columns
+        """
+        self.__columns = columns
+        self.__table = table
+
+    @staticmethod
+    def decode(frames: Iterable[bytes]):
+        """
+        Decodes batch of raw Ethernet frames to the columns
+
+        :param frames: raw Ethernet frames
+        :return: PacketBatch instance
+        """
+        if numpy is not None:
+            return PacketBatch._decode_vectorized(list(frames))
+        return PacketBatch._decode(frames)
+
+    @property
+    def column_names(self) -> List[str]:
+        return [column[0] for column in self.COLUMNS]
+
+    @property
+    def table(self):
+        """
+        Returns NumPy structured array with all columns, or None if NumPy
+        isn't available
+        """
+        return self.__table
+
+    def __getitem__(self, column_name: str):
+        return self.__columns[column_name]
+
+    def __len__(self) -> int:
+        return len(self.__columns["length"])
+
+    def __str__(self) -> str:
+        return f"PacketBatch(size={len(self)})"
+
+    @staticmethod
+    def _decode(frames: Iterable[bytes]):
+        """
+        Decodes frames one by one using precompiled header formats
+        """
+        columns = {name: array(code) for name, code, _ in PacketBatch.COLUMNS}
+        ethernet_header = PacketBatch.ETHERNET_HEADER_FORMAT
+        ip_header = PacketBatch.IP_HEADER_FORMAT
+        tcp_header = PacketBatch.TCP_HEADER_FORMAT
+        udp_header = PacketBatch.UDP_HEADER_FORMAT
+        eth_len = EthernetPacket.ETHERNET_HEADER_LENGTH_BYTES
+        empty_row = dict.fromkeys(columns, 0)
+        for frame in frames:
+            row = empty_row.copy()
+            frame_len = len(frame)
+            row["length"] = frame_len
+            row["payload_offset"] = min(eth_len, frame_len)
+            if frame_len >= eth_len:
+                dst_hi, dst_lo, src_hi, src_lo, ether_type = \
+                    ethernet_header.unpack_from(frame)
+                row["dest_mac"] = dst_hi << 32 | dst_lo
+                row["source_mac"] = src_hi << 32 | src_lo
+                row["ether_type"] = ether_type
+                if ether_type == EtherType.IPV4 \
+                        and frame_len >= eth_len + ip_header.size:
+                    ver_ihl, ttl, protocol, src, dst = \
+                        ip_header.unpack_from(frame, eth_len)
+                    row["ttl"] = ttl
+                    row["protocol"] = protocol
+                    row["source_addr"] = src
+                    row["dest_addr"] = dst
+                    l4_offset = eth_len + (ver_ihl & 0xf) * 4
+                    row["payload_offset"] = l4_offset
+                    if protocol == socket.IPPROTO_TCP \
+                            and frame_len >= l4_offset + tcp_header.size:
+                        sport, dport, seq, ack, offset_flags = \
+                            tcp_header.unpack_from(frame, l4_offset)
+                        row["source_port"] = sport
+                        row["dest_port"] = dport
+                        row["sequence_number"] = seq
+                        row["ack_number"] = ack
+                        row["tcp_flags"] = offset_flags & 0x1ff
+                        row["payload_offset"] = \
+                            l4_offset + (offset_flags >> 12) * 4
+                    elif protocol == socket.IPPROTO_UDP \
+                            and frame_len >= l4_offset \
+                            + UdpPacket.UDP_HEADER_LENGTH_BYTES:
+                        sport, dport = udp_header.unpack_from(frame, l4_offset)
+                        row["source_port"] = sport
+                        row["dest_port"] = dport
+                        row["payload_offset"] = \
+                            l4_offset + UdpPacket.UDP_HEADER_LENGTH_BYTES
+            for name, value in row.items():
+                columns[name].append(value)
+        return PacketBatch(columns)
+
+    @staticmethod
+    def _decode_vectorized(frames: List[bytes]):
+        """
+        Copies headers of all frames to the single matrix and extracts
+        columns using NumPy vectorized operations
+        """
+        headers_len = PacketBatch.MAX_HEADERS_LENGTH_BYTES
+        eth_len = EthernetPacket.ETHERNET_HEADER_LENGTH_BYTES
+        frames_count = len(frames)
+        table = numpy.zeros(
+            frames_count,
+            dtype=[(name, dtype) for name, _, dtype in PacketBatch.COLUMNS]
+        )
+        if frames_count == 0:
+            return PacketBatch.__from_table(table)
+
+        # matrix of frame headers, each row is padded with zeros
+        headers = numpy.frombuffer(
+            b"".join(
+                bytes(frame[:headers_len]).ljust(headers_len, b"\0")
+                for frame in frames
+            ),
+            dtype=numpy.uint8
+        ).reshape(frames_count, headers_len)
+        rows = numpy.arange(frames_count)[:, None]
+
+        def unpack(offsets, size: int):
+            """
+            Unpacks big-endian unsigned integers of 'size' bytes
+            starting at per-row 'offsets'
+            """
+            columns = headers[rows, offsets[:, None] + numpy.arange(size)]
+            value = numpy.zeros(frames_count, dtype=numpy.uint64)
+            for i in range(size):
+                value = (value << numpy.uint64(8)) | columns[:, i]
+            return value
+
+        def offsets(offset: int):
+            return numpy.full(frames_count, offset)
+
+        length = numpy.fromiter(
+            (len(frame) for frame in frames),
+            dtype=numpy.int64,
+            count=frames_count
+        )
+        table["length"] = length
+        is_ethernet = length >= eth_len
+        ether_type = unpack(offsets(12), 2)
+        table["dest_mac"] = numpy.where(is_ethernet, unpack(offsets(0), 6), 0)
+        table["source_mac"] = numpy.where(
+            is_ethernet,
+            unpack(offsets(6), 6),
+            0
+        )
+        table["ether_type"] = numpy.where(is_ethernet, ether_type, 0)
+        payload_offset = numpy.minimum(length, eth_len)
+
+        is_ip = is_ethernet & (ether_type == int(EtherType.IPV4)) \
+            & (length >= eth_len + PacketBatch.IP_HEADER_FORMAT.size)
+        protocol = headers[:, eth_len + 9]
+        table["protocol"] = numpy.where(is_ip, protocol, 0)
+        table["ttl"] = numpy.where(is_ip, headers[:, eth_len + 8], 0)
+        table["source_addr"] = numpy.where(
+            is_ip,
+            unpack(offsets(eth_len + 12), 4),
+            0
+        )
+        table["dest_addr"] = numpy.where(
+            is_ip,
+            unpack(offsets(eth_len + 16), 4),
+            0
+        )
+        l4_offset = eth_len + (headers[:, eth_len] & 0xf).astype(int) * 4
+        payload_offset = numpy.where(is_ip, l4_offset, payload_offset)
+
+        is_tcp = is_ip & (protocol == socket.IPPROTO_TCP) \
+            & (length >= l4_offset + PacketBatch.TCP_HEADER_FORMAT.size)
+        is_udp = is_ip & (protocol == socket.IPPROTO_UDP) \
+            & (length >= l4_offset + UdpPacket.UDP_HEADER_LENGTH_BYTES)
+        is_transport = is_tcp | is_udp
+        table["source_port"] = numpy.where(
+            is_transport,
+            unpack(l4_offset, 2),
+            0
+        )
+        table["dest_port"] = numpy.where(
+            is_transport,
+            unpack(l4_offset + 2, 2),
+            0
+        )
+        table["sequence_number"] = numpy.where(
+            is_tcp,
+            unpack(l4_offset + 4, 4),
+            0
+        )
+        table["ack_number"] = numpy.where(
+            is_tcp,
+            unpack(l4_offset + 8, 4),
+            0
+        )
+        offset_flags = unpack(l4_offset + 12, 2)
+        table["tcp_flags"] = numpy.where(is_tcp, offset_flags & 0x1ff, 0)
+        payload_offset = numpy.where(
+            is_tcp,
+            l4_offset + (offset_flags >> 12).astype(int) * 4,
+            payload_offset
+        )
+        payload_offset = numpy.where(
+            is_udp,
+            l4_offset + UdpPacket.UDP_HEADER_LENGTH_BYTES,
+            payload_offset
+        )
+        table["payload_offset"] = payload_offset
+        return PacketBatch.__from_table(table)
+
+    @staticmethod
+    def __from_table(table):
+        return PacketBatch(
+            {name: table[name] for name, _, _ in PacketBatch.COLUMNS},
+            table
+        )
@@ -0,0 +1,226 @@
+import socket
+import struct
+from typing import Dict, List, NamedTuple, Tuple
+
+from nally.core.layers.inet.icmp.icmp_packet import IcmpPacket
+from nally.core.layers.inet.ip.ip_packet import IpPacket
+from nally.core.layers.packet import Packet
+from nally.core.layers.transport.tcp.tcp_packet import TcpPacket
+from nally.core.layers.transport.udp.udp_packet import UdpPacket
+from nally.core.utils.utils import Utils
+
+
+class TemplateChecksum(NamedTuple):
+    """
+    Describes checksum of the serialized packet
+    """
+    offset: int
+    """Offset of the checksum field in the frame"""
+    data_offset: int
+    """
+    Offset of the checksummed data in the frame, used to align patched
+    fields to 16 bits words of the checksum
+    """
+    zero_checksum_disabled: bool = False
+    """
+    If True, then zero checksum means that checksum isn't used, and
+    computed zero checksum should be transmitted as all ones (UDP)
+    """
+
+
+class TemplateField(NamedTuple):
+    """
+    Describes patchable field of the serialized packet
+    """
+    offset: int
+    """Offset of the field in the frame"""
+    field_format: struct.Struct
+    """Format of the field value"""
+    checksums: List[TemplateChecksum]
+    """Checksums covering the field"""
+
+
+class PacketTemplate:
+    """
+    Layer stack serialized once and used to stamp out frames which differ
+    only in a few header fields (e.g. scanning probes). Stamping patches the
+    fields in the reusable buffer and updates IP, TCP, UDP and ICMP checksums
+    incrementally instead of serializing the whole stack again.
+
+    Supported fields:
+        * IP: 'source_addr', 'dest_addr', 'identification', 'ttl'
+        * TCP: 'source_port', 'dest_port', 'sequence_number', 'ack_number'
+        * UDP: 'source_port', 'dest_port'
+        * ICMP echo: 'identifier', 'seq_number'
+    """
+
+    ADDR_FORMAT = struct.Struct("!4s")
+    UINT8_FORMAT = struct.Struct("!B")
+    UINT16_FORMAT = struct.Struct("!H")
+    UINT32_FORMAT = struct.Struct("!I")
+
+    def __init__(self, packet: Packet):
+        """
+        :param packet: layer stack which will be serialized
+            to the template buffer
+        """
+        self.__buffer = bytearray(packet.wire_length())
+        packet.serialize_into(self.__buffer)
+        self.__view = memoryview(self.__buffer)
+        self.__fields: Dict[str, TemplateField] = {}
+        self.__resolve_fields(packet)
+
+    def stamp(self, **fields) -> memoryview:
+        """
+        Patches the passed fields in the template buffer and returns the
+        updated frame. Returned view references the reusable buffer, so it
+        will be overwritten by the next call
+
+        :param fields: field values by names, IP addresses can be passed as
+            strings
+        :return: patched frame
+        """
+        for field_name, value in fields.items():
+            self.set_field(field_name, value)
+        return self.__view
+
+    def set_field(self, field_name: str, value):
+        """
+        Patches single field in the template buffer and updates
+        all checksums covering it
+
+        :raises: ValueError: if field isn't supported by the template
+        """
+        field = self.__fields.get(field_name)
+        if field is None:
+            raise ValueError(f"Field {field_name} can't be patched, "
+                             f"available fields: {self.fields}")
+        if isinstance(value, str):
+            value = socket.inet_aton(value)
+        buffer = self.__buffer
+        field_offset = field.offset
+        field_end = field_offset + field.field_format.size
+        new_value = field.field_format.pack(value)
+        if buffer[field_offset:field_end] == new_value:
+            return
+        spans = [
+            self.__aligned_span(field, checksum.data_offset)
+            for checksum in field.checksums
+        ]
+        old_words = [bytes(buffer[start:end]) for start, end in spans]
+        buffer[field_offset:field_end] = new_value
+        for checksum, (start, end), old_bytes \
+                in zip(field.checksums, spans, old_words):
+            checksum_end = checksum.offset + 2
+            checksum_bytes = buffer[checksum.offset:checksum_end]
+            if checksum.zero_checksum_disabled \
+                    and checksum_bytes == b"\0\0":
+                continue
+            checksum_bytes = Utils.update_checksum(
+                checksum_bytes,
+                old_bytes,
+                buffer[start:end]
+            )
+            if checksum.zero_checksum_disabled \
+                    and checksum_bytes == b"\0\0":
+                checksum_bytes = b"\xff\xff"
+            buffer[checksum.offset:checksum_end] = checksum_bytes
+
+    def to_bytes(self) -> bytes:
+        """
+        Returns copy of the current frame
+        """
+        return bytes(self.__buffer)
+
+    @property
+    def fields(self) -> List[str]:
+        """
+        Returns names of the fields which can be patched
+        """
+        return list(self.__fields)
+
+    @staticmethod
+    def __aligned_span(
+            field: TemplateField,
+            data_offset: int
+    ) -> Tuple[int, int]:
+        """
+        Returns offsets of the field extended to the 16 bits words of the
+        checksummed data starting at 'data_offset'
+        """
+        start = field.offset - (field.offset - data_offset) % 2
+        end = field.offset + field.field_format.size
+        end += (end - data_offset) % 2
+        return start, end
+
+    def __resolve_fields(self, packet: Packet):
+        """
+        Walks through the layer stack and records offsets
+        of the patchable fields
+        """
+        fields = self.__fields
+        layer = packet
+        offset = 0
+        ip_offset = None
+        while layer is not None:
+            if isinstance(layer, IpPacket):
+                ip_offset = offset
+                ip_checksum = [TemplateChecksum(offset + 10, offset)]
+                fields["identification"] = TemplateField(
+                    offset + 4, self.UINT16_FORMAT, ip_checksum
+                )
+                fields["ttl"] = TemplateField(
+                    offset + 8, self.UINT8_FORMAT, ip_checksum
+                )
+                fields["source_addr"] = TemplateField(
+                    offset + 12, self.ADDR_FORMAT, ip_checksum
+                )
+                fields["dest_addr"] = TemplateField(
+                    offset + 16, self.ADDR_FORMAT, ip_checksum
+                )
+            elif isinstance(layer, (TcpPacket, UdpPacket)):
+                is_tcp = isinstance(layer, TcpPacket)
+                checksum = [
+                    TemplateChecksum(
+                        offset + (16 if is_tcp else 6),
+                        offset,
+                        zero_checksum_disabled=not is_tcp
+                    )
+                ]
+                fields["source_port"] = TemplateField(
+                    offset, self.UINT16_FORMAT, checksum
+                )
+                fields["dest_port"] = TemplateField(
+                    offset + 2, self.UINT16_FORMAT, checksum
+                )
+                if is_tcp:
+                    fields["sequence_number"] = TemplateField(
+                        offset + 4, self.UINT32_FORMAT, checksum
+                    )
+                    fields["ack_number"] = TemplateField(
+                        offset + 8, self.UINT32_FORMAT, checksum
+                    )
+                if ip_offset is not None:
+                    # IP addresses are the part of the pseudo header, so
+                    # they are covered by the transport layer checksum too
+                    for addr_field in ("source_addr", "dest_addr"):
+                        ip_field = fields[addr_field]
+                        fields[addr_field] = ip_field._replace(
+                            checksums=ip_field.checksums + [
+                                checksum[0]._replace(data_offset=ip_offset)
+                            ]
+                        )
+                # upper layers don't contain patchable fields
+                break
+            elif isinstance(layer, IcmpPacket):
+                if "identifier" in layer.rest_of_header:
+                    checksum = [TemplateChecksum(offset + 2, offset)]
+                    fields["identifier"] = TemplateField(
+                        offset + 4, self.UINT16_FORMAT, checksum
+                    )
+                    fields["seq_number"] = TemplateField(
+                        offset + 6, self.UINT16_FORMAT, checksum
+                    )
+                break
+            offset += layer.header_length()
+            layer = layer.upper_layer
@@ -0,0 +1,112 @@
+import copy
+import struct
+
+from nally.core.layers.layer import Layer
+from nally.core.layers.packet import Packet
+
+
+class PacketView:
+    """
+    Mixin for lazily decoded packets. View wraps a shared 'memoryview' of the
+    captured frame plus offsets of the layer inside it, header fields are
+    unpacked only when the corresponding property is read and the upper layer
+    is decoded only when it's accessed for the first time.
+
+    Views are read-only: they don't copy the frame, so the underlying buffer
+    should stay unchanged while the view is in use. Use 'clone()' to get the
+    independent copy of the view
+    """
+
+    UINT8 = struct.Struct("!B")
+    UINT16 = struct.Struct("!H")
+    UINT32 = struct.Struct("!I")
+
+    def __init__(
+            self,
+            frame,
+            offset: int = 0,
+            end: int = None,
+            max_layer: Layer = None
+    ):
+        """
+        :param frame: captured frame, any object which supports
+            buffer protocol
+        :param offset: offset of the layer header in the frame
+        :param end: offset of the layer end in the frame, if not specified,
+            then layer is considered to take the rest of the frame
+        :param max_layer: the highest layer which should be decoded, payload
+            of this layer is kept as RawPacket. If not specified, then all
+            known layers are decoded
+        """
+        Packet.__init__(self)
+        self._view = (
+            frame
+            if isinstance(frame, memoryview)
+            else memoryview(frame)
+        )
+        self._offset = offset
+        self._end = (
+            len(self._view)
+            if end is None
+            else min(end, len(self._view))
+        )
+        self._max_layer = max_layer
+        self._upper_layer_decoded = False
+
+    def _decode_upper_layer(self):
+        """
+        Decodes the upper layer from the payload of the view, returns None if
+        payload is empty
+        """
+        raise NotImplementedError
+
+    def _unpack(self, field_struct: struct.Struct, field_offset: int):
+        """
+        Unpacks single header field
+
+        :param field_struct: precompiled format of the field
+        :param field_offset: offset of the field relative to the layer header
+        """
+        return field_struct.unpack_from(
+            self._view,
+            self._offset + field_offset
+        )[0]
+
+    def _slice(self, start: int, end: int) -> bytes:
+        """
+        Copies bytes of the header field, offsets are relative to
+        the layer header
+        """
+        return bytes(self._view[self._offset + start:self._offset + end])
+
+    @property
+    def upper_layer(self):
+        if not self._upper_layer_decoded:
+            self._upper_layer_decoded = True
+            upper_layer = self._decode_upper_layer()
+            if upper_layer is not None:
+                upper_layer.under_layer = self
+            self._upper_layer = upper_layer
+        return self._upper_layer
+
+    @upper_layer.setter
+    def upper_layer(self, packet):
+        if not isinstance(packet, Packet):
+            raise ValueError("Upper layer packet should be Packet instance")
+        self._upper_layer_decoded = True
+        self._upper_layer = packet
+
+    def __deepcopy__(self, memo):
+        # memoryview can't be copied, so copy only the bytes of this layer
+        # and re-create the view on top of them
+        view_copy = type(self)(
+            bytes(self._view[self._offset:self._end]),
+            max_layer=self._max_layer
+        )
+        memo[id(self)] = view_copy
+        if self._under_layer is not None:
+            view_copy._under_layer = copy.deepcopy(self._under_layer, memo)
+        if self._upper_layer_decoded:
+            view_copy._upper_layer_decoded = True
+            view_copy._upper_layer = copy.deepcopy(self._upper_layer, memo)
+        return view_copy
@@ -14,6 +14,12 @@ class RawPacket(Packet):
     def to_bytes(self):
         return self.__raw_packet
 
+    def header_length(self) -> int:
+        return len(self.__raw_packet)
+
+    def _pack_header_into(self, buffer, offset: int, payload_length: int):
+        buffer[offset:offset + len(self.__raw_packet)] = self.__raw_packet
+
     @staticmethod
     def from_bytes(bytes_packet: bytes):
         return RawPacket(bytes_packet)
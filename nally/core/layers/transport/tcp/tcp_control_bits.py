@@ -1,5 +1,4 @@
 from nally.core.utils.bit_flags import BitFlags
-from nally.core.utils.utils import Utils
 
 
 class TcpControlBits(BitFlags):
@@ -27,6 +26,9 @@ class TcpControlBits(BitFlags):
     FIN = 1
     """Bit mask used to check or set FIN flag """
 
+    BIT_LENGTH = 9
+    """Bit length of the control flags field"""
+
     def __init__(
             self,
             ns=False,
@@ -81,23 +83,14 @@ class TcpControlBits(BitFlags):
     @staticmethod
     def from_int(bits: int):
         """
-        Creates TcpControlBits instance from integer
+        Returns TcpControlBits instance for integer. Instances are shared
+        between all callers and can't be modified
 
-        :param int bits: integer which represents bit flags
-        :return: TcpControlBits instance
+        :param int bits: integer which represents bit flags, bits above
+            the control flags are ignored
+        :return: shared TcpControlBits instance
         """
-        is_flag_set: callable = Utils.is_bit_set
-        return TcpControlBits(
-            is_flag_set(bits, TcpControlBits.NS),
-            is_flag_set(bits, TcpControlBits.CWR),
-            is_flag_set(bits, TcpControlBits.ECE),
-            is_flag_set(bits, TcpControlBits.URG),
-            is_flag_set(bits, TcpControlBits.ACK),
-            is_flag_set(bits, TcpControlBits.PSH),
-            is_flag_set(bits, TcpControlBits.RST),
-            is_flag_set(bits, TcpControlBits.SYN),
-            is_flag_set(bits, TcpControlBits.FIN)
-        )
+        return _SHARED_CONTROL_BITS[bits & 0x1ff]
 
     @property
     def ns(self) -> bool:
@@ -160,3 +153,9 @@ class TcpControlBits(BitFlags):
         if self.fin:
             flags_str += "fin"
         return flags_str.strip()
+
+
+_SHARED_CONTROL_BITS = BitFlags.shared_instances(
+    TcpControlBits,
+    TcpControlBits.BIT_LENGTH
+)
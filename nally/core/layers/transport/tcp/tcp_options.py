@@ -67,6 +67,7 @@ class TcpOptions:
                 (like TIMESTAMPS, SACK etc)
         """
         self.__options = []
+        self.__options_bytes = None
         if options is None:
             options = []
         for option in options:
@@ -105,6 +106,13 @@ class TcpOptions:
         :raises: ValueError: if options length is more that max allowed value
             (40 bytes)
         """
+        # options are immutable, so encode them only once since they're
+        # needed both for header length computation and serialization
+        if self.__options_bytes is None:
+            self.__options_bytes = self.__encode()
+        return self.__options_bytes
+
+    def __encode(self) -> bytes:
         options_bytes = bytearray()
         for option in self.__options:
             opt_name: str = option[0]
@@ -134,7 +142,7 @@ class TcpOptions:
         # pad with zeros to make the bit length divisible by 32
         options_bytes += b"\x00" * (3 - ((len(options_bytes) + 3) % 4))
         TcpUtils.validate_options_length(options_bytes)
-        return options_bytes
+        return bytes(options_bytes)
 
     @staticmethod
     def from_bytes(options_bytes: bytes):
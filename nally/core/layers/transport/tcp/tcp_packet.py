@@ -1,12 +1,11 @@
-import struct
-
+from nally.core.layers.header_schema import HeaderField, HeaderSchema
 from nally.core.layers.packet import Packet
 from nally.core.layers.transport.tcp.tcp_control_bits import TcpControlBits
 from nally.core.layers.transport.tcp.tcp_utils import TcpUtils
 from nally.core.layers.transport.tcp.tcp_options import TcpOptions
 from nally.core.layers.transport.transport_layer_utils \
     import TransportLayerUtils
-from nally.core.utils.utils import Utils
+from nally.core.utils.checksum_utils import ChecksumUtils
 
 
 class TcpPacket(Packet):
@@ -14,17 +13,22 @@ class TcpPacket(Packet):
     Represents TCP (Transmission Control Protocol) packet
     """
 
-    TCP_HEADER_FORMAT = "!HHIIHHHH"
+    TCP_HEADER_SCHEMA = HeaderSchema("tcp", [
+        HeaderField("source_port", 16),
+        HeaderField("dest_port", 16),
+        HeaderField("sequence_number", 32),
+        HeaderField("ack_number", 32),
+        HeaderField("data_offset", 4, TcpUtils.TCP_HEADER_LENGTH),
+        HeaderField("reserved", 3,
+                    validator=TcpUtils.validate_reserved_bits),
+        HeaderField("flags", 9, validator=TcpControlBits.from_int),
+        HeaderField("win_size", 16),
+        HeaderField("checksum", 16),
+        HeaderField("urg_pointer", 16),
+    ])
     """
-    Defines TCP header format without options:
-        * Source port field : 2 bytes
-        * Destination port field : 2 bytes
-        * Sequence number field : 4 bytes
-        * Acknowledgment number field : 4 bytes
-        * Data offset field + 3 reserved bits + 9 bit flags : 2 bytes
-        * Window size field : 2 bytes
-        * Checksum field : 2 bytes
-        * Urgent pointer field : 2 bytes
+    Defines TCP header format without options,
+    see https://tools.ietf.org/html/rfc793#section-3.1
     """
 
     def __init__(
@@ -79,102 +83,74 @@ class TcpPacket(Packet):
         self.__urg_pointer = urg_pointer
         self.__options = options
 
-    def to_bytes(self):
-        options_bytes = self.__options.to_bytes()
+    def header_length(self) -> int:
+        return TcpUtils.TCP_HEADER_LENGTH_BYTES + len(self.options.to_bytes())
+
+    def _pack_header_into(self, buffer, offset: int, payload_length: int):
+        options_bytes = self.options.to_bytes()
         # make sure that options bit length is divisible by 32
         # should not fail here since all required
         # padding already performed in TcpOptions class
         assert len(options_bytes) % 4 == 0
         # calculate data offset value in 32-bits words
         data_offset = TcpUtils.TCP_HEADER_LENGTH + len(options_bytes) // 4
-        # concat 4 data offset bits + 3 reserved zero bits + 9
-        # control bit flags
-        data_offset_flags = data_offset << 12 | self.__flags.flags
-
-        header_fields = [
-            self.__source_port,
-            self.__dest_port,
-            self.__sequence_number,
-            self.__ack_number,
-            data_offset_flags,
-            self.__win_size,
-            0,
-            self.__urg_pointer,
-        ]
-
-        # allocate 20 bytes buffer to put header in
-        header_buffer = bytearray(TcpUtils.TCP_HEADER_LENGTH_BYTES)
         # pack header without checksum to the buffer
-        struct.pack_into(
-            self.TCP_HEADER_FORMAT,
-            header_buffer,
-            0,  # leave checksum field empty
-            *header_fields
+        self.TCP_HEADER_SCHEMA.pack_into(
+            buffer,
+            offset,
+            source_port=self.source_port,
+            dest_port=self.dest_port,
+            sequence_number=self.sequence_number,
+            ack_number=self.ack_number,
+            data_offset=data_offset,
+            flags=self.flags.flags,
+            win_size=self.win_size,
+            urg_pointer=self.urg_pointer
         )
+        options_offset = offset + TcpUtils.TCP_HEADER_LENGTH_BYTES
+        buffer[options_offset:options_offset + len(options_bytes)] = \
+            options_bytes
 
-        payload = self.raw_payload
+        segment_len = TransportLayerUtils.validate_length(
+            data_offset * 4 + payload_length
+        )
         # generate pseudo header using underlying IP packet
         pseudo_header = TransportLayerUtils.get_pseudo_header(
             self,
-            data_offset * 4 + len(payload)
+            segment_len
         )
-        # calculate checksum
-        checksum_bytes = Utils.calc_checksum(
-            pseudo_header + header_buffer + options_bytes + payload
+        # calculate checksum over pseudo header and segment without
+        # concatenating them
+        checksum_bytes = ChecksumUtils.calc_checksum(
+            pseudo_header,
+            memoryview(buffer)[offset:offset + segment_len]
         )
         # checksum takes 16-th and 17-th bytes of the header (counting from 0)
         # see https://tools.ietf.org/html/rfc793#section-3.1 for more details
-        header_buffer[16] = checksum_bytes[0]
-        header_buffer[17] = checksum_bytes[1]
-
-        return TransportLayerUtils.validate_packet_length(
-            bytes(header_buffer) + options_bytes + payload
-        )
+        buffer[offset + 16:offset + 18] = checksum_bytes
 
     @staticmethod
     def from_bytes(packet_bytes: bytes):
-        header_bytes = packet_bytes[:TcpUtils.TCP_HEADER_LENGTH_BYTES]
         payload_and_options = packet_bytes[TcpUtils.TCP_HEADER_LENGTH_BYTES:]
-        header_fields = struct.unpack(
-            TcpPacket.TCP_HEADER_FORMAT,
-            header_bytes
-        )
-
-        source_port = header_fields[0]
-        dest_port = header_fields[1]
-        seq_num = header_fields[2]
-        ack_num = header_fields[3]
-        data_offset_flags = header_fields[4]
-        win_size = header_fields[5]
-        # 6-th item is checksum, don't need to extract it,
-        # since it will be calculated later
-        urg_pointer = header_fields[7]
-
-        # take first 4 bits
-        data_offset = data_offset_flags >> 12
-        # take 5-th, 6-th, 7-th bits
-        reserved_bits = (data_offset_flags >> 9) & 7
-        if reserved_bits != 0:
-            raise ValueError("Reserved bits should be set to zero")
-        # take last 9 bits
-        flags = TcpControlBits.from_int(data_offset_flags & 511)
+        # checksum isn't extracted, since it will be calculated later
+        tcp_header = TcpPacket.__new__(TcpPacket)
+        Packet.__init__(tcp_header)
+        # fields are validated by the schema, so the constructor is skipped
+        tcp_header.__source_port, tcp_header.__dest_port, \
+            tcp_header.__sequence_number, tcp_header.__ack_number, \
+            data_offset, _, tcp_header.__flags, tcp_header.__win_size, _, \
+            tcp_header.__urg_pointer = \
+            TcpPacket.TCP_HEADER_SCHEMA.decode(packet_bytes)
 
         # compute options field length in bytes
         options_len = (data_offset - TcpUtils.TCP_HEADER_LENGTH) * 4
-        options = TcpOptions.from_bytes(payload_and_options[:options_len])
+        tcp_header.__options = \
+            TcpOptions.from_bytes(payload_and_options[:options_len])
 
-        tcp_header = TcpPacket(
-            dest_port=dest_port,
-            source_port=source_port,
-            sequence_number=seq_num,
-            ack_number=ack_num,
-            flags=flags,
-            win_size=win_size,
-            urg_pointer=urg_pointer,
-            options=options,
-        )
         payload = payload_and_options[options_len:]
-        return tcp_header / payload if len(payload) else tcp_header
+        return (
+            tcp_header._link_payload(payload) if len(payload) else tcp_header
+        )
 
     def is_response(self, packet: Packet) -> bool:
         if TcpPacket not in packet:
@@ -206,7 +182,7 @@ class TcpPacket(Packet):
         else:
             # we expect that our ACK SN will be equal
             # to SN + length of the sent payload of the other packet
-            if tcp_layer.sequence_number + len(tcp_layer.raw_payload) \
+            if tcp_layer.sequence_number + tcp_layer.payload_length() \
                     != self.ack_number:
                 return False
         # here we know that 'self' is a valid response on TCP layer,
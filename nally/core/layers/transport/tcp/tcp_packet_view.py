@@ -0,0 +1,73 @@
+from functools import cached_property
+
+from nally.core.layers.packet_view import PacketView
+from nally.core.layers.raw_packet import RawPacket
+from nally.core.layers.transport.tcp.tcp_control_bits import TcpControlBits
+from nally.core.layers.transport.tcp.tcp_options import TcpOptions
+from nally.core.layers.transport.tcp.tcp_packet import TcpPacket
+from nally.core.layers.transport.tcp.tcp_utils import TcpUtils
+
+
+class TcpPacketView(PacketView, TcpPacket):
+    """
+    Lazily decoded TCP packet, see PacketView for details
+    """
+
+    @staticmethod
+    def from_bytes(packet_bytes: bytes):
+        return TcpPacketView(packet_bytes)
+
+    def _decode_upper_layer(self):
+        payload_offset = self._offset + self.data_offset * 4
+        if payload_offset >= self._end:
+            return None
+        return RawPacket(self._view[payload_offset:self._end])
+
+    @property
+    def source_port(self) -> int:
+        return self._unpack(self.UINT16, 0)
+
+    @property
+    def dest_port(self) -> int:
+        return self._unpack(self.UINT16, 2)
+
+    @property
+    def sequence_number(self) -> int:
+        return self._unpack(self.UINT32, 4)
+
+    @property
+    def ack_number(self) -> int:
+        return self._unpack(self.UINT32, 8)
+
+    @property
+    def data_offset(self) -> int:
+        """
+        Returns Data Offset field value, size of TCP header in 32-bit words
+        """
+        return self._unpack(self.UINT8, 12) >> 4
+
+    @cached_property
+    def flags(self) -> TcpControlBits:
+        # take last 9 bits
+        return TcpControlBits.from_int(self._unpack(self.UINT16, 12) & 511)
+
+    @property
+    def win_size(self) -> int:
+        return self._unpack(self.UINT16, 14)
+
+    @property
+    def checksum(self) -> int:
+        return self._unpack(self.UINT16, 16)
+
+    @property
+    def urg_pointer(self) -> int:
+        return self._unpack(self.UINT16, 18)
+
+    @cached_property
+    def options(self) -> TcpOptions:
+        return TcpOptions.from_bytes(
+            self._view[
+                self._offset + TcpUtils.TCP_HEADER_LENGTH_BYTES:
+                self._offset + self.data_offset * 4
+            ]
+        )
@@ -14,3 +14,9 @@ class TcpUtils:
             raise ValueError(f"Max options length is "
                              f"{TcpUtils.TCP_OPTIONS_MAX_LENGTH_BYTES} "
                              f"got {length}")
+
+    @staticmethod
+    def validate_reserved_bits(reserved_bits: int) -> int:
+        if reserved_bits != 0:
+            raise ValueError("Reserved bits should be set to zero")
+        return reserved_bits
@@ -31,11 +31,16 @@ class TransportLayerUtils:
 
     @staticmethod
     def validate_packet_length(packet: bytes):
-        if len(packet) > TransportLayerUtils.PACKET_MAX_LENGTH_BYTES:
+        TransportLayerUtils.validate_length(len(packet))
+        return packet
+
+    @staticmethod
+    def validate_length(length: int) -> int:
+        if length > TransportLayerUtils.PACKET_MAX_LENGTH_BYTES:
             raise ValueError(f"packet size can't be larger than "
                              f"{TransportLayerUtils.PACKET_MAX_LENGTH_BYTES} "
                              f"bytes")
-        return packet
+        return length
 
     @staticmethod
     def get_pseudo_header(packet: Packet, segment_len: int) -> bytes:
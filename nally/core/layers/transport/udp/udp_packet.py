@@ -1,9 +1,8 @@
-import struct
-
+from nally.core.layers.header_schema import HeaderField, HeaderSchema
 from nally.core.layers.packet import Packet
 from nally.core.layers.transport.transport_layer_utils \
     import TransportLayerUtils
-from nally.core.utils.utils import Utils
+from nally.core.utils.checksum_utils import ChecksumUtils
 
 
 class UdpPacket(Packet):
@@ -11,16 +10,17 @@ class UdpPacket(Packet):
     Represents UDP (User Datagram Protocol) datagram
     """
 
-    UDP_HEADER_FORMAT = "!HHHH"
+    UDP_HEADER_SCHEMA = HeaderSchema("udp", [
+        HeaderField("source_port", 16),
+        HeaderField("dest_port", 16),
+        HeaderField("length", 16),
+        HeaderField("checksum", 16),
+    ])
     """
-        Defines UDP header format:
-            * Source port field : 2 bytes
-            * Destination port field : 2 bytes
-            * Length field : 2 bytes
-            * Checksum field : 2 bytes
+    Defines UDP header format, see https://tools.ietf.org/html/rfc768
     """
 
-    UDP_HEADER_LENGTH_BYTES = 8
+    UDP_HEADER_LENGTH_BYTES = UDP_HEADER_SCHEMA.size
 
     def __init__(
             self,
@@ -39,51 +39,50 @@ class UdpPacket(Packet):
         self.__dest_port = TransportLayerUtils.validate_port_num(dest_port)
         self.__source_port = TransportLayerUtils.validate_port_num(source_port)
 
-    def to_bytes(self):
-        payload = self.raw_payload
-        length = self.UDP_HEADER_LENGTH_BYTES + len(payload)
-        header_fields = [self.__source_port, self.__dest_port, length, 0]
+    def header_length(self) -> int:
+        return self.UDP_HEADER_LENGTH_BYTES
 
-        # allocate 20 bytes buffer to put header in
-        header_buffer = bytearray(self.UDP_HEADER_LENGTH_BYTES)
+    def _pack_header_into(self, buffer, offset: int, payload_length: int):
+        length = TransportLayerUtils.validate_length(
+            self.UDP_HEADER_LENGTH_BYTES + payload_length
+        )
         # pack header without checksum to the buffer
-        struct.pack_into(
-            self.UDP_HEADER_FORMAT,
-            header_buffer,
-            0,
-            *header_fields
+        self.UDP_HEADER_SCHEMA.pack_into(
+            buffer,
+            offset,
+            source_port=self.source_port,
+            dest_port=self.dest_port,
+            length=length
         )
 
         # generate pseudo header using underlying IP packet
         pseudo_header = TransportLayerUtils.get_pseudo_header(self, length)
-        # calculate checksum
-        checksum_bytes = Utils.calc_checksum(
-            pseudo_header + header_buffer + payload
+        # calculate checksum over pseudo header and datagram without
+        # concatenating them
+        checksum_bytes = ChecksumUtils.calc_checksum(
+            pseudo_header,
+            memoryview(buffer)[offset:offset + length]
         )
         # checksum takes 6-th and 7-th bytes of the header (counting from 0)
         # see https://tools.ietf.org/html/rfc768 for more details
-        header_buffer[6] = checksum_bytes[0]
-        header_buffer[7] = checksum_bytes[1]
-
-        return TransportLayerUtils.validate_packet_length(
-            bytes(header_buffer) + payload
-        )
+        buffer[offset + 6:offset + 8] = checksum_bytes
 
     @staticmethod
     def from_bytes(packet_bytes: bytes):
-        header_bytes = packet_bytes[:UdpPacket.UDP_HEADER_LENGTH_BYTES]
         payload = packet_bytes[UdpPacket.UDP_HEADER_LENGTH_BYTES:]
-        header_fields = struct.unpack(
-            UdpPacket.UDP_HEADER_FORMAT,
-            header_bytes
+        # length and checksum fields will be calculated
+        # during serialization
+        udp_header = UdpPacket.__new__(UdpPacket)
+        Packet.__init__(udp_header)
+        # 16 bits ports are always valid, so the constructor is skipped
+        udp_header.__source_port, udp_header.__dest_port, _, _ = \
+            UdpPacket.UDP_HEADER_SCHEMA.decode(packet_bytes)
+        return (
+            udp_header._link_payload(payload)
+            if len(payload) > 0
+            else udp_header
         )
 
-        source_port = header_fields[0]
-        dest_port = header_fields[1]
-
-        udp_header = UdpPacket(dest_port=dest_port, source_port=source_port)
-        return udp_header / payload if len(payload) > 0 else udp_header
-
     def is_response(self, packet) -> bool:
         if UdpPacket not in packet:
             return False
@@ -110,7 +109,7 @@ class UdpPacket(Packet):
 
     @property
     def length(self) -> int:
-        return self.UDP_HEADER_LENGTH_BYTES + len(self.raw_payload)
+        return self.wire_length()
 
     def __eq__(self, other: object) -> bool:
         if isinstance(other, UdpPacket):
@@ -0,0 +1,37 @@
+from nally.core.layers.packet_view import PacketView
+from nally.core.layers.raw_packet import RawPacket
+from nally.core.layers.transport.udp.udp_packet import UdpPacket
+
+
+class UdpPacketView(PacketView, UdpPacket):
+    """
+    Lazily decoded UDP datagram, see PacketView for details
+    """
+
+    @staticmethod
+    def from_bytes(packet_bytes: bytes):
+        return UdpPacketView(packet_bytes)
+
+    def _decode_upper_layer(self):
+        payload_offset = self._offset + self.UDP_HEADER_LENGTH_BYTES
+        # frame may contain padding, so rely on the Length field
+        payload_end = min(self._offset + self.length, self._end)
+        if payload_offset >= payload_end:
+            return None
+        return RawPacket(self._view[payload_offset:payload_end])
+
+    @property
+    def source_port(self) -> int:
+        return self._unpack(self.UINT16, 0)
+
+    @property
+    def dest_port(self) -> int:
+        return self._unpack(self.UINT16, 2)
+
+    @property
+    def length(self) -> int:
+        return self._unpack(self.UINT16, 4)
+
+    @property
+    def checksum(self) -> int:
+        return self._unpack(self.UINT16, 6)
@@ -0,0 +1,283 @@
+import heapq
+import itertools
+import socket
+import struct
+import time
+from typing import Dict, List, Optional
+
+from nally.core.layers.inet.icmp.icmp_codes import IcmpType
+from nally.core.layers.inet.icmp.icmp_packet import IcmpPacket
+from nally.core.layers.inet.ip.ip_packet import IpPacket
+from nally.core.layers.link.arp.arp_packet import ArpPacket
+from nally.core.layers.link.arp.arp_utils import ArpOperation
+from nally.core.layers.link.proto_type import EtherType
+from nally.core.layers.packet import Packet
+from nally.core.layers.raw_packet import RawPacket
+from nally.core.layers.transport.tcp.tcp_packet import TcpPacket
+from nally.core.layers.transport.udp.udp_packet import UdpPacket
+
+
+class _OutstandingProbe:
+    """
+    Holds probe which waits for the response
+    """
+
+    __slots__ = ("probe", "keys", "deadline", "active")
+
+    def __init__(self, probe: Packet, keys: list, deadline: float):
+        self.probe = probe
+        self.keys = keys
+        self.deadline = deadline
+        self.active = True
+
+
+class ResponseMatcher:
+    """
+    Matches captured replies to the outstanding probes in O(1). Instead of
+    calling 'is_response' for every (probe, reply) pair, probes are indexed
+    by the protocol-specific keys which can be computed from the reply:
+        * TCP: IP addresses, ports and expected acknowledgment number. RST
+            without ACK flag is matched by its sequence number, which should
+            be equal to the acknowledgment number of the probe
+        * UDP: IP addresses and ports
+        * ICMP echo: IP addresses, identifier and sequence number
+        * ARP: requested and requester protocol addresses
+
+    Probes which weren't answered in time can be evicted using 'expire'
+    """
+
+    SEQ_NUMBER_MODULO = 2 ** 32
+
+    ICMP_ECHO_FORMAT = struct.Struct("!BBHHH")
+    """
+    Defines format of ICMP echo header, used to match ICMP replies which
+    weren't decoded to IcmpPacket:
+        * ICMP type : 1 byte
+        * ICMP code : 1 byte
+        * Checksum : 2 bytes
+        * Identifier : 2 bytes
+        * Sequence number : 2 bytes
+    """
+
+    def __init__(self, timeout: float = None, clock: callable = None):
+        """
+        :param timeout: default time in seconds after which unanswered probe
+            is expired, if None, then probes never expire by default
+        :param clock: function which returns current time in seconds,
+            'time.monotonic' by default
+        """
+        self.__timeout = timeout
+        self.__clock = clock if clock is not None else time.monotonic
+        self.__probes: Dict[tuple, List[_OutstandingProbe]] = {}
+        self.__deadlines = []
+        self.__counter = itertools.count()
+        self.__size = 0
+
+    def add(self, probe: Packet, timeout: float = None):
+        """
+        Registers outstanding probe
+
+        :param probe: sent packet
+        :param timeout: time in seconds after which probe is expired,
+            if not specified, then default timeout is used
+        :raises: ValueError: if probe protocol isn't supported
+        """
+        keys = self.probe_keys(probe)
+        if not keys:
+            raise ValueError(f"Can't compute matching keys for probe {probe}")
+        timeout = self.__timeout if timeout is None else timeout
+        deadline = (
+            self.__clock() + timeout
+            if timeout is not None
+            else None
+        )
+        outstanding_probe = _OutstandingProbe(probe, keys, deadline)
+        for key in keys:
+            self.__probes.setdefault(key, []).append(outstanding_probe)
+        if deadline is not None:
+            heapq.heappush(
+                self.__deadlines,
+                (deadline, next(self.__counter), outstanding_probe)
+            )
+        self.__size += 1
+
+    def match(self, reply: Packet) -> Optional[Packet]:
+        """
+        Finds the probe which is answered by the reply and removes it
+        from the outstanding probes
+
+        :param reply: captured packet
+        :return: matched probe or None if reply doesn't answer
+            any outstanding probe
+        """
+        for key in self.reply_keys(reply):
+            outstanding_probes = self.__probes.get(key)
+            if outstanding_probes:
+                outstanding_probe = outstanding_probes[0]
+                self.__remove(outstanding_probe)
+                return outstanding_probe.probe
+        return None
+
+    def expire(self, now: float = None) -> List[Packet]:
+        """
+        Removes probes which deadline is passed
+
+        :param now: current time, if not specified, then clock is used
+        :return: list of expired probes
+        """
+        now = self.__clock() if now is None else now
+        expired = []
+        deadlines = self.__deadlines
+        while deadlines and deadlines[0][0] <= now:
+            outstanding_probe = heapq.heappop(deadlines)[2]
+            # probe could be already answered
+            if outstanding_probe.active:
+                self.__remove(outstanding_probe)
+                expired.append(outstanding_probe.probe)
+        return expired
+
+    def __remove(self, outstanding_probe: _OutstandingProbe):
+        outstanding_probe.active = False
+        for key in outstanding_probe.keys:
+            outstanding_probes = self.__probes[key]
+            outstanding_probes.remove(outstanding_probe)
+            if not outstanding_probes:
+                del self.__probes[key]
+        self.__size -= 1
+
+    def __len__(self) -> int:
+        return self.__size
+
+    @staticmethod
+    def probe_keys(probe: Packet) -> list:
+        """
+        Computes keys which can be used to find the probe by its response
+        """
+        if ArpPacket in probe:
+            arp: ArpPacket = probe[ArpPacket]
+            if arp.operation != ArpOperation.OP_REQUEST:
+                return []
+            return [(
+                EtherType.ARP,
+                arp.target_proto_addr,
+                arp.sender_proto_addr
+            )]
+        source_addr, dest_addr = ResponseMatcher.__addresses(probe)
+        if TcpPacket in probe:
+            tcp: TcpPacket = probe[TcpPacket]
+            flow = (
+                socket.IPPROTO_TCP,
+                source_addr,
+                tcp.source_port,
+                dest_addr,
+                tcp.dest_port
+            )
+            # SYN and FIN flags occupy one sequence number
+            seq_length = tcp.payload_length() + tcp.flags.syn + tcp.flags.fin
+            expected_ack = (tcp.sequence_number + seq_length) \
+                % ResponseMatcher.SEQ_NUMBER_MODULO
+            return [
+                flow + ("ack", expected_ack),
+                flow + ("rst", tcp.ack_number)
+            ]
+        if UdpPacket in probe:
+            udp: UdpPacket = probe[UdpPacket]
+            return [(
+                socket.IPPROTO_UDP,
+                source_addr,
+                udp.source_port,
+                dest_addr,
+                udp.dest_port
+            )]
+        if IcmpPacket in probe:
+            icmp: IcmpPacket = probe[IcmpPacket]
+            if icmp.icmp_type != IcmpType.ECHO_REQUEST:
+                return []
+            return [(
+                socket.IPPROTO_ICMP,
+                source_addr,
+                dest_addr,
+                icmp.rest_of_header["identifier"],
+                icmp.rest_of_header["seq_number"]
+            )]
+        return []
+
+    @staticmethod
+    def reply_keys(reply: Packet) -> list:
+        """
+        Computes keys of the probes which can be answered by the reply
+        """
+        if ArpPacket in reply:
+            arp: ArpPacket = reply[ArpPacket]
+            if arp.operation != ArpOperation.OP_REPLY:
+                return []
+            return [(
+                EtherType.ARP,
+                arp.sender_proto_addr,
+                arp.target_proto_addr
+            )]
+        source_addr, dest_addr = ResponseMatcher.__addresses(reply)
+        if TcpPacket in reply:
+            tcp: TcpPacket = reply[TcpPacket]
+            flow = (
+                socket.IPPROTO_TCP,
+                dest_addr,
+                tcp.dest_port,
+                source_addr,
+                tcp.source_port
+            )
+            if tcp.flags.ack:
+                return [flow + ("ack", tcp.ack_number)]
+            if tcp.flags.rst:
+                return [flow + ("rst", tcp.sequence_number)]
+            return []
+        if UdpPacket in reply:
+            udp: UdpPacket = reply[UdpPacket]
+            return [(
+                socket.IPPROTO_UDP,
+                dest_addr,
+                udp.dest_port,
+                source_addr,
+                udp.source_port
+            )]
+        if IcmpPacket in reply:
+            icmp: IcmpPacket = reply[IcmpPacket]
+            if icmp.icmp_type != IcmpType.ECHO_REPLY:
+                return []
+            return [(
+                socket.IPPROTO_ICMP,
+                dest_addr,
+                source_addr,
+                icmp.rest_of_header["identifier"],
+                icmp.rest_of_header["seq_number"]
+            )]
+        ip: IpPacket = reply[IpPacket]
+        if ip is not None and ip.protocol == socket.IPPROTO_ICMP \
+                and isinstance(ip.upper_layer, RawPacket):
+            # ICMP isn't decoded by IpPacket, so parse echo reply header
+            payload = ip.upper_layer.to_bytes()
+            if len(payload) < ResponseMatcher.ICMP_ECHO_FORMAT.size:
+                return []
+            icmp_type, _, _, identifier, seq_number = \
+                ResponseMatcher.ICMP_ECHO_FORMAT.unpack_from(payload)
+            if icmp_type != IcmpType.ECHO_REPLY:
+                return []
+            return [(
+                socket.IPPROTO_ICMP,
+                dest_addr,
+                source_addr,
+                identifier,
+                seq_number
+            )]
+        return []
+
+    @staticmethod
+    def __addresses(packet: Packet) -> tuple:
+        """
+        Returns raw source and destination addresses of IP layer,
+        or (None, None) if packet has no IP layer
+        """
+        ip: IpPacket = packet[IpPacket]
+        if ip is None:
+            return None, None
+        return ip.source_addr_raw, ip.dest_addr_raw
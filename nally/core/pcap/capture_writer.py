@@ -0,0 +1,262 @@
+import logging
+import os
+import queue
+import threading
+import time
+from abc import ABC, abstractmethod
+
+
+class CaptureWriter(ABC):
+    """
+    Base class of the capture file writers. Records are accumulated in the
+    memory buffer and written to the file by large chunks, optionally by the
+    background thread, so the capturing thread doesn't wait for the disk.
+    If the background thread fails, then the error is raised by the next
+    'write', 'flush' or 'close' call, and the rest of the records are
+    discarded.
+
+    If rotation is enabled, then new file is started when the current one
+    exceeds 'rotate_size_bytes' or 'rotate_seconds' elapsed since it was
+    opened. Rotated files are named as '<name>.<index><extension>', e.g.
+    'capture.pcap', 'capture.1.pcap', 'capture.2.pcap'
+    """
+
+    LINKTYPE_ETHERNET = 1
+
+    DEFAULT_SNAPLEN = 262144
+    DEFAULT_BUFFER_SIZE_BYTES = 1 << 20
+    MAX_PENDING_CHUNKS = 16
+    """
+    Max number of chunks queued for the background thread, if writing
+    falls behind, then 'write' blocks until queue is drained
+    """
+
+    LOG = logging.getLogger("CaptureWriter")
+
+    def __init__(
+            self,
+            path: str,
+            snaplen: int = DEFAULT_SNAPLEN,
+            buffer_size: int = DEFAULT_BUFFER_SIZE_BYTES,
+            rotate_size_bytes: int = None,
+            rotate_seconds: float = None,
+            background: bool = False
+    ):
+        """
+        :param path: path of the capture file
+        :param snaplen: max number of bytes stored per frame, longer frames
+            are truncated
+        :param buffer_size: size of the chunk written to the file at once
+        :param rotate_size_bytes: if specified, then new file is started when
+            the current one exceeds this size
+        :param rotate_seconds: if specified, then new file is started every
+            'rotate_seconds' seconds
+        :param background: if True, then chunks are written to the file by
+            the background thread
+        """
+        self._snaplen = snaplen
+        self.__path = path
+        self.__buffer_size = buffer_size
+        self.__rotate_size_bytes = rotate_size_bytes
+        self.__rotate_seconds = rotate_seconds
+        self.__buffer = bytearray()
+        self.__file = None
+        self.__file_size = 0
+        self.__file_opened_at = None
+        self.__paths = []
+        self.__closed = False
+        self.__queue = None
+        self.__thread = None
+        self.__error = None
+        if background:
+            self.__queue = queue.Queue(self.MAX_PENDING_CHUNKS)
+            self.__thread = threading.Thread(
+                target=self.__run_background,
+                name="CaptureWriter",
+                daemon=True
+            )
+            self.__thread.start()
+        self.__start_file()
+
+    @abstractmethod
+    def _file_header(self) -> bytes:
+        """
+        Returns header which starts each capture file
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def _append_record(
+            self,
+            buffer: bytearray,
+            frame,
+            timestamp_ns: int,
+            length: int
+    ):
+        """
+        Appends record of the frame to the buffer
+
+        :param buffer: buffer to append to
+        :param frame: captured bytes of the frame, already truncated
+            to snaplen
+        :param timestamp_ns: capture time in nanoseconds since the epoch
+        :param length: original length of the frame
+        """
+        raise NotImplementedError
+
+    @property
+    def paths(self) -> list:
+        """
+        Returns paths of all files started by the writer
+        """
+        return list(self.__paths)
+
+    def write(self, frame, timestamp_ns: int = None, length: int = None):
+        """
+        Appends frame to the capture
+
+        :param frame: raw frame, any object which supports buffer protocol
+        :param timestamp_ns: capture time in nanoseconds since the epoch,
+            current time if not specified
+        :param length: original length of the frame, if frame was truncated
+            during capturing, length of the frame if not specified
+        """
+        if self.__closed:
+            raise ValueError("Writer is closed")
+        self.__raise_background_error()
+        if self.__should_rotate():
+            self.__rotate()
+        frame_length = len(frame)
+        if frame_length > self._snaplen:
+            frame = memoryview(frame)[:self._snaplen]
+        buffer = self.__buffer
+        buffer_length = len(buffer)
+        self._append_record(
+            buffer,
+            frame,
+            time.time_ns() if timestamp_ns is None else timestamp_ns,
+            frame_length if length is None else length
+        )
+        self.__file_size += len(buffer) - buffer_length
+        if len(buffer) >= self.__buffer_size:
+            self.__flush_buffer()
+
+    def flush(self):
+        """
+        Writes buffered records to the file, if writing is performed in
+        background, then waits until they're written
+        """
+        self.__flush_buffer()
+        self.__submit(self.__flush_file)
+        if self.__queue is not None:
+            self.__queue.join()
+        self.__raise_background_error()
+
+    def close(self):
+        """
+        Flushes buffered records and closes the file
+        """
+        if self.__closed:
+            return
+        self.__flush_buffer()
+        self.__submit(self.__close_file)
+        self.__closed = True
+        if self.__thread is not None:
+            self.__queue.put(None)
+            self.__thread.join()
+            if self.__file is not None:
+                # file isn't closed by the background thread if it failed
+                self.__file.close()
+                self.__file = None
+        self.__raise_background_error()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __should_rotate(self) -> bool:
+        if self.__rotate_size_bytes is not None \
+                and self.__file_size >= self.__rotate_size_bytes:
+            return True
+        if self.__rotate_seconds is not None \
+                and time.monotonic() - self.__file_opened_at \
+                >= self.__rotate_seconds:
+            return True
+        return False
+
+    def __rotate(self):
+        self.__flush_buffer()
+        self.__submit(self.__close_file)
+        self.__start_file()
+
+    def __start_file(self):
+        """
+        Starts the new file, file header is written with the first chunk
+        """
+        index = len(self.__paths)
+        path = self.__path
+        if index > 0:
+            name, extension = os.path.splitext(self.__path)
+            path = f"{name}.{index}{extension}"
+        self.__paths.append(path)
+        self.__submit(self.__open_file, path)
+        header = self._file_header()
+        self.__buffer += header
+        self.__file_size = len(header)
+        self.__file_opened_at = time.monotonic()
+
+    def __flush_buffer(self):
+        if self.__buffer:
+            chunk = self.__buffer
+            self.__buffer = bytearray()
+            self.__submit(self.__write_chunk, chunk)
+
+    def __submit(self, operation: callable, *args):
+        """
+        Performs file operation in the current thread or passes it
+        to the background thread
+        """
+        if self.__queue is None:
+            operation(*args)
+        else:
+            self.__queue.put((operation, args))
+
+    def __raise_background_error(self):
+        """
+        Raises the error of the background thread if it failed
+        """
+        if self.__error is not None:
+            raise self.__error
+
+    def __run_background(self):
+        while True:
+            item = self.__queue.get()
+            try:
+                if item is None:
+                    return
+                operation, args = item
+                # state of the file is unknown after the failure, so the
+                # rest of operations are skipped, the first error is
+                # reported to the caller
+                if self.__error is None:
+                    operation(*args)
+            except Exception as e:
+                self.LOG.exception("Failed to write capture file")
+                self.__error = e
+            finally:
+                self.__queue.task_done()
+
+    def __open_file(self, path: str):
+        self.__file = open(path, "wb")
+
+    def __write_chunk(self, chunk: bytearray):
+        self.__file.write(chunk)
+
+    def __flush_file(self):
+        self.__file.flush()
+
+    def __close_file(self):
+        self.__file.close()
+        self.__file = None
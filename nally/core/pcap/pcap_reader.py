@@ -0,0 +1,258 @@
+import logging
+import mmap
+import struct
+from typing import Callable, Generator, List, NamedTuple, Tuple, Union
+
+from nally.core.bpf.bpf_compiler import BpfCompiler
+from nally.core.layers.layer import Layer
+from nally.core.pcap.capture_writer import CaptureWriter
+from nally.core.sniffer.packet_source import FrameRecord, PacketSource
+
+
+class PcapRecord(NamedTuple):
+    """
+    Frame read from the capture file
+    """
+    timestamp_ns: int
+    """Capture time in nanoseconds since the epoch"""
+    length: int
+    """Original length of the frame"""
+    data: memoryview
+    """Captured bytes, view of the mapped file"""
+
+
+class PcapReader(PacketSource):
+    """
+    Reads frames of the classic pcap file (Ethernet link type, both byte
+    orders, microsecond and nanosecond timestamps). File is memory-mapped
+    and records are read on demand, so the whole file is never loaded into
+    the memory and frames aren't copied unless they're decoded eagerly.
+
+    Provides the same interface as Sniffer, so consumers of the live
+    capture can process capture files unchanged.
+
+    Usage:
+        with PcapReader("capture.pcap", lazy_decoding=True) as reader:
+            for packet in reader.sniff():
+                ...
+    """
+
+    MAGIC_MICROSECONDS = 0xa1b2c3d4
+    MAGIC_NANOSECONDS = 0xa1b23c4d
+    MAGIC_FORMAT = struct.Struct("<I")
+    FILE_HEADER_FORMAT = "IHHiIII"
+    """
+    Defines format of the pcap file header, see PcapWriter
+    """
+    RECORD_HEADER_FORMAT = "IIII"
+    """
+    Defines format of the pcap record header, see PcapWriter
+    """
+
+    DEFAULT_BATCH_SIZE = 256
+
+    LOG = logging.getLogger("PcapReader")
+
+    def __init__(
+            self,
+            path: str,
+            started_callback: callable = None,
+            predicate_filter: Union[Callable, str] = None,
+            packet_count: int = None,
+            lazy_decoding: bool = False,
+            batch_size: int = DEFAULT_BATCH_SIZE,
+            bpf_filter: str = "",
+            max_layer: Layer = None
+    ):
+        """
+        :param path: path of the capture file
+        :param batch_size: max number of frames processed per batch
+        :param bpf_filter: packet filter in tcpdump syntax (see
+            BpfCompiler), it's executed by BpfProgram interpreter
+        See Sniffer for the rest of parameters. Note: lazily decoded packets
+        reference the mapped file, so they're valid until reader is closed
+        """
+        super().__init__(
+            started_callback,
+            predicate_filter,
+            packet_count,
+            lazy_decoding,
+            max_layer
+        )
+        if batch_size < 1:
+            raise ValueError(f"Batch size should be positive, "
+                             f"got {batch_size}")
+        self.__path = path
+        self.__batch_size = batch_size
+        self.__compiled_filter = (
+            BpfCompiler.compile(bpf_filter)
+            if bpf_filter
+            else None
+        )
+        self.__file = None
+        self.__map = None
+        self.__view = None
+        self.__record_header = None
+        self.__timestamp_multiplier = None
+        self.__data_offset = None
+        self.__snaplen = None
+
+    @property
+    def snaplen(self) -> int:
+        return self.__snaplen
+
+    def records(self) -> Generator[PcapRecord, None, None]:
+        """
+        Yields all records of the file with their timestamps, filters
+        and packet count aren't applied
+        """
+        offset = self.__check_opened()
+        while True:
+            records, offset = self.__read_records(offset)
+            if not records:
+                return
+            yield from records
+
+    def _sniff(
+            self,
+            process_frames: callable,
+            copy: bool,
+            records: bool = False
+    ) -> Generator[list, None, int]:
+        """
+        Reads the frames and yields them in batches
+
+        :param process_frames: function which turns frames to the batch,
+            see '_process_frames'
+        :param copy: if True, then frames are copied, so they don't
+            reference the mapped file
+        :param records: if True, then frames are passed to 'process_frames'
+            as FrameRecord instances
+        """
+        offset = self.__check_opened()
+        processed_count = 0
+        if self._started_callback is not None:
+            self._started_callback()
+        while not self._stopped and processed_count != self._packet_count:
+            file_records, offset = self.__read_records(offset)
+            if not file_records:
+                break
+            frames = (
+                [bytes(record.data) for record in file_records]
+                if copy
+                else [record.data for record in file_records]
+            )
+            self._count_received(frames)
+            if records:
+                frames = [
+                    FrameRecord(frame, record.timestamp_ns, record.length)
+                    for frame, record in zip(frames, file_records)
+                ]
+            batch = process_frames(
+                frames,
+                self._remaining_count(processed_count)
+            )
+            processed_count += len(batch)
+            if batch:
+                yield batch
+        return processed_count
+
+    def _filters_in_user_space(self) -> bool:
+        return self.__compiled_filter is not None
+
+    def _filter_packet(self, raw_packet: bytes) -> bool:
+        return self.__compiled_filter is None \
+            or self.__compiled_filter.filter(raw_packet) != 0
+
+    def __read_records(self, offset: int) -> Tuple[List[PcapRecord], int]:
+        """
+        Reads up to 'batch_size' records starting at the offset
+
+        :return: list of records and offset of the next record
+        """
+        view = self.__view
+        record_header = self.__record_header
+        multiplier = self.__timestamp_multiplier
+        file_size = len(view)
+        records = []
+        for _ in range(self.__batch_size):
+            if offset + record_header.size > file_size:
+                if offset != file_size:
+                    self.LOG.warning(f"{self.__path} is truncated")
+                break
+            seconds, fraction, captured_length, length = \
+                record_header.unpack_from(view, offset)
+            data_offset = offset + record_header.size
+            if data_offset + captured_length > file_size:
+                self.LOG.warning(f"{self.__path} is truncated")
+                break
+            records.append(PcapRecord(
+                seconds * 1_000_000_000 + fraction * multiplier,
+                length,
+                view[data_offset:data_offset + captured_length]
+            ))
+            offset = data_offset + captured_length
+        return records, offset
+
+    def __check_opened(self) -> int:
+        """
+        Returns offset of the first record
+        """
+        if self.__view is None:
+            raise RuntimeError("PcapReader should be used "
+                               "inside context manager")
+        return self.__data_offset
+
+    def __enter__(self):
+        self.__file = open(self.__path, "rb")
+        try:
+            self.__map = mmap.mmap(
+                self.__file.fileno(),
+                0,
+                access=mmap.ACCESS_READ
+            )
+        except ValueError:
+            self.__file.close()
+            raise ValueError(f"{self.__path} isn't a pcap file")
+        self.__view = memoryview(self.__map)
+        try:
+            self.__read_file_header()
+        except ValueError:
+            self.__exit__(None, None, None)
+            raise
+        return self
+
+    def __read_file_header(self):
+        view = self.__view
+        if len(view) < struct.calcsize("=" + self.FILE_HEADER_FORMAT):
+            raise ValueError(f"{self.__path} isn't a pcap file")
+        magic, = self.MAGIC_FORMAT.unpack_from(view)
+        byte_order = "<"
+        if magic not in (self.MAGIC_MICROSECONDS, self.MAGIC_NANOSECONDS):
+            byte_order = ">"
+            magic, = struct.unpack_from(">I", view)
+        if magic == self.MAGIC_MICROSECONDS:
+            self.__timestamp_multiplier = 1000
+        elif magic == self.MAGIC_NANOSECONDS:
+            self.__timestamp_multiplier = 1
+        else:
+            raise ValueError(f"{self.__path} isn't a pcap file")
+        file_header = struct.Struct(byte_order + self.FILE_HEADER_FORMAT)
+        *_, self.__snaplen, link_type = file_header.unpack_from(view)
+        if link_type != CaptureWriter.LINKTYPE_ETHERNET:
+            raise ValueError(f"Unsupported link type {link_type}, "
+                             f"only Ethernet captures are supported")
+        self.__record_header = struct.Struct(
+            byte_order + self.RECORD_HEADER_FORMAT
+        )
+        self.__data_offset = file_header.size
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.__view.release()
+        self.__view = None
+        try:
+            self.__map.close()
+        except BufferError:
+            self.LOG.debug("Frames are still referenced, file will be "
+                           "unmapped after they're released")
+        self.__file.close()
@@ -0,0 +1,66 @@
+import struct
+
+from nally.core.pcap.capture_writer import CaptureWriter
+
+
+class PcapWriter(CaptureWriter):
+    """
+    Writes frames to the classic pcap file with nanosecond resolution
+    timestamps, see https://wiki.wireshark.org/Development/LibpcapFileFormat
+
+    Usage:
+        with PcapWriter("capture.pcap", background=True) as writer:
+            with Sniffer(writer=writer) as sniffer:
+                ...
+    """
+
+    MAGIC_NANOSECONDS = 0xa1b23c4d
+    VERSION_MAJOR = 2
+    VERSION_MINOR = 4
+
+    FILE_HEADER_FORMAT = struct.Struct("=IHHiIII")
+    """
+    Defines format of the pcap file header:
+        * Magic number : 4 bytes
+        * Major version : 2 bytes
+        * Minor version : 2 bytes
+        * Time zone offset : 4 bytes
+        * Timestamps accuracy : 4 bytes
+        * Snapshot length : 4 bytes
+        * Link layer type : 4 bytes
+    """
+    RECORD_HEADER_FORMAT = struct.Struct("=IIII")
+    """
+    Defines format of the pcap record header:
+        * Timestamp seconds : 4 bytes
+        * Timestamp nanoseconds : 4 bytes
+        * Captured length : 4 bytes
+        * Original length : 4 bytes
+    """
+
+    def _file_header(self) -> bytes:
+        return self.FILE_HEADER_FORMAT.pack(
+            self.MAGIC_NANOSECONDS,
+            self.VERSION_MAJOR,
+            self.VERSION_MINOR,
+            0,
+            0,
+            self._snaplen,
+            self.LINKTYPE_ETHERNET
+        )
+
+    def _append_record(
+            self,
+            buffer: bytearray,
+            frame,
+            timestamp_ns: int,
+            length: int
+    ):
+        seconds, nanoseconds = divmod(timestamp_ns, 1_000_000_000)
+        buffer += self.RECORD_HEADER_FORMAT.pack(
+            seconds,
+            nanoseconds,
+            len(frame),
+            length
+        )
+        buffer += frame
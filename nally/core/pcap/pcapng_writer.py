@@ -0,0 +1,119 @@
+import struct
+
+from nally.core.pcap.capture_writer import CaptureWriter
+
+
+class PcapngWriter(CaptureWriter):
+    """
+    Writes frames to the pcapng file as Enhanced Packet Blocks of the single
+    Ethernet interface with nanosecond resolution timestamps,
+    see https://www.ietf.org/archive/id/draft-ietf-opsawg-pcapng-02.html
+
+    Usage:
+        with PcapngWriter("capture.pcapng", background=True) as writer:
+            with Sniffer(writer=writer) as sniffer:
+                ...
+    """
+
+    SECTION_HEADER_BLOCK_TYPE = 0x0a0d0d0a
+    INTERFACE_DESCRIPTION_BLOCK_TYPE = 0x00000001
+    ENHANCED_PACKET_BLOCK_TYPE = 0x00000006
+
+    BYTE_ORDER_MAGIC = 0x1a2b3c4d
+    VERSION_MAJOR = 1
+    VERSION_MINOR = 0
+    SECTION_LENGTH_UNSPECIFIED = -1
+
+    OPTION_END_OF_OPTIONS = 0
+    OPTION_IF_TSRESOL = 9
+    TSRESOL_NANOSECONDS = 9
+    """Timestamp resolution is 10^-9 seconds"""
+
+    SECTION_HEADER_BLOCK_FORMAT = struct.Struct("=IIIHHqI")
+    """
+    Defines format of the Section Header Block without options:
+        * Block type : 4 bytes
+        * Block total length : 4 bytes
+        * Byte-order magic : 4 bytes
+        * Major version : 2 bytes
+        * Minor version : 2 bytes
+        * Section length : 8 bytes
+        * Block total length : 4 bytes
+    """
+    INTERFACE_DESCRIPTION_BLOCK_FORMAT = struct.Struct("=IIHHIHHB3xHHI")
+    """
+    Defines format of the Interface Description Block with
+    'if_tsresol' option:
+        * Block type : 4 bytes
+        * Block total length : 4 bytes
+        * Link layer type : 2 bytes
+        * Reserved : 2 bytes
+        * Snapshot length : 4 bytes
+        * 'if_tsresol' option code and length : 4 bytes
+        * 'if_tsresol' option value : 1 byte, padded to 4 bytes
+        * End of options : 4 bytes
+        * Block total length : 4 bytes
+    """
+    ENHANCED_PACKET_HEADER_FORMAT = struct.Struct("=IIIIIII")
+    """
+    Defines format of the Enhanced Packet Block header:
+        * Block type : 4 bytes
+        * Block total length : 4 bytes
+        * Interface id : 4 bytes
+        * Timestamp (high) : 4 bytes
+        * Timestamp (low) : 4 bytes
+        * Captured length : 4 bytes
+        * Original length : 4 bytes
+    Header is followed by the frame padded to 4 bytes and the block total
+    length (4 bytes)
+    """
+    BLOCK_LENGTH_FORMAT = struct.Struct("=I")
+
+    PADDINGS = [b"", b"\x00\x00\x00", b"\x00\x00", b"\x00"]
+
+    def _file_header(self) -> bytes:
+        return self.SECTION_HEADER_BLOCK_FORMAT.pack(
+            self.SECTION_HEADER_BLOCK_TYPE,
+            self.SECTION_HEADER_BLOCK_FORMAT.size,
+            self.BYTE_ORDER_MAGIC,
+            self.VERSION_MAJOR,
+            self.VERSION_MINOR,
+            self.SECTION_LENGTH_UNSPECIFIED,
+            self.SECTION_HEADER_BLOCK_FORMAT.size
+        ) + self.INTERFACE_DESCRIPTION_BLOCK_FORMAT.pack(
+            self.INTERFACE_DESCRIPTION_BLOCK_TYPE,
+            self.INTERFACE_DESCRIPTION_BLOCK_FORMAT.size,
+            self.LINKTYPE_ETHERNET,
+            0,
+            self._snaplen,
+            self.OPTION_IF_TSRESOL,
+            1,
+            self.TSRESOL_NANOSECONDS,
+            self.OPTION_END_OF_OPTIONS,
+            0,
+            self.INTERFACE_DESCRIPTION_BLOCK_FORMAT.size
+        )
+
+    def _append_record(
+            self,
+            buffer: bytearray,
+            frame,
+            timestamp_ns: int,
+            length: int
+    ):
+        captured_length = len(frame)
+        padding = self.PADDINGS[captured_length % 4]
+        block_length = self.ENHANCED_PACKET_HEADER_FORMAT.size \
+            + captured_length + len(padding) + self.BLOCK_LENGTH_FORMAT.size
+        buffer += self.ENHANCED_PACKET_HEADER_FORMAT.pack(
+            self.ENHANCED_PACKET_BLOCK_TYPE,
+            block_length,
+            0,
+            timestamp_ns >> 32,
+            timestamp_ns & 0xffffffff,
+            captured_length,
+            length
+        )
+        buffer += frame
+        buffer += padding
+        buffer += self.BLOCK_LENGTH_FORMAT.pack(block_length)
@@ -0,0 +1,231 @@
+import asyncio
+from collections import deque
+from typing import AsyncGenerator, List
+
+from nally.core.layers.packet import Packet
+from nally.core.sniffer.sniffer import Sniffer
+
+
+class AsyncSniffer(Sniffer):
+    """
+    asyncio interface for packet capturing. Socket is registered in the
+    event loop with 'add_reader', so capturing doesn't need a dedicated
+    thread: on each readiness callback all available frames are drained,
+    decoded and queued as a single batch.
+
+    If consumer falls behind and 'max_pending_batches' batches are queued,
+    then sniffer stops reading the socket until consumer catches up, so new
+    frames are buffered (and eventually dropped) by the kernel instead of
+    piling up in memory. This replaces the pipeline mode of Sniffer, so
+    'queue_size' isn't supported.
+
+    Frames are always copied before decoding, since queued packets should
+    outlive the receive buffers.
+
+    If reading fails in the readiness callback (e.g. predicate raises or
+    socket is broken), then reading is paused and the error is raised by
+    'asniff_batch' after the batches queued before the failure.
+
+    Usage:
+        async with AsyncSniffer(if_name="eth0") as sniffer:
+            async for packet in sniffer.asniff():
+                ...
+    """
+
+    DEFAULT_MAX_PENDING_BATCHES = 64
+
+    def __init__(
+            self,
+            *args,
+            max_pending_batches: int = DEFAULT_MAX_PENDING_BATCHES,
+            **kwargs
+    ):
+        """
+        :param max_pending_batches: max number of batches which are queued
+            until the socket reading is paused, replaces 'queue_size'
+            of Sniffer
+        See Sniffer for the rest of parameters
+        :raises: ValueError: if 'queue_size' is specified
+        """
+        if kwargs.get("queue_size") is not None:
+            raise ValueError("AsyncSniffer doesn't support pipeline mode, "
+                             "use 'max_pending_batches' instead of "
+                             "'queue_size'")
+        super().__init__(*args, **kwargs)
+        if max_pending_batches < 1:
+            raise ValueError(f"Max pending batches should be positive, "
+                             f"got {max_pending_batches}")
+        self._max_pending_batches = max_pending_batches
+        self._loop = None
+        self._batches = deque()
+        self._batches_ready = None
+        self._reading = False
+        self._received_count = 0
+        self._stats_timer = None
+        self._error = None
+
+    async def __aenter__(self):
+        self.__enter__()
+        self._loop = asyncio.get_running_loop()
+        self._batches_ready = asyncio.Event()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        self._pause_reading()
+        self._batches.clear()
+        self.__exit__(exc_type, exc_val, exc_tb)
+
+    async def asniff(self) -> AsyncGenerator[Packet, None]:
+        """
+        Yields captured packets one by one, see 'asniff_batch'
+        """
+        async for batch in self.asniff_batch():
+            for packet in batch:
+                yield packet
+
+    async def asniff_batch(self) -> AsyncGenerator[List[Packet], None]:
+        """
+        Yields captured packets in batches, each batch holds packets received
+        per single readiness callback
+        """
+        if self._loop is None:
+            raise RuntimeError("AsyncSniffer should be used "
+                               "inside async context manager")
+        processed_count = 0
+        termination_date_seconds = None
+        if self._started_callback is not None:
+            self._started_callback()
+        if self._timeout is not None:
+            termination_date_seconds = self._loop.time() + self._timeout
+        self._resume_reading()
+        if self._stats_callback is not None:
+            self._schedule_stats_report()
+            self._stats_timer = self._loop.call_later(
+                self._stats_interval,
+                self._on_stats_timer
+            )
+        try:
+            while not self._stopped:
+                if processed_count == self._packet_count:
+                    break
+                if self._batches:
+                    batch = self._batches.popleft()
+                    if len(self._batches) < self._max_pending_batches:
+                        self._resume_reading()
+                    processed_count += len(batch)
+                    yield batch
+                    continue
+                self._raise_error()
+                remaining_time_seconds = None
+                if termination_date_seconds is not None:
+                    remaining_time_seconds = termination_date_seconds - \
+                                             self._loop.time()
+                    if remaining_time_seconds <= 0:
+                        break
+                self._batches_ready.clear()
+                try:
+                    await asyncio.wait_for(
+                        self._batches_ready.wait(),
+                        remaining_time_seconds
+                    )
+                except asyncio.TimeoutError:
+                    break
+            if self._stopped and self._drain_on_stop:
+                for batch in self._drain_batches(processed_count):
+                    yield batch
+            self._raise_error()
+        finally:
+            self._pause_reading()
+            if self._stats_timer is not None:
+                self._stats_timer.cancel()
+                self._stats_timer = None
+
+    def stop(self, drain: bool = False):
+        """
+        Terminates the sniffer, can be called from any thread
+
+        :param drain: if True, then queued batches and frames which were
+            already queued in the socket are returned before the termination
+        """
+        super().stop(drain)
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._batches_ready.set)
+
+    def _on_readable(self):
+        """
+        Drains available frames from the socket and queues them as
+        a single batch. Since exceptions of the reader callbacks are only
+        logged by the event loop, they're stored for 'asniff_batch'
+        """
+        batch = []
+        try:
+            for frames in self._receive(copy=True):
+                self._count_received(frames)
+                frames = self._accept_frames(frames)
+                batch += self._process_frames(
+                    frames,
+                    self._remaining_count(self._received_count + len(batch))
+                )
+        except Exception as error:
+            self._error = error
+            self._pause_reading()
+            self._batches_ready.set()
+            return
+        if batch:
+            self._received_count += len(batch)
+            self._batches.append(batch)
+            self._batches_ready.set()
+        if len(self._batches) >= self._max_pending_batches \
+                or self._received_count == self._packet_count:
+            self._pause_reading()
+
+    def _drain_batches(self, processed_count: int) -> List[List[Packet]]:
+        """
+        Reads frames until the socket has no more data and returns all
+        queued batches, limited by the packet count
+
+        :param processed_count: number of already returned packets
+        """
+        while self._received_count != self._packet_count \
+                and self._error is None:
+            received_count = self._counters.received_count
+            self._on_readable()
+            if self._counters.received_count == received_count:
+                break
+        batches = []
+        while self._batches and processed_count != self._packet_count:
+            batch = self._batches.popleft()
+            remaining_count = self._remaining_count(processed_count)
+            batch = batch[:remaining_count]
+            processed_count += len(batch)
+            batches.append(batch)
+        return batches
+
+    def _raise_error(self):
+        """
+        Raises the error stored by the readiness callback, if any
+        """
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+
+    def _on_stats_timer(self):
+        """
+        Reports stats and schedules the next report
+        """
+        self._report_stats()
+        self._stats_timer = self._loop.call_later(
+            self._wait_time(),
+            self._on_stats_timer
+        )
+
+    def _resume_reading(self):
+        if not self._reading and not self._stopped and self._error is None \
+                and self._received_count != self._packet_count:
+            self._loop.add_reader(self._sniff_socket, self._on_readable)
+            self._reading = True
+
+    def _pause_reading(self):
+        if self._reading:
+            self._loop.remove_reader(self._sniff_socket)
+            self._reading = False
@@ -0,0 +1,373 @@
+import ctypes
+import ctypes.util
+import errno
+import os
+import socket
+import struct
+import time
+from typing import List, Tuple
+
+
+class _IoVec(ctypes.Structure):
+    # according to 'sys/uio.h'
+    _fields_ = [
+        ("iov_base", ctypes.c_void_p),
+        ("iov_len", ctypes.c_size_t)
+    ]
+
+
+class _MsgHdr(ctypes.Structure):
+    # according to 'sys/socket.h'
+    _fields_ = [
+        ("msg_name", ctypes.c_void_p),
+        ("msg_namelen", ctypes.c_uint32),
+        ("msg_iov", ctypes.POINTER(_IoVec)),
+        ("msg_iovlen", ctypes.c_size_t),
+        ("msg_control", ctypes.c_void_p),
+        ("msg_controllen", ctypes.c_size_t),
+        ("msg_flags", ctypes.c_int)
+    ]
+
+
+class _MMsgHdr(ctypes.Structure):
+    # according to 'sys/socket.h'
+    _fields_ = [
+        ("msg_hdr", _MsgHdr),
+        ("msg_len", ctypes.c_uint)
+    ]
+
+
+class BatchReceiver:
+    """
+    Drains up to 'batch_size' datagrams from the non-blocking socket per
+    call into the pool of preallocated buffers. Uses single 'recvmmsg'
+    system call if it's available in libc, otherwise calls 'recv_into'
+    until the socket has no more data.
+
+    Returned frames are memoryviews of the pool buffers, so they're valid
+    only until the next call of 'receive'. Copy the frame if it should
+    outlive this.
+
+    If timestamps are requested, then kernel receive timestamps are read
+    from the control messages (socket should have SO_TIMESTAMPNS option
+    enabled). If they aren't available, then frames are stamped with the
+    time they were received by the process.
+
+    If lengths are requested, then original lengths of the frames are
+    collected, so truncation of the frames is visible to the caller.
+    Datagrams are received with MSG_TRUNC, which reports lengths before
+    truncation by the buffer. Packet socket can also truncate frames by
+    the attached BPF filter, lengths before that are read from the
+    PACKET_AUXDATA control messages (socket should have PACKET_AUXDATA
+    option enabled)
+    """
+
+    MSG_DONTWAIT = getattr(socket, "MSG_DONTWAIT", 0x40)
+    MSG_TRUNC = getattr(socket, "MSG_TRUNC", 0x20)
+
+    # asm-generic/socket.h
+    SO_TIMESTAMPNS = getattr(socket, "SO_TIMESTAMPNS", 35)
+    SCM_TIMESTAMPNS = SO_TIMESTAMPNS
+
+    CMSG_HEADER_FORMAT = struct.Struct("@Nii")
+    """
+    Defines format of 'cmsghdr' structure:
+        * Length of the message : size_t
+        * Protocol level : int
+        * Message type : int
+    """
+    CMSG_DATA_OFFSET = -CMSG_HEADER_FORMAT.size \
+        // ctypes.sizeof(ctypes.c_size_t) * -ctypes.sizeof(ctypes.c_size_t)
+    """Header is padded to the size_t alignment"""
+    TIMESPEC_FORMAT = struct.Struct("@ll")
+
+    # linux/socket.h, linux/if_packet.h
+    SOL_PACKET = 263
+    PACKET_AUXDATA = 8
+    TPACKET_AUXDATA_FORMAT = struct.Struct("@IIIHHHH")
+    """
+    Defines format of 'tpacket_auxdata' structure:
+        * Status : 4 bytes
+        * Original length of the frame : 4 bytes
+        * Captured length of the frame : 4 bytes
+        * Offset of the link layer header : 2 bytes
+        * Offset of the network layer header : 2 bytes
+        * VLAN TCI : 2 bytes
+        * VLAN TPID : 2 bytes
+    """
+    CONTROL_BUFFER_SIZE_BYTES = 128
+
+    def __init__(
+            self,
+            batch_size: int,
+            buffer_size: int,
+            use_recvmmsg: bool = True,
+            timestamps: bool = False,
+            lengths: bool = False
+    ):
+        """
+        :param batch_size: max number of datagrams received per call
+        :param buffer_size: size of the single buffer in the pool, longer
+            datagrams are truncated
+        :param use_recvmmsg: if False, then 'recv_into' is used
+            even if 'recvmmsg' is available
+        :param timestamps: if True, then receive timestamps of the frames
+            are collected, see 'timestamps'
+        :param lengths: if True, then original lengths of the frames are
+            collected, see 'lengths'
+        """
+        if batch_size < 1:
+            raise ValueError(f"Batch size should be positive, "
+                             f"got {batch_size}")
+        self.__batch_size = batch_size
+        self.__buffers = [bytearray(buffer_size) for _ in range(batch_size)]
+        self.__views = [memoryview(buffer) for buffer in self.__buffers]
+        self.__collect_timestamps = timestamps
+        self.__collect_lengths = lengths
+        self.__timestamps = []
+        self.__lengths = []
+        self.__flags = (
+            self.MSG_DONTWAIT | self.MSG_TRUNC
+            if lengths
+            else self.MSG_DONTWAIT
+        )
+        self.__recvmmsg = (
+            self.__load_recvmmsg()
+            if use_recvmmsg
+            else None
+        )
+        if self.__recvmmsg is not None:
+            self.__init_messages(buffer_size)
+
+    @property
+    def batch_size(self) -> int:
+        return self.__batch_size
+
+    @property
+    def uses_recvmmsg(self) -> bool:
+        return self.__recvmmsg is not None
+
+    @property
+    def timestamps(self) -> List[int]:
+        """
+        Returns receive timestamps (in nanoseconds since the epoch) of the
+        frames returned by the last 'receive' call, empty if timestamps
+        weren't requested
+        """
+        return self.__timestamps
+
+    @property
+    def lengths(self) -> List[int]:
+        """
+        Returns original lengths of the frames returned by the last
+        'receive' call, they differ from the frames lengths if frames were
+        truncated. Empty if lengths weren't requested
+        """
+        return self.__lengths
+
+    def receive(self, sock: socket.socket) -> List[memoryview]:
+        """
+        Receives datagrams which are available in the socket without
+        blocking
+
+        :param sock: socket to receive from
+        :return: list of received frames, empty if socket has no data
+        """
+        if self.__recvmmsg is None:
+            return self.__receive_into(sock)
+        count = self.__recvmmsg(
+            sock.fileno(),
+            self.__messages,
+            self.__batch_size,
+            self.__flags,
+            None
+        )
+        if count < 0:
+            error = ctypes.get_errno()
+            if error in (errno.EAGAIN, errno.EWOULDBLOCK, errno.EINTR):
+                return []
+            raise OSError(error, os.strerror(error))
+        messages = self.__messages
+        views = self.__views
+        # with MSG_TRUNC 'msg_len' can exceed the buffer, slicing clamps it
+        lengths = [messages[i].msg_len for i in range(count)]
+        if self.__collect_timestamps or self.__collect_lengths:
+            self.__read_controls(count, lengths)
+        return [views[i][:lengths[i]] for i in range(count)]
+
+    def __read_controls(self, count: int, lengths: List[int]):
+        """
+        Reads timestamps and original lengths from the control messages of
+        the received datagrams and resets control buffers for the next call
+
+        :param lengths: lengths of the received datagrams
+        """
+        received_at = time.time_ns()
+        timestamps = []
+        original_lengths = []
+        for i in range(count):
+            header = self.__messages[i].msg_hdr
+            control = memoryview(self.__controls[i])[:header.msg_controllen]
+            timestamp, length = self.__parse_control_messages(
+                self.__control_messages(control),
+                received_at,
+                lengths[i]
+            )
+            # kernel sets the length of the received control data
+            header.msg_controllen = self.CONTROL_BUFFER_SIZE_BYTES
+            timestamps.append(timestamp)
+            original_lengths.append(length)
+        if self.__collect_timestamps:
+            self.__timestamps = timestamps
+        if self.__collect_lengths:
+            self.__lengths = original_lengths
+
+    def __control_messages(self, control: memoryview):
+        """
+        Yields (level, type, data) tuples of the control messages
+        written by the kernel to the control buffer
+        """
+        alignment = ctypes.sizeof(ctypes.c_size_t)
+        offset = 0
+        while offset + self.CMSG_HEADER_FORMAT.size <= len(control):
+            length, level, message_type = \
+                self.CMSG_HEADER_FORMAT.unpack_from(control, offset)
+            if length < self.CMSG_HEADER_FORMAT.size:
+                break
+            yield level, message_type, control[
+                offset + self.CMSG_DATA_OFFSET:offset + length
+            ]
+            offset += -length // alignment * -alignment
+
+    def __parse_control_messages(
+            self,
+            messages,
+            received_at: int,
+            length: int
+    ) -> Tuple[int, int]:
+        """
+        Returns timestamp and original length of the datagram, defaults are
+        used if control messages don't contain them
+
+        :param messages: iterable of (level, type, data) tuples
+        :param received_at: default timestamp
+        :param length: default length
+        """
+        timestamp = received_at
+        for level, message_type, data in messages:
+            if level == socket.SOL_SOCKET \
+                    and message_type == self.SCM_TIMESTAMPNS \
+                    and len(data) >= self.TIMESPEC_FORMAT.size:
+                seconds, nanoseconds = self.TIMESPEC_FORMAT.unpack_from(data)
+                timestamp = seconds * 1_000_000_000 + nanoseconds
+            elif level == self.SOL_PACKET \
+                    and message_type == self.PACKET_AUXDATA \
+                    and len(data) >= self.TPACKET_AUXDATA_FORMAT.size:
+                length = self.TPACKET_AUXDATA_FORMAT.unpack_from(data)[1]
+        return timestamp, length
+
+    def __receive_into(self, sock: socket.socket) -> List[memoryview]:
+        """
+        Receives datagrams one by one until socket has no more data
+        """
+        if self.__collect_timestamps or self.__collect_lengths:
+            return self.__receive_messages_into(sock)
+        frames = []
+        for view in self.__views:
+            try:
+                length = sock.recv_into(view, 0, self.MSG_DONTWAIT)
+            except (BlockingIOError, InterruptedError):
+                break
+            frames.append(view[:length])
+        return frames
+
+    def __receive_messages_into(self, sock: socket.socket) \
+            -> List[memoryview]:
+        """
+        Receives datagrams one by one with their control messages until
+        socket has no more data
+        """
+        frames = []
+        timestamps = []
+        lengths = []
+        for view in self.__views:
+            try:
+                length, messages, _, _ = sock.recvmsg_into(
+                    [view],
+                    self.CONTROL_BUFFER_SIZE_BYTES,
+                    self.__flags
+                )
+            except (BlockingIOError, InterruptedError):
+                break
+            timestamp, original_length = self.__parse_control_messages(
+                messages,
+                time.time_ns(),
+                length
+            )
+            # with MSG_TRUNC length can exceed the buffer, slicing clamps it
+            frames.append(view[:length])
+            timestamps.append(timestamp)
+            lengths.append(original_length)
+        if self.__collect_timestamps:
+            self.__timestamps = timestamps
+        if self.__collect_lengths:
+            self.__lengths = lengths
+        return frames
+
+    def __init_messages(self, buffer_size: int):
+        """
+        Builds 'mmsghdr' array, each message points to its own pool buffer
+        """
+        # keep references to ctypes objects, so buffers addresses stay valid
+        self.__c_buffers = [
+            (ctypes.c_char * buffer_size).from_buffer(buffer)
+            for buffer in self.__buffers
+        ]
+        self.__iovecs = (_IoVec * self.__batch_size)(*[
+            _IoVec(ctypes.addressof(c_buffer), buffer_size)
+            for c_buffer in self.__c_buffers
+        ])
+        self.__messages = (_MMsgHdr * self.__batch_size)()
+        for i, message in enumerate(self.__messages):
+            message.msg_hdr.msg_iov = ctypes.pointer(self.__iovecs[i])
+            message.msg_hdr.msg_iovlen = 1
+        if self.__collect_timestamps or self.__collect_lengths:
+            self.__controls = [
+                bytearray(self.CONTROL_BUFFER_SIZE_BYTES)
+                for _ in range(self.__batch_size)
+            ]
+            self.__c_controls = [
+                (ctypes.c_char * self.CONTROL_BUFFER_SIZE_BYTES)
+                .from_buffer(control)
+                for control in self.__controls
+            ]
+            for message, c_control in zip(self.__messages,
+                                          self.__c_controls):
+                message.msg_hdr.msg_control = ctypes.addressof(c_control)
+                message.msg_hdr.msg_controllen = \
+                    self.CONTROL_BUFFER_SIZE_BYTES
+
+    @staticmethod
+    def __load_recvmmsg():
+        """
+        Returns 'recvmmsg' function of libc or None if it isn't available
+        """
+        library_name = ctypes.util.find_library("c")
+        if library_name is None:
+            return None
+        try:
+            libc = ctypes.CDLL(library_name, use_errno=True)
+        except OSError:
+            return None
+        recvmmsg = getattr(libc, "recvmmsg", None)
+        if recvmmsg is None:
+            return None
+        recvmmsg.argtypes = [
+            ctypes.c_int,
+            ctypes.POINTER(_MMsgHdr),
+            ctypes.c_uint,
+            ctypes.c_int,
+            ctypes.c_void_p
+        ]
+        recvmmsg.restype = ctypes.c_int
+        return recvmmsg
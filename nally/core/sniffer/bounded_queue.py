@@ -0,0 +1,178 @@
+import threading
+import time
+from collections import deque
+from enum import Enum
+from typing import Any, Iterable, List
+
+
+class DropPolicy(Enum):
+    """
+    Defines which items are shed when BoundedQueue is full
+    """
+    DROP_NEWEST = "drop_newest"
+    """New items are dropped, queued ones are kept"""
+    DROP_OLDEST = "drop_oldest"
+    """The oldest queued items are evicted to make room for the new ones"""
+    SAMPLE = "sample"
+    """
+    Every n-th new item is queued, evicting the oldest one, the rest are
+    dropped, so queue holds the sample of the recent items
+    """
+
+
+class BoundedQueue:
+    """
+    Queue of the fixed capacity between the producer (e.g. capture thread)
+    and the consumer. Producer never blocks: if queue is full, then items
+    are shed according to the drop policy and counted, so overload results
+    in controlled and measurable shedding. Consumer takes items in batches,
+    to amortize the synchronization cost
+    """
+
+    DEFAULT_SAMPLE_INTERVAL = 10
+
+    def __init__(
+            self,
+            capacity: int,
+            drop_policy: DropPolicy = DropPolicy.DROP_NEWEST,
+            sample_interval: int = DEFAULT_SAMPLE_INTERVAL
+    ):
+        """
+        :param capacity: max number of queued items
+        :param drop_policy: defines which items are shed if queue is full
+        :param sample_interval: if drop policy is SAMPLE, then every
+            'sample_interval'-th item is queued while queue is full
+        """
+        if capacity < 1:
+            raise ValueError(f"Capacity should be positive, got {capacity}")
+        if sample_interval < 1:
+            raise ValueError(f"Sample interval should be positive, "
+                             f"got {sample_interval}")
+        self.__capacity = capacity
+        self.__drop_policy = DropPolicy(drop_policy)
+        self.__sample_interval = sample_interval
+        self.__items = deque()
+        self.__condition = threading.Condition()
+        self.__closed = False
+        self.__put_count = 0
+        self.__dropped_count = 0
+        self.__overflow_count = 0
+
+    @property
+    def capacity(self) -> int:
+        return self.__capacity
+
+    @property
+    def drop_policy(self) -> DropPolicy:
+        return self.__drop_policy
+
+    @property
+    def put_count(self) -> int:
+        """
+        Returns number of items passed to the queue
+        """
+        return self.__put_count
+
+    @property
+    def dropped_count(self) -> int:
+        """
+        Returns number of items which were shed: new items which weren't
+        queued and queued items which were evicted
+        """
+        return self.__dropped_count
+
+    @property
+    def closed(self) -> bool:
+        return self.__closed
+
+    def __len__(self) -> int:
+        return len(self.__items)
+
+    def put(self, item: Any) -> int:
+        """
+        Adds the item to the queue, sheds items if queue is full.
+        Items passed to the closed queue are ignored
+
+        :return: number of items which were shed
+        """
+        return self.put_batch((item,))
+
+    def put_batch(self, items: Iterable[Any]) -> int:
+        """
+        Adds items to the queue, sheds items if queue is full.
+        Items passed to the closed queue are ignored
+
+        :return: number of items which were shed
+        """
+        with self.__condition:
+            if self.__closed:
+                return 0
+            queue = self.__items
+            capacity = self.__capacity
+            drop_policy = self.__drop_policy
+            dropped_count = 0
+            put_count = 0
+            for item in items:
+                put_count += 1
+                if len(queue) < capacity:
+                    queue.append(item)
+                    self.__overflow_count = 0
+                    continue
+                if drop_policy is DropPolicy.SAMPLE:
+                    self.__overflow_count += 1
+                    if self.__overflow_count % self.__sample_interval:
+                        dropped_count += 1
+                        continue
+                elif drop_policy is DropPolicy.DROP_NEWEST:
+                    dropped_count += 1
+                    continue
+                # evict the oldest item
+                queue.popleft()
+                queue.append(item)
+                dropped_count += 1
+            self.__put_count += put_count
+            self.__dropped_count += dropped_count
+            if queue:
+                self.__condition.notify()
+            return dropped_count
+
+    def get_batch(self, max_count: int = None, timeout: float = None) \
+            -> List[Any]:
+        """
+        Waits until queue has items and takes them
+
+        :param max_count: max number of items to take, all queued items
+            if not specified
+        :param timeout: time in seconds to wait for the items, if None,
+            then waits until items are queued or queue is closed
+        :return: list of items, empty if timeout expired or queue
+            is closed and has no more items
+        """
+        with self.__condition:
+            queue = self.__items
+            if not queue and not self.__closed:
+                deadline = (
+                    time.monotonic() + timeout
+                    if timeout is not None
+                    else None
+                )
+                while not queue and not self.__closed:
+                    remaining = None
+                    if deadline is not None:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            break
+                    self.__condition.wait(remaining)
+            count = len(queue)
+            if max_count is not None:
+                count = min(count, max_count)
+            return [queue.popleft() for _ in range(count)]
+
+    def close(self):
+        """
+        Closes the queue, consumers take the remaining items and then
+        get empty batches without waiting
+        """
+        with self.__condition:
+            self.__closed = True
+            self.__condition.notify_all()
@@ -0,0 +1,293 @@
+import logging
+import threading
+from typing import Callable, Generator, List, Optional, Union
+
+from nally.core.bpf.bpf_compiler import BpfCompiler
+from nally.core.layers.packet import Packet
+from nally.core.sniffer.bounded_queue import BoundedQueue, DropPolicy
+from nally.core.sniffer.capture_stats import CaptureStats
+from nally.core.sniffer.predicate_compiler import PredicateCompiler
+from nally.core.sniffer.sniffer import Sniffer
+
+
+class CaptureSubscription:
+    """
+    Stream of packets delivered to the single subscriber of CaptureHub.
+    Packets are buffered in the bounded queue, if subscriber falls behind
+    and queue is full, then packets are shed according to the drop policy
+    and counted, see BoundedQueue. If stream is ended, since the capture
+    failed, then the failure is available as 'error'
+    """
+
+    def __init__(
+            self,
+            hub,
+            predicate_filter: Union[Callable, str],
+            bpf_filter: str,
+            max_queue_size: int,
+            drop_policy: DropPolicy
+    ):
+        """
+        Use 'CaptureHub.subscribe' to create subscription
+        """
+        self.__queue = BoundedQueue(max_queue_size, drop_policy)
+        self.__hub = hub
+        self.__error = None
+        self.__predicate_filter, self.__raw_predicate = \
+            PredicateCompiler.from_filter(predicate_filter)
+        self.__compiled_filter = (
+            BpfCompiler.compile(bpf_filter)
+            if bpf_filter
+            else None
+        )
+
+    @property
+    def delivered_count(self) -> int:
+        """
+        Returns number of packets which were passed to the subscriber queue
+        """
+        return self.__queue.put_count
+
+    @property
+    def dropped_count(self) -> int:
+        """
+        Returns number of packets which were shed, since queue was full
+        """
+        return self.__queue.dropped_count
+
+    @property
+    def error(self) -> Optional[Exception]:
+        """
+        Returns exception which terminated the capture or None, so the
+        stream ended by the failure can be told from the empty one
+        """
+        return self.__error
+
+    def get(self, timeout: float = None) -> Optional[Packet]:
+        """
+        Returns the next packet
+
+        :param timeout: time in seconds to wait for the packet, if None,
+            then waits until the packet arrives or the stream ends
+        :return: packet or None if timeout expired or stream ended
+        """
+        packets = self.__queue.get_batch(1, timeout)
+        return packets[0] if packets else None
+
+    def packets(self, timeout: float = None) \
+            -> Generator[Packet, None, None]:
+        """
+        Yields packets until the stream ends
+
+        :param timeout: time in seconds after which generator stops if there
+            are no new packets, if None, then waits until the stream ends
+        """
+        while True:
+            packets = self.__queue.get_batch(timeout=timeout)
+            if not packets:
+                return
+            yield from packets
+
+    def close(self):
+        """
+        Unsubscribes from the hub
+        """
+        self.__hub.unsubscribe(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def _accepts(self, raw_packet: bytes) -> bool:
+        """
+        Checks if frame satisfies subscription BPF filter and compiled
+        predicate
+        """
+        if self.__raw_predicate is not None \
+                and not self.__raw_predicate(raw_packet):
+            return False
+        return self.__compiled_filter is None \
+            or self.__compiled_filter.filter(raw_packet) != 0
+
+    def _offer(self, packet: Packet) -> bool:
+        """
+        Queues the packet if it satisfies the subscription predicate
+
+        :return: True if packet satisfies the predicate
+        """
+        if self.__predicate_filter is not None \
+                and not self.__predicate_filter(packet):
+            return False
+        self.__queue.put(packet)
+        return True
+
+    def _end(self, error: Exception = None):
+        """
+        Ends the stream, subscriber still gets the queued packets
+
+        :param error: exception which terminated the capture, if any
+        """
+        self.__error = error
+        self.__queue.close()
+
+
+class CaptureHub:
+    """
+    Shares the single capture socket of the interface between several
+    subscribers, so concurrent consumers don't cost extra kernel copies
+    and decoding of every frame. Frames are received by the background
+    thread, each frame is checked against subscribers BPF filters and
+    decoded at most once, if some subscriber accepts it. Decoded packet
+    is checked against subscribers predicates and queued to the matching
+    subscriptions. Note: packet instances are shared between subscribers,
+    so they shouldn't be modified. If the capture fails, then streams
+    are ended with the error, see 'CaptureSubscription.error', and the
+    error is raised on the hub exit.
+
+    Usage:
+        with CaptureHub(if_name="eth0") as hub:
+            with hub.subscribe(bpf_filter="tcp port 80") as subscription:
+                for packet in subscription.packets(timeout=5):
+                    ...
+    """
+
+    DEFAULT_MAX_QUEUE_SIZE = 1024
+
+    LOG = logging.getLogger("CaptureHub")
+
+    def __init__(self, if_name: str = None, **sniffer_options):
+        """
+        :param if_name: network interface for capturing
+        :param sniffer_options: options of the underlying sniffer, see
+            Sniffer. Note: 'bpf_filter' and 'predicate_filter' of the sniffer
+            are applied before subscribers filters
+        """
+        self.__sniffer = Sniffer(if_name=if_name, **sniffer_options)
+        self.__subscriptions = ()
+        self.__lock = threading.Lock()
+        self.__thread = None
+        self.__error = None
+
+    def subscribe(
+            self,
+            predicate_filter: Union[Callable, str] = None,
+            bpf_filter: str = "",
+            max_queue_size: int = DEFAULT_MAX_QUEUE_SIZE,
+            drop_policy: DropPolicy = DropPolicy.DROP_NEWEST
+    ) -> CaptureSubscription:
+        """
+        Adds the subscriber, can be called while hub is running
+
+        :param predicate_filter: bool function which will be called to
+            determine if packet should be delivered to the subscriber, or
+            field expression checked against the raw frame before it's
+            decoded, see PredicateCompiler
+        :param bpf_filter: packet filter in BPF format, applied before
+            the frame is decoded
+        :param max_queue_size: max number of packets queued for the
+            subscriber
+        :param drop_policy: defines which packets are shed if subscriber
+            queue is full
+        :return: CaptureSubscription instance
+        """
+        subscription = CaptureSubscription(
+            self,
+            predicate_filter,
+            bpf_filter,
+            max_queue_size,
+            drop_policy
+        )
+        with self.__lock:
+            # subscriptions are replaced rather than modified, so capture
+            # thread iterates them without locking
+            self.__subscriptions += (subscription,)
+        return subscription
+
+    def unsubscribe(self, subscription: CaptureSubscription):
+        """
+        Removes the subscriber and ends its stream
+        """
+        with self.__lock:
+            if subscription not in self.__subscriptions:
+                return
+            self.__subscriptions = tuple(
+                s for s in self.__subscriptions if s is not subscription
+            )
+        subscription._end()
+
+    def stats(self, since: CaptureStats = None) -> CaptureStats:
+        """
+        Returns counters of the underlying sniffer, see 'Sniffer.stats'.
+        Matched packets are packets delivered to at least one subscriber
+        """
+        return self.__sniffer.stats(since)
+
+    def __enter__(self):
+        self.__sniffer.__enter__()
+        self.__thread = threading.Thread(
+            target=self.__run,
+            name="CaptureHub",
+            daemon=True
+        )
+        self.__thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        try:
+            self.__sniffer.stop()
+        except RuntimeError:
+            # sniffer is already terminated by itself
+            pass
+        self.__thread.join()
+        self.__thread = None
+        self.__sniffer.__exit__(exc_type, exc_val, exc_tb)
+        self.__end_subscriptions()
+        error, self.__error = self.__error, None
+        if error is not None and exc_val is None:
+            raise error
+
+    def __run(self):
+        try:
+            self.__sniffer._dispatch(self.__accept, self.__deliver)
+        except Exception as error:
+            self.LOG.exception("Capture failed, subscriptions are ended")
+            self.__error = error
+        finally:
+            # subscribers shouldn't wait for the terminated capture, e.g.
+            # if sniffer timeout expired
+            self.__end_subscriptions()
+
+    def __end_subscriptions(self):
+        with self.__lock:
+            subscriptions = self.__subscriptions
+            self.__subscriptions = ()
+        for subscription in subscriptions:
+            subscription._end(self.__error)
+
+    def __accept(self, raw_packet: bytes) -> List[CaptureSubscription]:
+        """
+        Returns subscriptions which accept the frame, frame is decoded
+        only if there are such
+        """
+        return [
+            subscription
+            for subscription in self.__subscriptions
+            if subscription._accepts(raw_packet)
+        ]
+
+    @staticmethod
+    def __deliver(
+            packet: Packet,
+            subscriptions: List[CaptureSubscription]
+    ) -> bool:
+        """
+        Queues the packet to the subscriptions which predicates it satisfies
+
+        :return: True if packet was queued to at least one subscription
+        """
+        matched = False
+        for subscription in subscriptions:
+            matched |= subscription._offer(packet)
+        return matched
@@ -0,0 +1,99 @@
+import time
+from typing import NamedTuple
+
+
+class CaptureStats(NamedTuple):
+    """
+    Snapshot of the capture counters. Counters are cumulative since the
+    capture start, rates are computed over the interval since the previous
+    snapshot (or since the capture start)
+    """
+    timestamp: float
+    """Monotonic time of the snapshot in seconds"""
+    received_count: int
+    """Frames received by the process"""
+    received_bytes: int
+    """Bytes of the frames received by the process"""
+    filtered_count: int
+    """Frames which satisfied the BPF filter"""
+    matched_count: int
+    """Decoded packets which satisfied the user-defined predicate"""
+    decode_error_count: int
+    """Frames which couldn't be decoded"""
+    kernel_received_count: int
+    """Frames passed to the socket by the kernel, including dropped ones"""
+    kernel_dropped_count: int
+    """Frames dropped by the kernel, since the socket buffer was full"""
+    kernel_freeze_count: int
+    """Number of times the receive ring was full (PACKET_MMAP only)"""
+    shed_count: int
+    """Frames shed by the bounded queue between capture and processing"""
+    interval_seconds: float
+    """Length of the interval the rates are computed over"""
+    packets_per_second: float
+    """Rate of the frames received by the process"""
+    bytes_per_second: float
+    """Rate of the bytes received by the process"""
+
+
+class CaptureCounters:
+    """
+    Mutable counters of the capture, see CaptureStats
+    """
+
+    __slots__ = (
+        "started_at",
+        "received_count",
+        "received_bytes",
+        "filtered_count",
+        "matched_count",
+        "decode_error_count",
+        "kernel_received_count",
+        "kernel_dropped_count",
+        "kernel_freeze_count",
+        "shed_count"
+    )
+
+    def __init__(self):
+        self.started_at = time.monotonic()
+        self.received_count = 0
+        self.received_bytes = 0
+        self.filtered_count = 0
+        self.matched_count = 0
+        self.decode_error_count = 0
+        self.kernel_received_count = 0
+        self.kernel_dropped_count = 0
+        self.kernel_freeze_count = 0
+        self.shed_count = 0
+
+    def snapshot(self, since: CaptureStats = None) -> CaptureStats:
+        """
+        Returns snapshot of the counters
+
+        :param since: previous snapshot, rates are computed over the interval
+            since it, if not specified, then since the capture start
+        """
+        timestamp = time.monotonic()
+        if since is None:
+            interval_seconds = timestamp - self.started_at
+            received_count = self.received_count
+            received_bytes = self.received_bytes
+        else:
+            interval_seconds = timestamp - since.timestamp
+            received_count = self.received_count - since.received_count
+            received_bytes = self.received_bytes - since.received_bytes
+        return CaptureStats(
+            timestamp,
+            self.received_count,
+            self.received_bytes,
+            self.filtered_count,
+            self.matched_count,
+            self.decode_error_count,
+            self.kernel_received_count,
+            self.kernel_dropped_count,
+            self.kernel_freeze_count,
+            self.shed_count,
+            interval_seconds,
+            received_count / interval_seconds if interval_seconds > 0 else 0.0,
+            received_bytes / interval_seconds if interval_seconds > 0 else 0.0
+        )
@@ -0,0 +1,251 @@
+import itertools
+import logging
+import multiprocessing
+import os
+import threading
+import traceback
+from typing import Any, Callable, Generator, Iterable, Iterator
+
+from nally.core.layers.packet import Packet
+from nally.core.sniffer.sniffer import Sniffer
+
+
+class FanoutSniffer:
+    """
+    Captures packets in parallel by several worker processes. Each worker
+    has its own Sniffer, and all their sockets are joined to the same
+    PACKET_FANOUT group (Linux only), so the kernel distributes captured
+    frames between the workers. By default frames are distributed by the
+    flow hash, so all packets of the flow (in both directions) are received
+    by the same worker and per-flow state doesn't need synchronization.
+
+    Each worker runs the 'worker' function over packets captured by its
+    sniffer, items yielded by the function are sent to the parent process
+    and merged to the single stream (see 'sniff'). To stream per-packet
+    results, yield them as packets arrive, to aggregate, yield the
+    aggregated value once the packets are exhausted.
+
+    Usage:
+        def count_packets(packets):
+            yield sum(1 for _ in packets)
+
+        with FanoutSniffer(count_packets, worker_count=4, timeout=10) as s:
+            total = sum(s.sniff())
+    """
+
+    STOP_TIMEOUT_SECONDS = 1
+    """
+    Time to wait for the worker termination after 'stop' call
+    """
+
+    _GROUP_IDS = itertools.count()
+    """
+    Counter of the instances in the process, so default fanout groups of
+    several sniffers don't collide
+    """
+
+    _READY = "ready"
+    _RESULTS = "results"
+    _ERROR = "error"
+    _DONE = "done"
+
+    LOG = logging.getLogger("FanoutSniffer")
+
+    def __init__(
+            self,
+            worker: Callable[[Iterator[Packet]], Iterable[Any]],
+            worker_count: int = None,
+            fanout_group_id: int = None,
+            fanout_mode: int = Sniffer.PACKET_FANOUT_HASH
+            | Sniffer.PACKET_FANOUT_FLAG_DEFRAG,
+            started_callback: callable = None,
+            **sniffer_options
+    ):
+        """
+        :param worker: function which is called in each worker process with
+            iterator over the captured packets, items returned by the
+            function are sent to the parent process. Note: if processes are
+            spawned rather than forked, then function should be picklable
+        :param worker_count: number of worker processes, number of CPUs
+            by default
+        :param fanout_group_id: id of the fanout group, by default unique
+            id is derived from the process id and the instance number
+        :param fanout_mode: frames distribution mode, see Sniffer
+        :param started_callback: function which will be called after all
+            workers are initialized
+        :param sniffer_options: options of the worker sniffers, see Sniffer.
+            Note: 'packet_count' limits number of packets per worker
+        """
+        self.__worker = worker
+        self.__worker_count = (
+            worker_count
+            if worker_count is not None
+            else os.cpu_count()
+        )
+        if self.__worker_count < 1:
+            raise ValueError(f"Worker count should be positive, "
+                             f"got {self.__worker_count}")
+        self.__fanout_group_id = (
+            fanout_group_id
+            if fanout_group_id is not None
+            else self.__default_group_id()
+        )
+        self.__fanout_mode = fanout_mode
+        self.__started_callback = started_callback
+        self.__sniffer_options = sniffer_options
+        self.__processes = []
+        self.__results = None
+        self.__stop_connections = []
+        self.__done_count = 0
+
+    def sniff(self) -> Generator[Any, None, None]:
+        """
+        Yields items produced by the workers, until all of them
+        are terminated
+        """
+        if self.__results is None:
+            raise RuntimeError("Sniffer should be used "
+                               "inside context manager")
+        while self.__done_count < self.__worker_count:
+            message_type, payload = self.__results.get()
+            if message_type == self._RESULTS:
+                yield from payload
+            elif message_type == self._DONE:
+                self.__done_count += 1
+            elif message_type == self._ERROR:
+                raise RuntimeError(f"Worker failed:\n{payload}")
+
+    def stop(self, drain: bool = False):
+        """
+        Terminates the workers, results produced before
+        the termination are still returned by 'sniff'
+
+        :param drain: if True, then workers process frames which were
+            already queued in their sockets before the termination
+        """
+        for stop_connection in self.__stop_connections:
+            try:
+                stop_connection.send(drain)
+            except OSError:
+                # worker is already terminated
+                pass
+
+    def __enter__(self):
+        self.__results = multiprocessing.Queue()
+        self.__done_count = 0
+        sniffer_options = dict(
+            self.__sniffer_options,
+            fanout_group_id=self.__fanout_group_id,
+            fanout_mode=self.__fanout_mode
+        )
+        for _ in range(self.__worker_count):
+            # pipe is used instead of shared event, since worker can exit
+            # while waiting for it, which leaves the event in broken state
+            stop_receiver, stop_sender = multiprocessing.Pipe(duplex=False)
+            process = multiprocessing.Process(
+                target=FanoutSniffer._run_worker,
+                args=(
+                    self.__worker,
+                    sniffer_options,
+                    self.__results,
+                    stop_receiver
+                ),
+                daemon=True
+            )
+            process.start()
+            stop_receiver.close()
+            self.__processes.append(process)
+            self.__stop_connections.append(stop_sender)
+        # wait until all sockets join the group, so no frames are missed
+        ready_count = 0
+        while ready_count < self.__worker_count:
+            message_type, payload = self.__results.get()
+            if message_type == self._ERROR:
+                self.__exit__(None, None, None)
+                raise RuntimeError(f"Worker failed:\n{payload}")
+            if message_type == self._READY:
+                ready_count += 1
+        self.LOG.debug(
+            f"{self.__worker_count} workers joined fanout group "
+            f"{self.__fanout_group_id}"
+        )
+        if self.__started_callback is not None:
+            self.__started_callback()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.LOG.debug("Exiting from sniffer, terminating workers...")
+        self.stop()
+        for process in self.__processes:
+            process.join(self.STOP_TIMEOUT_SECONDS)
+            if process.is_alive():
+                process.terminate()
+                process.join()
+        for stop_connection in self.__stop_connections:
+            stop_connection.close()
+        self.__processes = []
+        self.__stop_connections = []
+        self.__results.close()
+        self.__results = None
+
+    @staticmethod
+    def __default_group_id() -> int:
+        """
+        Returns 16 bits group id, unique within the process: instance
+        number is scrambled by the multiplication by odd number, which is
+        a bijection modulo 2^16, and combined with the process id, so ids
+        of different processes are unlikely to match
+        """
+        instance_number = next(FanoutSniffer._GROUP_IDS)
+        return (os.getpid() ^ instance_number * 0x9e37) & 0xffff
+
+    @staticmethod
+    def _run_worker(
+            worker: Callable[[Iterator[Packet]], Iterable[Any]],
+            sniffer_options: dict,
+            results: multiprocessing.Queue,
+            stop_receiver
+    ):
+        """
+        Entry point of the worker process. Items produced by the worker
+        function are sent in batches: pending items are flushed before
+        the sniffer waits for the next batch of packets
+        """
+        pending = []
+
+        def flush():
+            if pending:
+                results.put((FanoutSniffer._RESULTS, list(pending)))
+                pending.clear()
+
+        try:
+            with Sniffer(**sniffer_options) as sniffer:
+
+                def wait_for_stop():
+                    drain = False
+                    try:
+                        drain = stop_receiver.recv()
+                    except EOFError:
+                        # parent process is terminated
+                        pass
+                    try:
+                        sniffer.stop(drain)
+                    except RuntimeError:
+                        # sniffer is already terminated by itself
+                        pass
+
+                threading.Thread(target=wait_for_stop, daemon=True).start()
+                results.put((FanoutSniffer._READY, None))
+
+                def packets() -> Iterator[Packet]:
+                    for batch in sniffer.sniff_batch():
+                        yield from batch
+                        flush()
+
+                for item in worker(packets()):
+                    pending.append(item)
+            flush()
+        except Exception:
+            results.put((FanoutSniffer._ERROR, traceback.format_exc()))
+        finally:
+            results.put((FanoutSniffer._DONE, None))
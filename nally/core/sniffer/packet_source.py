@@ -0,0 +1,360 @@
+import functools
+import logging
+import struct
+from abc import ABC, abstractmethod
+from typing import Callable, Generator, Iterable, List, NamedTuple, Union
+
+from nally.core.layers.layer import Layer
+from nally.core.layers.link.ethernet.ethernet_packet import EthernetPacket
+from nally.core.layers.link.ethernet.ethernet_packet_view \
+    import EthernetPacketView
+from nally.core.layers.packet import Packet
+from nally.core.sniffer.capture_stats import CaptureCounters, CaptureStats
+from nally.core.sniffer.predicate_compiler import PredicateCompiler
+
+
+class FrameRecord(NamedTuple):
+    """
+    Raw frame with its capture metadata, see 'PacketSource.sniff_records'
+    """
+    data: memoryview
+    """Captured bytes of the frame"""
+    timestamp_ns: int
+    """Capture time in nanoseconds since the epoch"""
+    length: int
+    """Original length of the frame, exceeds captured one if it's truncated"""
+
+
+class PacketSource(ABC):
+    """
+    Base class of the packet sources, e.g. live capture (Sniffer) and
+    capture file (PcapReader). Defines the generator interface and the
+    pipeline which turns raw frames to packets: filter, decode, predicate.
+    Frames which can't be decoded are skipped and counted, see 'stats'
+    """
+
+    DECODE_ERRORS = (ValueError, struct.error)
+
+    LOG = logging.getLogger("PacketSource")
+
+    def __init__(
+            self,
+            started_callback: callable = None,
+            predicate_filter: Union[Callable, str] = None,
+            packet_count: int = None,
+            lazy_decoding: bool = False,
+            max_layer: Layer = None
+    ):
+        """
+        :param started_callback: function which will be called when
+            the source starts producing packets
+        :param predicate_filter: bool function which will be called to
+            determine if packet should be processed, or field expression,
+            e.g. 'tcp.dport in {80, 443} and ip.ttl < 64', which is checked
+            against the raw frame before it's decoded, see PredicateCompiler
+        :param packet_count: number of packets that should be produced
+        :param lazy_decoding: if True, then packets are decoded lazily, i.e.
+            header fields are unpacked only when they are read, see
+            EthernetPacketView for details
+        :param max_layer: the highest layer which should be decoded, e.g.
+            Layer.INTERNET if only IP fields are needed, payload of this
+            layer is kept as RawPacket. If not specified, then all known
+            layers are decoded
+        """
+        self._started_callback = started_callback
+        self._predicate_filter, self._raw_predicate = \
+            PredicateCompiler.from_filter(predicate_filter)
+        self._packet_count = packet_count
+        self._lazy_decoding = lazy_decoding
+        self._max_layer = max_layer
+        self._decoder = (
+            EthernetPacketView.from_bytes
+            if lazy_decoding
+            else EthernetPacket.from_bytes
+        )
+        if max_layer is not None:
+            self._decoder = functools.partial(
+                self._decoder,
+                max_layer=Layer(max_layer)
+            )
+        self._stopped = False
+        self._counters = CaptureCounters()
+
+    def stats(self, since: CaptureStats = None) -> CaptureStats:
+        """
+        Returns snapshot of the capture counters
+
+        :param since: previous snapshot, rates are computed over the interval
+            since it, if not specified, then since the capture start
+        """
+        self._update_kernel_stats()
+        return self._counters.snapshot(since)
+
+    def sniff(self) -> Generator[Packet, None, int]:
+        """
+        Yields packets one by one, see 'sniff_batch'
+        """
+        batches = self.sniff_batch()
+        while True:
+            try:
+                batch = next(batches)
+            except StopIteration as stop:
+                return stop.value
+            yield from batch
+
+    def sniff_batch(self) -> Generator[List[Packet], None, int]:
+        """
+        Yields packets in batches, so the per-packet overhead of waiting
+        for the frames is avoided. Returns number of processed packets
+        """
+        # eagerly decoded packets shouldn't reference the receive
+        # buffers, so frames are copied
+        return self._sniff(
+            self._process_frames,
+            copy=not self._lazy_decoding
+        )
+
+    def sniff_frames(self) -> Generator[List[memoryview], None, int]:
+        """
+        Yields batches of raw frames which satisfy the BPF filter, frames
+        aren't decoded and user-defined predicate isn't applied. Frames
+        reference the receive buffers, so they're valid only until the next
+        batch is requested. Returns number of processed frames
+        """
+        return self._sniff(self._filter_frames, copy=False)
+
+    def sniff_records(self) -> Generator[List[FrameRecord], None, int]:
+        """
+        Yields batches of raw frames which satisfy the BPF filter as
+        FrameRecord instances, i.e. with capture timestamps and original
+        lengths, so they can be passed further as is, e.g. to
+        'SharedFrameRing.write(*record)'. Frames reference the receive
+        buffers the same way as ones of 'sniff_frames'. Returns number
+        of processed frames
+        """
+        return self._sniff(self._filter_records, copy=False, records=True)
+
+    def stop(self):
+        """
+        Provides ability to gracefully terminate the source (makes sense if
+        it's running in the separate thread)
+        """
+        if self._stopped:
+            raise RuntimeError("Illegal state: sniffer already terminated")
+        self._stopped = True
+
+    @abstractmethod
+    def _sniff(
+            self,
+            process_frames: callable,
+            copy: bool,
+            records: bool = False
+    ) -> Generator[list, None, int]:
+        """
+        Reads the frames and yields them in batches
+
+        :param process_frames: function which turns frames to the batch,
+            see '_process_frames'
+        :param copy: if True, then frames are copied, so they don't
+            reference the receive buffers
+        :param records: if True, then frames are passed to 'process_frames'
+            as FrameRecord instances
+        """
+        raise NotImplementedError
+
+    def _process_frames(self, frames: Iterable, max_count: int = None) \
+            -> List[Packet]:
+        """
+        Applies BPF filter to the frames, decodes them and applies
+        user-defined predicate
+
+        :param frames: captured frames
+        :param max_count: max number of packets to return
+        :return: list of decoded packets which satisfy the filters
+        """
+        batch = []
+        filtered_count = 0
+        decode_error_count = 0
+        for raw_packet in frames:
+            if len(batch) == max_count:
+                break
+            # apply BPF filter
+            if not self._filter_packet(raw_packet):
+                continue
+            filtered_count += 1
+            # apply compiled predicate before paying for decoding
+            if self._raw_predicate is not None \
+                    and not self._raw_predicate(raw_packet):
+                continue
+            # parse Ethernet header and all upper layers if present
+            try:
+                ethernet_packet = self._decoder(raw_packet)
+            except self.DECODE_ERRORS as e:
+                decode_error_count += 1
+                self.LOG.debug(f"Can't decode frame ({e}), skipping it")
+                continue
+            # apply user-defined predicate if presents
+            predicate_result: bool = (
+                self._predicate_filter(ethernet_packet)
+                if self._predicate_filter is not None
+                else True
+            )
+            if not predicate_result:
+                continue
+            batch.append(ethernet_packet)
+        counters = self._counters
+        counters.filtered_count += filtered_count
+        counters.decode_error_count += decode_error_count
+        counters.matched_count += len(batch)
+        return batch
+
+    def _filter_frames(self, frames: Iterable, max_count: int = None) \
+            -> list:
+        """
+        Applies BPF filter to the frames
+
+        :param frames: captured frames
+        :param max_count: max number of frames to return
+        :return: list of frames which satisfy the filter
+        """
+        if not self._filters_in_user_space():
+            batch = list(frames)[:max_count]
+        else:
+            batch = []
+            for raw_packet in frames:
+                if len(batch) == max_count:
+                    break
+                if self._filter_packet(raw_packet):
+                    batch.append(raw_packet)
+        self._counters.filtered_count += len(batch)
+        return batch
+
+    def _filter_records(
+            self,
+            records: Iterable[FrameRecord],
+            max_count: int = None
+    ) -> List[FrameRecord]:
+        """
+        Applies BPF filter to the frames of the records, see '_filter_frames'
+        """
+        if not self._filters_in_user_space():
+            batch = list(records)[:max_count]
+        else:
+            batch = []
+            for record in records:
+                if len(batch) == max_count:
+                    break
+                if self._filter_packet(record.data):
+                    batch.append(record)
+        self._counters.filtered_count += len(batch)
+        return batch
+
+    def _dispatch(self, accept: Callable, deliver: Callable) -> int:
+        """
+        Runs the source in the current thread and passes packets to the
+        consumers instead of yielding them, so the single source can be
+        shared, see CaptureHub. Filters and predicates of the source are
+        applied before the consumers ones, frames which aren't accepted by
+        any consumer aren't decoded
+
+        :param accept: function which takes the raw frame and returns
+            collection of consumers which accept it
+        :param deliver: function which takes the decoded packet and the
+            consumers returned by 'accept', returns True if packet was
+            delivered to at least one of them
+        :return: number of delivered packets
+        """
+        batches = self._sniff(
+            functools.partial(self._dispatch_frames, accept, deliver),
+            copy=False
+        )
+        while True:
+            try:
+                next(batches)
+            except StopIteration as stop:
+                return stop.value
+
+    def _dispatch_frames(
+            self,
+            accept: Callable,
+            deliver: Callable,
+            frames: Iterable,
+            max_count: int = None
+    ) -> List[Packet]:
+        """
+        Decodes frames accepted by the consumers and delivers packets to
+        them, see '_dispatch'
+
+        :return: list of packets delivered to at least one consumer
+        """
+        dispatched = []
+        filtered_count = 0
+        decode_error_count = 0
+        for raw_packet in frames:
+            if len(dispatched) == max_count:
+                break
+            if not self._filter_packet(raw_packet):
+                continue
+            filtered_count += 1
+            if self._raw_predicate is not None \
+                    and not self._raw_predicate(raw_packet):
+                continue
+            consumers = accept(raw_packet)
+            if not consumers:
+                continue
+            # packets are kept by consumers, so they shouldn't reference
+            # the receive buffers
+            try:
+                packet = self._decoder(bytes(raw_packet))
+            except self.DECODE_ERRORS as e:
+                decode_error_count += 1
+                self.LOG.debug(f"Can't decode frame ({e}), skipping it")
+                continue
+            if self._predicate_filter is not None \
+                    and not self._predicate_filter(packet):
+                continue
+            if deliver(packet, consumers):
+                dispatched.append(packet)
+        counters = self._counters
+        counters.filtered_count += filtered_count
+        counters.decode_error_count += decode_error_count
+        counters.matched_count += len(dispatched)
+        return dispatched
+
+    def _count_received(self, frames: List):
+        """
+        Updates counters of the received frames
+        """
+        counters = self._counters
+        counters.received_count += len(frames)
+        counters.received_bytes += sum(map(len, frames))
+
+    def _update_kernel_stats(self):
+        """
+        Updates kernel counters of the source, if it has such
+        """
+
+    def _filters_in_user_space(self) -> bool:
+        """
+        Returns True if frames should be checked by '_filter_packet'
+        """
+        return False
+
+    def _filter_packet(self, raw_packet: bytes) -> bool:
+        """
+        Filters packet using the BPF filter, if specified
+
+        :param raw_packet: raw network packet
+        :return: True, if packet satisfies the filter conditions,
+            False otherwise
+        """
+        return True
+
+    def _remaining_count(self, processed_count: int):
+        """
+        Returns number of packets which should be produced yet,
+        or None if it's unlimited
+        """
+        if self._packet_count is None:
+            return None
+        return self._packet_count - processed_count
@@ -0,0 +1,364 @@
+import ast
+import operator
+import socket
+import struct
+from typing import Callable, NamedTuple, Optional, Tuple, Union
+
+
+class _Field(NamedTuple):
+    layer: str
+    offset: int
+    """Offset of the field from the beginning of the layer"""
+    format: struct.Struct
+    mask: int
+    """Mask applied to the unpacked value, 0 if there is no mask"""
+    shift: int
+    """Shift applied to the masked value"""
+    convert: Callable
+    """Converts constants compared with the field to the field format"""
+
+
+def _ipv4_address(value) -> bytes:
+    try:
+        return socket.inet_pton(socket.AF_INET, value)
+    except (OSError, TypeError):
+        raise ValueError(f"Invalid IPv4 address: {value}")
+
+
+def _mac_address(value) -> bytes:
+    try:
+        address = bytes.fromhex(value.replace(":", "").replace("-", ""))
+    except (AttributeError, ValueError):
+        address = b""
+    if len(address) != 6:
+        raise ValueError(f"Invalid MAC address: {value}")
+    return address
+
+
+def _integer(value) -> int:
+    if not isinstance(value, int) or isinstance(value, bool):
+        raise ValueError(f"Integer value expected, got {value!r}")
+    return value
+
+
+class PredicateCompiler:
+    """
+    Compiles predicates declared as field expressions to the functions
+    which check raw frames, so frames can be filtered before they're
+    decoded. Each field is read from the fixed offset of its layer by
+    the precompiled struct, only the offset of the transport layer
+    depends on the IP header length.
+
+    Expression is a Python expression over 'layer.field' operands:
+        * comparisons: ==, !=, <, <=, >, >=, in, not in
+        * sets, lists and tuples of constants for 'in' checks
+        * bitwise and with constant, e.g. 'tcp.flags & 0x02'
+        * 'and', 'or', 'not'
+        * bare layer name checks that the frame has the layer, e.g. 'udp'
+
+    IPv4 and MAC addresses are compared with string constants, e.g.
+    'ip.src == "10.0.0.1"'. If frame doesn't have the layer of the field,
+    then the comparison is false.
+
+    Usage:
+        predicate = PredicateCompiler.compile(
+            "tcp.dport in {80, 443} and ip.ttl < 64"
+        )
+        predicate(raw_frame)  # -> bool
+    """
+
+    ETHERNET_HEADER_LENGTH = 14
+    ETHER_TYPE_IPV4 = b"\x08\x00"
+    ETHER_TYPE_ARP = b"\x08\x06"
+    IP_PROTOCOLS = {"icmp": 1, "tcp": 6, "udp": 17}
+
+    U8 = struct.Struct("!B")
+    U16 = struct.Struct("!H")
+    U32 = struct.Struct("!I")
+    ADDRESS_IPV4 = struct.Struct("!4s")
+    ADDRESS_MAC = struct.Struct("!6s")
+
+    FIELDS = {
+        "eth": {
+            "dst": (0, ADDRESS_MAC, 0, 0, _mac_address),
+            "src": (6, ADDRESS_MAC, 0, 0, _mac_address),
+            "type": (12, U16, 0, 0, _integer),
+        },
+        "ip": {
+            "version": (0, U8, 0xf0, 4, _integer),
+            "ihl": (0, U8, 0x0f, 0, _integer),
+            "dscp": (1, U8, 0xfc, 2, _integer),
+            "ecn": (1, U8, 0x03, 0, _integer),
+            "len": (2, U16, 0, 0, _integer),
+            "id": (4, U16, 0, 0, _integer),
+            "flags": (6, U16, 0xe000, 13, _integer),
+            "frag_offset": (6, U16, 0x1fff, 0, _integer),
+            "ttl": (8, U8, 0, 0, _integer),
+            "proto": (9, U8, 0, 0, _integer),
+            "checksum": (10, U16, 0, 0, _integer),
+            "src": (12, ADDRESS_IPV4, 0, 0, _ipv4_address),
+            "dst": (16, ADDRESS_IPV4, 0, 0, _ipv4_address),
+        },
+        "tcp": {
+            "sport": (0, U16, 0, 0, _integer),
+            "dport": (2, U16, 0, 0, _integer),
+            "seq": (4, U32, 0, 0, _integer),
+            "ack": (8, U32, 0, 0, _integer),
+            "offset": (12, U8, 0xf0, 4, _integer),
+            "flags": (12, U16, 0x01ff, 0, _integer),
+            "win": (14, U16, 0, 0, _integer),
+            "checksum": (16, U16, 0, 0, _integer),
+            "urg_ptr": (18, U16, 0, 0, _integer),
+        },
+        "udp": {
+            "sport": (0, U16, 0, 0, _integer),
+            "dport": (2, U16, 0, 0, _integer),
+            "len": (4, U16, 0, 0, _integer),
+            "checksum": (6, U16, 0, 0, _integer),
+        },
+        "icmp": {
+            "type": (0, U8, 0, 0, _integer),
+            "code": (1, U8, 0, 0, _integer),
+            "checksum": (2, U16, 0, 0, _integer),
+        },
+        "arp": {
+            "op": (6, U16, 0, 0, _integer),
+            "sha": (8, ADDRESS_MAC, 0, 0, _mac_address),
+            "spa": (14, ADDRESS_IPV4, 0, 0, _ipv4_address),
+            "tha": (18, ADDRESS_MAC, 0, 0, _mac_address),
+            "tpa": (24, ADDRESS_IPV4, 0, 0, _ipv4_address),
+        },
+    }
+    """
+    Maps layer name to its fields: offset from the beginning of the layer,
+    struct, mask, shift and converter of the constants
+    """
+
+    COMPARISONS = {
+        ast.Eq: operator.eq,
+        ast.NotEq: operator.ne,
+        ast.Lt: operator.lt,
+        ast.LtE: operator.le,
+        ast.Gt: operator.gt,
+        ast.GtE: operator.ge,
+    }
+
+    @staticmethod
+    def compile(expression: str) -> Callable[[bytes], bool]:
+        """
+        Compiles the expression to the predicate of the raw frame
+
+        :param expression: field expression, see PredicateCompiler
+        :return: function which takes the raw Ethernet frame and returns
+            True if it satisfies the expression
+        """
+        try:
+            tree = ast.parse(expression.strip(), mode="eval")
+        except SyntaxError as e:
+            raise ValueError(f"Invalid predicate '{expression}': {e.msg}")
+        return PredicateCompiler.__compile_condition(tree.body)
+
+    @staticmethod
+    def from_filter(predicate_filter: Union[Callable, str, None]) \
+            -> Tuple[Optional[Callable], Optional[Callable[[bytes], bool]]]:
+        """
+        Splits 'predicate_filter' option of the packet sources to the
+        predicate of the decoded packet and the predicate of the raw frame
+
+        :param predicate_filter: bool function of the decoded packet, field
+            expression or None
+        :return: tuple of the packet predicate and the compiled frame
+            predicate, at least one of them is None
+        """
+        if isinstance(predicate_filter, str):
+            return None, PredicateCompiler.compile(predicate_filter)
+        return predicate_filter, None
+
+    @staticmethod
+    def __compile_condition(node: ast.AST) -> Callable[[bytes], bool]:
+        if isinstance(node, ast.BoolOp):
+            operands = tuple(
+                PredicateCompiler.__compile_condition(value)
+                for value in node.values
+            )
+            if isinstance(node.op, ast.And):
+                return lambda frame: all(
+                    operand(frame) for operand in operands
+                )
+            return lambda frame: any(operand(frame) for operand in operands)
+        if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.Not):
+            operand = PredicateCompiler.__compile_condition(node.operand)
+            return lambda frame: not operand(frame)
+        if isinstance(node, ast.Compare):
+            comparisons = [
+                PredicateCompiler.__compile_comparison(left, op, right)
+                for left, op, right in zip(
+                    [node.left] + node.comparators[:-1],
+                    node.ops,
+                    node.comparators
+                )
+            ]
+            if len(comparisons) == 1:
+                return comparisons[0]
+            return lambda frame: all(
+                comparison(frame) for comparison in comparisons
+            )
+        if isinstance(node, ast.Name):
+            return PredicateCompiler.__compile_presence(node.id)
+        if isinstance(node, (ast.Attribute, ast.BinOp)):
+            getter, _ = PredicateCompiler.__compile_operand(node)
+            return lambda frame: bool(getter(frame))
+        raise ValueError(f"Unsupported expression: {ast.unparse(node)}")
+
+    @staticmethod
+    def __compile_presence(layer: str) -> Callable[[bytes], bool]:
+        get_offset = PredicateCompiler.__layer_offset_getter(layer)
+        return lambda frame: get_offset(frame) is not None
+
+    @staticmethod
+    def __compile_comparison(left: ast.AST, op: ast.cmpop, right: ast.AST) \
+            -> Callable[[bytes], bool]:
+        if isinstance(op, (ast.In, ast.NotIn)):
+            getter, convert = PredicateCompiler.__compile_operand(left)
+            values = frozenset(
+                convert(value)
+                for value in PredicateCompiler.__constant_collection(right)
+            )
+            if isinstance(op, ast.In):
+                return lambda frame: getter(frame) in values
+            return lambda frame: (
+                (value := getter(frame)) is not None and value not in values
+            )
+        compare = PredicateCompiler.COMPARISONS.get(type(op))
+        if compare is None:
+            raise ValueError(f"Unsupported comparison: {type(op).__name__}")
+        if PredicateCompiler.__is_constant(right):
+            getter, convert = PredicateCompiler.__compile_operand(left)
+            constant = convert(right.value)
+            return lambda frame: (
+                (value := getter(frame)) is not None
+                and compare(value, constant)
+            )
+        if PredicateCompiler.__is_constant(left):
+            getter, convert = PredicateCompiler.__compile_operand(right)
+            constant = convert(left.value)
+            return lambda frame: (
+                (value := getter(frame)) is not None
+                and compare(constant, value)
+            )
+        left_getter, _ = PredicateCompiler.__compile_operand(left)
+        right_getter, _ = PredicateCompiler.__compile_operand(right)
+
+        def compare_fields(frame: bytes) -> bool:
+            left_value = left_getter(frame)
+            right_value = right_getter(frame)
+            return left_value is not None and right_value is not None \
+                and compare(left_value, right_value)
+
+        return compare_fields
+
+    @staticmethod
+    def __compile_operand(node: ast.AST):
+        """
+        Returns getter of the operand value (None if frame doesn't have
+        the field) and converter of the constants compared with it
+        """
+        if isinstance(node, ast.BinOp) and isinstance(node.op, ast.BitAnd) \
+                and PredicateCompiler.__is_constant(node.right):
+            getter, convert = PredicateCompiler.__compile_operand(node.left)
+            mask = _integer(node.right.value)
+            return (
+                lambda frame: (
+                    None
+                    if (value := getter(frame)) is None
+                    else value & mask
+                ),
+                convert
+            )
+        if not isinstance(node, ast.Attribute) \
+                or not isinstance(node.value, ast.Name):
+            raise ValueError(f"Field expected, got {ast.unparse(node)}")
+        field = PredicateCompiler.__field(node.value.id, node.attr)
+        return PredicateCompiler.__field_getter(field), field.convert
+
+    @staticmethod
+    def __field(layer: str, name: str) -> _Field:
+        fields = PredicateCompiler.FIELDS.get(layer)
+        if fields is None:
+            raise ValueError(f"Unknown layer: {layer}")
+        if name not in fields:
+            raise ValueError(f"Unknown field: {layer}.{name}")
+        return _Field(layer, *fields[name])
+
+    @staticmethod
+    def __field_getter(field: _Field) -> Callable[[bytes], Optional[int]]:
+        get_offset = PredicateCompiler.__layer_offset_getter(field.layer)
+        field_offset = field.offset
+        unpack_from = field.format.unpack_from
+        end_offset = field_offset + field.format.size
+        mask = field.mask
+        shift = field.shift
+
+        def get(frame: bytes):
+            offset = get_offset(frame)
+            if offset is None or offset + end_offset > len(frame):
+                return None
+            value = unpack_from(frame, offset + field_offset)[0]
+            if mask:
+                return (value & mask) >> shift
+            return value
+
+        return get
+
+    @staticmethod
+    def __layer_offset_getter(layer: str) \
+            -> Callable[[bytes], Optional[int]]:
+        """
+        Returns function which returns offset of the layer in the frame,
+        or None if frame doesn't have the layer
+        """
+        ip_offset = PredicateCompiler.ETHERNET_HEADER_LENGTH
+        if layer == "eth":
+            return lambda frame: 0
+        if layer == "arp":
+            ether_type = PredicateCompiler.ETHER_TYPE_ARP
+            return lambda frame: (
+                ip_offset if frame[12:14] == ether_type else None
+            )
+        ipv4 = PredicateCompiler.ETHER_TYPE_IPV4
+
+        def get_ip_offset(frame: bytes) -> Optional[int]:
+            if frame[12:14] != ipv4 or len(frame) <= ip_offset \
+                    or frame[ip_offset] >> 4 != 4:
+                return None
+            return ip_offset
+
+        if layer == "ip":
+            return get_ip_offset
+        protocol = PredicateCompiler.IP_PROTOCOLS.get(layer)
+        if protocol is None:
+            raise ValueError(f"Unknown layer: {layer}")
+
+        def get_transport_offset(frame: bytes) -> Optional[int]:
+            # transport header is present in non-fragmented packets
+            # and in the first fragment only
+            if get_ip_offset(frame) is None or len(frame) < ip_offset + 20 \
+                    or frame[ip_offset + 9] != protocol \
+                    or frame[ip_offset + 6] & 0x1f or frame[ip_offset + 7]:
+                return None
+            return ip_offset + (frame[ip_offset] & 0x0f) * 4
+
+        return get_transport_offset
+
+    @staticmethod
+    def __is_constant(node: ast.AST) -> bool:
+        return isinstance(node, ast.Constant)
+
+    @staticmethod
+    def __constant_collection(node: ast.AST) -> list:
+        if not isinstance(node, (ast.Set, ast.List, ast.Tuple)) or not all(
+                PredicateCompiler.__is_constant(e) for e in node.elts
+        ):
+            raise ValueError(f"Collection of constants expected, "
+                             f"got {ast.unparse(node)}")
+        return [element.value for element in node.elts]
@@ -0,0 +1,217 @@
+import logging
+import mmap
+import socket
+import struct
+from typing import Generator, List
+
+
+class RxRing:
+    """
+    Linux PACKET_MMAP receive ring (TPACKET_V3). Kernel writes captured
+    frames directly to the blocks of the memory shared with the process, so
+    frames are read without syscall and copying per frame. Each block holds
+    many frames and is returned to the kernel at once, after all its frames
+    were consumed.
+
+    Frames are returned as memoryviews of the ring, so they're valid only
+    until the next frame is requested, after that the block can be released
+    and overwritten by the kernel. Copy the frame if it should outlive this.
+
+    Ring should be set up before the socket is bound to the interface,
+    see https://www.kernel.org/doc/Documentation/networking/packet_mmap.txt
+    """
+
+    # linux/socket.h
+    SOL_PACKET = 263
+
+    # linux/if_packet.h
+    PACKET_RX_RING = 5
+    PACKET_VERSION = 10
+    TPACKET_V3 = 2
+
+    TP_STATUS_KERNEL = 0
+    """Block is owned by the kernel"""
+    TP_STATUS_USER = 1
+    """Block is filled by the kernel and can be read by the process"""
+
+    TPACKET_REQ3_FORMAT = struct.Struct("=7I")
+    """
+    Defines format of 'tpacket_req3' structure:
+        * Block size : 4 bytes
+        * Number of blocks : 4 bytes
+        * Frame size : 4 bytes
+        * Number of frames : 4 bytes
+        * Block retire timeout in milliseconds : 4 bytes
+        * Size of private area : 4 bytes
+        * Feature request word : 4 bytes
+    """
+
+    BLOCK_STATUS_FORMAT = struct.Struct("=I")
+    BLOCK_HEADER_FORMAT = struct.Struct("=8x3I")
+    """
+    Defines format of the beginning of 'tpacket_block_desc' structure:
+        * Version and offset to private area : 8 bytes (skipped)
+        * Block status : 4 bytes
+        * Number of frames in the block : 4 bytes
+        * Offset to the first frame : 4 bytes
+    """
+    BLOCK_STATUS_OFFSET = 8
+
+    FRAME_HEADER_FORMAT = struct.Struct("=5I4xH")
+    """
+    Defines format of the beginning of 'tpacket3_hdr' structure:
+        * Offset to the next frame : 4 bytes
+        * Timestamp seconds : 4 bytes
+        * Timestamp nanoseconds : 4 bytes
+        * Captured length : 4 bytes
+        * Original length : 4 bytes
+        * Status : 4 bytes (skipped)
+        * Offset to the link layer header : 2 bytes
+    """
+
+    DEFAULT_BLOCK_SIZE_BYTES = 1 << 20
+    DEFAULT_BLOCK_COUNT = 16
+    DEFAULT_FRAME_SIZE_BYTES = 2048
+    DEFAULT_BLOCK_TIMEOUT_MS = 64
+
+    LOG = logging.getLogger("RxRing")
+
+    def __init__(
+            self,
+            sniff_socket: socket.socket,
+            block_size: int = DEFAULT_BLOCK_SIZE_BYTES,
+            block_count: int = DEFAULT_BLOCK_COUNT,
+            frame_size: int = DEFAULT_FRAME_SIZE_BYTES,
+            block_timeout_ms: int = DEFAULT_BLOCK_TIMEOUT_MS
+    ):
+        """
+        Sets up the ring on the socket and maps it to the process memory
+
+        :param sniff_socket: AF_PACKET socket, which isn't bound yet
+        :param block_size: size of the block, should be a multiple of the
+            page size and a power of two
+        :param block_count: number of blocks in the ring
+        :param frame_size: nominal frame size, used by the kernel to compute
+            number of frames, frames of the larger size are still captured
+        :param block_timeout_ms: timeout after which partially filled block
+            is passed to the process
+        """
+        if block_size % mmap.PAGESIZE != 0:
+            raise ValueError(f"Block size should be a multiple of the page "
+                             f"size ({mmap.PAGESIZE}), got {block_size}")
+        self.__block_size = block_size
+        self.__block_count = block_count
+        sniff_socket.setsockopt(
+            self.SOL_PACKET,
+            self.PACKET_VERSION,
+            self.TPACKET_V3
+        )
+        sniff_socket.setsockopt(
+            self.SOL_PACKET,
+            self.PACKET_RX_RING,
+            self.TPACKET_REQ3_FORMAT.pack(
+                block_size,
+                block_count,
+                frame_size,
+                block_size // frame_size * block_count,
+                block_timeout_ms,
+                0,
+                0
+            )
+        )
+        self.__ring = mmap.mmap(
+            sniff_socket.fileno(),
+            block_size * block_count,
+            flags=mmap.MAP_SHARED,
+            prot=mmap.PROT_READ | mmap.PROT_WRITE
+        )
+        self.__view = memoryview(self.__ring)
+        self.__current_block = 0
+        self.__timestamps = []
+        self.__lengths = []
+
+    @property
+    def timestamps(self) -> List[int]:
+        """
+        Returns kernel timestamps (in nanoseconds since the epoch) of the
+        frames of the last returned block
+        """
+        return self.__timestamps
+
+    @property
+    def lengths(self) -> List[int]:
+        """
+        Returns original lengths of the frames of the last returned block,
+        they differ from the frames lengths if frames were truncated
+        """
+        return self.__lengths
+
+    def frames(self) -> Generator[memoryview, None, None]:
+        """
+        Returns frames of all blocks filled by the kernel, doesn't block
+        if there are no such blocks. Block is released after its last frame
+        is consumed, or when generator is closed
+        """
+        for block in self.blocks():
+            yield from block
+
+    def blocks(self) -> Generator[List[memoryview], None, None]:
+        """
+        Returns frames of the blocks filled by the kernel block by block,
+        doesn't block if there are no such blocks. Block is released when
+        the next one is requested, or when generator is closed, so all
+        frames of the block are valid until then. Timestamps and original
+        lengths of the frames are available as 'timestamps' and 'lengths'
+        """
+        view = self.__view
+        while True:
+            block_offset = self.__current_block * self.__block_size
+            status, frames_count, frame_offset = \
+                self.BLOCK_HEADER_FORMAT.unpack_from(view, block_offset)
+            if not status & self.TP_STATUS_USER:
+                return
+            frames = []
+            timestamps = []
+            lengths = []
+            frame_offset += block_offset
+            for _ in range(frames_count):
+                next_offset, seconds, nanoseconds, snap_len, length, \
+                    mac_offset = self.FRAME_HEADER_FORMAT.unpack_from(
+                        view,
+                        frame_offset
+                    )
+                frame_start = frame_offset + mac_offset
+                frames.append(view[frame_start:frame_start + snap_len])
+                timestamps.append(seconds * 1_000_000_000 + nanoseconds)
+                lengths.append(length)
+                frame_offset += next_offset
+            self.__timestamps = timestamps
+            self.__lengths = lengths
+            try:
+                yield frames
+            finally:
+                self.__release_block(block_offset)
+
+    def __release_block(self, block_offset: int):
+        """
+        Passes the block back to the kernel and moves to the next one
+        """
+        self.BLOCK_STATUS_FORMAT.pack_into(
+            self.__view,
+            block_offset + self.BLOCK_STATUS_OFFSET,
+            self.TP_STATUS_KERNEL
+        )
+        self.__current_block = (self.__current_block + 1) \
+            % self.__block_count
+
+    def close(self):
+        """
+        Unmaps the ring. If some frames are still referenced, then ring
+        will be unmapped after they're released
+        """
+        self.__view.release()
+        try:
+            self.__ring.close()
+        except BufferError:
+            self.LOG.debug("Ring frames are still referenced, ring will be "
+                           "unmapped after they're released")
@@ -0,0 +1,376 @@
+import struct
+import sys
+import time
+from multiprocessing import resource_tracker, shared_memory
+from typing import Generator, NamedTuple, Optional
+
+
+class SharedFrame(NamedTuple):
+    """
+    Frame read from the shared ring
+    """
+    sequence: int
+    """Sequence number of the frame in the ring"""
+    timestamp_ns: int
+    """Capture time in nanoseconds since the epoch"""
+    length: int
+    """Original length of the frame"""
+    data: memoryview
+    """Captured bytes, view of the shared memory"""
+
+
+class SharedFrameRing:
+    """
+    Single producer / multiple consumers ring of raw frames in the shared
+    memory (see 'multiprocessing.shared_memory'), used to pass captured
+    frames from the capture process to the analysis processes without
+    pickling them.
+
+    Ring consists of the fixed size slots, frame 'n' is written to the slot
+    'n % slot_count'. Producer never waits for consumers: if consumer falls
+    behind by more than 'slot_count' frames, then the oldest frames are
+    overwritten and counted as lost by the reader. Every reader sees every
+    frame, readers are independent.
+
+    Each slot is guarded by the sequence lock: producer marks the slot as
+    busy, writes the frame and publishes its sequence number, so reader can
+    detect the slot which is being overwritten. Readers get frames as views
+    of the shared memory, use 'SharedFrameReader.is_valid' to check that
+    frame wasn't overwritten while it was processed, or copy it.
+
+    Usage:
+        # capture process, frames are written with kernel timestamps
+        # and original lengths
+        with SharedFrameRing.create(slot_count=4096) as ring:
+            for records in sniffer.sniff_records():
+                for record in records:
+                    ring.write(*record)
+
+        # analysis process
+        with SharedFrameRing.attach(name) as ring:
+            for frame in ring.reader().frames():
+                packet = EthernetPacketView.from_bytes(frame.data)
+    """
+
+    HEADER_FORMAT = struct.Struct("=4sIIQ")
+    """
+    Defines format of the ring header:
+        * Magic : 4 bytes
+        * Number of slots : 4 bytes
+        * Size of the slot data : 4 bytes
+        * Sequence number of the next frame to write : 8 bytes
+    """
+    WRITE_SEQUENCE_FORMAT = struct.Struct("=Q")
+    WRITE_SEQUENCE_OFFSET = 12
+
+    SLOT_HEADER_FORMAT = struct.Struct("=QQII")
+    """
+    Defines format of the slot header:
+        * Slot state : 8 bytes, 'sequence number + 1' if slot holds the
+            frame, 0 if slot is empty, SLOT_BUSY if frame is being written
+        * Timestamp in nanoseconds : 8 bytes
+        * Original length of the frame : 4 bytes
+        * Captured length of the frame : 4 bytes
+    """
+    SLOT_STATE_FORMAT = struct.Struct("=Q")
+    SLOT_BUSY = 2 ** 64 - 1
+
+    MAGIC = b"NFRR"
+
+    DEFAULT_SLOT_COUNT = 4096
+    DEFAULT_SLOT_SIZE_BYTES = 2048
+
+    def __init__(self, memory: shared_memory.SharedMemory, owner: bool):
+        """
+        Use 'create' and 'attach' to instantiate the ring
+
+        :param memory: shared memory which holds the ring
+        :param owner: if True, then shared memory is unlinked on close
+        """
+        self.__memory = memory
+        self.__owner = owner
+        self.__view = memory.buf
+        magic, slot_count, slot_size, _ = \
+            self.HEADER_FORMAT.unpack_from(self.__view)
+        if magic != self.MAGIC:
+            self.__view = None
+            memory.close()
+            raise ValueError(f"Shared memory {memory.name} doesn't "
+                             f"contain frame ring")
+        self.__slot_count = slot_count
+        self.__slot_size = slot_size
+        self.__slot_stride = self.SLOT_HEADER_FORMAT.size + slot_size
+        self.__write_sequence = self.write_sequence
+
+    @staticmethod
+    def create(
+            slot_count: int = DEFAULT_SLOT_COUNT,
+            slot_size: int = DEFAULT_SLOT_SIZE_BYTES,
+            name: str = None
+    ):
+        """
+        Creates new ring, creator is the producer of the ring
+
+        :param slot_count: number of slots in the ring
+        :param slot_size: max number of frame bytes stored in the slot,
+            longer frames are truncated
+        :param name: name of the shared memory, random if not specified
+        :return: SharedFrameRing instance
+        """
+        if slot_count <= 0 or slot_size <= 0:
+            raise ValueError("Slot count and slot size should be positive")
+        memory = shared_memory.SharedMemory(
+            name=name,
+            create=True,
+            size=SharedFrameRing.HEADER_FORMAT.size + slot_count * (
+                SharedFrameRing.SLOT_HEADER_FORMAT.size + slot_size
+            )
+        )
+        SharedFrameRing.HEADER_FORMAT.pack_into(
+            memory.buf,
+            0,
+            SharedFrameRing.MAGIC,
+            slot_count,
+            slot_size,
+            0
+        )
+        return SharedFrameRing(memory, owner=True)
+
+    @staticmethod
+    def attach(name: str):
+        """
+        Attaches to the existing ring by the shared memory name
+
+        :return: SharedFrameRing instance
+        """
+        if sys.version_info >= (3, 13):
+            return SharedFrameRing(
+                shared_memory.SharedMemory(name=name, track=False),
+                owner=False
+            )
+        memory = shared_memory.SharedMemory(name=name)
+        try:
+            ring = SharedFrameRing(memory, owner=False)
+        except ValueError:
+            memory.close()
+            raise
+        # attached memory is registered in the resource tracker of this
+        # process, which would unlink it on exit, while it's owned by
+        # another process
+        resource_tracker.unregister(memory._name, "shared_memory")
+        return ring
+
+    @property
+    def name(self) -> str:
+        return self.__memory.name
+
+    @property
+    def slot_count(self) -> int:
+        return self.__slot_count
+
+    @property
+    def slot_size(self) -> int:
+        return self.__slot_size
+
+    @property
+    def write_sequence(self) -> int:
+        """
+        Returns sequence number of the next frame which will be written
+        """
+        return self.WRITE_SEQUENCE_FORMAT.unpack_from(
+            self.__view,
+            self.WRITE_SEQUENCE_OFFSET
+        )[0]
+
+    def write(
+            self,
+            frame,
+            timestamp_ns: int = None,
+            length: int = None
+    ) -> int:
+        """
+        Writes frame to the next slot, overwriting the oldest frame if ring
+        is full. Should be called by the single producer only
+
+        :param frame: any object which supports buffer protocol
+        :param timestamp_ns: capture time in nanoseconds since the epoch,
+            current time if not specified
+        :param length: original length of the frame, if frame was truncated
+            during capturing, length of the frame if not specified
+        :return: sequence number of the frame
+        """
+        sequence = self.__write_sequence
+        view = self.__view
+        slot_offset = self._slot_offset(sequence)
+        data_offset = slot_offset + self.SLOT_HEADER_FORMAT.size
+        captured_length = min(len(frame), self.__slot_size)
+        if length is None:
+            length = len(frame)
+        self.SLOT_STATE_FORMAT.pack_into(view, slot_offset, self.SLOT_BUSY)
+        view[data_offset:data_offset + captured_length] = \
+            memoryview(frame)[:captured_length]
+        self.SLOT_HEADER_FORMAT.pack_into(
+            view,
+            slot_offset,
+            self.SLOT_BUSY,
+            time.time_ns() if timestamp_ns is None else timestamp_ns,
+            length,
+            captured_length
+        )
+        # publish the frame
+        self.SLOT_STATE_FORMAT.pack_into(view, slot_offset, sequence + 1)
+        self.__write_sequence = sequence + 1
+        self.WRITE_SEQUENCE_FORMAT.pack_into(
+            view,
+            self.WRITE_SEQUENCE_OFFSET,
+            self.__write_sequence
+        )
+        return sequence
+
+    def reader(self, from_oldest: bool = False):
+        """
+        Creates reader of the ring
+
+        :param from_oldest: if True, then reader starts from the oldest frame
+            which is still in the ring, otherwise from the next written one
+        :return: SharedFrameReader instance
+        """
+        write_sequence = self.write_sequence
+        return SharedFrameReader(
+            self,
+            max(0, write_sequence - self.__slot_count)
+            if from_oldest
+            else write_sequence
+        )
+
+    def _slot_offset(self, sequence: int) -> int:
+        return self.HEADER_FORMAT.size \
+            + sequence % self.__slot_count * self.__slot_stride
+
+    def _slot_state(self, sequence: int) -> int:
+        return self.SLOT_STATE_FORMAT.unpack_from(
+            self.__view,
+            self._slot_offset(sequence)
+        )[0]
+
+    def _view(self) -> memoryview:
+        return self.__view
+
+    def close(self):
+        """
+        Closes the ring, if it was created by this process, then shared
+        memory is also unlinked. Frames returned by readers should
+        be released before
+        """
+        self.__view = None
+        self.__memory.close()
+        if self.__owner:
+            if sys.version_info < (3, 13):
+                # resource tracker may be shared with the attached
+                # processes (e.g. forked ones), which unregister the memory
+                resource_tracker.register(self.__memory._name,
+                                          "shared_memory")
+            try:
+                self.__memory.unlink()
+            except FileNotFoundError:
+                # memory was already unlinked by another process
+                resource_tracker.unregister(self.__memory._name,
+                                            "shared_memory")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+class SharedFrameReader:
+    """
+    Reads frames from the shared ring, see SharedFrameRing
+    """
+
+    DEFAULT_POLL_INTERVAL_SECONDS = 0.001
+
+    def __init__(self, ring: SharedFrameRing, sequence: int):
+        """
+        :param ring: ring to read from
+        :param sequence: sequence number of the first frame to read
+        """
+        self.__ring = ring
+        self.__sequence = sequence
+        self.__lost_count = 0
+
+    @property
+    def lost_count(self) -> int:
+        """
+        Returns number of frames which were overwritten before
+        they were read
+        """
+        return self.__lost_count
+
+    def read(self) -> Optional[SharedFrame]:
+        """
+        Reads the next frame without waiting
+
+        :return: next frame or None if there are no new frames
+        """
+        ring = self.__ring
+        view = ring._view()
+        slot_header = SharedFrameRing.SLOT_HEADER_FORMAT
+        while True:
+            write_sequence = ring.write_sequence
+            if self.__sequence >= write_sequence:
+                return None
+            oldest_sequence = write_sequence - ring.slot_count
+            if self.__sequence < oldest_sequence:
+                self.__lost_count += oldest_sequence - self.__sequence
+                self.__sequence = oldest_sequence
+            sequence = self.__sequence
+            self.__sequence += 1
+            slot_offset = ring._slot_offset(sequence)
+            state, timestamp_ns, length, captured_length = \
+                slot_header.unpack_from(view, slot_offset)
+            # slot is being overwritten, frame is lost, state is checked
+            # again, since header could be changed while it was read
+            if state != sequence + 1 \
+                    or ring._slot_state(sequence) != state:
+                self.__lost_count += 1
+                continue
+            data_offset = slot_offset + slot_header.size
+            return SharedFrame(
+                sequence,
+                timestamp_ns,
+                length,
+                view[data_offset:data_offset + captured_length]
+            )
+
+    def is_valid(self, frame: SharedFrame) -> bool:
+        """
+        Checks that frame wasn't overwritten by the producer since
+        it was read
+        """
+        return self.__ring._slot_state(frame.sequence) == frame.sequence + 1
+
+    def frames(
+            self,
+            timeout: float = None,
+            poll_interval: float = DEFAULT_POLL_INTERVAL_SECONDS
+    ) -> Generator[SharedFrame, None, None]:
+        """
+        Yields frames as they're written to the ring
+
+        :param timeout: time in seconds after which generator stops if there
+            are no new frames, if None, then waits forever
+        :param poll_interval: time in seconds between checks for new frames
+        """
+        idle_since = time.monotonic()
+        while True:
+            frame = self.read()
+            if frame is not None:
+                idle_since = time.monotonic()
+                yield frame
+                continue
+            if timeout is not None \
+                    and time.monotonic() - idle_since >= timeout:
+                return
+            time.sleep(poll_interval)
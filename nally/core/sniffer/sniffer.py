@@ -1,26 +1,91 @@
 import logging
 import socket
 import selectors
+import struct
+import threading
 import time
-from typing import Generator
-
-from pcapy import BPFProgram
+from typing import Callable, Generator, Iterable, List, Union
 
 from nally.config import config
-from nally.core.layers.link.ethernet.ethernet_packet import EthernetPacket
-from nally.core.layers.link.ethernet.ethernet_utils import EthernetUtils
-from nally.core.layers.packet import Packet
+from nally.core.bpf.bpf_compiler import BpfCompiler
+from nally.core.layers.layer import Layer
+from nally.core.pcap.capture_writer import CaptureWriter
+from nally.core.sniffer.batch_receiver import BatchReceiver
+from nally.core.sniffer.bounded_queue import BoundedQueue, DropPolicy
+from nally.core.sniffer.capture_stats import CaptureCounters
+from nally.core.sniffer.packet_source import FrameRecord, PacketSource
+from nally.core.sniffer.rx_ring import RxRing
+from nally.core.sniffer.wakeup_event import WakeupEvent
 from nally.core.utils.platform_specific.platform_specific_utils \
     import PlatformSpecificUtils
 
 
-class Sniffer:
+class Sniffer(PacketSource):
     """
     Provides interface for packet capturing
     """
 
     ETH_P_ALL = 3
-    BUFFER_SIZE_BYTES = EthernetUtils.MAX_PAYLOAD_LENGTH_BYTES
+
+    # linux/socket.h
+    SOL_PACKET = 263
+
+    # linux/if_packet.h
+    PACKET_FANOUT = 18
+    """
+    Joins the socket to the fanout group, frames are distributed
+    between sockets of the group
+    """
+    PACKET_FANOUT_HASH = 0
+    """
+    Frames are distributed by the flow hash, so frames of the same flow
+    (in both directions) are received by the same socket
+    """
+    PACKET_FANOUT_LB = 1
+    """Frames are distributed in round-robin manner"""
+    PACKET_FANOUT_CPU = 2
+    """Frames are distributed by CPU which received them"""
+    PACKET_FANOUT_FLAG_DEFRAG = 0x8000
+    """IP fragments are reassembled before distribution"""
+    PACKET_STATISTICS = 6
+    """
+    Returns kernel counters of the socket and resets them
+    """
+    TPACKET_STATS_FORMAT = struct.Struct("=II")
+    """
+    Defines format of 'tpacket_stats' structure:
+        * Number of received frames, including dropped ones : 4 bytes
+        * Number of dropped frames : 4 bytes
+    """
+    TPACKET_STATS_V3_FORMAT = struct.Struct("=III")
+    """
+    Defines format of 'tpacket_stats_v3' structure, used by TPACKET_V3 ring:
+        * Number of received frames, including dropped ones : 4 bytes
+        * Number of dropped frames : 4 bytes
+        * Number of times the ring was full : 4 bytes
+    """
+
+    DEFAULT_STATS_INTERVAL_SECONDS = 1
+
+    FRAME_OVERHEAD_BYTES = 14 + 4
+    """
+    Ethernet header and 802.1Q tag, they aren't included to the MTU
+    """
+    MAX_IP_PACKET_LENGTH_BYTES = 65535
+    """
+    Max length of the frames coalesced by GRO (Generic Receive Offload)
+    """
+    BUFFER_SIZE_BYTES = MAX_IP_PACKET_LENGTH_BYTES + FRAME_OVERHEAD_BYTES
+    """
+    Receive buffer size which is used if it can't be derived
+    from the interface settings
+    """
+
+    BPF_RET_K = 0x06
+    """
+    Code of BPF instruction which returns the constant, i.e. number of
+    bytes of the packet which should be captured
+    """
 
     LOG = logging.getLogger("Sniffer")
 
@@ -28,11 +93,23 @@ class Sniffer:
             self,
             if_name: str = None,
             started_callback: callable = None,
-            predicate_filter: callable = None,
+            predicate_filter: Union[Callable, str] = None,
             packet_count: int = None,
             promiscuous_mode: bool = True,
             bpf_filter: str = "",
-            timeout: int = None
+            timeout: int = None,
+            lazy_decoding: bool = False,
+            mmap_ring: bool = False,
+            batch_size: int = 1,
+            snaplen: int = None,
+            fanout_group_id: int = None,
+            fanout_mode: int = PACKET_FANOUT_HASH,
+            writer: CaptureWriter = None,
+            stats_callback: callable = None,
+            stats_interval: float = DEFAULT_STATS_INTERVAL_SECONDS,
+            queue_size: int = None,
+            drop_policy: DropPolicy = DropPolicy.DROP_NEWEST,
+            max_layer: Layer = None
     ):
         """
         :param if_name: network interface for capturing, if not specified,
@@ -40,32 +117,148 @@ class Sniffer:
         :param started_callback: function which will be called after the
             sniffer initialization
         :param predicate_filter: bool function which will be called to
-            determine if packet should be processed. Note: predicate will
-            be applied after the BPF filter if one presents
+            determine if packet should be processed, or field expression,
+            e.g. 'tcp.dport in {80, 443} and ip.ttl < 64', which is checked
+            against the raw frame before it's decoded, see PredicateCompiler.
+            Note: predicate will be applied after the BPF filter if one
+            presents
         :param packet_count: number of packets that should be caught
         :param promiscuous_mode: indicates if sniffer should receive all
             packets on the LAN, including packets sent to a network address
             that the network adapter isn't configured to recognize.
-        :param bpf_filter: packet filter in BPF format
+        :param bpf_filter: packet filter in tcpdump syntax (see
+            BpfCompiler), it's attached to the socket, so non-matching
+            packets are dropped by the kernel. If filter can't be attached,
+            then it's applied in user space
         :param timeout: specifies timeout in seconds after which sniffer will
             be terminated
+        :param lazy_decoding: if True, then packets are decoded lazily, i.e.
+            header fields are unpacked only when they are read, see
+            EthernetPacketView for details
+        :param mmap_ring: if True, then frames are captured using PACKET_MMAP
+            receive ring instead of reading them from the socket one by one
+            (Linux only), see RxRing for details. Note: lazily decoded
+            packets reference the ring, so they're valid only until the
+            next packet is requested
+        :param batch_size: max number of frames received from the socket per
+            wakeup, if greater than 1, then frames are received in batches
+            using 'recvmmsg' (see BatchReceiver). Ignored if 'mmap_ring'
+            is True, since ring returns all frames of the filled block
+        :param snaplen: if specified, then only first 'snaplen' bytes of
+            each frame are captured, the rest is dropped by the kernel.
+            Lazy decoding is preferable for truncated frames, since only
+            accessed layers are decoded
+        :param fanout_group_id: if specified, then socket joins the
+            PACKET_FANOUT group with this id (Linux only), so captured frames
+            are distributed between the sockets of the group
+        :param fanout_mode: frames distribution mode of the fanout group,
+            one of PACKET_FANOUT_* constants, optionally combined with flags
+        :param writer: if specified, then raw frames which satisfy the BPF
+            filter are written to the capture file with kernel timestamps,
+            before they're decoded and user-defined predicate is applied.
+            Writer is flushed, but not closed, on sniffer exit
+        :param stats_callback: function which will be called with
+            CaptureStats every 'stats_interval' seconds while sniffer is
+            running, rates are computed over the interval, see 'stats'
+        :param stats_interval: interval in seconds between the
+            'stats_callback' calls
+        :param queue_size: if specified, then sniffer works in pipeline
+            mode: frames are received by the background capture thread
+            into the bounded queue of this size, and decoded by the consuming
+            thread, so slow consumer doesn't stall the socket draining.
+            If capture thread fails, then its error is raised by 'sniff'
+            after the queued frames are processed
+        :param drop_policy: defines which frames are shed if queue is full,
+            shed frames are counted, see BoundedQueue and 'stats'
+        :param max_layer: the highest layer which should be decoded, e.g.
+            Layer.INTERNET if only IP fields are needed, payload of this
+            layer is kept as RawPacket
         """
+        super().__init__(
+            started_callback,
+            predicate_filter,
+            packet_count,
+            lazy_decoding,
+            max_layer
+        )
         self._if_name = (
             if_name
             if if_name is not None
             else config.interface_name
         )
-        self._started_callback = started_callback
-        self._predicate_filter = predicate_filter
-        self._packet_count = packet_count
         self._promiscuous_mode = promiscuous_mode
         self._bpf_filter = bpf_filter
         self._timeout = timeout
-        self._stopped = False
+        self._mmap_ring = mmap_ring
+        self._batch_size = batch_size
+        if snaplen is not None and snaplen <= 0:
+            raise ValueError(f"Snaplen should be positive, got {snaplen}")
+        self._snaplen = snaplen
+        self._buffer_size = None
+        self._fanout_group_id = fanout_group_id
+        self._fanout_mode = fanout_mode
+        self._writer = writer
+        if stats_interval <= 0:
+            raise ValueError(f"Stats interval should be positive, "
+                             f"got {stats_interval}")
+        self._stats_callback = stats_callback
+        self._stats_interval = stats_interval
+        if queue_size is not None and queue_size < 1:
+            raise ValueError(f"Queue size should be positive, "
+                             f"got {queue_size}")
+        self._queue_size = queue_size
+        self._drop_policy = DropPolicy(drop_policy)
+        self._frame_queue = None
+        self._capture_error = None
+        self._last_stats = None
+        self._next_stats_report = None
         self._sniff_socket = None
-        self._compiled_filter = None
+        # filter is compiled eagerly, so invalid expression is reported
+        # before the socket is opened
+        self._compiled_filter = (
+            BpfCompiler.compile(bpf_filter)
+            if bpf_filter
+            else None
+        )
+        self._kernel_filter = False
+        self._rx_ring = None
+        self._batch_receiver = None
+        self._frame_metadata = False
+        self._wakeup = None
+        self._drain_on_stop = False
+        self._capture_cancelled = False
+
+    def _sniff(
+            self,
+            process_frames: callable,
+            copy: bool,
+            records: bool = False
+    ) -> Generator[list, None, int]:
+        """
+        Waits for the frames and yields them in batches
+
+        :param process_frames: function which turns received frames to the
+            batch, see '_process_frames'
+        :param copy: if True, then received frames are copied, see '_receive'
+        :param records: if True, then frames are passed to 'process_frames'
+            as FrameRecord instances
+        """
+        if records:
+            self._collect_frame_metadata()
+        if self._queue_size is not None:
+            return self._sniff_pipelined(process_frames, records)
+        return self._receive_loop(process_frames, copy, records)
 
-    def sniff(self) -> Generator[Packet, None, int]:
+    def _receive_loop(
+            self,
+            process_frames: callable,
+            copy: bool,
+            records: bool = False
+    ) -> Generator[list, None, int]:
+        """
+        Waits for the frames and processes them in the current thread,
+        see '_sniff'
+        """
         processed_count = 0
         try:
             if self._sniff_socket is None:
@@ -77,7 +270,8 @@ class Sniffer:
             if self._timeout is not None:
                 termination_date_seconds = time.time() + self._timeout
             remaining_time_seconds = None
-            while not self._stopped:
+            self._schedule_stats_report()
+            while not self._stopped and not self._capture_cancelled:
                 if processed_count == self._packet_count:
                     break
                 if self._timeout is not None:
@@ -86,61 +280,423 @@ class Sniffer:
                     if remaining_time_seconds <= 0:
                         break
                 # blocking call, waits until data in socket will be available,
-                # or until timeout expires
-                if not self._selector.select(remaining_time_seconds):
+                # until timeout expires or until sniffer is stopped
+                if not self._selector.select(
+                        self._wait_time(remaining_time_seconds)
+                ):
                     # no data in socket available yet
+                    self._report_stats()
                     continue
+                if self._stopped or self._capture_cancelled:
+                    break
                 # data is available
-                packet_address: tuple = self._sniff_socket.recvfrom(
-                    self.BUFFER_SIZE_BYTES
+                processed_count = yield from self._read_available(
+                    process_frames,
+                    copy,
+                    processed_count,
+                    records
+                )
+                self._report_stats()
+            if self._stopped and self._drain_on_stop \
+                    and not self._capture_cancelled:
+                processed_count = yield from self._drain(
+                    process_frames,
+                    copy,
+                    processed_count,
+                    records
                 )
-                raw_packet: bytes = packet_address[0]
-                # apply BPF filter
-                if self._filter_packet(raw_packet):
-                    # parse Ethernet header and all upper layers if present
-                    ethernet_packet = EthernetPacket.from_bytes(raw_packet)
-                    # apply user-defined predicate if presents
-                    predicate_result: bool = (
-                        self._predicate_filter(ethernet_packet)
-                        if self._predicate_filter is not None
-                        else True
-                    )
-                    if not predicate_result:
-                        continue
-                    processed_count += 1
-                    yield ethernet_packet
             return processed_count
         except KeyboardInterrupt:
             self.LOG.debug("Keyboard interruption received. Exiting...")
             return processed_count
 
-    def stop(self):
+    def _sniff_pipelined(
+            self,
+            process_frames: callable,
+            records: bool = False
+    ) -> Generator[list, None, int]:
+        """
+        Receives frames by the capture thread into the bounded queue and
+        processes them in the current thread, see '_sniff'
+        """
+        if self._sniff_socket is None:
+            raise RuntimeError("Sniffer should be used "
+                               "inside context manager")
+        self._frame_queue = BoundedQueue(self._queue_size, self._drop_policy)
+        self._capture_error = None
+        self._capture_cancelled = False
+        self._wakeup.clear()
+        capture_thread = threading.Thread(
+            target=self._capture,
+            args=(self._frame_queue, records),
+            name="SnifferCapture",
+            daemon=True
+        )
+        capture_thread.start()
+        processed_count = 0
+        try:
+            while processed_count != self._packet_count:
+                frames = self._frame_queue.get_batch()
+                if not frames:
+                    # queue is closed and drained by the capture thread
+                    if self._capture_error is not None:
+                        raise self._capture_error
+                    break
+                if self._stopped and not self._drain_on_stop:
+                    break
+                batch = process_frames(
+                    frames,
+                    self._remaining_count(processed_count)
+                )
+                processed_count += len(batch)
+                if batch:
+                    yield batch
+            return processed_count
+        finally:
+            # consumer is done, so capture thread is terminated, sniffer
+            # itself isn't stopped, so it can be used again
+            self._capture_cancelled = True
+            self._wakeup.set()
+            capture_thread.join()
+
+    def _capture(self, frame_queue: BoundedQueue, records: bool = False):
+        """
+        Entry point of the capture thread, receives frames into the queue
+        until sniffer is stopped or timeout expires
+        """
+        try:
+            for _ in self._receive_loop(
+                    self._enqueue_frames,
+                    copy=True,
+                    records=records
+            ):
+                pass
+        except Exception as error:
+            self.LOG.exception("Capture thread failed")
+            # raised by the consumer, since exceptions of the thread
+            # aren't propagated
+            self._capture_error = error
+        finally:
+            frame_queue.close()
+
+    def _enqueue_frames(self, frames: List, max_count: int = None) -> list:
+        """
+        Passes frames to the queue, frames aren't counted as processed,
+        since consumer applies the packet count
         """
-        Provides ability to gracefully terminate the sniffer (makes sense if
-        sniffer is running in the separate thread)
+        self._counters.shed_count += self._frame_queue.put_batch(frames)
+        return []
+
+    def stop(self, drain: bool = False):
+        """
+        Terminates the sniffer, can be called from any thread. Sniffer
+        is woken up immediately, even if it's waiting for the frames
+
+        :param drain: if True, then frames which were already queued
+            in the socket are processed before the termination
         """
         if self._stopped:
             raise RuntimeError("Illegal state: sniffer already terminated")
-        self._stopped = True
+        # flag is set before the sniffer is marked as stopped, so the
+        # sniffer thread can't miss it
+        self._drain_on_stop = drain
+        super().stop()
+        if self._wakeup is not None:
+            self._wakeup.set()
 
-    def _compile_filter(self):
+    def _read_available(
+            self,
+            process_frames: callable,
+            copy: bool,
+            processed_count: int,
+            records: bool = False
+    ) -> Generator[list, None, int]:
         """
-        If BPF filter was specified, then compiles it using 'libpcap'
+        Processes frames which are available in the socket and yields
+        non-empty batches
+
+        :param processed_count: number of already processed frames
+        :param records: if True, then frames are passed to
+            'process_frames' as FrameRecord instances
+        :return: updated number of processed frames
         """
-        if self._bpf_filter is not None:
-            self._compiled_filter = BPFProgram(self._bpf_filter)
+        for frames in self._receive(copy):
+            self._count_received(frames)
+            frames = self._accept_frames(frames, records)
+            batch = process_frames(
+                frames,
+                self._remaining_count(processed_count)
+            )
+            processed_count += len(batch)
+            if batch:
+                yield batch
+            if self._stopped and not self._drain_on_stop \
+                    or self._capture_cancelled \
+                    or processed_count == self._packet_count:
+                break
+        return processed_count
 
-    def _filter_packet(self, raw_packet: bytes):
+    def _drain(
+            self,
+            process_frames: callable,
+            copy: bool,
+            processed_count: int,
+            records: bool = False
+    ) -> Generator[list, None, int]:
+        """
+        Processes frames until the socket has no more data
+        or packet count is reached
         """
-        Filters packet using the BPF filter, if specified
+        while processed_count != self._packet_count:
+            received_count = self._counters.received_count
+            processed_count = yield from self._read_available(
+                process_frames,
+                copy,
+                processed_count,
+                records
+            )
+            if self._counters.received_count == received_count:
+                break
+        return processed_count
 
-        :param raw_packet: raw network packet
-        :return: True, if packet satisfies the filter conditions,
-            False otherwise
+    def _schedule_stats_report(self):
         """
-        if self._compiled_filter is not None:
-            return self._compiled_filter.filter(raw_packet) != 0
-        return True
+        Schedules the first 'stats_callback' call
+        """
+        if self._stats_callback is not None:
+            self._last_stats = self.stats()
+            self._next_stats_report = \
+                self._last_stats.timestamp + self._stats_interval
+
+    def _wait_time(self, remaining_time_seconds: float = None) -> float:
+        """
+        Returns time to wait for the frames, which is limited by the
+        sniffer timeout and by the time of the next stats report
+        """
+        if self._stats_callback is None:
+            return remaining_time_seconds
+        wait_time_seconds = max(
+            0.0,
+            self._next_stats_report - time.monotonic()
+        )
+        if remaining_time_seconds is None:
+            return wait_time_seconds
+        return min(remaining_time_seconds, wait_time_seconds)
+
+    def _report_stats(self):
+        """
+        Calls 'stats_callback' if the stats interval elapsed
+        """
+        if self._stats_callback is None \
+                or time.monotonic() < self._next_stats_report:
+            return
+        stats = self.stats(self._last_stats)
+        self._last_stats = stats
+        self._next_stats_report = stats.timestamp + self._stats_interval
+        self._stats_callback(stats)
+
+    def _update_kernel_stats(self):
+        """
+        Reads kernel counters of the socket, kernel resets them on each
+        read, so they're accumulated
+        """
+        if self._sniff_socket is None:
+            return
+        stats_format = (
+            self.TPACKET_STATS_V3_FORMAT
+            if self._rx_ring is not None
+            else self.TPACKET_STATS_FORMAT
+        )
+        try:
+            kernel_stats = stats_format.unpack(
+                self._sniff_socket.getsockopt(
+                    self.SOL_PACKET,
+                    self.PACKET_STATISTICS,
+                    stats_format.size
+                )
+            )
+        except OSError as e:
+            self.LOG.debug(f"Can't read kernel stats of the socket ({e})")
+            return
+        counters = self._counters
+        counters.kernel_received_count += kernel_stats[0]
+        counters.kernel_dropped_count += kernel_stats[1]
+        if len(kernel_stats) > 2:
+            counters.kernel_freeze_count += kernel_stats[2]
+
+    def _accept_frames(self, frames: List, records: bool = False) -> List:
+        """
+        Applies BPF filter to the received frames, if it isn't attached to
+        the socket, and writes accepted frames to the capture file. Each
+        frame is checked once, the rest of the pipeline gets only accepted
+        frames
+
+        :param frames: batch of frames returned by '_receive'
+        :param records: if True, then accepted frames are returned as
+            FrameRecord instances
+        :return: frames which satisfy the BPF filter
+        """
+        if self._writer is not None or records:
+            return self._accept_records(frames, records)
+        if not self._has_user_space_filter():
+            return frames
+        bpf_filter = self._compiled_filter.filter
+        return [frame for frame in frames if bpf_filter(frame)]
+
+    def _accept_records(self, frames: List, records: bool) -> List:
+        """
+        Pairs frames with their kernel timestamps and original lengths,
+        applies BPF filter and writes accepted frames to the capture file,
+        so frames truncated by snaplen are recorded as such, see
+        '_accept_frames'
+        """
+        if self._rx_ring is not None:
+            timestamps = self._rx_ring.timestamps
+            lengths = self._rx_ring.lengths
+        else:
+            timestamps = self._batch_receiver.timestamps
+            lengths = self._batch_receiver.lengths
+        frame_records = list(map(FrameRecord, frames, timestamps, lengths))
+        if self._has_user_space_filter():
+            bpf_filter = self._compiled_filter.filter
+            frame_records = [
+                record for record in frame_records if bpf_filter(record.data)
+            ]
+        if self._writer is not None:
+            write = self._writer.write
+            for record in frame_records:
+                write(*record)
+        if records:
+            return frame_records
+        return [record.data for record in frame_records]
+
+    def _collect_frame_metadata(self):
+        """
+        Makes the batch receiver collect kernel timestamps and original
+        lengths of the frames, receive ring always provides them
+        """
+        if self._batch_receiver is None or self._frame_metadata:
+            return
+        self._enable_frame_metadata()
+        self._batch_receiver = BatchReceiver(
+            self._batch_size,
+            self._buffer_size,
+            timestamps=True,
+            lengths=True
+        )
+
+    def _enable_frame_metadata(self):
+        """
+        Enables socket options which make the kernel report receive
+        timestamps and original lengths of the frames
+        """
+        self._sniff_socket.setsockopt(
+            socket.SOL_SOCKET,
+            BatchReceiver.SO_TIMESTAMPNS,
+            1
+        )
+        # frames can be truncated by the attached filter, original
+        # lengths are reported in the auxiliary data
+        self._sniff_socket.setsockopt(
+            BatchReceiver.SOL_PACKET,
+            BatchReceiver.PACKET_AUXDATA,
+            1
+        )
+        self._frame_metadata = True
+
+    def _receive(self, copy: bool) -> Iterable[List]:
+        """
+        Returns batches of frames which are available in the socket. Frames
+        of the batch stay valid until the next batch is requested
+
+        :param copy: if True, then frames are copied, so they don't reference
+            the ring or the buffer pool and stay valid after that
+        """
+        if self._rx_ring is not None:
+            blocks = self._rx_ring.blocks()
+            if self._snaplen is not None and not self._kernel_filter:
+                blocks = (
+                    [frame[:self._snaplen] for frame in block]
+                    for block in blocks
+                )
+            if not copy:
+                return blocks
+            return ([bytes(frame) for frame in block] for block in blocks)
+        frames = self._batch_receiver.receive(self._sniff_socket)
+        if not copy:
+            return frames,
+        return [bytes(frame) for frame in frames],
+
+    def _get_buffer_size(self) -> int:
+        """
+        Returns size of the receive buffer: the max frame size derived from
+        the interface MTU and GRO settings, limited by snaplen
+        """
+        try:
+            if PlatformSpecificUtils.is_gro_enabled(self._if_name):
+                buffer_size = self.MAX_IP_PACKET_LENGTH_BYTES
+            else:
+                buffer_size = PlatformSpecificUtils.get_net_interface_mtu(
+                    self._if_name
+                )
+            buffer_size += self.FRAME_OVERHEAD_BYTES
+        except (NotImplementedError, OSError) as e:
+            self.LOG.warning(
+                f"Can't get MTU of {self._if_name} ({e}), using "
+                f"{self.BUFFER_SIZE_BYTES} bytes receive buffer"
+            )
+            buffer_size = self.BUFFER_SIZE_BYTES
+        if self._snaplen is not None:
+            return min(buffer_size, self._snaplen)
+        return buffer_size
+
+    def _attach_filter(self):
+        """
+        If BPF filter was specified, then tries to attach the compiled
+        filter to the socket. If kernel filtering isn't available, then
+        compiled filter is applied in user space.
+        If snaplen was specified, then the filter also truncates frames
+        """
+        if self._compiled_filter is None and self._snaplen is None:
+            return
+        try:
+            instructions = (
+                self._compiled_filter.instructions
+                if self._compiled_filter is not None
+                else [(self.BPF_RET_K, 0, 0, self._snaplen)]
+            )
+            if self._snaplen is not None:
+                instructions = self._limit_snaplen(instructions)
+            PlatformSpecificUtils.attach_bpf_filter(
+                self._sniff_socket,
+                instructions
+            )
+            self._kernel_filter = True
+        except (AttributeError, NotImplementedError, OSError) as e:
+            self.LOG.warning(
+                f"Can't attach BPF filter to the socket ({e}), "
+                "filter will be applied in user space"
+            )
+            self._kernel_filter = False
+
+    def _limit_snaplen(self, instructions: list) -> list:
+        """
+        Limits number of bytes accepted by BPF program to snaplen, the same
+        way as libpcap does
+        """
+        return [
+            (code, jt, jf, min(k & 0xffffffff, self._snaplen))
+            if code == self.BPF_RET_K and k != 0
+            else (code, jt, jf, k)
+            for code, jt, jf, k in instructions
+        ]
+
+    def _has_user_space_filter(self) -> bool:
+        """
+        Returns True if BPF filter couldn't be attached to the socket, so
+        it's applied to the received frames, see '_accept_frames'
+        """
+        return self._compiled_filter is not None and not self._kernel_filter
 
     def _toggle_promiscuous_mode(self, enable: bool):
         """
@@ -154,31 +710,85 @@ class Sniffer:
             )
 
     def __enter__(self):
+        # socket with zero protocol doesn't receive any packets until
+        # it's bound, so no unfiltered packets are queued before the
+        # BPF filter is attached
         self._sniff_socket = socket.socket(
             socket.AF_PACKET,
             socket.SOCK_RAW,
-            socket.htons(self.ETH_P_ALL)
+            0
         )
         self._toggle_promiscuous_mode(True)
         self._sniff_socket.setblocking(False)
-        self._sniff_socket.bind((self._if_name, 0))
-        self._compile_filter()
+        self._counters = CaptureCounters()
+        self._attach_filter()
+        self._buffer_size = self._get_buffer_size()
+        if self._mmap_ring:
+            self._rx_ring = RxRing(self._sniff_socket)
+        else:
+            self._frame_metadata = False
+            if self._writer is not None:
+                self._enable_frame_metadata()
+            self._batch_receiver = BatchReceiver(
+                self._batch_size,
+                self._buffer_size,
+                timestamps=self._frame_metadata,
+                lengths=self._frame_metadata
+            )
+        self._sniff_socket.bind((self._if_name, self.ETH_P_ALL))
+        if self._fanout_group_id is not None:
+            # socket should be bound before joining the group, value is
+            # packed as unsigned, since flags can set the most significant bit
+            self._sniff_socket.setsockopt(
+                self.SOL_PACKET,
+                self.PACKET_FANOUT,
+                struct.pack(
+                    "=I",
+                    self._fanout_group_id & 0xffff | self._fanout_mode << 16
+                )
+            )
+        # wakeup event is registered, so 'stop' interrupts waiting
+        self._wakeup = WakeupEvent()
         self._selector = selectors.DefaultSelector()
         self._selector.register(self._sniff_socket, selectors.EVENT_READ)
+        self._selector.register(self._wakeup, selectors.EVENT_READ)
         self.LOG.debug(
             "Sniffer had been initialized with the following options: "
             f"promiscuous_mode={self._promiscuous_mode}, "
             f"bpf_filter='{self._bpf_filter}', "
+            f"kernel_filter={self._kernel_filter}, "
             f"timeout={self._timeout}, "
             f"if_name={self._if_name}, "
-            f"packet_count={self._packet_count}"
+            f"packet_count={self._packet_count}, "
+            f"lazy_decoding={self._lazy_decoding}, "
+            f"max_layer={self._max_layer}, "
+            f"mmap_ring={self._mmap_ring}, "
+            f"batch_size={self._batch_size}, "
+            f"snaplen={self._snaplen}, "
+            f"buffer_size={self._buffer_size}, "
+            f"fanout_group_id={self._fanout_group_id}, "
+            f"writer={type(self._writer).__name__}, "
+            f"queue_size={self._queue_size}"
         )
         return self
 
     def __exit__(self, exc_type, exc_val, exc_tb):
         self.LOG.debug("Exiting from sniffer, cleaning up resources...")
+        # counters are kept, so stats are still available after exit
+        self._update_kernel_stats()
         self._toggle_promiscuous_mode(False)
-        self._sniff_socket.close()
-        self._sniff_socket = None
-        self._selector.close()
-        self._selector = None
+        if self._rx_ring is not None:
+            self._rx_ring.close()
+            self._rx_ring = None
+        self._batch_receiver = None
+        try:
+            if self._writer is not None:
+                self._writer.flush()
+        finally:
+            # writer errors are propagated, but the sockets are released
+            self._sniff_socket.close()
+            self._sniff_socket = None
+            self._selector.close()
+            self._selector = None
+            self._wakeup.close()
+            self._wakeup = None
@@ -0,0 +1,49 @@
+import os
+
+
+class WakeupEvent:
+    """
+    File descriptor which becomes readable when the event is set, so it
+    can be waited for by 'select' together with the sockets. Uses eventfd
+    if it's available (Linux), otherwise the self-pipe
+    """
+
+    def __init__(self):
+        if hasattr(os, "eventfd"):
+            self.__read_fd = os.eventfd(
+                0,
+                os.EFD_NONBLOCK | os.EFD_CLOEXEC
+            )
+            self.__write_fd = self.__read_fd
+        else:
+            self.__read_fd, self.__write_fd = os.pipe()
+            os.set_blocking(self.__read_fd, False)
+            os.set_blocking(self.__write_fd, False)
+
+    def fileno(self) -> int:
+        return self.__read_fd
+
+    def set(self):
+        """
+        Makes the descriptor readable, can be called from any thread
+        """
+        try:
+            os.write(self.__write_fd, (1).to_bytes(8, "little"))
+        except BlockingIOError:
+            # counter or pipe is full, so the event is already set
+            pass
+
+    def clear(self):
+        """
+        Makes the descriptor non-readable
+        """
+        try:
+            while os.read(self.__read_fd, 512):
+                pass
+        except BlockingIOError:
+            pass
+
+    def close(self):
+        os.close(self.__read_fd)
+        if self.__write_fd != self.__read_fd:
+            os.close(self.__write_fd)
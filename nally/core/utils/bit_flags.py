@@ -1,3 +1,4 @@
+import copy
 from abc import ABC, abstractmethod
 
 from nally.core.utils.utils import Utils
@@ -7,16 +8,62 @@ class BitFlags(ABC):
 
     def __init__(self):
         self._flags = 0
+        self._shared = False
 
     @staticmethod
     @abstractmethod
     def from_int(bits: int):
         raise NotImplementedError
 
+    @staticmethod
+    def shared_instances(flags_type, bit_length: int) -> tuple:
+        """
+        Creates immutable instances of 'flags_type' for all values of the
+        'bit_length' bits field. Returned tuple is indexed by the flags value
+        and used by 'from_int' implementations, so decoded packets share
+        the same instances instead of creating new ones
+
+        :param flags_type: BitFlags subclass, should be constructible
+            without arguments
+        :param int bit_length: bit length of the flags field
+        :return: tuple of shared instances
+        """
+        instances = []
+        for bits in range(1 << bit_length):
+            instance = flags_type()
+            instance._flags = bits
+            instance._shared = True
+            instances.append(instance)
+        return tuple(instances)
+
     @property
     def flags(self) -> int:
         return self._flags
 
+    @property
+    def shared(self) -> bool:
+        """
+        Returns True if instance is shared (see 'shared_instances') and
+        can't be modified
+        """
+        return self._shared
+
+    def __copy__(self):
+        # shared instances are immutable, so copies share them as well
+        if self._shared:
+            return self
+        copied = type(self).__new__(type(self))
+        copied.__dict__.update(self.__dict__)
+        return copied
+
+    def __deepcopy__(self, memo):
+        if self._shared:
+            return self
+        copied = type(self).__new__(type(self))
+        memo[id(self)] = copied
+        copied.__dict__.update(copy.deepcopy(self.__dict__, memo))
+        return copied
+
     def is_flag_set(self, flag_mask: int) -> bool:
         """
         Checks if flag is set using the bit mask
@@ -32,5 +79,9 @@ class BitFlags(ABC):
 
         :param int flag_mask: bit mask associated with flag
         :param bool value: value which flag should be set to
+        :raises: AttributeError: if instance is shared
         """
+        if self._shared:
+            raise AttributeError(f"Shared {type(self).__name__} instance "
+                                 f"can't be modified")
         self._flags = Utils.set_bit(self._flags, flag_mask, value)
@@ -0,0 +1,91 @@
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+class ChecksumUtils:
+    """
+    Computes Internet checksum (see https://tools.ietf.org/html/rfc1071)
+    used by IPv4, ICMP, TCP and UDP protocols.
+
+    Checksum is computed over the list of buffers (e.g. pseudo header and
+    segment) as if they were concatenated, but without concatenation.
+    Instead of summing 16-bit words one by one, each buffer is converted to
+    the single integer and reduced modulo 0xffff, since 2^16 = 1 (mod 0xffff)
+    this gives the same result as the one's complement sum of its words
+    """
+
+    CHECKSUM_MODULO = 0xffff
+
+    @staticmethod
+    def ones_complement_sum(*buffers) -> int:
+        """
+        Computes 16-bit one's complement sum of the buffers concatenation
+
+        :param buffers: objects which support buffer protocol, if total
+            length is odd, then data is padded with zero byte
+        :return: 16-bit one's complement sum
+        """
+        modulo = ChecksumUtils.CHECKSUM_MODULO
+        checksum_sum = 0
+        is_odd = False
+        is_zero = True
+        for buffer in buffers:
+            value = int.from_bytes(buffer, byteorder="big")
+            if value:
+                is_zero = False
+            # 256^len(buffer) = 256^(len(buffer) % 2) (mod 0xffff)
+            shift = 8 if len(buffer) & 1 else 0
+            checksum_sum = ((checksum_sum << shift) + value) % modulo
+            is_odd ^= bool(shift)
+        if is_odd:
+            # pad with zero byte
+            checksum_sum = (checksum_sum << 8) % modulo
+        # one's complement sum of non-zero data can't be zero, so in this
+        # case it's equal to 0xffff, which is the same as 0 modulo 0xffff
+        if checksum_sum == 0 and not is_zero:
+            return modulo
+        return checksum_sum
+
+    @staticmethod
+    def calc_checksum(*buffers) -> bytes:
+        """
+        Calculates checksum of the buffers concatenation
+
+        :param buffers: objects which support buffer protocol
+        :return: calculated checksum (16 bits value)
+        """
+        checksum = ~ChecksumUtils.ones_complement_sum(*buffers) & 0xffff
+        return checksum.to_bytes(2, byteorder="big")
+
+    @staticmethod
+    def calc_checksums(buffers: list) -> list:
+        """
+        Calculates checksums of the batch of equal length buffers. If NumPy
+        is available, then all buffers are summed at once
+
+        :param buffers: list of objects which support buffer protocol,
+            all of them should have the same length
+        :return: list of calculated checksums (16 bits values)
+        """
+        if not buffers:
+            return []
+        length = len(buffers[0])
+        if any(len(buffer) != length for buffer in buffers):
+            raise ValueError("All buffers should have the same length")
+        if numpy is None:
+            return [ChecksumUtils.calc_checksum(buffer) for buffer in buffers]
+        rows = numpy.frombuffer(
+            b"".join(buffers),
+            dtype=numpy.uint8
+        ).reshape(len(buffers), length)
+        if length & 1:
+            # pad with zero byte
+            rows = numpy.pad(rows, ((0, 0), (0, 1)))
+        words = rows.view(">u2").astype(numpy.uint64)
+        sums = words.sum(axis=1) % ChecksumUtils.CHECKSUM_MODULO
+        # see 'ones_complement_sum' for details
+        sums[(sums == 0) & words.any(axis=1)] = ChecksumUtils.CHECKSUM_MODULO
+        checksums = (~sums.astype(numpy.uint16)).astype(">u2").tobytes()
+        return [checksums[i:i + 2] for i in range(0, len(checksums), 2)]
@@ -0,0 +1,27 @@
+from enum import Enum
+from typing import Type
+
+
+class EnumTable(dict):
+    """
+    Lookup table which converts raw field values to the members of the enum.
+    Members are shared, so indexing the table is a single dictionary lookup
+    instead of the enum constructor call:
+
+        IP_ECN_VALUES = EnumTable(IpEcnValues)
+        ecn = IP_ECN_VALUES[ecn_bits]
+
+    Values which aren't in the table are delegated to the enum constructor,
+    so unknown values raise ValueError as 'enum_type(value)' does
+    """
+
+    def __init__(self, enum_type: Type[Enum]):
+        super().__init__((member.value, member) for member in enum_type)
+        self.__enum_type = enum_type
+
+    @property
+    def enum_type(self) -> Type[Enum]:
+        return self.__enum_type
+
+    def __missing__(self, value):
+        return self.__enum_type(value)
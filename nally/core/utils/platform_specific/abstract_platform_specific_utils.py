@@ -1,4 +1,6 @@
 from abc import abstractmethod, ABC
+from socket import socket
+from typing import List, Tuple
 
 
 class AbstractPlatformSpecificUtils(ABC):
@@ -30,6 +32,23 @@ class AbstractPlatformSpecificUtils(ABC):
         """
         raise NotImplementedError
 
+    @staticmethod
+    @abstractmethod
+    def get_net_interface_mtu(if_name: str) -> int:
+        """
+        Returns MTU (Maximum Transfer Unit) of this network interface
+        """
+        raise NotImplementedError
+
+    @staticmethod
+    @abstractmethod
+    def is_gro_enabled(if_name: str) -> bool:
+        """
+        Checks if Generic Receive Offload is enabled on this network
+        interface, i.e. if received frames can be coalesced
+        """
+        raise NotImplementedError
+
     @staticmethod
     @abstractmethod
     def toggle_promiscuous_mode(if_name: str, enable: bool):
@@ -41,3 +60,18 @@ class AbstractPlatformSpecificUtils(ABC):
             disabled otherwise
         """
         raise NotImplementedError
+
+    @staticmethod
+    @abstractmethod
+    def attach_bpf_filter(
+            socket_obj: socket,
+            instructions: List[Tuple[int, int, int, int]]
+    ):
+        """
+        Attaches compiled BPF program to the socket, so packets which don't
+        satisfy the filter are dropped by the kernel
+
+        :param socket_obj: socket to attach the filter to
+        :param instructions: BPF program, list of (code, jt, jf, k) tuples
+        """
+        raise NotImplementedError
@@ -1,6 +1,7 @@
 import ctypes
 import struct
-from socket import socket, AF_INET, SOCK_DGRAM, inet_ntoa
+from socket import socket, AF_INET, SOCK_DGRAM, SOL_SOCKET, inet_ntoa
+from typing import List, Tuple
 
 from nally.core.utils.platform_specific.abstract_platform_specific_utils \
     import AbstractPlatformSpecificUtils
@@ -30,10 +31,30 @@ class LinuxUtils(AbstractPlatformSpecificUtils):
     """
     Gets the IP address of the device
     """
+    SIOCGIFMTU = 0x8921
+    """
+    Gets the MTU (Maximum Transfer Unit) of the device
+    """
     SIOCGIFHWADDR = 0x8927
     """
     Gets the MAC address of the device
     """
+    SIOCETHTOOL = 0x8946
+    """
+    Performs Ethtool request to the device
+    """
+
+    # linux/ethtool.h
+    ETHTOOL_GGRO = 0x0000002b
+    """
+    Gets the Generic Receive Offload flag of the device
+    """
+
+    # asm-generic/socket.h
+    SO_ATTACH_FILTER = 26
+    """
+    Attaches classic BPF program to the socket
+    """
 
     # linux/route.h
     RTF_GATEWAY = 0x0002
@@ -144,3 +165,101 @@ class LinuxUtils(AbstractPlatformSpecificUtils):
                 request.if_flags ^= LinuxUtils.IFF_PROMISC
             # update
             fcntl.ioctl(socket_obj, LinuxUtils.SIOCSIFFLAGS, request)
+
+    @staticmethod
+    def attach_bpf_filter(
+            socket_obj: socket,
+            instructions: List[Tuple[int, int, int, int]]
+    ):
+        """
+        Attaches classic BPF program to the socket using SO_ATTACH_FILTER
+        socket option. Available only for Linux
+
+        :param socket_obj: socket to attach the filter to
+        :param instructions: BPF program, list of (code, jt, jf, k) tuples
+        """
+
+        class SockFilter(ctypes.Structure):
+            # according to 'linux/filter.h'
+            _fields_ = [
+                ("code", ctypes.c_uint16),
+                ("jt", ctypes.c_uint8),
+                ("jf", ctypes.c_uint8),
+                ("k", ctypes.c_uint32)
+            ]
+
+        class SockFprog(ctypes.Structure):
+            # according to 'linux/filter.h'
+            _fields_ = [
+                ("len", ctypes.c_uint16),
+                ("filter", ctypes.POINTER(SockFilter))
+            ]
+
+        # 'k' may be passed as signed value (e.g. 'ret #-1')
+        sock_filters = (SockFilter * len(instructions))(*[
+            SockFilter(code, jt, jf, k & 0xffffffff)
+            for code, jt, jf, k in instructions
+        ])
+        program = SockFprog(len(instructions), sock_filters)
+        # kernel copies the program, so buffer can be released after the call
+        socket_obj.setsockopt(
+            SOL_SOCKET,
+            LinuxUtils.SO_ATTACH_FILTER,
+            bytes(program)
+        )
+
+    # noinspection PyTypeChecker
+    @staticmethod
+    def get_net_interface_mtu(if_name: str) -> int:
+        """
+        Returns MTU of this network interface. Uses Fcntl system call,
+        hence available only for Linux
+        """
+        with socket(AF_INET, SOCK_DGRAM) as socket_obj:
+
+            class IfMtuRequest(ctypes.Structure):
+                # according to 'if.h'
+                _fields_ = [
+                    ("if_name", ctypes.c_char * 16),
+                    ("if_mtu", ctypes.c_int),
+                    ("padding", ctypes.c_char * 20)
+                ]
+
+            import fcntl
+            request = IfMtuRequest()
+            request.if_name = if_name.encode()
+            fcntl.ioctl(socket_obj, LinuxUtils.SIOCGIFMTU, request)
+            return request.if_mtu
+
+    # noinspection PyTypeChecker
+    @staticmethod
+    def is_gro_enabled(if_name: str) -> bool:
+        """
+        Checks if Generic Receive Offload is enabled on network card, if so,
+        then captured frames can be coalesced and exceed the MTU. Uses Ethtool
+        ioctl system call, hence available only for Linux
+        """
+        with socket(AF_INET, SOCK_DGRAM) as socket_obj:
+
+            class EthtoolValue(ctypes.Structure):
+                # according to 'ethtool.h'
+                _fields_ = [
+                    ("cmd", ctypes.c_uint32),
+                    ("data", ctypes.c_uint32)
+                ]
+
+            class IfDataRequest(ctypes.Structure):
+                # according to 'if.h'
+                _fields_ = [
+                    ("if_name", ctypes.c_char * 16),
+                    ("if_data", ctypes.c_void_p),
+                    ("padding", ctypes.c_char * 16)
+                ]
+
+            import fcntl
+            value = EthtoolValue(LinuxUtils.ETHTOOL_GGRO, 0)
+            request = IfDataRequest()
+            request.if_name = if_name.encode()
+            request.if_data = ctypes.addressof(value)
+            fcntl.ioctl(socket_obj, LinuxUtils.SIOCETHTOOL, request)
+            return bool(value.data)
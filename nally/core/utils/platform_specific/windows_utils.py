@@ -1,3 +1,6 @@
+from socket import socket
+from typing import List, Tuple
+
 from nally.core.utils.platform_specific.abstract_platform_specific_utils \
     import AbstractPlatformSpecificUtils
 
@@ -16,6 +19,21 @@ class WindowsUtils(AbstractPlatformSpecificUtils):
     def get_net_interface_ip(if_name: str) -> str:
         raise NotImplementedError
 
+    @staticmethod
+    def get_net_interface_mtu(if_name: str) -> int:
+        raise NotImplementedError
+
+    @staticmethod
+    def is_gro_enabled(if_name: str) -> bool:
+        raise NotImplementedError
+
     @staticmethod
     def toggle_promiscuous_mode(if_name: str, enable: bool):
         raise NotImplementedError
+
+    @staticmethod
+    def attach_bpf_filter(
+            socket_obj: socket,
+            instructions: List[Tuple[int, int, int, int]]
+    ):
+        raise NotImplementedError
@@ -1,3 +1,6 @@
+from nally.core.utils.checksum_utils import ChecksumUtils
+
+
 class Utils:
 
     @staticmethod
@@ -22,18 +25,38 @@ class Utils:
             - Compute sum of these words
             - Compute sum one's complement
 
+        See ChecksumUtils for the checksum of multiple buffers
+
         :param: byte_buffer: input byte sequence
         :return: calculated checksum (16 bits value)
         """
-        if len(byte_buffer) % 2 != 0:
-            byte_buffer += b'\0'
-        checksum = 0
-        for i in range(0, len(byte_buffer), 2):
-            # pair two bytes into 16-bits value
-            paired_bytes = (byte_buffer[i] << 8) + byte_buffer[i + 1]
-            checksum += paired_bytes
-        checksum += (checksum >> 16)
+        return ChecksumUtils.calc_checksum(byte_buffer)
+
+    @staticmethod
+    def update_checksum(
+            checksum_bytes: bytes,
+            old_bytes: bytes,
+            new_bytes: bytes
+    ) -> bytes:
+        """
+        Incrementally updates checksum after the part of the checksummed
+        data was changed, uses the equation 3 from
+        https://tools.ietf.org/html/rfc1624#section-3:
+            HC' = ~(~HC + ~m + m')
+
+        :param checksum_bytes: current checksum (16 bits value)
+        :param old_bytes: old value of the changed data, should be aligned to
+            16 bits words of the checksummed data
+        :param new_bytes: new value of the changed data, should have the same
+            length and alignment as the old one
+        :return: updated checksum (16 bits value)
+        """
+        checksum = ~int.from_bytes(checksum_bytes, byteorder="big") & 0xffff
+        for i in range(0, len(old_bytes), 2):
+            old_word = (old_bytes[i] << 8) + old_bytes[i + 1]
+            new_word = (new_bytes[i] << 8) + new_bytes[i + 1]
+            checksum += (~old_word & 0xffff) + new_word
+        while checksum >> 16:
+            checksum = (checksum & 0xffff) + (checksum >> 16)
         checksum = ~checksum & 0xffff
-        # split 16-bits checksum into two 8-bits values
-        checksum_bytes = checksum.to_bytes(2, byteorder="big")
-        return checksum_bytes
+        return checksum.to_bytes(2, byteorder="big")
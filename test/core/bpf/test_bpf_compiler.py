@@ -0,0 +1,129 @@
+import platform
+import socket
+from unittest import TestCase, skipUnless
+
+from nally.core.bpf.bpf_compiler import BpfCompiler
+from nally.core.utils.platform_specific.linux_utils import LinuxUtils
+from test.core.layers.link.ethernet.test_ethernet_packet_view \
+    import _tcp_frame, _udp_frame
+from test.core.sniffer.test_predicate_compiler import _arp_frame
+
+# 'tcpdump -dd tcp port 80' without IPv6 branches
+TCP_PORT_80_PROGRAM = [
+    (0x28, 0, 0, 0x0000000c),
+    (0x15, 0, 11, 0x00000800),
+    (0x30, 0, 0, 0x00000017),
+    (0x15, 0, 9, 0x00000006),
+    (0x28, 0, 0, 0x00000014),
+    (0x45, 7, 0, 0x00001fff),
+    (0xb1, 0, 0, 0x0000000e),
+    (0x48, 0, 0, 0x0000000e),
+    (0x15, 3, 0, 0x00000050),
+    (0xb1, 0, 0, 0x0000000e),
+    (0x48, 0, 0, 0x00000010),
+    (0x15, 0, 1, 0x00000050),
+    (0x06, 0, 0, 0x00040000),
+    (0x06, 0, 0, 0x00000000),
+]
+
+
+class TestBpfCompiler(TestCase):
+
+    # TCP 3.123.217.208:443 -> 10.10.128.44:55978, ACK, TTL 47
+    TCP_FRAME = _tcp_frame()
+    # UDP 86.57.135.193:443 -> 192.168.1.32:39237, TTL 252
+    UDP_FRAME = _udp_frame()
+    # ARP request 10.10.144.73 -> 10.10.152.144, broadcast
+    ARP_FRAME = _arp_frame()
+
+    EXPRESSIONS = {
+        # expression: (matches TCP, matches UDP, matches ARP)
+        "": (True, True, True),
+        "ip": (True, True, False),
+        "arp": (False, False, True),
+        "tcp": (True, False, False),
+        "udp or arp": (False, True, True),
+        "host 3.123.217.208": (True, False, False),
+        "src host 10.10.128.44": (False, False, False),
+        "dst 10.10.128.44": (True, False, False),
+        "10.10.152.144": (False, False, True),
+        "ip host 10.10.152.144": (False, False, False),
+        "net 10/8": (True, False, True),
+        "src net 10.10.144.0/20": (False, False, True),
+        "dst net 192.168.0.0 mask 255.255.0.0": (False, True, False),
+        "port 443": (True, True, False),
+        "udp port 443": (False, True, False),
+        "tcp src port 443 and dst port 55978": (True, False, False),
+        "portrange 39000-40000": (False, True, False),
+        "tcp[tcpflags] & tcp-ack != 0": (True, False, False),
+        "tcp[tcpflags] & (tcp-syn|tcp-ack) == tcp-syn": (False, False, False),
+        "tcp[13] = 0x10": (True, False, False),
+        "ip[8] < 64": (True, False, False),
+        "ip[2:2] >= 52 && !udp": (True, False, False),
+        "greater 100": (False, True, False),
+        "less 66": (True, False, True),
+        "ether host ff:ff:ff:ff:ff:ff": (False, False, True),
+        "ether src 52:54:0:eb:a2:58": (False, False, True),
+        "ether proto \\arp or ip proto 17": (False, True, True),
+        "not tcp and not udp": (False, False, True),
+        # 'and' and 'or' have the same precedence
+        "tcp or udp and ip[8] < 64": (True, False, False),
+        "not (tcp or udp) or ip[8] > 64": (False, True, True),
+    }
+
+    def test_expressions(self):
+        frames = (self.TCP_FRAME, self.UDP_FRAME, self.ARP_FRAME)
+        for expression, expected in self.EXPRESSIONS.items():
+            program = BpfCompiler.compile(expression)
+            self.assertEqual(
+                expected,
+                tuple(program.filter(frame) != 0 for frame in frames),
+                expression
+            )
+
+    def test_program(self):
+        program = BpfCompiler.compile("tcp port 80")
+        self.assertEqual(TCP_PORT_80_PROGRAM, program.instructions)
+        self.assertEqual(
+            len(self.TCP_FRAME),
+            BpfCompiler.compile("tcp").filter(self.TCP_FRAME)
+        )
+        self.assertEqual(
+            16,
+            BpfCompiler.compile("tcp", snaplen=16).filter(self.TCP_FRAME)
+        )
+
+    def test_fragment(self):
+        frame = bytearray(self.UDP_FRAME)
+        frame[20] |= 0x01
+        self.assertTrue(BpfCompiler.compile("udp").filter(frame))
+        self.assertFalse(BpfCompiler.compile("udp port 443").filter(frame))
+
+    def test_invalid_expression(self):
+        for expression in (
+                "tcp port",
+                "tcp port 80 or",
+                "(tcp",
+                "tcp port 70000",
+                "icmp port 80",
+                "host 10.0.0",
+                "host example",
+                "net 10.0.0.1/8",
+                "ether host ff:ff",
+                "ether port 80",
+                "tcp[13:3] == 1",
+                "tcp[13] ~ 1",
+                "src proto tcp",
+                "$",
+        ):
+            with self.assertRaises(ValueError, msg=expression):
+                BpfCompiler.compile(expression)
+
+    @skipUnless(platform.system() == "Linux", "SO_ATTACH_FILTER is Linux only")
+    def test_accepted_by_kernel(self):
+        for expression in self.EXPRESSIONS:
+            with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+                LinuxUtils.attach_bpf_filter(
+                    sock,
+                    BpfCompiler.compile(expression).instructions
+                )
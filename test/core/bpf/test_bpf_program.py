@@ -0,0 +1,75 @@
+from unittest import TestCase
+
+from nally.core.bpf.bpf_program import BpfProgram as Bpf
+
+
+class TestBpfProgram(TestCase):
+
+    PACKET = bytes(range(64))
+
+    def test_loads_and_jumps(self):
+        program = Bpf([
+            (Bpf.LD | Bpf.H | Bpf.ABS, 0, 0, 2),
+            (Bpf.JMP | Bpf.JEQ | Bpf.K, 0, 4, 0x0203),
+            (Bpf.LDX | Bpf.B | Bpf.MSH, 0, 0, 5),
+            (Bpf.LD | Bpf.B | Bpf.IND, 0, 0, 1),
+            (Bpf.JMP | Bpf.JSET | Bpf.K, 0, 1, 0x10),
+            (Bpf.RET | Bpf.A, 0, 0, 0),
+            (Bpf.RET | Bpf.K, 0, 0, 0),
+        ])
+        # X = 4 * (5 & 0x0f) = 20, A = packet[21] = 21
+        self.assertEqual(21, program.filter(self.PACKET))
+        self.assertEqual(21, program.filter(memoryview(self.PACKET)))
+        self.assertEqual(0, program.filter(b"\x00" * 64))
+        # out of bounds load rejects the packet
+        self.assertEqual(0, program.filter(self.PACKET[:21]))
+
+    def test_alu_and_memory(self):
+        program = Bpf([
+            (Bpf.LD | Bpf.W | Bpf.LEN, 0, 0, 0),
+            (Bpf.ST, 0, 0, 3),
+            (Bpf.LD | Bpf.W | Bpf.IMM, 0, 0, 6),
+            (Bpf.ALU | Bpf.MUL | Bpf.K, 0, 0, 7),
+            (Bpf.ALU | Bpf.SUB | Bpf.K, 0, 0, 50),
+            (Bpf.ALU | Bpf.NEG, 0, 0, 0),
+            (Bpf.ALU | Bpf.AND | Bpf.K, 0, 0, 0xff),
+            (Bpf.MISC | Bpf.TAX, 0, 0, 0),
+            (Bpf.LD | Bpf.W | Bpf.MEM, 0, 0, 3),
+            (Bpf.ALU | Bpf.DIV | Bpf.X, 0, 0, 0),
+            (Bpf.JMP | Bpf.JGE | Bpf.K, 1, 0, 8),
+            (Bpf.JMP | Bpf.JA, 0, 0, 1),
+            (Bpf.RET | Bpf.A, 0, 0, 0),
+            (Bpf.RET | Bpf.K, 0, 0, 1),
+        ])
+        # 6 * 7 - 50 = -8, -(-8) = 8, A = len / 8
+        self.assertEqual(8, program.filter(self.PACKET))
+        self.assertEqual(1, program.filter(self.PACKET[:40]))
+        # division by zero rejects the packet
+        program = Bpf([
+            (Bpf.LDX | Bpf.W | Bpf.IMM, 0, 0, 0),
+            (Bpf.ALU | Bpf.DIV | Bpf.X, 0, 0, 0),
+            (Bpf.RET | Bpf.K, 0, 0, 1),
+        ])
+        self.assertEqual(0, program.filter(self.PACKET))
+
+    def test_accepted_length(self):
+        program = Bpf([(Bpf.RET | Bpf.K, 0, 0, -1)])
+        self.assertEqual(len(self.PACKET), program.filter(self.PACKET))
+        self.assertEqual([(Bpf.RET | Bpf.K, 0, 0, 0xffffffff)],
+                         program.instructions)
+
+    def test_invalid_program(self):
+        for instructions in (
+                [],
+                [(0xffff, 0, 0, 0)],
+                [(Bpf.LD | Bpf.W | Bpf.ABS, 0, 0, 0)],
+                [(Bpf.JMP | Bpf.JEQ | Bpf.K, 0, 1, 0),
+                 (Bpf.RET | Bpf.K, 0, 0, 0)],
+                [(Bpf.ST, 0, 0, Bpf.MEMORY_WORDS),
+                 (Bpf.RET | Bpf.K, 0, 0, 0)],
+                [(Bpf.ALU | Bpf.DIV | Bpf.K, 0, 0, 0),
+                 (Bpf.RET | Bpf.K, 0, 0, 0)],
+                [(Bpf.RET | Bpf.K, 0, 0, 0)] * (Bpf.MAX_INSTRUCTIONS + 1),
+        ):
+            with self.assertRaises(ValueError):
+                Bpf(instructions)
@@ -42,3 +42,11 @@ class TestIpFragmentationFlags(TestCase):
         self.assertEqual(0, no_flags.flags)
         self.assertFalse(no_flags.is_flag_set(IpFragmentationFlags.DF))
         self.assertFalse(no_flags.is_flag_set(IpFragmentationFlags.MF))
+
+    def test_from_int_shared(self):
+        flags_df = IpFragmentationFlags.from_int(self.IP_FLAGS_DF)
+        self.assertIs(flags_df, IpFragmentationFlags.from_int(0b110))
+        self.assertTrue(flags_df.shared)
+        with self.assertRaises(AttributeError):
+            flags_df.set_flag(IpFragmentationFlags.MF, True)
+        self.assertEqual(self.IP_FLAGS_DF, flags_df.flags)
@@ -61,6 +61,19 @@ class TestArpPacket(TestCase):
         self.assertEqual(PACKET_DUMP_2, arp_bytes.hex())
         self.assertEqual(arp_packet, ArpPacket.from_bytes(arp_bytes))
 
+    def test_from_bytes_invalid(self):
+        arp_bytes = bytes.fromhex(PACKET_DUMP_1)
+        for invalid_bytes in (
+                # unsupported operation
+                arp_bytes[:6] + b"\x00\x07" + arp_bytes[8:],
+                # hardware length doesn't match Ethernet
+                arp_bytes[:4] + b"\x05" + arp_bytes[5:],
+                # truncated addresses
+                arp_bytes[:-1],
+        ):
+            with self.assertRaises(ValueError, msg=invalid_bytes.hex()):
+                ArpPacket.from_bytes(invalid_bytes)
+
     def test_is_response(self):
         arp_request = ArpPacket(
             hardware_type=ArpHardwareType.ETHERNET,
@@ -310,6 +310,20 @@ class TestEthernetPacket(TestCase):
             EthernetPacket.from_bytes(bytes.fromhex(ethernet_header_hex))
         )
 
+    def test_jumbo_frame(self):
+        # captured frames can exceed MTU, e.g. if they're coalesced by GRO
+        header = EthernetPacket(
+            dest_mac="01:00:5e:67:00:0a",
+            source_mac="52:54:00:46:cd:26"
+        ) / IpPacket(
+            source_addr_str="10.10.128.44",
+            dest_addr_str="10.10.144.153",
+            protocol=socket.IPPROTO_UDP
+        ) / UdpPacket(source_port=53, dest_port=53000)
+        payload = bytes(range(256)) * 35
+        packet = EthernetPacket.from_bytes(header.to_bytes() + payload)
+        self.assertEqual(payload, packet[UdpPacket].upper_layer.to_bytes())
+
     def test_is_response(self):
         packet1 = EthernetPacket(
             dest_mac="01:00:5e:67:00:0a",
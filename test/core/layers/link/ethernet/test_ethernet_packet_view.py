@@ -0,0 +1,116 @@
+from unittest import TestCase
+
+from nally.core.layers.inet.ip.ip_packet import IpPacket
+from nally.core.layers.inet.ip.ip_packet_view import IpPacketView
+from nally.core.layers.layer import Layer
+from nally.core.layers.link.arp.arp_packet import ArpPacket
+from nally.core.layers.link.ethernet.ethernet_packet import EthernetPacket
+from nally.core.layers.link.ethernet.ethernet_packet_view \
+    import EthernetPacketView
+from nally.core.layers.raw_packet import RawPacket
+from nally.core.layers.transport.tcp.tcp_packet import TcpPacket
+from nally.core.layers.transport.tcp.tcp_packet_view import TcpPacketView
+from nally.core.layers.transport.udp.udp_packet import UdpPacket
+from test.core.layers.link.ethernet.test_ethernet_packet import \
+    ARP_PAYLOAD_TEST_CONTEXT, TCP_IP_PAYLOAD_TEST_CONTEXT, \
+    UDP_IP_PAYLOAD_TEST_CONTEXT
+
+
+def _tcp_frame() -> bytes:
+    return bytes.fromhex(
+        TCP_IP_PAYLOAD_TEST_CONTEXT["ETHERNET_HEADER"]
+        + TCP_IP_PAYLOAD_TEST_CONTEXT["IP_PAYLOAD"]
+        + TCP_IP_PAYLOAD_TEST_CONTEXT["TCP_PAYLOAD"]
+    )
+
+
+def _udp_frame() -> bytes:
+    return bytes.fromhex(
+        UDP_IP_PAYLOAD_TEST_CONTEXT["ETHERNET_HEADER"]
+        + UDP_IP_PAYLOAD_TEST_CONTEXT["IP_PAYLOAD"]
+        + UDP_IP_PAYLOAD_TEST_CONTEXT["UDP_PAYLOAD"]
+        + UDP_IP_PAYLOAD_TEST_CONTEXT["APP_LAYER_PAYLOAD"]
+    )
+
+
+class TestEthernetPacketView(TestCase):
+
+    def test_tcp_ip_payload(self):
+        frame = _tcp_frame()
+        view = EthernetPacketView.from_bytes(frame)
+        self.assertEqual(EthernetPacket.from_bytes(frame), view)
+        self.assertEqual(frame, view.to_bytes())
+
+        self.assertTrue(isinstance(view[IpPacket], IpPacketView))
+        self.assertTrue(isinstance(view[TcpPacket], TcpPacketView))
+        self.assertEqual("3.123.217.208", view[IpPacket].source_addr)
+        self.assertEqual(47, view[IpPacket].ttl)
+        self.assertEqual(443, view[TcpPacket].source_port)
+        self.assertEqual(55978, view[TcpPacket].dest_port)
+        self.assertTrue(view[TcpPacket].flags.ack)
+
+    def test_udp_ip_payload(self):
+        frame = _udp_frame()
+        view = EthernetPacketView.from_bytes(frame)
+        self.assertEqual(EthernetPacket.from_bytes(frame), view)
+        self.assertEqual(frame, view.to_bytes())
+        self.assertEqual(39237, view[UdpPacket].dest_port)
+        self.assertEqual(
+            UDP_IP_PAYLOAD_TEST_CONTEXT["APP_LAYER_PAYLOAD"],
+            view[RawPacket].to_bytes().hex()
+        )
+
+    def test_arp_payload(self):
+        frame = bytes.fromhex(
+            ARP_PAYLOAD_TEST_CONTEXT["ETHERNET_HEADER"]
+            + ARP_PAYLOAD_TEST_CONTEXT["ARP_PAYLOAD"]
+        )
+        view = EthernetPacketView.from_bytes(frame)
+        self.assertEqual(EthernetPacket.from_bytes(frame), view)
+        self.assertTrue(isinstance(view.upper_layer, ArpPacket))
+
+    def test_lazy_decoding(self):
+        view = EthernetPacketView.from_bytes(_tcp_frame())
+        self.assertFalse(view._upper_layer_decoded)
+        self.assertEqual(0x0800, view.ether_type)
+        self.assertFalse(view._upper_layer_decoded)
+        ip_view = view.upper_layer
+        self.assertFalse(ip_view._upper_layer_decoded)
+        self.assertIs(view, ip_view.under_layer)
+
+    def test_max_layer(self):
+        frame = _tcp_frame()
+        for decoder in (EthernetPacket.from_bytes,
+                        EthernetPacketView.from_bytes):
+            packet = decoder(frame, max_layer=Layer.INTERNET)
+            self.assertEqual(47, packet[IpPacket].ttl)
+            self.assertFalse(TcpPacket in packet)
+            self.assertEqual(frame[34:], packet[RawPacket].to_bytes())
+            self.assertEqual(frame, packet.to_bytes())
+
+            packet = decoder(frame, max_layer=Layer.LINK)
+            self.assertFalse(IpPacket in packet)
+            self.assertEqual(frame[14:], packet[RawPacket].to_bytes())
+
+            packet = decoder(frame, max_layer=Layer.TRANSPORT)
+            self.assertEqual(443, packet[TcpPacket].source_port)
+        view = EthernetPacketView.from_bytes(frame, max_layer=Layer.INTERNET)
+        self.assertFalse(TcpPacket in view.clone())
+
+    def test_padding_ignored(self):
+        # frame padded with zeros up to the min Ethernet frame size
+        frame = _tcp_frame() + bytes(16)
+        view = EthernetPacketView.from_bytes(frame)
+        self.assertIsNone(view[TcpPacket].upper_layer)
+        self.assertEqual(_tcp_frame(), view.to_bytes())
+
+    def test_clone(self):
+        frame = bytearray(_tcp_frame())
+        view = EthernetPacketView.from_bytes(frame)
+        self.assertEqual(443, view[TcpPacket].source_port)
+        view_copy = view.clone()
+        # modify original frame, copy shouldn't be affected
+        frame[34:36] = bytes(2)
+        self.assertEqual(0, view[TcpPacket].source_port)
+        self.assertEqual(443, view_copy[TcpPacket].source_port)
+        self.assertIs(view_copy, view_copy[TcpPacket].under_layer.under_layer)
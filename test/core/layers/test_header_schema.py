@@ -0,0 +1,108 @@
+from unittest import TestCase
+
+from nally.core.layers.header_schema import HeaderField, HeaderSchema
+from nally.core.layers.inet.ip.ip_packet import IpPacket
+from nally.core.layers.transport.transport_layer_utils \
+    import TransportLayerUtils
+
+
+class TestHeaderSchema(TestCase):
+
+    SCHEMA = HeaderSchema("test", [
+        HeaderField("version", 4, 4),
+        HeaderField("length", 4, 5),
+        HeaderField("port", 16, validator=TransportLayerUtils
+                    .validate_port_num),
+        HeaderField("flags", 3),
+        HeaderField("offset_bits", 13),
+        HeaderField("address", 32, bytes(4), raw=True),
+        HeaderField("counter", 32),
+    ])
+
+    @classmethod
+    def encode(cls, **fields) -> bytes:
+        buffer = bytearray(cls.SCHEMA.size)
+        cls.SCHEMA.pack_into(buffer, 0, **fields)
+        return bytes(buffer)
+
+    def test_size(self):
+        self.assertEqual(13, self.SCHEMA.size)
+
+    def test_pack_decode(self):
+        header = self.encode(
+            port=443,
+            flags=0b101,
+            offset_bits=0x1abc,
+            address=b"\x0a\x00\x00\x01",
+            counter=0xdeadbeef
+        )
+        self.assertEqual(
+            bytes.fromhex("45 01bb babc 0a000001 deadbeef"),
+            header
+        )
+        self.assertEqual(
+            (4, 5, 443, 0b101, 0x1abc, b"\x0a\x00\x00\x01", 0xdeadbeef),
+            self.SCHEMA.decode(header)
+        )
+        buffer = bytearray(b"\xff" * (self.SCHEMA.size + 2))
+        self.SCHEMA.pack_into(buffer, 2, version=6, length=15)
+        self.assertEqual(b"\xff\xff\x6f" + bytes(12), buffer)
+        self.assertEqual(
+            (6, 15, 0, 0, 0, bytes(4), 0),
+            self.SCHEMA.decode(memoryview(buffer), 2)
+        )
+        # fields don't overflow to the neighbours
+        self.assertEqual(
+            bytes.fromhex("f0 0000 1fff 00000000 00000000"),
+            self.encode(version=0x1f, length=0x10, flags=8, offset_bits=-1)
+        )
+
+    def test_ip_header(self):
+        packet = IpPacket(dest_addr_str="10.0.0.1", identification=7, ttl=3)
+        version, ihl, dscp, ecn, total_length, identification, flags, \
+            fragment_offset, ttl, protocol, _, _, _ = \
+            IpPacket.IP_V4_HEADER_SCHEMA.decode(packet.to_bytes())
+        self.assertEqual(
+            (4, 5, 20, 7, 0, 3, 6),
+            (version, ihl, total_length, identification, fragment_offset,
+             ttl, protocol)
+        )
+        # validators convert raw values to the field types
+        self.assertIs(packet.dscp, dscp)
+        self.assertIs(packet.ecn, ecn)
+        self.assertEqual(packet.flags, flags)
+        self.assertTrue(flags.shared)
+
+    def test_decode_validators(self):
+        header = self.encode(port=80)
+        self.assertEqual(80, self.SCHEMA.decode(header)[2])
+        schema = HeaderSchema("test", [
+            HeaderField("kind", 8, validator=lambda value: f"kind-{value}"),
+            HeaderField("reserved", 8, validator=self.validate_zero),
+        ])
+        self.assertEqual(("kind-3", 0), schema.decode(b"\x03\x00"))
+        with self.assertRaises(ValueError):
+            schema.decode(b"\x03\x01")
+
+    @staticmethod
+    def validate_zero(value: int) -> int:
+        if value != 0:
+            raise ValueError("should be zero")
+        return value
+
+    def test_invalid_schema(self):
+        for fields in (
+                [HeaderField("a", 4)],
+                [HeaderField("a", 12), HeaderField("b", 12)],
+                [HeaderField("a", 4), HeaderField("b", 32, raw=True)],
+                [HeaderField("a", 12, raw=True)],
+                [HeaderField("a", 60), HeaderField("b", 12)],
+                [HeaderField("a", 0)],
+                [HeaderField("a", 8), HeaderField("a", 8)],
+                [HeaderField("offset", 8)],
+                [HeaderField("_a", 8)],
+                [HeaderField("in", 8)],
+                [HeaderField("a-b", 8)],
+        ):
+            with self.assertRaises(ValueError, msg=fields):
+                HeaderSchema("test", fields)
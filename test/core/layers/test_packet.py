@@ -0,0 +1,73 @@
+from unittest import TestCase
+
+from nally.core.layers.inet.ip.ip_packet import IpPacket
+from nally.core.layers.raw_packet import RawPacket
+from nally.core.layers.transport.tcp.tcp_packet import TcpPacket
+
+
+class TestPacket(TestCase):
+
+    def test_stack(self):
+        ip_packet = IpPacket(dest_addr_str="8.8.8.8", identification=1)
+        tcp_packet = TcpPacket(source_port=44134, dest_port=443)
+        packet = ip_packet.stack(tcp_packet).stack(b"payload")
+        # no copies should be made
+        self.assertIs(ip_packet, packet)
+        self.assertIs(tcp_packet, packet.upper_layer)
+        self.assertIs(ip_packet, tcp_packet.under_layer)
+        self.assertEqual(RawPacket(b"payload"), tcp_packet.upper_layer)
+        self.assertEqual(
+            IpPacket(dest_addr_str="8.8.8.8", identification=1)
+            / TcpPacket(source_port=44134, dest_port=443)
+            / b"payload",
+            packet
+        )
+
+    def test_true_div_assignment_copies_operands(self):
+        packet = IpPacket(dest_addr_str="8.8.8.8")
+        ip_packet = packet
+        tcp_packet = TcpPacket(source_port=44134, dest_port=443)
+        packet /= tcp_packet
+        self.assertIsNot(ip_packet, packet)
+        self.assertTrue(TcpPacket in packet)
+        self.assertIsNone(ip_packet.upper_layer)
+        # right operand isn't stacked, so it can be reused
+        other_packet = IpPacket(dest_addr_str="1.1.1.1")
+        other_packet /= tcp_packet
+        self.assertTrue(TcpPacket in other_packet)
+        self.assertIsNone(tcp_packet.under_layer)
+
+    def test_stack_already_stacked_packet(self):
+        tcp_packet = TcpPacket(source_port=44134, dest_port=443)
+        IpPacket(dest_addr_str="8.8.8.8").stack(tcp_packet)
+        self.assertRaises(
+            ValueError,
+            IpPacket(dest_addr_str="1.1.1.1").stack,
+            tcp_packet
+        )
+
+    def test_true_div_copies_operands(self):
+        ip_packet = IpPacket(dest_addr_str="8.8.8.8")
+        tcp_packet = TcpPacket(source_port=44134, dest_port=443)
+        packet = ip_packet / tcp_packet
+        self.assertIsNot(ip_packet, packet)
+        self.assertIsNot(tcp_packet, packet.upper_layer)
+        self.assertIsNone(ip_packet.upper_layer)
+        self.assertIsNone(tcp_packet.under_layer)
+
+    def test_serialize_into(self):
+        packet = IpPacket(dest_addr_str="8.8.8.8", identification=1) \
+            / TcpPacket(source_port=44134, dest_port=443) \
+            / b"payload"
+        packet_bytes = packet.to_bytes()
+        self.assertEqual(len(packet_bytes), packet.wire_length())
+        self.assertEqual(20 + 20 + 7, packet.wire_length())
+        self.assertEqual(27, packet.payload_length())
+
+        # serialize into the middle of the larger buffer
+        buffer = bytearray(b"\xff" * 64)
+        written = packet.serialize_into(memoryview(buffer), 10)
+        self.assertEqual(len(packet_bytes), written)
+        self.assertEqual(packet_bytes, buffer[10:10 + written])
+        self.assertEqual(b"\xff" * 10, buffer[:10])
+        self.assertEqual(b"\xff" * (64 - 10 - written), buffer[10 + written:])
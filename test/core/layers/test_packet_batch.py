@@ -0,0 +1,100 @@
+import socket
+from unittest import TestCase, skipIf
+
+from nally.core.layers import packet_batch
+from nally.core.layers.link.ethernet.ethernet_packet import EthernetPacket
+from nally.core.layers.packet_batch import PacketBatch
+from test.core.layers.link.ethernet.test_ethernet_packet import \
+    ARP_PAYLOAD_TEST_CONTEXT, TCP_IP_PAYLOAD_TEST_CONTEXT, \
+    UDP_IP_PAYLOAD_TEST_CONTEXT
+
+TCP_FRAME = bytes.fromhex(
+    TCP_IP_PAYLOAD_TEST_CONTEXT["ETHERNET_HEADER"]
+    + TCP_IP_PAYLOAD_TEST_CONTEXT["IP_PAYLOAD"]
+    + TCP_IP_PAYLOAD_TEST_CONTEXT["TCP_PAYLOAD"]
+)
+UDP_FRAME = bytes.fromhex(
+    UDP_IP_PAYLOAD_TEST_CONTEXT["ETHERNET_HEADER"]
+    + UDP_IP_PAYLOAD_TEST_CONTEXT["IP_PAYLOAD"]
+    + UDP_IP_PAYLOAD_TEST_CONTEXT["UDP_PAYLOAD"]
+    + UDP_IP_PAYLOAD_TEST_CONTEXT["APP_LAYER_PAYLOAD"]
+)
+ARP_FRAME = bytes.fromhex(
+    ARP_PAYLOAD_TEST_CONTEXT["ETHERNET_HEADER"]
+    + ARP_PAYLOAD_TEST_CONTEXT["ARP_PAYLOAD"]
+)
+# truncated TCP header
+SHORT_TCP_FRAME = TCP_FRAME[:40]
+FRAMES = [TCP_FRAME, UDP_FRAME, ARP_FRAME, SHORT_TCP_FRAME, b"\x01\x02"]
+
+EXPECTED_COLUMNS = {
+    "length": [66, 231, 42, 40, 2],
+    "dest_mac": [0xe0d55e21b0cb, 0x0c84dca6bfc1, 0xffffffffffff,
+                 0xe0d55e21b0cb, 0],
+    "source_mac": [0x007e95026142, 0x34dab787d534, 0x525400eba258,
+                   0x007e95026142, 0],
+    "ether_type": [0x0800, 0x0800, 0x0806, 0x0800, 0],
+    "source_addr": [0x037bd9d0, 0x563987c1, 0, 0x037bd9d0, 0],
+    "dest_addr": [0x0a0a802c, 0xc0a80120, 0, 0x0a0a802c, 0],
+    "protocol": [socket.IPPROTO_TCP, socket.IPPROTO_UDP, 0,
+                 socket.IPPROTO_TCP, 0],
+    "ttl": [47, 252, 0, 47, 0],
+    "source_port": [443, 443, 0, 0, 0],
+    "dest_port": [55978, 39237, 0, 0, 0],
+    "tcp_flags": [0x010, 0, 0, 0, 0],
+    "sequence_number": [2555500760, 0, 0, 0, 0],
+    "ack_number": [1254966751, 0, 0, 0, 0],
+    "payload_offset": [66, 42, 14, 34, 2],
+}
+
+
+class TestPacketBatch(TestCase):
+
+    def test_decode(self):
+        self.__test_batch(PacketBatch._decode(FRAMES))
+
+    @skipIf(packet_batch.numpy is None, "NumPy isn't available")
+    def test_decode_vectorized(self):
+        batch = PacketBatch._decode_vectorized(FRAMES)
+        self.__test_batch(batch)
+        self.assertEqual(len(FRAMES), len(batch.table))
+        tcp_frames = batch.table[batch["protocol"] == socket.IPPROTO_TCP]
+        self.assertEqual([66, 40], list(tcp_frames["length"]))
+        self.assertEqual(0, len(PacketBatch._decode_vectorized([])))
+
+    @skipIf(packet_batch.numpy is None, "NumPy isn't available")
+    def test_decode_vectorized_matches_fallback(self):
+        # IPv4 header with options and TCP header with options
+        options_frame = bytearray(TCP_FRAME)
+        options_frame[14] = 0x46
+        options_frame[46] = 0x60
+        options_frame[34:34] = b"\x01\x01\x01\x00"
+        frames = [
+            frame[:length]
+            for frame in (TCP_FRAME, UDP_FRAME, ARP_FRAME,
+                          bytes(options_frame))
+            for length in range(len(frame) + 1)
+        ]
+        expected = PacketBatch._decode(frames)
+        batch = PacketBatch._decode_vectorized(frames)
+        self.assertEqual(len(frames), len(batch))
+        for column_name in batch.column_names:
+            self.assertEqual(
+                list(expected[column_name]),
+                [int(value) for value in batch[column_name]],
+                column_name
+            )
+
+    def test_decode_batch(self):
+        batch = EthernetPacket.decode_batch(iter(FRAMES))
+        self.__test_batch(batch)
+
+    def __test_batch(self, batch: PacketBatch):
+        self.assertEqual(len(FRAMES), len(batch))
+        self.assertEqual(list(EXPECTED_COLUMNS), batch.column_names)
+        for column_name, expected_values in EXPECTED_COLUMNS.items():
+            self.assertEqual(
+                expected_values,
+                [int(value) for value in batch[column_name]],
+                column_name
+            )
@@ -0,0 +1,93 @@
+import socket
+from unittest import TestCase
+
+from nally.core.layers.inet.icmp.icmp_codes import IcmpType
+from nally.core.layers.inet.icmp.icmp_packet import IcmpPacket
+from nally.core.layers.inet.ip.ip_packet import IpPacket
+from nally.core.layers.link.ethernet.ethernet_packet import EthernetPacket
+from nally.core.layers.packet_template import PacketTemplate
+from nally.core.layers.transport.tcp.tcp_control_bits import TcpControlBits
+from nally.core.layers.transport.tcp.tcp_options import TcpOptions
+from nally.core.layers.transport.tcp.tcp_packet import TcpPacket
+from nally.core.layers.transport.udp.udp_packet import UdpPacket
+
+
+def _tcp_probe(dest_addr, source_port, dest_port, seq, ttl=64):
+    return EthernetPacket(
+        dest_mac="e0:d5:5e:21:b0:cb",
+        source_mac="00:7e:95:02:61:42"
+    ) / IpPacket(
+        source_addr_str="10.10.128.44",
+        dest_addr_str=dest_addr,
+        identification=11150,
+        ttl=ttl
+    ) / TcpPacket(
+        source_port=source_port,
+        dest_port=dest_port,
+        sequence_number=seq,
+        flags=TcpControlBits(syn=True),
+        options=TcpOptions([(TcpOptions.MAX_SEGMENT_SIZE, 1460)])
+    )
+
+
+def _udp_probe(dest_addr, dest_port):
+    return IpPacket(
+        source_addr_str="10.10.128.44",
+        dest_addr_str=dest_addr,
+        identification=1,
+        protocol=socket.IPPROTO_UDP
+    ) / UdpPacket(source_port=53000, dest_port=dest_port) / b"probe"
+
+
+class TestPacketTemplate(TestCase):
+
+    def test_tcp_probe(self):
+        template = PacketTemplate(_tcp_probe("8.8.8.8", 40000, 80, 1))
+        probes = [
+            ("1.2.3.4", 40001, 443, 2302261952),
+            ("255.255.255.255", 65535, 65535, 4294967295),
+            ("0.0.0.0", 0, 0, 0),
+            ("10.10.144.153", 44134, 22, 123456789),
+        ]
+        for dest_addr, source_port, dest_port, seq in probes:
+            frame = template.stamp(
+                dest_addr=dest_addr,
+                source_port=source_port,
+                dest_port=dest_port,
+                sequence_number=seq
+            )
+            expected = _tcp_probe(dest_addr, source_port, dest_port, seq)
+            self.assertEqual(expected.to_bytes().hex(), frame.hex())
+
+        # not word-aligned field
+        frame = template.stamp(ttl=1)
+        expected = _tcp_probe("10.10.144.153", 44134, 22, 123456789, ttl=1)
+        self.assertEqual(expected.to_bytes(), template.to_bytes())
+        self.assertEqual(expected.to_bytes().hex(), frame.hex())
+
+    def test_udp_probe(self):
+        template = PacketTemplate(_udp_probe("8.8.8.8", 53))
+        for dest_addr, dest_port in (("1.1.1.1", 123), ("9.9.9.9", 161)):
+            frame = template.stamp(dest_addr=dest_addr, dest_port=dest_port)
+            expected = _udp_probe(dest_addr, dest_port)
+            self.assertEqual(expected.to_bytes().hex(), frame.hex())
+
+    def test_icmp_probe(self):
+        def icmp_probe(seq_number):
+            return IcmpPacket(
+                icmp_type=IcmpType.ECHO_REQUEST,
+                icmp_code=0,
+                identifier=1,
+                seq_number=seq_number
+            ) / b"ping"
+
+        template = PacketTemplate(icmp_probe(1))
+        for seq_number in range(2, 10):
+            self.assertEqual(
+                icmp_probe(seq_number).to_bytes(),
+                template.stamp(seq_number=seq_number)
+            )
+
+    def test_unsupported_field(self):
+        template = PacketTemplate(_udp_probe("8.8.8.8", 53))
+        self.assertRaises(ValueError, template.stamp, sequence_number=1)
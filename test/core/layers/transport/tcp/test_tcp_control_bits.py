@@ -1,6 +1,8 @@
+import copy
 from unittest import TestCase
 
 from nally.core.layers.transport.tcp.tcp_control_bits import TcpControlBits
+from nally.core.layers.transport.tcp.tcp_packet import TcpPacket
 
 
 class TestTcpControlBits(TestCase):
@@ -58,3 +60,28 @@ class TestTcpControlBits(TestCase):
 
         flags_all = TcpControlBits.from_int(self.FLAGS_ALL)
         self.assertEqual(self.FLAGS_ALL, flags_all.flags)
+
+    def test_from_int_shared(self):
+        flags = TcpControlBits.from_int(self.FLAGS_PSH_ACK)
+        self.assertIs(flags, TcpControlBits.from_int(self.FLAGS_PSH_ACK))
+        self.assertIs(flags, TcpControlBits.from_int(0x1000 | flags.flags))
+        self.assertTrue(flags.shared)
+        with self.assertRaises(AttributeError):
+            flags.set_flag(TcpControlBits.SYN, True)
+        self.assertEqual(TcpControlBits(ack=True, psh=True), flags)
+        self.assertFalse(TcpControlBits(ack=True, psh=True).shared)
+
+    def test_copy(self):
+        shared = TcpControlBits.from_int(self.FLAGS_PSH_ACK)
+        self.assertIs(shared, copy.copy(shared))
+        self.assertIs(shared, copy.deepcopy(shared))
+        # packets copied by stacking keep the shared instance
+        packet = TcpPacket(source_port=1, dest_port=2, flags=shared)
+        self.assertIs(shared, (packet / b"payload").flags)
+        flags = TcpControlBits(syn=True)
+        for copied in (copy.copy(flags), copy.deepcopy(flags)):
+            self.assertIsNot(flags, copied)
+            self.assertEqual(flags, copied)
+            self.assertFalse(copied.shared)
+            copied.set_flag(TcpControlBits.ACK, True)
+            self.assertFalse(flags.ack)
@@ -178,6 +178,16 @@ class TestTcpPacket(TestCase):
         ) / tcp_packet4
         self.__test_tcp_packet(PACKET_DUMP_4, tcp_packet4)
 
+    def test_from_bytes_reserved_bits(self):
+        packet_bytes = bytearray.fromhex(PACKET_DUMP_2)
+        parsed_packet = TcpPacket.from_bytes(bytes(packet_bytes))
+        self.assertTrue(parsed_packet.flags.ack)
+        self.assertTrue(parsed_packet.flags.shared)
+        # reserved bits follow the data offset in the 12-th byte
+        packet_bytes[12] |= 0x02
+        with self.assertRaises(ValueError):
+            TcpPacket.from_bytes(bytes(packet_bytes))
+
     def test_is_response(self):
         # 'syn' sent, wait for 'syn/ack'
         tcp_packet = TcpPacket(
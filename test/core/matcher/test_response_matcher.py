@@ -0,0 +1,187 @@
+import socket
+from unittest import TestCase
+
+from nally.core.layers.inet.icmp.icmp_codes import IcmpType
+from nally.core.layers.inet.icmp.icmp_packet import IcmpPacket
+from nally.core.layers.inet.ip.ip_packet import IpPacket
+from nally.core.layers.link.arp.arp_packet import ArpPacket
+from nally.core.layers.link.arp.arp_utils import ArpOperation
+from nally.core.layers.link.ethernet.ethernet_packet import EthernetPacket
+from nally.core.layers.transport.tcp.tcp_control_bits import TcpControlBits
+from nally.core.layers.transport.tcp.tcp_packet import TcpPacket
+from nally.core.layers.transport.udp.udp_packet import UdpPacket
+from nally.core.matcher.response_matcher import ResponseMatcher
+
+LOCAL_ADDR = "10.10.128.44"
+REMOTE_ADDR = "10.10.144.153"
+
+
+def _tcp(source_addr, dest_addr, source_port, dest_port, seq, ack, flags):
+    return EthernetPacket(
+        dest_mac="e0:d5:5e:21:b0:cb",
+        source_mac="00:7e:95:02:61:42"
+    ) / IpPacket(
+        source_addr_str=source_addr,
+        dest_addr_str=dest_addr
+    ) / TcpPacket(
+        source_port=source_port,
+        dest_port=dest_port,
+        sequence_number=seq,
+        ack_number=ack,
+        flags=flags
+    )
+
+
+def _syn_probe(dest_port, seq):
+    return _tcp(
+        LOCAL_ADDR, REMOTE_ADDR, 40000, dest_port, seq, 0,
+        TcpControlBits(syn=True)
+    )
+
+
+def _syn_ack(source_port, ack):
+    return _tcp(
+        REMOTE_ADDR, LOCAL_ADDR, source_port, 40000, 1000, ack,
+        TcpControlBits(syn=True, ack=True)
+    )
+
+
+class TestResponseMatcher(TestCase):
+
+    def test_tcp(self):
+        matcher = ResponseMatcher()
+        probes = [_syn_probe(port, port * 7) for port in range(1, 1000)]
+        for probe in probes:
+            matcher.add(probe)
+        self.assertEqual(len(probes), len(matcher))
+
+        probe = matcher.match(_syn_ack(80, 80 * 7 + 1))
+        self.assertIs(probes[79], probe)
+        self.assertTrue(
+            _syn_ack(80, 80 * 7 + 1)[TcpPacket].is_response(probe)
+        )
+        # already answered
+        self.assertIsNone(matcher.match(_syn_ack(80, 80 * 7 + 1)))
+        # wrong acknowledgment number
+        self.assertIsNone(matcher.match(_syn_ack(81, 81 * 7)))
+        # wrong port
+        self.assertIsNone(matcher.match(_syn_ack(1001, 81 * 7 + 1)))
+        self.assertEqual(len(probes) - 1, len(matcher))
+
+        # RST + ACK to the SYN probe
+        rst = _tcp(
+            REMOTE_ADDR, LOCAL_ADDR, 22, 40000, 0, 22 * 7 + 1,
+            TcpControlBits(rst=True, ack=True)
+        )
+        self.assertIs(probes[21], matcher.match(rst))
+
+    def test_tcp_rst(self):
+        matcher = ResponseMatcher()
+        probe = _tcp(
+            LOCAL_ADDR, REMOTE_ADDR, 40000, 443, 5, 2302261952,
+            TcpControlBits(ack=True)
+        )
+        matcher.add(probe)
+        rst = _tcp(
+            REMOTE_ADDR, LOCAL_ADDR, 443, 40000, 2302261952, 0,
+            TcpControlBits(rst=True)
+        )
+        self.assertIs(probe, matcher.match(rst))
+        self.assertEqual(0, len(matcher))
+
+    def test_sequence_number_wraparound(self):
+        matcher = ResponseMatcher()
+        probe = _syn_probe(80, 2 ** 32 - 1)
+        matcher.add(probe)
+        self.assertIs(probe, matcher.match(_syn_ack(80, 0)))
+
+    def test_udp(self):
+        matcher = ResponseMatcher()
+        probe = IpPacket(
+            source_addr_str=LOCAL_ADDR,
+            dest_addr_str=REMOTE_ADDR,
+            protocol=socket.IPPROTO_UDP
+        ) / UdpPacket(source_port=53000, dest_port=53) / b"probe"
+        matcher.add(probe)
+        reply = IpPacket(
+            source_addr_str=REMOTE_ADDR,
+            dest_addr_str=LOCAL_ADDR,
+            protocol=socket.IPPROTO_UDP
+        ) / UdpPacket(source_port=53, dest_port=53000) / b"reply"
+        reply = IpPacket.from_bytes(reply.to_bytes())
+        self.assertIs(probe, matcher.match(reply))
+
+    def test_icmp_echo(self):
+        matcher = ResponseMatcher()
+        probe = IpPacket(
+            source_addr_str=LOCAL_ADDR,
+            dest_addr_str=REMOTE_ADDR,
+            protocol=socket.IPPROTO_ICMP
+        ) / IcmpPacket(
+            icmp_type=IcmpType.ECHO_REQUEST,
+            icmp_code=0,
+            identifier=1,
+            seq_number=7
+        )
+        matcher.add(probe)
+        reply = IpPacket(
+            source_addr_str=REMOTE_ADDR,
+            dest_addr_str=LOCAL_ADDR,
+            protocol=socket.IPPROTO_ICMP
+        ) / IcmpPacket(
+            icmp_type=IcmpType.ECHO_REPLY,
+            icmp_code=0,
+            identifier=1,
+            seq_number=7
+        )
+        # ICMP layer isn't decoded from bytes, so matcher
+        # should parse raw payload
+        self.assertIs(probe, matcher.match(IpPacket.from_bytes(
+            reply.to_bytes()
+        )))
+
+    def test_arp(self):
+        matcher = ResponseMatcher()
+        request = ArpPacket(
+            operation=ArpOperation.OP_REQUEST,
+            sender_hw_address="b0 6e bf c7 e6 ba",
+            sender_proto_address="10.10.128.161",
+            target_hw_address="00 00 00 00 00 00",
+            target_proto_address="10.10.128.2"
+        )
+        matcher.add(request)
+        reply = ArpPacket(
+            operation=ArpOperation.OP_REPLY,
+            sender_hw_address="00 7e 95 02 61 42",
+            sender_proto_address="10.10.128.2",
+            target_hw_address="b0 6e bf c7 e6 ba",
+            target_proto_address="10.10.128.161"
+        )
+        self.assertIsNone(matcher.match(request))
+        self.assertIs(request, matcher.match(reply))
+
+    def test_expire(self):
+        now = [0.0]
+        matcher = ResponseMatcher(timeout=1, clock=lambda: now[0])
+        first, second, third = (_syn_probe(port, 0) for port in (1, 2, 3))
+        matcher.add(first)
+        now[0] = 0.5
+        matcher.add(second)
+        matcher.add(third, timeout=10)
+        self.assertIs(second, matcher.match(_syn_ack(2, 1)))
+
+        self.assertEqual([], matcher.expire())
+        now[0] = 1.5
+        self.assertEqual([first], matcher.expire())
+        # answered probe isn't reported as expired
+        self.assertEqual([], matcher.expire(now=2))
+        self.assertEqual(1, len(matcher))
+        self.assertEqual([third], matcher.expire(now=10.5))
+        self.assertIsNone(matcher.match(_syn_ack(3, 1)))
+
+    def test_unsupported_probe(self):
+        with self.assertRaises(ValueError):
+            ResponseMatcher().add(IpPacket(
+                source_addr_str=LOCAL_ADDR,
+                dest_addr_str=REMOTE_ADDR
+            ))
@@ -0,0 +1,198 @@
+import os
+import struct
+import tempfile
+from unittest import TestCase
+
+from nally.core.layers.inet.ip.ip_packet import IpPacket
+from nally.core.layers.layer import Layer
+from nally.core.layers.link.ethernet.ethernet_packet import EthernetPacket
+from nally.core.layers.link.ethernet.ethernet_packet_view \
+    import EthernetPacketView
+from nally.core.layers.transport.udp.udp_packet import UdpPacket
+from nally.core.pcap.pcap_reader import PcapReader
+from nally.core.pcap.pcap_writer import PcapWriter
+from test.core.layers.link.ethernet.test_ethernet_packet_view \
+    import _udp_frame
+
+
+class TestPcapReader(TestCase):
+
+    FRAME = _udp_frame()
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "capture.pcap")
+        self.frames = [self.FRAME[:-1] + bytes([i]) for i in range(10)]
+        with PcapWriter(self.path) as writer:
+            for i, frame in enumerate(self.frames):
+                writer.write(frame, 1_000_000_000 + i)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_records(self):
+        with PcapReader(self.path, batch_size=3) as reader:
+            records = [
+                (record.timestamp_ns, record.length, bytes(record.data))
+                for record in reader.records()
+            ]
+            self.assertEqual(PcapWriter.DEFAULT_SNAPLEN, reader.snaplen)
+        self.assertEqual(
+            [
+                (1_000_000_000 + i, len(frame), frame)
+                for i, frame in enumerate(self.frames)
+            ],
+            records
+        )
+
+    def test_sniff(self):
+        with PcapReader(self.path, batch_size=4) as reader:
+            packets = list(reader.sniff())
+        self.assertEqual(10, len(packets))
+        for packet, frame in zip(packets, self.frames):
+            self.assertIsInstance(packet, EthernetPacket)
+            self.assertEqual(EthernetPacket.from_bytes(frame), packet)
+
+    def test_sniff_lazy(self):
+        with PcapReader(self.path, lazy_decoding=True) as reader:
+            ports = [packet[UdpPacket].dest_port
+                     for packet in reader.sniff()]
+            self.assertEqual([39237] * 10, ports)
+            self.assertIsInstance(next(iter(reader.sniff()), None),
+                                  EthernetPacketView)
+
+    def test_sniff_batch(self):
+        with PcapReader(
+                self.path,
+                batch_size=4,
+                packet_count=5,
+                predicate_filter=lambda packet: packet.to_bytes()[-1] % 2
+        ) as reader:
+            batches = reader.sniff_batch()
+            sizes = []
+            while True:
+                try:
+                    sizes.append(len(next(batches)))
+                except StopIteration as stop:
+                    self.assertEqual(5, stop.value)
+                    break
+        self.assertEqual([2, 2, 1], sizes)
+
+    def test_stats(self):
+        with open(self.path, "ab") as file:
+            # frame which is too short to be decoded
+            file.write(struct.pack("=IIII", 0, 0, 4, 4) + b"\x00" * 4)
+        with PcapReader(
+                self.path,
+                predicate_filter=lambda packet: packet.to_bytes()[-1] % 2
+        ) as reader:
+            self.assertEqual(5, len(list(reader.sniff())))
+            stats = reader.stats()
+        self.assertEqual(11, stats.received_count)
+        self.assertEqual(
+            sum(map(len, self.frames)) + 4,
+            stats.received_bytes
+        )
+        self.assertEqual(11, stats.filtered_count)
+        self.assertEqual(1, stats.decode_error_count)
+        self.assertEqual(5, stats.matched_count)
+        self.assertEqual(0, stats.kernel_dropped_count)
+
+    def test_field_predicate(self):
+        with open(self.path, "ab") as file:
+            # frame which doesn't satisfy predicate isn't decoded
+            file.write(struct.pack("=IIII", 0, 0, 4, 4) + b"\x00" * 4)
+        with PcapReader(
+                self.path,
+                predicate_filter="udp.dport == 39237 and ip.ttl > 64"
+        ) as reader:
+            self.assertEqual(10, len(list(reader.sniff())))
+            stats = reader.stats()
+        self.assertEqual(0, stats.decode_error_count)
+        self.assertEqual(10, stats.matched_count)
+        with PcapReader(self.path, predicate_filter="tcp") as reader:
+            self.assertEqual([], list(reader.sniff()))
+
+    def test_bpf_filter(self):
+        with PcapReader(self.path, bpf_filter="udp dst port 39237") as reader:
+            self.assertEqual(10, len(list(reader.sniff())))
+        with PcapReader(self.path, bpf_filter="udp[8:4] == 0") as reader:
+            self.assertEqual([], list(reader.sniff_frames()))
+            self.assertEqual(0, reader.stats().filtered_count)
+        with self.assertRaises(ValueError):
+            PcapReader(self.path, bpf_filter="udp port x")
+
+    def test_max_layer(self):
+        for lazy_decoding in (False, True):
+            with PcapReader(
+                    self.path,
+                    lazy_decoding=lazy_decoding,
+                    max_layer=Layer.INTERNET
+            ) as reader:
+                packets = list(reader.sniff())
+                self.assertEqual(10, len(packets))
+                self.assertTrue(all(
+                    IpPacket in packet and UdpPacket not in packet
+                    for packet in packets
+                ))
+
+    def test_sniff_frames(self):
+        with PcapReader(self.path, batch_size=8) as reader:
+            frames = [bytes(frame)
+                      for batch in reader.sniff_frames()
+                      for frame in batch]
+        self.assertEqual(self.frames, frames)
+
+    def test_sniff_records(self):
+        with PcapReader(self.path, batch_size=8,
+                        packet_count=9) as reader:
+            records = [
+                (record.timestamp_ns, record.length, bytes(record.data))
+                for batch in reader.sniff_records()
+                for record in batch
+            ]
+        self.assertEqual(
+            [
+                (1_000_000_000 + i, len(frame), frame)
+                for i, frame in enumerate(self.frames[:9])
+            ],
+            records
+        )
+
+    def test_stop(self):
+        with PcapReader(self.path, batch_size=1) as reader:
+            packets = []
+            for packet in reader.sniff():
+                packets.append(packet)
+                reader.stop()
+        self.assertEqual(1, len(packets))
+
+    def test_microseconds_big_endian(self):
+        with open(self.path, "wb") as file:
+            file.write(struct.pack(">IHHiIII", 0xa1b2c3d4, 2, 4, 0, 0, 96, 1))
+            file.write(struct.pack(">IIII", 5, 7, len(self.FRAME), 1500))
+            file.write(self.FRAME)
+        with PcapReader(self.path) as reader:
+            record, = reader.records()
+            self.assertEqual(5_000_007_000, record.timestamp_ns)
+            self.assertEqual(1500, record.length)
+            self.assertEqual(self.FRAME, bytes(record.data))
+
+    def test_truncated_file(self):
+        with open(self.path, "r+b") as file:
+            file.truncate(os.path.getsize(self.path) - 5)
+        with self.assertLogs("PcapReader", "WARNING"):
+            with PcapReader(self.path) as reader:
+                self.assertEqual(9, len(list(reader.records())))
+
+    def test_invalid_file(self):
+        for content in (b"", b"not a pcap file at all, just text"):
+            with open(self.path, "wb") as file:
+                file.write(content)
+            with self.assertRaises(ValueError):
+                with PcapReader(self.path):
+                    pass
+
+    def test_not_opened(self):
+        with self.assertRaises(RuntimeError):
+            list(PcapReader(self.path).sniff())
@@ -0,0 +1,119 @@
+import os
+import tempfile
+from unittest import TestCase
+
+from nally.core.pcap.pcap_writer import PcapWriter
+
+
+def _read_pcap(path: str):
+    with open(path, "rb") as file:
+        data = file.read()
+    header = PcapWriter.FILE_HEADER_FORMAT.unpack_from(data)
+    records = []
+    offset = PcapWriter.FILE_HEADER_FORMAT.size
+    while offset < len(data):
+        seconds, nanoseconds, captured_length, length = \
+            PcapWriter.RECORD_HEADER_FORMAT.unpack_from(data, offset)
+        offset += PcapWriter.RECORD_HEADER_FORMAT.size
+        records.append((
+            seconds * 1_000_000_000 + nanoseconds,
+            length,
+            data[offset:offset + captured_length]
+        ))
+        offset += captured_length
+    return header, records
+
+
+class TestPcapWriter(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "capture.pcap")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_write(self):
+        frames = [bytes([i]) * (i + 14) for i in range(100)]
+        for background in (False, True):
+            with PcapWriter(self.path, buffer_size=256,
+                            background=background) as writer:
+                for i, frame in enumerate(frames):
+                    writer.write(frame, 1_600_000_000_123_456_789 + i)
+            header, records = _read_pcap(self.path)
+            self.assertEqual(
+                (0xa1b23c4d, 2, 4, 0, 0, PcapWriter.DEFAULT_SNAPLEN, 1),
+                header
+            )
+            self.assertEqual(
+                [
+                    (1_600_000_000_123_456_789 + i, len(frame), frame)
+                    for i, frame in enumerate(frames)
+                ],
+                records
+            )
+
+    def test_snaplen(self):
+        with PcapWriter(self.path, snaplen=16) as writer:
+            writer.write(b"x" * 100, 0)
+            writer.write(memoryview(b"y" * 10), 0, length=1500)
+        _, records = _read_pcap(self.path)
+        self.assertEqual([(0, 100, b"x" * 16), (0, 1500, b"y" * 10)],
+                         records)
+
+    def test_flush(self):
+        writer = PcapWriter(self.path, background=True)
+        writer.write(b"frame", 0)
+        writer.flush()
+        self.assertEqual([(0, 5, b"frame")], _read_pcap(self.path)[1])
+        writer.close()
+        with self.assertRaises(ValueError):
+            writer.write(b"frame")
+
+    def test_rotation_by_size(self):
+        frame = b"f" * 84
+        record_size = PcapWriter.RECORD_HEADER_FORMAT.size + len(frame)
+        with PcapWriter(self.path, rotate_size_bytes=4 * record_size,
+                        background=True) as writer:
+            for i in range(10):
+                writer.write(frame, i)
+        self.assertEqual(
+            [
+                self.path,
+                os.path.join(self.directory.name, "capture.1.pcap"),
+                os.path.join(self.directory.name, "capture.2.pcap")
+            ],
+            writer.paths
+        )
+        timestamps = [
+            [timestamp for timestamp, _, _ in _read_pcap(path)[1]]
+            for path in writer.paths
+        ]
+        self.assertEqual([[0, 1, 2, 3], [4, 5, 6, 7], [8, 9]], timestamps)
+
+    def test_rotation_by_time(self):
+        with PcapWriter(self.path, rotate_seconds=0) as writer:
+            writer.write(b"a", 0)
+            writer.write(b"b", 1)
+        self.assertEqual(3, len(writer.paths))
+        self.assertEqual([], _read_pcap(writer.paths[0])[1])
+        self.assertEqual([(1, 1, b"b")], _read_pcap(writer.paths[2])[1])
+
+    def test_default_timestamp(self):
+        with PcapWriter(self.path) as writer:
+            writer.write(b"frame")
+        self.assertGreater(_read_pcap(self.path)[1][0][0], 0)
+
+    def test_background_error(self):
+        path = os.path.join(self.directory.name, "missing", "capture.pcap")
+        writer = PcapWriter(path, background=True)
+        # file is opened by the background thread, so the error is raised
+        # by the next call
+        with self.assertRaises(FileNotFoundError):
+            writer.flush()
+        with self.assertRaises(FileNotFoundError):
+            writer.write(b"frame", 0)
+        with self.assertRaises(FileNotFoundError):
+            writer.close()
+        # writer is closed even though it failed
+        writer.close()
@@ -0,0 +1,84 @@
+import os
+import struct
+import tempfile
+from unittest import TestCase
+
+from nally.core.pcap.pcapng_writer import PcapngWriter
+
+
+def _read_blocks(path: str):
+    with open(path, "rb") as file:
+        data = file.read()
+    blocks = []
+    offset = 0
+    while offset < len(data):
+        block_type, block_length = struct.unpack_from("=II", data, offset)
+        trailing_length, = struct.unpack_from(
+            "=I",
+            data,
+            offset + block_length - 4
+        )
+        assert block_length == trailing_length
+        assert block_length % 4 == 0
+        blocks.append((block_type, data[offset:offset + block_length]))
+        offset += block_length
+    return blocks
+
+
+class TestPcapngWriter(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "capture.pcapng")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_write(self):
+        frames = [bytes([i]) * (i + 14) for i in range(20)]
+        timestamp = 1_600_000_000_123_456_789
+        with PcapngWriter(self.path, snaplen=24) as writer:
+            for i, frame in enumerate(frames):
+                writer.write(frame, timestamp + i)
+        blocks = _read_blocks(self.path)
+        self.assertEqual(
+            [0x0a0d0d0a, 0x00000001] + [0x00000006] * len(frames),
+            [block_type for block_type, _ in blocks]
+        )
+        byte_order_magic, major, minor = \
+            struct.unpack_from("=IHH", blocks[0][1], 8)
+        self.assertEqual((0x1a2b3c4d, 1, 0), (byte_order_magic, major, minor))
+        link_type, _, snaplen, option_code, option_length, resolution = \
+            struct.unpack_from("=HHIHHB", blocks[1][1], 8)
+        self.assertEqual((1, 24, 9, 1, 9), (
+            link_type,
+            snaplen,
+            option_code,
+            option_length,
+            resolution
+        ))
+        for i, (frame, (_, block)) in enumerate(zip(frames, blocks[2:])):
+            interface_id, high, low, captured_length, length = \
+                struct.unpack_from("=5I", block, 8)
+            self.assertEqual(0, interface_id)
+            self.assertEqual(timestamp + i, high << 32 | low)
+            self.assertEqual(min(len(frame), 24), captured_length)
+            self.assertEqual(len(frame), length)
+            self.assertEqual(frame[:24], block[28:28 + captured_length])
+
+    def test_rotation(self):
+        with PcapngWriter(self.path, rotate_size_bytes=1,
+                          background=True) as writer:
+            writer.write(b"a" * 60)
+            writer.write(b"b" * 60)
+        self.assertEqual(
+            [
+                self.path,
+                os.path.join(self.directory.name, "capture.1.pcapng"),
+                os.path.join(self.directory.name, "capture.2.pcapng")
+            ],
+            writer.paths
+        )
+        # each file starts with its own section header
+        for path in writer.paths:
+            self.assertEqual(0x0a0d0d0a, _read_blocks(path)[0][0])
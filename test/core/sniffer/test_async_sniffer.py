@@ -0,0 +1,122 @@
+import asyncio
+import platform
+import socket
+import time
+from unittest import TestCase, skipUnless
+
+from nally.core.layers.link.ethernet.ethernet_packet_view \
+    import EthernetPacketView
+from nally.core.layers.transport.udp.udp_packet import UdpPacket
+from nally.core.sniffer.async_sniffer import AsyncSniffer
+from test.core.sniffer.test_rx_ring import _packet_socket
+
+
+def _send(ports):
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sender:
+        for port in ports:
+            sender.sendto(b"sniffer", ("127.0.0.1", port))
+
+
+@skipUnless(platform.system() == "Linux", "AF_PACKET is Linux only")
+class TestAsyncSniffer(TestCase):
+
+    def setUp(self):
+        sniff_socket = _packet_socket()
+        if sniff_socket is None:
+            self.skipTest("AF_PACKET sockets require CAP_NET_RAW")
+        sniff_socket.close()
+
+    @staticmethod
+    def sniffer(**options) -> AsyncSniffer:
+        return AsyncSniffer(
+            if_name="lo",
+            promiscuous_mode=False,
+            bpf_filter="udp and dst host 127.0.0.1",
+            **options
+        )
+
+    def test_asniff_packet_count(self):
+        async def sniff():
+            async with self.sniffer(packet_count=3, timeout=5) as sniffer:
+                _send([7, 9, 11])
+                return [packet[UdpPacket].dest_port
+                        async for packet in sniffer.asniff()]
+
+        # loopback frames are captured twice: as outgoing
+        # and as incoming ones
+        self.assertEqual([7, 7, 9], asyncio.run(sniff()))
+
+    def test_timeout(self):
+        async def sniff():
+            async with self.sniffer(timeout=0.2) as sniffer:
+                return [batch async for batch in sniffer.asniff_batch()]
+
+        started = time.monotonic()
+        self.assertEqual([], asyncio.run(sniff()))
+        self.assertLess(time.monotonic() - started, 2)
+
+    def test_stop(self):
+        async def sniff():
+            async with self.sniffer() as sniffer:
+                asyncio.get_running_loop().call_later(0.2, sniffer.stop)
+                return [packet async for packet in sniffer.asniff()]
+
+        started = time.monotonic()
+        self.assertEqual([], asyncio.run(sniff()))
+        self.assertLess(time.monotonic() - started, 2)
+
+    def test_stop_drain(self):
+        async def sniff():
+            async with self.sniffer(packet_count=3) as sniffer:
+                _send([7, 9])
+                # frames are queued in the socket, since it isn't read yet
+                sniffer.stop(drain=True)
+                return [packet[UdpPacket].dest_port
+                        async for packet in sniffer.asniff()]
+
+        self.assertEqual([7, 7, 9], asyncio.run(sniff()))
+
+    def test_lazy_batches(self):
+        async def sniff():
+            async with self.sniffer(packet_count=4, timeout=5,
+                                    lazy_decoding=True) as sniffer:
+                _send([7, 9])
+                return [batch async for batch in sniffer.asniff_batch()]
+
+        batches = asyncio.run(sniff())
+        packets = [packet for batch in batches for packet in batch]
+        self.assertTrue(all(batches))
+        self.assertTrue(all(isinstance(packet, EthernetPacketView)
+                            for packet in packets))
+        # frames are copied, so packets stay valid after the sniffer exit
+        self.assertEqual([7, 7, 9, 9],
+                         [packet[UdpPacket].dest_port for packet in packets])
+
+    def test_predicate_error(self):
+        def predicate(packet):
+            raise RuntimeError("broken predicate")
+
+        async def sniff():
+            async with self.sniffer(timeout=5,
+                                    predicate_filter=predicate) as sniffer:
+                _send([7])
+                return [packet async for packet in sniffer.asniff()]
+
+        started = time.monotonic()
+        with self.assertRaisesRegex(RuntimeError, "broken predicate"):
+            asyncio.run(sniff())
+        # error is raised once it happens, not when timeout expires
+        self.assertLess(time.monotonic() - started, 2)
+
+    def test_not_entered(self):
+        async def sniff():
+            return [packet async for packet in self.sniffer().asniff()]
+
+        with self.assertRaises(RuntimeError):
+            asyncio.run(sniff())
+
+    def test_queue_size(self):
+        with self.assertRaises(ValueError):
+            self.sniffer(queue_size=16)
+        with self.assertRaises(ValueError):
+            self.sniffer(max_pending_batches=0)
@@ -0,0 +1,101 @@
+import socket
+import time
+from unittest import TestCase
+
+from nally.core.sniffer.batch_receiver import BatchReceiver
+
+
+class TestBatchReceiver(TestCase):
+
+    def setUp(self):
+        self.receiver_socket = socket.socket(
+            socket.AF_INET,
+            socket.SOCK_DGRAM
+        )
+        self.receiver_socket.bind(("127.0.0.1", 0))
+        self.sender_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+
+    def tearDown(self):
+        self.receiver_socket.close()
+        self.sender_socket.close()
+
+    def __send(self, payloads):
+        for payload in payloads:
+            self.sender_socket.sendto(
+                payload,
+                self.receiver_socket.getsockname()
+            )
+
+    def __check_receive(self, receiver: BatchReceiver):
+        self.assertEqual([], receiver.receive(self.receiver_socket))
+        payloads = [bytes([i]) * (i + 1) for i in range(10)]
+        self.__send(payloads)
+        frames = receiver.receive(self.receiver_socket)
+        self.assertEqual(payloads[:8], [bytes(frame) for frame in frames])
+        frames = receiver.receive(self.receiver_socket)
+        self.assertEqual(payloads[8:], [bytes(frame) for frame in frames])
+        self.assertEqual([], receiver.receive(self.receiver_socket))
+        # longer datagrams are truncated
+        self.__send([b"x" * 100])
+        frames = receiver.receive(self.receiver_socket)
+        self.assertEqual([b"x" * 64], [bytes(frame) for frame in frames])
+
+    def test_receive(self):
+        receiver = BatchReceiver(batch_size=8, buffer_size=64)
+        self.__check_receive(receiver)
+
+    def test_receive_into(self):
+        receiver = BatchReceiver(
+            batch_size=8,
+            buffer_size=64,
+            use_recvmmsg=False
+        )
+        self.assertFalse(receiver.uses_recvmmsg)
+        self.__check_receive(receiver)
+
+    def test_receive_timestamps(self):
+        self.receiver_socket.setsockopt(
+            socket.SOL_SOCKET,
+            BatchReceiver.SO_TIMESTAMPNS,
+            1
+        )
+        for use_recvmmsg in (True, False):
+            receiver = BatchReceiver(
+                batch_size=8,
+                buffer_size=64,
+                use_recvmmsg=use_recvmmsg,
+                timestamps=True
+            )
+            sent_at = time.time_ns()
+            self.__send([b"a", b"b", b"c"])
+            frames = receiver.receive(self.receiver_socket)
+            received_at = time.time_ns()
+            self.assertEqual(3, len(frames))
+            self.assertEqual(3, len(receiver.timestamps))
+            for timestamp in receiver.timestamps:
+                self.assertLessEqual(sent_at, timestamp)
+                self.assertLessEqual(timestamp, received_at)
+            self.assertEqual(sorted(receiver.timestamps),
+                             receiver.timestamps)
+
+    def test_receive_lengths(self):
+        for use_recvmmsg in (True, False):
+            receiver = BatchReceiver(
+                batch_size=8,
+                buffer_size=64,
+                use_recvmmsg=use_recvmmsg,
+                lengths=True
+            )
+            self.__send([b"a" * 10, b"b" * 100])
+            frames = receiver.receive(self.receiver_socket)
+            # frames are truncated by the buffer, lengths aren't
+            self.assertEqual(
+                [b"a" * 10, b"b" * 64],
+                [bytes(frame) for frame in frames]
+            )
+            self.assertEqual([10, 100], receiver.lengths)
+            self.assertEqual([], receiver.timestamps)
+
+    def test_invalid_batch_size(self):
+        with self.assertRaises(ValueError):
+            BatchReceiver(batch_size=0, buffer_size=64)
@@ -0,0 +1,60 @@
+import threading
+import time
+from unittest import TestCase
+
+from nally.core.sniffer.bounded_queue import BoundedQueue, DropPolicy
+
+
+class TestBoundedQueue(TestCase):
+
+    def test_drop_newest(self):
+        queue = BoundedQueue(3)
+        self.assertEqual(0, queue.put_batch([1, 2]))
+        self.assertEqual(2, queue.put_batch([3, 4, 5]))
+        self.assertEqual([1, 2, 3], queue.get_batch())
+        self.assertEqual(5, queue.put_count)
+        self.assertEqual(2, queue.dropped_count)
+
+    def test_drop_oldest(self):
+        queue = BoundedQueue(3, DropPolicy.DROP_OLDEST)
+        self.assertEqual(2, queue.put_batch(range(5)))
+        self.assertEqual([2, 3, 4], queue.get_batch())
+        self.assertEqual(2, queue.dropped_count)
+
+    def test_sample(self):
+        queue = BoundedQueue(2, DropPolicy.SAMPLE, sample_interval=3)
+        queue.put_batch(range(2))
+        # every third item is queued while queue is full
+        self.assertEqual(6, queue.put_batch(range(10, 16)))
+        self.assertEqual([12, 15], queue.get_batch())
+        self.assertEqual(6, queue.dropped_count)
+
+    def test_get_batch(self):
+        queue = BoundedQueue(10)
+        queue.put_batch(range(5))
+        self.assertEqual([0, 1], queue.get_batch(max_count=2))
+        self.assertEqual(3, len(queue))
+        self.assertEqual([2, 3, 4], queue.get_batch())
+        started_at = time.monotonic()
+        self.assertEqual([], queue.get_batch(timeout=0.05))
+        self.assertGreaterEqual(time.monotonic() - started_at, 0.05)
+
+    def test_wait_for_items(self):
+        queue = BoundedQueue(10)
+        threading.Timer(0.05, queue.put, args=(1,)).start()
+        self.assertEqual([1], queue.get_batch(timeout=5))
+
+    def test_close(self):
+        queue = BoundedQueue(10)
+        queue.put(1)
+        threading.Timer(0.05, queue.close).start()
+        self.assertEqual([1], queue.get_batch())
+        # closed queue doesn't block
+        self.assertEqual([], queue.get_batch())
+        self.assertTrue(queue.closed)
+        self.assertEqual(0, queue.put(2))
+        self.assertEqual([], queue.get_batch())
+
+    def test_invalid_capacity(self):
+        with self.assertRaises(ValueError):
+            BoundedQueue(0)
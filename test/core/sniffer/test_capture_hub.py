@@ -0,0 +1,136 @@
+import platform
+import socket
+import time
+from unittest import TestCase, skipUnless
+
+from nally.core.layers.transport.udp.udp_packet import UdpPacket
+from nally.core.sniffer.capture_hub import CaptureHub
+from test.core.sniffer.test_rx_ring import _packet_socket
+
+
+def _send(ports):
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sender:
+        for port in ports:
+            sender.sendto(b"sniffer", ("127.0.0.1", port))
+
+
+def _ports(subscription, count: int) -> list:
+    ports = []
+    for _ in range(count):
+        packet = subscription.get(timeout=5)
+        if packet is None:
+            break
+        ports.append(packet[UdpPacket].dest_port)
+    return ports
+
+
+@skipUnless(platform.system() == "Linux", "AF_PACKET is Linux only")
+class TestCaptureHub(TestCase):
+
+    def setUp(self):
+        sniff_socket = _packet_socket()
+        if sniff_socket is None:
+            self.skipTest("AF_PACKET sockets require CAP_NET_RAW")
+        sniff_socket.close()
+
+    @staticmethod
+    def hub(**options) -> CaptureHub:
+        return CaptureHub(
+            if_name="lo",
+            promiscuous_mode=False,
+            bpf_filter="udp and dst host 127.0.0.1",
+            **options
+        )
+
+    def test_routing(self):
+        with self.hub() as hub:
+            bpf_subscription = hub.subscribe(bpf_filter="udp dst port 7")
+            predicate_subscription = hub.subscribe(
+                predicate_filter="udp.dport == 9"
+            )
+            callable_subscription = hub.subscribe(
+                predicate_filter=lambda packet:
+                packet[UdpPacket].dest_port != 7
+            )
+            _send([7, 9, 11])
+            # loopback frames are captured twice: as outgoing
+            # and as incoming ones
+            self.assertEqual([7, 7], _ports(bpf_subscription, 2))
+            self.assertEqual([9, 9], _ports(predicate_subscription, 2))
+            self.assertEqual([9, 9, 11, 11], _ports(callable_subscription, 4))
+            self.assertIsNone(bpf_subscription.get(timeout=0.2))
+            self.assertIsNone(predicate_subscription.get(timeout=0))
+            stats = hub.stats()
+        self.assertEqual(6, stats.filtered_count)
+        # packet delivered to several subscribers is counted once
+        self.assertEqual(6, stats.matched_count)
+
+    def test_unsubscribe(self):
+        with self.hub() as hub:
+            subscription = hub.subscribe(bpf_filter="udp dst port 7")
+            other_subscription = hub.subscribe(bpf_filter="udp dst port 7")
+            _send([7])
+            self.assertEqual([7, 7], _ports(other_subscription, 2))
+            subscription.close()
+            # queued packets are still available, then the stream ends
+            self.assertEqual(
+                [7, 7],
+                [packet[UdpPacket].dest_port
+                 for packet in subscription.packets()]
+            )
+            # repeated unsubscribe is ignored
+            hub.unsubscribe(subscription)
+            _send([7])
+            self.assertEqual([7, 7], _ports(other_subscription, 2))
+            self.assertEqual(2, subscription.delivered_count)
+            self.assertIsNone(subscription.get(timeout=0))
+
+    def test_dropped_count(self):
+        with self.hub() as hub:
+            subscription = hub.subscribe(
+                bpf_filter="udp dst port 7",
+                max_queue_size=1
+            )
+            _send([7, 7, 7])
+            deadline = time.monotonic() + 5
+            while subscription.delivered_count < 6 \
+                    and time.monotonic() < deadline:
+                time.sleep(0.01)
+            self.assertEqual(6, subscription.delivered_count)
+            self.assertEqual(5, subscription.dropped_count)
+            self.assertEqual([7], _ports(subscription, 1))
+            self.assertIsNone(subscription.get(timeout=0))
+
+    def test_shutdown(self):
+        with self.hub() as hub:
+            subscription = hub.subscribe(bpf_filter="udp dst port 7")
+            _send([7])
+            while subscription.delivered_count < 2:
+                time.sleep(0.01)
+        # stream ends after the hub exit, queued packets are kept
+        self.assertEqual(
+            [7, 7],
+            [packet[UdpPacket].dest_port for packet in subscription.packets()]
+        )
+        self.assertIsNone(subscription.get())
+
+    def test_sniffer_timeout(self):
+        started = time.monotonic()
+        with self.hub(timeout=0.2) as hub:
+            subscription = hub.subscribe()
+            # stream ends when the sniffer is terminated by itself
+            self.assertEqual([], list(subscription.packets()))
+            self.assertIsNone(subscription.error)
+        self.assertLess(time.monotonic() - started, 2)
+
+    def test_capture_error(self):
+        def predicate(packet):
+            raise RuntimeError("broken predicate")
+
+        with self.assertRaisesRegex(RuntimeError, "broken predicate"):
+            with self.hub(timeout=5, predicate_filter=predicate) as hub:
+                subscription = hub.subscribe()
+                _send([7])
+                # stream ended by the failure is told from the empty one
+                self.assertEqual([], list(subscription.packets()))
+                self.assertIsInstance(subscription.error, RuntimeError)
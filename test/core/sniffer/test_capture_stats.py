@@ -0,0 +1,33 @@
+from unittest import TestCase
+
+from nally.core.sniffer.capture_stats import CaptureCounters
+
+
+class TestCaptureCounters(TestCase):
+
+    def test_snapshot(self):
+        counters = CaptureCounters()
+        counters.started_at -= 2
+        counters.received_count = 10
+        counters.received_bytes = 1000
+        counters.kernel_dropped_count = 3
+        stats = counters.snapshot()
+        self.assertEqual(10, stats.received_count)
+        self.assertEqual(3, stats.kernel_dropped_count)
+        self.assertGreaterEqual(stats.interval_seconds, 2)
+        self.assertAlmostEqual(5, stats.packets_per_second, delta=0.1)
+        self.assertAlmostEqual(500, stats.bytes_per_second, delta=10)
+
+    def test_snapshot_since(self):
+        counters = CaptureCounters()
+        counters.received_count = 10
+        counters.received_bytes = 1000
+        previous = counters.snapshot()
+        previous = previous._replace(timestamp=previous.timestamp - 1)
+        counters.received_count = 30
+        counters.received_bytes = 1500
+        stats = counters.snapshot(previous)
+        # counters are cumulative, rates are computed over the interval
+        self.assertEqual(30, stats.received_count)
+        self.assertAlmostEqual(20, stats.packets_per_second, delta=0.5)
+        self.assertAlmostEqual(500, stats.bytes_per_second, delta=10)
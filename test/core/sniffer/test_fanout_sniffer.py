@@ -0,0 +1,109 @@
+import os
+import platform
+import socket
+import threading
+import time
+from unittest import TestCase, skipUnless
+
+from nally.core.layers.transport.udp.udp_packet import UdpPacket
+from nally.core.sniffer.fanout_sniffer import FanoutSniffer
+from nally.core.sniffer.sniffer import Sniffer
+from test.core.sniffer.test_rx_ring import _packet_socket
+
+PORTS = list(range(7000, 7008))
+
+
+def _dest_ports(packets):
+    for packet in packets:
+        yield packet[UdpPacket].dest_port
+
+
+def _worker_pid(packets):
+    for _ in packets:
+        pass
+    yield os.getpid()
+
+
+def _failing_worker(packets):
+    raise ValueError("worker failure")
+    yield  # makes the function a generator
+
+
+@skipUnless(platform.system() == "Linux", "PACKET_FANOUT is Linux only")
+class TestFanoutSniffer(TestCase):
+
+    def setUp(self):
+        sniff_socket = _packet_socket()
+        if sniff_socket is None:
+            self.skipTest("AF_PACKET sockets require CAP_NET_RAW")
+        sniff_socket.close()
+
+    @staticmethod
+    def sniffer(worker, **options) -> FanoutSniffer:
+        return FanoutSniffer(
+            worker,
+            worker_count=2,
+            if_name="lo",
+            promiscuous_mode=False,
+            bpf_filter="udp dst portrange 7000-7007 and dst host 127.0.0.1",
+            **options
+        )
+
+    @staticmethod
+    def send(ports):
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sender:
+            for port in ports:
+                sender.sendto(b"sniffer", ("127.0.0.1", port))
+
+    def test_merged_results(self):
+        with self.sniffer(_dest_ports, timeout=1) as sniffer:
+            self.send(PORTS)
+            ports = sorted(sniffer.sniff())
+        # loopback frames are captured twice: as outgoing
+        # and as incoming ones
+        self.assertEqual(sorted(PORTS * 2), ports)
+
+    def test_concurrent_sniffers(self):
+        # each sniffer has its own group, so both receive all frames,
+        # even though their fanout modes differ
+        with self.sniffer(_dest_ports, timeout=1) as sniffer, \
+                self.sniffer(_dest_ports, timeout=1,
+                             fanout_mode=Sniffer.PACKET_FANOUT_LB) \
+                as other_sniffer:
+            self.send(PORTS)
+            ports = sorted(sniffer.sniff())
+            other_ports = sorted(other_sniffer.sniff())
+        self.assertEqual(sorted(PORTS * 2), ports)
+        self.assertEqual(sorted(PORTS * 2), other_ports)
+
+    def test_workers(self):
+        with self.sniffer(_worker_pid, timeout=0.5) as sniffer:
+            pids = list(sniffer.sniff())
+        self.assertEqual(2, len(set(pids)))
+        self.assertNotIn(os.getpid(), pids)
+
+    def test_worker_error(self):
+        # a worker may fail before the others joined the group, in which
+        # case the error is raised on enter instead of from sniff()
+        with self.assertRaisesRegex(RuntimeError, "worker failure"):
+            with self.sniffer(_failing_worker, timeout=5) as sniffer:
+                list(sniffer.sniff())
+
+    def test_stop(self):
+        with self.sniffer(_dest_ports) as sniffer:
+            self.send(PORTS)
+            threading.Timer(0.5, sniffer.stop, kwargs={"drain": True}) \
+                .start()
+            started = time.monotonic()
+            ports = sorted(sniffer.sniff())
+            self.assertLess(time.monotonic() - started, 3)
+        self.assertEqual(sorted(PORTS * 2), ports)
+
+    def test_stop_after_packet_count(self):
+        # workers stop by themselves, so stop doesn't fail
+        with self.sniffer(_dest_ports, packet_count=1, timeout=5) \
+                as sniffer:
+            self.send(PORTS)
+            # each worker which received frames yields a single port
+            self.assertIn(len(list(sniffer.sniff())), (1, 2))
+            sniffer.stop()
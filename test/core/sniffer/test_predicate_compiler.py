@@ -0,0 +1,113 @@
+from unittest import TestCase
+
+from nally.core.sniffer.predicate_compiler import PredicateCompiler
+from test.core.layers.link.ethernet.test_ethernet_packet import \
+    ARP_PAYLOAD_TEST_CONTEXT
+from test.core.layers.link.ethernet.test_ethernet_packet_view \
+    import _tcp_frame, _udp_frame
+
+
+def _arp_frame() -> bytes:
+    return bytes.fromhex(
+        ARP_PAYLOAD_TEST_CONTEXT["ETHERNET_HEADER"]
+        + ARP_PAYLOAD_TEST_CONTEXT["ARP_PAYLOAD"]
+    )
+
+
+class TestPredicateCompiler(TestCase):
+
+    TCP_FRAME = _tcp_frame()
+    UDP_FRAME = _udp_frame()
+    ARP_FRAME = _arp_frame()
+
+    def assert_matches(self, expression: str, *frames: bytes):
+        predicate = PredicateCompiler.compile(expression)
+        for frame in frames:
+            self.assertTrue(predicate(frame), expression)
+            self.assertTrue(predicate(memoryview(frame)), expression)
+
+    def assert_not_matches(self, expression: str, *frames: bytes):
+        predicate = PredicateCompiler.compile(expression)
+        for frame in frames:
+            self.assertFalse(predicate(frame), expression)
+
+    def test_transport_fields(self):
+        self.assert_matches("tcp.sport == 443", self.TCP_FRAME)
+        self.assert_matches("tcp.dport in {80, 55978}", self.TCP_FRAME)
+        self.assert_matches("tcp.flags & 0x10", self.TCP_FRAME)
+        self.assert_matches("udp.dport == 39237", self.UDP_FRAME)
+        self.assert_matches("1024 < udp.dport <= 39237", self.UDP_FRAME)
+        self.assert_not_matches("tcp.flags & 0x02", self.TCP_FRAME)
+        # frames without the layer don't satisfy the comparison
+        self.assert_not_matches("tcp.sport == 443", self.UDP_FRAME)
+        self.assert_not_matches("udp.sport != 0", self.TCP_FRAME)
+        self.assert_not_matches("tcp.dport not in {80}", self.ARP_FRAME)
+        self.assert_matches("not tcp.sport == 443", self.UDP_FRAME)
+
+    def test_ip_fields(self):
+        self.assert_matches("ip.ttl < 64 and tcp", self.TCP_FRAME)
+        self.assert_matches("ip.src == '3.123.217.208'", self.TCP_FRAME)
+        self.assert_matches(
+            "ip.dst in ('10.10.128.44', '192.168.1.32')",
+            self.TCP_FRAME,
+            self.UDP_FRAME
+        )
+        self.assert_matches("ip.proto == 17 and ip.ihl == 5", self.UDP_FRAME)
+        self.assert_matches("ip.src != ip.dst", self.TCP_FRAME)
+        self.assert_not_matches("ip.ttl < 64", self.UDP_FRAME, self.ARP_FRAME)
+        self.assert_not_matches("ip", self.ARP_FRAME)
+
+    def test_link_fields(self):
+        self.assert_matches("eth.type == 0x0806 and arp", self.ARP_FRAME)
+        self.assert_matches("eth.dst == 'ff:ff:ff:ff:ff:ff'", self.ARP_FRAME)
+        self.assert_matches(
+            "arp.op == 1 and arp.tpa == '10.10.152.144'",
+            self.ARP_FRAME
+        )
+        self.assert_matches(
+            "arp.sha == '52:54:00:eb:a2:58' or udp",
+            self.ARP_FRAME,
+            self.UDP_FRAME
+        )
+        self.assert_not_matches("arp", self.TCP_FRAME)
+
+    def test_truncated_frame(self):
+        self.assert_not_matches("tcp.dport == 55978", self.TCP_FRAME[:36])
+        self.assert_not_matches("ip.ttl > 0", self.TCP_FRAME[:14])
+
+    def test_fragment(self):
+        frame = bytearray(self.UDP_FRAME)
+        frame[20] |= 0x01
+        self.assert_matches("ip.frag_offset == 256", bytes(frame))
+        self.assert_not_matches("udp", bytes(frame))
+
+    def test_invalid_expression(self):
+        for expression in (
+                "tcp.dport ==",
+                "tcp.port == 80",
+                "sctp.dport == 80",
+                "ip.src == '10.0.0'",
+                "eth.src == 'ff:ff'",
+                "tcp.dport == '80'",
+                "tcp.dport in {80, tcp.sport}",
+                "tcp.dport is 80",
+                "tcp.dport + 1 == 80",
+                "print(1)",
+        ):
+            with self.assertRaises(ValueError, msg=expression):
+                PredicateCompiler.compile(expression)
+
+    def test_from_filter(self):
+        packet_predicate, raw_predicate = \
+            PredicateCompiler.from_filter("tcp.sport == 443")
+        self.assertIsNone(packet_predicate)
+        self.assertTrue(raw_predicate(self.TCP_FRAME))
+        self.assertFalse(raw_predicate(self.UDP_FRAME))
+
+        def predicate(packet):
+            return True
+
+        self.assertEqual(
+            (predicate, None), PredicateCompiler.from_filter(predicate)
+        )
+        self.assertEqual((None, None), PredicateCompiler.from_filter(None))
@@ -0,0 +1,67 @@
+import platform
+import select
+import socket
+import time
+from unittest import TestCase, skipUnless
+
+from nally.core.layers.link.ethernet.ethernet_packet_view \
+    import EthernetPacketView
+from nally.core.layers.transport.udp.udp_packet import UdpPacket
+from nally.core.sniffer.rx_ring import RxRing
+
+ETH_P_ALL = 3
+
+
+def _packet_socket():
+    try:
+        return socket.socket(socket.AF_PACKET, socket.SOCK_RAW, 0)
+    except (AttributeError, PermissionError):
+        return None
+
+
+@skipUnless(platform.system() == "Linux", "PACKET_MMAP is Linux only")
+class TestRxRing(TestCase):
+
+    def setUp(self):
+        self.sniff_socket = _packet_socket()
+        if self.sniff_socket is None:
+            self.skipTest("AF_PACKET sockets require CAP_NET_RAW")
+
+    def tearDown(self):
+        self.sniff_socket.close()
+
+    def test_loopback_capture(self):
+        ring = RxRing(
+            self.sniff_socket,
+            block_size=1 << 16,
+            block_count=4,
+            block_timeout_ms=10
+        )
+        try:
+            self.sniff_socket.bind(("lo", ETH_P_ALL))
+            with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sender:
+                payloads = [f"rx ring {i}".encode() for i in range(100)]
+                for payload in payloads:
+                    sender.sendto(payload, ("127.0.0.1", 9))
+                received = []
+                deadline = time.monotonic() + 5
+                # loopback frames are captured twice: as outgoing
+                # and as incoming ones
+                while len(received) < 2 * len(payloads) \
+                        and time.monotonic() < deadline:
+                    select.select([self.sniff_socket], [], [], 0.1)
+                    for frame in ring.frames():
+                        packet = EthernetPacketView.from_bytes(frame)
+                        if UdpPacket in packet \
+                                and packet[UdpPacket].dest_port == 9:
+                            received.append(
+                                packet[UdpPacket].upper_layer.to_bytes()
+                            )
+                        del packet, frame
+            self.assertEqual(payloads, list(dict.fromkeys(received)))
+        finally:
+            ring.close()
+
+    def test_invalid_block_size(self):
+        with self.assertRaises(ValueError):
+            RxRing(self.sniff_socket, block_size=1000)
@@ -0,0 +1,126 @@
+import multiprocessing
+import subprocess
+import sys
+from multiprocessing import shared_memory
+from unittest import TestCase
+
+from nally.core.sniffer.shared_frame_ring import SharedFrameRing
+
+
+def _consume(name: str, expected_count: int, results):
+    with SharedFrameRing.attach(name) as ring:
+        reader = ring.reader(from_oldest=True)
+        frames = []
+        for frame in reader.frames(timeout=5):
+            frames.append(bytes(frame.data))
+            del frame
+            if len(frames) == expected_count:
+                break
+        del reader
+    results.put(frames)
+
+
+class TestSharedFrameRing(TestCase):
+
+    def test_write_read(self):
+        with SharedFrameRing.create(slot_count=4, slot_size=8) as ring:
+            reader = ring.reader()
+            self.assertIsNone(reader.read())
+            ring.write(b"first", timestamp_ns=1_500_000_000)
+            ring.write(b"second frame", timestamp_ns=2_500_000_000)
+            # frame truncated during capturing keeps its original length
+            ring.write(memoryview(b"third")[:3], 3, length=1500)
+
+            frame = reader.read()
+            self.assertEqual(
+                (0, 1_500_000_000, 5, b"first"),
+                (frame.sequence, frame.timestamp_ns, frame.length,
+                 bytes(frame.data))
+            )
+            self.assertTrue(reader.is_valid(frame))
+            # frame is truncated to the slot size
+            frame = reader.read()
+            self.assertEqual(
+                (1, 12, b"second f"),
+                (frame.sequence, frame.length, bytes(frame.data))
+            )
+            frame = reader.read()
+            self.assertEqual(
+                (2, 3, 1500, b"thi"),
+                (frame.sequence, frame.timestamp_ns, frame.length,
+                 bytes(frame.data))
+            )
+            self.assertIsNone(reader.read())
+            self.assertEqual(0, reader.lost_count)
+            del frame
+
+    def test_overrun(self):
+        with SharedFrameRing.create(slot_count=4, slot_size=8) as ring:
+            reader = ring.reader()
+            ring.write(b"0")
+            frame = reader.read()
+            for i in range(1, 10):
+                ring.write(str(i).encode())
+            # slot was overwritten
+            self.assertFalse(reader.is_valid(frame))
+            # only 4 latest frames are available
+            frames = [bytes(frame.data) for frame in reader.frames(timeout=0)]
+            self.assertEqual([b"6", b"7", b"8", b"9"], frames)
+            self.assertEqual(5, reader.lost_count)
+            # late reader starts from the oldest available frame
+            late_reader = ring.reader(from_oldest=True)
+            self.assertEqual(6, late_reader.read().sequence)
+            del frame, late_reader
+
+    def test_multiple_processes(self):
+        payloads = [bytes([i]) * (i + 1) for i in range(64)]
+        with SharedFrameRing.create(slot_count=128, slot_size=64) as ring:
+            results = multiprocessing.Queue()
+            consumers = [
+                multiprocessing.Process(
+                    target=_consume,
+                    args=(ring.name, len(payloads), results)
+                )
+                for _ in range(2)
+            ]
+            for payload in payloads:
+                ring.write(payload)
+            for consumer in consumers:
+                consumer.start()
+            # every consumer receives every frame
+            for _ in consumers:
+                self.assertEqual(payloads, results.get(timeout=10))
+            for consumer in consumers:
+                consumer.join()
+
+    def test_attach_from_another_interpreter(self):
+        with SharedFrameRing.create(slot_count=4, slot_size=8) as ring:
+            ring.write(b"frame")
+            consumer = subprocess.run(
+                [sys.executable, "-c",
+                 "import sys\n"
+                 "from nally.core.sniffer.shared_frame_ring "
+                 "import SharedFrameRing\n"
+                 "with SharedFrameRing.attach(sys.argv[1]) as ring:\n"
+                 "    reader = ring.reader(from_oldest=True)\n"
+                 "    print(bytes(reader.read().data).decode())\n"
+                 "    del reader\n",
+                 ring.name],
+                capture_output=True, text=True, timeout=30
+            )
+            self.assertEqual("frame\n", consumer.stdout, consumer.stderr)
+            self.assertEqual("", consumer.stderr)
+            # memory isn't unlinked when the consumer exits
+            with SharedFrameRing.attach(ring.name) as attached_ring:
+                reader = attached_ring.reader(from_oldest=True)
+                self.assertEqual(b"frame", bytes(reader.read().data))
+                del reader
+
+    def test_attach_invalid_memory(self):
+        memory = shared_memory.SharedMemory(create=True, size=64)
+        try:
+            with self.assertRaises(ValueError):
+                SharedFrameRing.attach(memory.name)
+        finally:
+            memory.close()
+            memory.unlink()
@@ -0,0 +1,278 @@
+import os
+import platform
+import socket
+import tempfile
+import threading
+import time
+from unittest import TestCase, skipUnless
+
+from nally.core.layers.transport.udp.udp_packet import UdpPacket
+from nally.core.pcap.pcap_reader import PcapReader
+from nally.core.pcap.pcap_writer import PcapWriter
+from nally.core.sniffer.sniffer import Sniffer
+from test.core.sniffer.test_rx_ring import _packet_socket
+
+
+class _UserSpaceFilterSniffer(Sniffer):
+    """
+    Sniffer which applies BPF filter in user space, as if it couldn't be
+    attached to the socket
+    """
+
+    def _attach_filter(self):
+        self._kernel_filter = False
+
+
+@skipUnless(platform.system() == "Linux", "AF_PACKET is Linux only")
+class TestSniffer(TestCase):
+
+    def setUp(self):
+        sniff_socket = _packet_socket()
+        if sniff_socket is None:
+            self.skipTest("AF_PACKET sockets require CAP_NET_RAW")
+        sniff_socket.close()
+
+    def sniff(self, ports, **options) -> list:
+        with Sniffer(if_name="lo", promiscuous_mode=False, timeout=5,
+                     **options) as sniffer:
+            with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sender:
+                for port in ports:
+                    sender.sendto(b"sniffer", ("127.0.0.1", port))
+            return [packet[UdpPacket].dest_port for packet in sniffer.sniff()]
+
+    def test_bpf_filter(self):
+        # loopback frames are captured twice: as outgoing
+        # and as incoming ones
+        self.assertEqual(
+            [9, 9, 9, 9],
+            self.sniff(
+                [7, 9, 7, 9],
+                bpf_filter="udp dst port 9 and host 127.0.0.1",
+                packet_count=4
+            )
+        )
+
+    def test_field_predicate(self):
+        self.assertEqual(
+            [9, 9],
+            self.sniff(
+                [7, 9],
+                predicate_filter="udp.dport == 9 and ip.dst == '127.0.0.1'",
+                packet_count=2
+            )
+        )
+
+    def test_user_space_filter_with_writer(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "capture.pcap")
+            with PcapWriter(path) as writer:
+                with _UserSpaceFilterSniffer(
+                        if_name="lo",
+                        promiscuous_mode=False,
+                        timeout=5,
+                        bpf_filter="udp dst port 9 and host 127.0.0.1",
+                        packet_count=2,
+                        writer=writer
+                ) as sniffer:
+                    bpf_filter = sniffer._compiled_filter.filter
+                    filtered_frames = []
+
+                    def count_filtered(frame):
+                        filtered_frames.append(frame)
+                        return bpf_filter(frame)
+
+                    sniffer._compiled_filter.filter = count_filtered
+                    with socket.socket(socket.AF_INET,
+                                       socket.SOCK_DGRAM) as sender:
+                        sender.sendto(b"sniffer", ("127.0.0.1", 7))
+                        sender.sendto(b"sniffer", ("127.0.0.1", 9))
+                    ports = [packet[UdpPacket].dest_port
+                             for packet in sniffer.sniff()]
+                    stats = sniffer.stats()
+            with PcapReader(path) as reader:
+                written_ports = [packet[UdpPacket].dest_port
+                                 for packet in reader.sniff()]
+        self.assertEqual([9, 9], ports)
+        self.assertEqual([9, 9], written_ports)
+        # each received frame is checked by the filter once
+        self.assertEqual(stats.received_count, len(filtered_frames))
+        self.assertEqual(2, stats.filtered_count)
+
+    def test_snaplen_with_writer(self):
+        # frames are truncated either by the attached filter or,
+        # if filter is applied in user space, by the receive buffer
+        for sniffer_type in (Sniffer, _UserSpaceFilterSniffer):
+            with tempfile.TemporaryDirectory() as directory:
+                path = os.path.join(directory, "capture.pcap")
+                with PcapWriter(path) as writer:
+                    with sniffer_type(
+                            if_name="lo",
+                            promiscuous_mode=False,
+                            timeout=5,
+                            bpf_filter="udp dst port 9 and host 127.0.0.1",
+                            packet_count=2,
+                            snaplen=42,
+                            writer=writer
+                    ) as sniffer:
+                        with socket.socket(socket.AF_INET,
+                                           socket.SOCK_DGRAM) as sender:
+                            sender.sendto(b"sniffer", ("127.0.0.1", 9))
+                        list(sniffer.sniff())
+                with PcapReader(path) as reader:
+                    records = [(record.length, len(record.data))
+                               for record in reader.records()]
+            # Ethernet, IP and UDP headers are captured, payload isn't
+            self.assertEqual([(49, 42), (49, 42)], records,
+                             sniffer_type.__name__)
+
+    def test_sniff_records(self):
+        # metadata is available with and without the receive ring
+        # and when frames pass through the pipeline queue
+        for options in ({}, {"mmap_ring": True}, {"queue_size": 16}):
+            with Sniffer(if_name="lo", promiscuous_mode=False, timeout=5,
+                         bpf_filter="udp dst port 9 and host 127.0.0.1",
+                         packet_count=2, snaplen=42, **options) as sniffer:
+                sent_at = time.time_ns()
+                with socket.socket(socket.AF_INET,
+                                   socket.SOCK_DGRAM) as sender:
+                    sender.sendto(b"sniffer", ("127.0.0.1", 9))
+                records = [
+                    (record.timestamp_ns, record.length, len(record.data))
+                    for batch in sniffer.sniff_records()
+                    for record in batch
+                ]
+            self.assertEqual([(49, 42), (49, 42)],
+                             [record[1:] for record in records], options)
+            for timestamp_ns, _, _ in records:
+                self.assertLessEqual(sent_at, timestamp_ns)
+                self.assertLessEqual(timestamp_ns, time.time_ns())
+
+    def test_writer_error_on_exit(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "capture.pcap")
+            with PcapWriter(path) as writer:
+                def flush():
+                    raise OSError("disk is full")
+
+                writer.flush = flush
+                sniffer = Sniffer(if_name="lo", promiscuous_mode=False,
+                                  writer=writer)
+                with self.assertRaisesRegex(OSError, "disk is full"):
+                    with sniffer:
+                        pass
+                del writer.flush
+        # kernel resources are released despite the writer error
+        self.assertIsNone(sniffer._sniff_socket)
+        self.assertIsNone(sniffer._selector)
+        self.assertIsNone(sniffer._wakeup)
+
+    def test_stop_wakes_sniffer(self):
+        with Sniffer(if_name="lo", promiscuous_mode=False,
+                     bpf_filter="udp and dst host 127.0.0.1") as sniffer:
+            stopper = threading.Timer(0.2, sniffer.stop)
+            started = time.monotonic()
+            stopper.start()
+            # sniffer has no timeout, so it waits until it's stopped
+            self.assertEqual([], list(sniffer.sniff()))
+            stopper.join()
+        self.assertLess(time.monotonic() - started, 2)
+
+    def test_stop_drain(self):
+        for packet_count, expected_ports in ((3, [7, 7, 9]),
+                                             (None, [7, 7, 9, 9])):
+            with Sniffer(if_name="lo", promiscuous_mode=False,
+                         bpf_filter="udp and dst host 127.0.0.1",
+                         packet_count=packet_count) as sniffer:
+                with socket.socket(socket.AF_INET,
+                                   socket.SOCK_DGRAM) as sender:
+                    sender.sendto(b"sniffer", ("127.0.0.1", 7))
+                    sender.sendto(b"sniffer", ("127.0.0.1", 9))
+                # frames are queued in the socket, since it isn't read yet
+                sniffer.stop(drain=True)
+                self.assertEqual(
+                    expected_ports,
+                    [packet[UdpPacket].dest_port
+                     for packet in sniffer.sniff()]
+                )
+
+    def test_pipeline_packet_count(self):
+        with Sniffer(if_name="lo", promiscuous_mode=False, timeout=5,
+                     bpf_filter="udp and dst host 127.0.0.1",
+                     packet_count=2, queue_size=16) as sniffer:
+            with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sender:
+                # sniffer isn't terminated when packet count is reached,
+                # so it can be used again
+                for port in (7, 9):
+                    sender.sendto(b"sniffer", ("127.0.0.1", port))
+                    self.assertEqual(
+                        [port, port],
+                        [packet[UdpPacket].dest_port
+                         for packet in sniffer.sniff()]
+                    )
+            sniffer.stop()
+            self.assertEqual([], list(sniffer.sniff()))
+
+    def test_pipeline_stop(self):
+        with Sniffer(if_name="lo", promiscuous_mode=False,
+                     bpf_filter="udp and dst host 127.0.0.1",
+                     queue_size=16) as sniffer:
+            stopper = threading.Timer(0.2, sniffer.stop)
+            started = time.monotonic()
+            stopper.start()
+            self.assertEqual([], list(sniffer.sniff()))
+            stopper.join()
+        self.assertLess(time.monotonic() - started, 2)
+
+    def test_pipeline_stop_drain(self):
+        with Sniffer(if_name="lo", promiscuous_mode=False,
+                     bpf_filter="udp and dst host 127.0.0.1",
+                     packet_count=3, queue_size=16) as sniffer:
+            with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sender:
+                sender.sendto(b"sniffer", ("127.0.0.1", 7))
+                sender.sendto(b"sniffer", ("127.0.0.1", 9))
+            sniffer.stop(drain=True)
+            self.assertEqual(
+                [7, 7, 9],
+                [packet[UdpPacket].dest_port for packet in sniffer.sniff()]
+            )
+
+    def test_pipeline_shed_count(self):
+        with Sniffer(if_name="lo", promiscuous_mode=False,
+                     bpf_filter="udp and dst host 127.0.0.1",
+                     batch_size=16, queue_size=1) as sniffer:
+            with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sender:
+                for port in (7, 9, 11, 13):
+                    sender.sendto(b"sniffer", ("127.0.0.1", port))
+            sniffer.stop(drain=True)
+            packets = list(sniffer.sniff())
+            stats = sniffer.stats()
+        # frames of the single received batch don't fit the queue
+        self.assertGreater(stats.shed_count, 0)
+        self.assertEqual(8, len(packets) + stats.shed_count)
+
+    def test_pipeline_capture_error(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "capture.pcap")
+            with PcapWriter(path) as writer:
+                def write(*args):
+                    raise OSError("disk is full")
+
+                writer.write = write
+                with Sniffer(if_name="lo", promiscuous_mode=False,
+                             timeout=5,
+                             bpf_filter="udp and dst host 127.0.0.1",
+                             writer=writer, queue_size=16) as sniffer:
+                    with socket.socket(socket.AF_INET,
+                                       socket.SOCK_DGRAM) as sender:
+                        sender.sendto(b"sniffer", ("127.0.0.1", 7))
+                    started = time.monotonic()
+                    # frames are written by the capture thread, its error
+                    # is raised by the consumer instead of ending the stream
+                    with self.assertRaisesRegex(OSError, "disk is full"):
+                        list(sniffer.sniff())
+                    self.assertLess(time.monotonic() - started, 2)
+                del writer.write
+
+    def test_invalid_bpf_filter(self):
+        with self.assertRaises(ValueError):
+            Sniffer(if_name="lo", bpf_filter="udp port")
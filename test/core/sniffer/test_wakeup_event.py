@@ -0,0 +1,34 @@
+import selectors
+import threading
+import time
+from unittest import TestCase
+
+from nally.core.sniffer.wakeup_event import WakeupEvent
+
+
+class TestWakeupEvent(TestCase):
+
+    def setUp(self):
+        self.event = WakeupEvent()
+        self.selector = selectors.DefaultSelector()
+        self.selector.register(self.event, selectors.EVENT_READ)
+
+    def tearDown(self):
+        self.selector.close()
+        self.event.close()
+
+    def test_set_and_clear(self):
+        self.assertEqual([], self.selector.select(0))
+        self.event.set()
+        self.event.set()
+        self.assertEqual(1, len(self.selector.select(0)))
+        self.event.clear()
+        self.assertEqual([], self.selector.select(0))
+        # clearing non-set event doesn't block
+        self.event.clear()
+
+    def test_wakes_up_select(self):
+        threading.Timer(0.05, self.event.set).start()
+        started_at = time.monotonic()
+        self.assertEqual(1, len(self.selector.select(5)))
+        self.assertLess(time.monotonic() - started_at, 1)
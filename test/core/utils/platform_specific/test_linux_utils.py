@@ -0,0 +1,41 @@
+import platform
+import socket
+from unittest import TestCase, skipUnless
+
+from nally.core.utils.platform_specific.linux_utils import LinuxUtils
+
+BPF_RET_K = 0x06
+BPF_LD_B_ABS = 0x30
+BPF_JEQ_K = 0x15
+UDP_HEADER_LENGTH_BYTES = 8
+
+
+@skipUnless(platform.system() == "Linux", "SO_ATTACH_FILTER is Linux only")
+class TestLinuxUtils(TestCase):
+
+    def test_attach_bpf_filter(self):
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as receiver, \
+                socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sender:
+            # accept only datagrams which payload starts with 'y',
+            # for UDP socket filter is applied to the datagram
+            # starting from UDP header
+            LinuxUtils.attach_bpf_filter(receiver, [
+                (BPF_LD_B_ABS, 0, 0, UDP_HEADER_LENGTH_BYTES),
+                (BPF_JEQ_K, 0, 1, ord("y")),
+                (BPF_RET_K, 0, 0, -1),
+                (BPF_RET_K, 0, 0, 0),
+            ])
+            receiver.bind(("127.0.0.1", 0))
+            receiver.settimeout(1)
+            for payload in (b"no", b"yes", b"nope", b"y"):
+                sender.sendto(payload, receiver.getsockname())
+            self.assertEqual(b"yes", receiver.recv(16))
+            self.assertEqual(b"y", receiver.recv(16))
+
+    def test_get_net_interface_mtu(self):
+        self.assertGreater(LinuxUtils.get_net_interface_mtu("lo"), 0)
+        with self.assertRaises(OSError):
+            LinuxUtils.get_net_interface_mtu("nonexistent0")
+
+    def test_is_gro_enabled(self):
+        self.assertIsInstance(LinuxUtils.is_gro_enabled("lo"), bool)
@@ -0,0 +1,82 @@
+import random
+from unittest import TestCase
+
+from nally.core.utils.checksum_utils import ChecksumUtils
+
+#
+# IPv4 header with zero checksum, expected checksum = 0xb8b4
+#
+IP_HEADER = "450000342b8e40002f060000037bd9d00a0a802c"
+IP_HEADER_CHECKSUM = "b8b4"
+
+
+def _reference_checksum(data: bytes) -> bytes:
+    """
+    Straightforward implementation of RFC 1071 used to verify results
+    """
+    if len(data) % 2:
+        data += b"\0"
+    checksum = 0
+    for i in range(0, len(data), 2):
+        checksum += (data[i] << 8) + data[i + 1]
+    while checksum >> 16:
+        checksum = (checksum & 0xffff) + (checksum >> 16)
+    return (~checksum & 0xffff).to_bytes(2, byteorder="big")
+
+
+class TestChecksumUtils(TestCase):
+
+    def test_calc_checksum(self):
+        self.assertEqual(
+            IP_HEADER_CHECKSUM,
+            ChecksumUtils.calc_checksum(bytes.fromhex(IP_HEADER)).hex()
+        )
+        self.assertEqual(b"\xff\xff", ChecksumUtils.calc_checksum(bytes(8)))
+        self.assertEqual(b"\xff\xff", ChecksumUtils.calc_checksum(b""))
+        self.assertEqual(
+            b"\x00\x00",
+            ChecksumUtils.calc_checksum(b"\xff\xff\xff\xff")
+        )
+
+    def test_calc_checksum_random_data(self):
+        rnd = random.Random(42)
+        for length in range(1, 200):
+            data = bytes(rnd.getrandbits(8) for _ in range(length))
+            self.assertEqual(
+                _reference_checksum(data),
+                ChecksumUtils.calc_checksum(data)
+            )
+
+    def test_calc_checksum_scatter_gather(self):
+        rnd = random.Random(42)
+        for _ in range(100):
+            parts = [
+                bytes(rnd.getrandbits(8) for _ in range(rnd.randint(0, 9)))
+                for _ in range(rnd.randint(1, 5))
+            ]
+            self.assertEqual(
+                _reference_checksum(b"".join(parts)),
+                ChecksumUtils.calc_checksum(
+                    *[memoryview(part) for part in parts]
+                )
+            )
+
+    def test_calc_checksums(self):
+        rnd = random.Random(42)
+        for length in (0, 1, 20, 41):
+            buffers = [
+                bytes(rnd.getrandbits(8) for _ in range(length))
+                for _ in range(10)
+            ]
+            buffers.append(bytes(length))
+            buffers.append(b"\xff" * length)
+            self.assertEqual(
+                [_reference_checksum(buffer) for buffer in buffers],
+                ChecksumUtils.calc_checksums(buffers)
+            )
+        self.assertEqual([], ChecksumUtils.calc_checksums([]))
+        self.assertRaises(
+            ValueError,
+            ChecksumUtils.calc_checksums,
+            [b"ab", b"abc"]
+        )
@@ -0,0 +1,21 @@
+from unittest import TestCase
+
+from nally.core.layers.inet.ip.ip_diff_service_values \
+    import IpDiffServiceValues, IP_DIFF_SERVICE_VALUES
+from nally.core.layers.link.proto_type import EtherType, ETHER_TYPES
+from nally.core.utils.enum_table import EnumTable
+
+
+class TestEnumTable(TestCase):
+
+    def test_lookup(self):
+        self.assertIs(EtherType.ARP, ETHER_TYPES[0x0806])
+        self.assertIs(IpDiffServiceValues.EF, IP_DIFF_SERVICE_VALUES[46])
+        self.assertEqual(len(EtherType), len(ETHER_TYPES))
+        self.assertIs(EtherType, EnumTable(EtherType).enum_type)
+
+    def test_unknown_value(self):
+        for value in (1, 0x0801):
+            with self.assertRaises(ValueError):
+                ETHER_TYPES[value]
+        self.assertNotIn(0x0801, ETHER_TYPES)